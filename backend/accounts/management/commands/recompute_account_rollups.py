@@ -0,0 +1,44 @@
+"""
+Recompute the stored rollup columns on every account (accounts/rollups.py).
+
+``won_amount``, ``open_pipeline``, ``open_tickets`` and the counts beside them
+are recomputed whenever a deal or ticket is saved or deleted. Writes that skip
+``save()`` (``QuerySet.update()``, ``bulk_create``, raw SQL, a restore) can
+leave them stale; this puts them right.
+
+Usage:
+    python manage.py recompute_account_rollups
+    python manage.py recompute_account_rollups --batch-size 5000
+
+Walks the accounts in primary-key order and rewrites each batch with one
+``UPDATE``. Safe to re-run. It reads every org's rows, so run it as the role
+migrations run as, not the RLS-restricted one.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import Account
+from accounts.rollups import recompute
+from cases.models import Case
+from opportunity.models import Opportunity
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored deal and ticket rollups on every account"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Accounts written per UPDATE (default 1000)",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        written = recompute(
+            Account, Opportunity, Case, batch_size=options["batch_size"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Recomputed {written} accounts"))
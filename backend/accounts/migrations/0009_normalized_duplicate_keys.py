@@ -0,0 +1,52 @@
+# Normalized duplicate-detection keys for Account (common/duplicate_detection.py).
+#
+# Adds the column(s), indexes them with the org, and fills them for existing
+# rows. New and saved rows are filled by NormalizedField.pre_save. The backfill
+# streams the table and writes in batches, so it is the same job as
+# `manage.py backfill_normalized_fields`, which can also be run again later.
+# Reversing drops the columns, so there is nothing for the backfill to undo.
+
+from django.db import migrations, models
+
+import common.duplicate_detection
+from common.duplicate_detection import backfill_normalized_fields
+
+
+def backfill(apps, schema_editor):
+    backfill_normalized_fields(apps.get_model("accounts", "Account"))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0008_account_is_sample"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="account",
+            name="phone_normalized",
+            field=common.duplicate_detection.NormalizedField(
+                blank=True, default="", kind="phone", max_length=25, source="phone"
+            ),
+        ),
+        migrations.AddField(
+            model_name="account",
+            name="website_domain",
+            field=common.duplicate_detection.NormalizedField(
+                blank=True, default="", kind="domain", max_length=255, source="website"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="account",
+            index=models.Index(
+                fields=["org", "phone_normalized"], name="accounts_org_id_af261f_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="account",
+            index=models.Index(
+                fields=["org", "website_domain"], name="accounts_org_id_86ce9e_idx"
+            ),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
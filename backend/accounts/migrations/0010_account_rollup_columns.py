@@ -0,0 +1,86 @@
+# Stored rollup columns on Account (accounts/rollups.py).
+#
+# Adds the won / open-pipeline / open-ticket totals the account page used to
+# annotate on every request, indexes the three the list sorts by with the org,
+# and fills them for existing accounts. Saves and deletes of deals and tickets
+# keep them current from here on. The backfill is the same job as
+# `manage.py recompute_account_rollups`, which can also be run again later.
+# Reversing drops the columns, so there is nothing for the backfill to undo.
+
+from django.conf import settings
+from django.db import migrations, models
+
+from accounts.rollups import recompute
+
+
+def backfill(apps, schema_editor):
+    recompute(
+        apps.get_model("accounts", "Account"),
+        apps.get_model("opportunity", "Opportunity"),
+        apps.get_model("cases", "Case"),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0009_normalized_duplicate_keys"),
+        ("common", "0043_partition_activity_notification"),
+        ("contacts", "0014_normalized_duplicate_keys"),
+        ("cases", "0031_escalationscanrun"),
+        ("opportunity", "0015_drop_orphan_deal_pipeline_tables"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="account",
+            name="first_won_on",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="account",
+            name="open_deal_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="account",
+            name="open_pipeline",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=15),
+        ),
+        migrations.AddField(
+            model_name="account",
+            name="open_tickets",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="account",
+            name="won_amount",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=15),
+        ),
+        migrations.AddField(
+            model_name="account",
+            name="won_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="account",
+            index=models.Index(
+                fields=["org", "-won_amount", "-id"], name="accounts_org_id_4bf4ab_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="account",
+            index=models.Index(
+                fields=["org", "-open_pipeline", "-id"],
+                name="accounts_org_id_af1b35_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="account",
+            index=models.Index(
+                fields=["org", "-open_tickets", "-id"],
+                name="accounts_org_id_b7ebb8_idx",
+            ),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -5,6 +5,7 @@ from django.db.models.functions import Lower
 from django.utils.translation import gettext_lazy as _
 
 from common.base import SAMPLE_DATA_HELP_TEXT, AssignableMixin, BaseModel
+from common.duplicate_detection import NormalizedField
 from common.models import Org, Profile, Tags, Teams
 from common.utils import COUNTRIES, CURRENCY_CODES, INDCHOICES
 from common.validators import flexible_phone_validator
@@ -32,6 +33,10 @@ class Account(AssignableMixin, BaseModel):
         validators=[flexible_phone_validator],
     )
     website = models.URLField(_("Website"), blank=True, null=True)
+    # `phone` and `website` as DuplicateDetector compares them, kept current
+    # on save.
+    phone_normalized = NormalizedField(max_length=25, source="phone", kind="phone")
+    website_domain = NormalizedField(source="website", kind="domain")
 
     # Business Information
     industry = models.CharField(
@@ -75,6 +80,16 @@ class Account(AssignableMixin, BaseModel):
         help_text="Per-org schema extension; values are validated against common.CustomFieldDefinition.",
     )
 
+    # Rollups over the account's deals and tickets, recomputed by
+    # `accounts.rollups.refresh` whenever one of those is saved or deleted.
+    # Never written from a form or serializer; see accounts/rollups.py.
+    won_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    won_count = models.PositiveIntegerField(default=0)
+    open_pipeline = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    open_deal_count = models.PositiveIntegerField(default=0)
+    open_tickets = models.PositiveIntegerField(default=0)
+    first_won_on = models.DateField(blank=True, null=True)
+
     # System Fields
     is_active = models.BooleanField(default=True)
     is_sample = models.BooleanField(default=False, help_text=SAMPLE_DATA_HELP_TEXT)
@@ -93,6 +108,12 @@ class Account(AssignableMixin, BaseModel):
             models.Index(fields=["name"]),
             models.Index(fields=["industry"]),
             models.Index(fields=["org", "-created_at"]),
+            models.Index(fields=["org", "phone_normalized"]),
+            models.Index(fields=["org", "website_domain"]),
+            # The account list's rollup sorts, `-id` being its tiebreak.
+            models.Index(fields=["org", "-won_amount", "-id"]),
+            models.Index(fields=["org", "-open_pipeline", "-id"]),
+            models.Index(fields=["org", "-open_tickets", "-id"]),
         ]
         constraints = [
             # Case-insensitive unique account name per organization
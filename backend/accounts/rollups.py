@@ -0,0 +1,173 @@
+"""The money and counts an account carries: stored, and how they stay right.
+
+Six of the figures on the account page are columns on ``Account``:
+
+* ``won_amount`` / ``won_count``: deals won. Booked revenue, not cash
+  collected; the invoices tell that story.
+* ``open_pipeline`` / ``open_deal_count``: deals still in play.
+* ``open_tickets``: cases not in a terminal status.
+* ``first_won_on``: the close date of the first deal won, the day this
+  company stopped being a prospect.
+
+They used to be correlated subqueries annotated onto every row of the list
+and the detail page: six aggregates per account, per request, and nothing a
+list could sort or filter on without computing them for the whole org
+first. Stored, "accounts by revenue" is an index scan.
+
+A stored total is a total that can be wrong, so none of them is ever adjusted
+in place. ``refresh`` recomputes an account's figures from its rows, with the
+same subqueries the annotations used, in one ``UPDATE``; the save and delete
+signals in ``accounts/signals.py`` call it for the account a deal or ticket
+belonged to before and after the write. Adding "+amount" on save would be
+cheaper and wrong the first time two saves race or a write skips the signal.
+Writes that do skip it (``QuerySet.update()``, ``bulk_create``, raw SQL) are
+what ``manage.py recompute_account_rollups`` is for; it calls ``recompute``,
+as the migration that added the columns did.
+
+``overdue_amount`` is not stored. It turns on ``due_date < today``, so it
+changes at midnight with no write to hang a refresh on; it stays an
+annotation (``accounts.views.annotate_rollups``).
+"""
+
+from __future__ import annotations
+
+from decimal import Decimal
+
+from django.db.models import (
+    Count,
+    DateField,
+    DecimalField,
+    IntegerField,
+    Min,
+    OuterRef,
+    Subquery,
+    Sum,
+)
+from django.db.models.functions import Coalesce
+
+from accounts.models import Account
+from cases.models import Case
+from cases.workflow import TERMINAL_STATUSES
+from common.utils import STATUS_CHOICE
+from opportunity.models import STAGES, Opportunity
+from opportunity.workflow import CLOSED_STAGES
+
+# What the account page prints, in the order it prints it. `overdue_amount`
+# is the one that is annotated rather than stored; see the module docstring.
+ROLLUP_FIELDS = (
+    "won_amount",
+    "won_count",
+    "open_pipeline",
+    "open_deal_count",
+    "overdue_amount",
+    "open_tickets",
+    "first_won_on",
+)
+
+STORED_ROLLUP_FIELDS = tuple(f for f in ROLLUP_FIELDS if f != "overdue_amount")
+
+# Both derived from the definitions the deal and ticket modules already use, so
+# "open pipeline" here means what /opportunities means by it and "open tickets"
+# means what /tickets means by it. Spelling either list out again by hand is how
+# two pages end up disagreeing about the same account.
+OPEN_STAGES = [stage for stage, _label in STAGES if stage not in CLOSED_STAGES]
+OPEN_CASE_STATUSES = [
+    value for value, _label in STATUS_CHOICE if value not in TERMINAL_STATUSES
+]
+
+MONEY = DecimalField(max_digits=15, decimal_places=2)
+
+
+def per_account(model, aggregate, output_field, **filters):
+    """One aggregate over one account's related rows, as a correlated subquery.
+
+    Not `.annotate(Sum(...), Count(...))` on the outer queryset: two aggregates
+    over two different relations join both tables at once, so every deal is
+    counted once per invoice and every total comes back multiplied. Each
+    aggregate therefore gets its own subquery, and the joins never meet.
+
+    `.values("account").annotate(...)` groups inside the subquery so it yields
+    at most one row. When an account has no matching rows it yields *none*, and
+    an empty subquery is NULL rather than zero, which is why every caller
+    wraps this in a `Coalesce`. Zero and "no invoices at all" look identical to
+    a reader of the page, and should.
+    """
+    return Subquery(
+        model.objects.filter(account=OuterRef("pk"), **filters)
+        .values("account")
+        .annotate(value=aggregate)
+        .values("value")[:1],
+        output_field=output_field,
+    )
+
+
+def stored_rollups(opportunity_model, case_model):
+    """``STORED_ROLLUP_FIELDS`` as expressions over an account's rows.
+
+    Takes the model classes rather than importing them, so a migration can
+    pass its historical models.
+    """
+    zero = Decimal("0")
+    won = {"stage": "CLOSED_WON"}
+    unclosed = {"stage__in": OPEN_STAGES}
+    return {
+        "won_amount": Coalesce(
+            per_account(opportunity_model, Sum("amount"), MONEY, **won), zero
+        ),
+        "won_count": Coalesce(
+            per_account(opportunity_model, Count("id"), IntegerField(), **won), 0
+        ),
+        "open_pipeline": Coalesce(
+            per_account(opportunity_model, Sum("amount"), MONEY, **unclosed), zero
+        ),
+        "open_deal_count": Coalesce(
+            per_account(opportunity_model, Count("id"), IntegerField(), **unclosed),
+            0,
+        ),
+        "open_tickets": Coalesce(
+            per_account(
+                case_model, Count("id"), IntegerField(), status__in=OPEN_CASE_STATUSES
+            ),
+            0,
+        ),
+        # No contract or subscription model to ask, so this is derived from
+        # what the CRM actually knows rather than entered by hand.
+        "first_won_on": per_account(
+            opportunity_model, Min("closed_on"), DateField(), **won
+        ),
+    }
+
+
+def recompute(account_model, opportunity_model, case_model, batch_size=1000):
+    """Recompute the stored rollups of every account; return accounts written.
+
+    Walks the accounts in primary-key order and writes each batch with one
+    ``UPDATE``. Takes the model classes, like ``stored_rollups``.
+    """
+    expressions = stored_rollups(opportunity_model, case_model)
+    manager = account_model._base_manager
+    ids = manager.order_by("pk").values_list("pk", flat=True)
+
+    written, batch = 0, []
+    for account_id in ids.iterator(chunk_size=batch_size):
+        batch.append(account_id)
+        if len(batch) >= batch_size:
+            written += manager.filter(pk__in=batch).update(**expressions)
+            batch = []
+    if batch:
+        written += manager.filter(pk__in=batch).update(**expressions)
+    return written
+
+
+def refresh(account_ids):
+    """Recompute the stored rollups of these accounts, in one ``UPDATE``.
+
+    ``None`` entries (a deal or ticket with no account) are skipped. Does not
+    touch ``updated_at``: a deal moving is not an edit to the account.
+    """
+    account_ids = {pk for pk in account_ids if pk is not None}
+    if not account_ids:
+        return 0
+    return Account._base_manager.filter(pk__in=account_ids).update(
+        **stored_rollups(Opportunity, Case)
+    )
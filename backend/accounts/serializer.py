@@ -41,14 +41,15 @@ class AccountSerializer(serializers.ModelSerializer):
     def get_rollups(self, obj):
         """What this account is worth, owes and is complaining about.
 
-        Computed by `accounts.views.annotate_rollups`, which is applied on the
-        list and detail endpoints. It is deliberately absent, `null`, rather
-        than zero-filled anywhere else: a page that was never given the numbers
-        should say nothing, not quietly claim every total is zero.
+        Stored on the account (`accounts/rollups.py`) except `overdue_amount`,
+        which `accounts.views.annotate_rollups` adds on the list and detail
+        endpoints. It is deliberately absent, `null`, rather than half-filled
+        anywhere else: a page that was never given the numbers should say
+        nothing, not quietly claim nothing is overdue.
         """
-        from accounts.views import ROLLUP_FIELDS
+        from accounts.rollups import ROLLUP_FIELDS
 
-        if not hasattr(obj, ROLLUP_FIELDS[0]):
+        if not hasattr(obj, "overdue_amount"):
             return None
         return {field: getattr(obj, field) for field in ROLLUP_FIELDS}
 
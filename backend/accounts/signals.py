@@ -0,0 +1,61 @@
+"""
+Keep the stored account rollups current (accounts/rollups.py).
+
+A deal or ticket remembers, when it is loaded, the fields the rollups read.
+On save, if any of them moved (or the row is new), the account it belonged to
+before and the one it belongs to now are recomputed; on delete, the one it
+belonged to. A save that only edits a description costs nothing.
+
+Writes that send no signal (``QuerySet.update()``, ``bulk_create``) are not
+seen here; the code paths that do that to a rollup input call
+``rollups.refresh`` themselves, and ``manage.py recompute_account_rollups``
+catches up anything else.
+"""
+
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from accounts import rollups
+from cases.models import Case
+from opportunity.models import Opportunity
+
+# The columns each model's rollups are computed from.
+ROLLUP_INPUTS = {
+    Opportunity: ("account_id", "stage", "amount", "closed_on"),
+    Case: ("account_id", "status"),
+}
+
+# Stands in for a column that was deferred when the row was loaded: its old
+# value is unknown, so a save always counts as a change to it.
+_UNKNOWN = object()
+
+
+def _inputs(instance):
+    # `__dict__`, not `getattr`: reading a deferred field would fetch it.
+    return tuple(
+        instance.__dict__.get(field, _UNKNOWN)
+        for field in ROLLUP_INPUTS[type(instance)]
+    )
+
+
+@receiver(post_init, sender=Opportunity)
+@receiver(post_init, sender=Case)
+def remember_rollup_inputs(sender, instance, **kwargs):
+    instance._rollup_inputs = _inputs(instance)
+
+
+@receiver(post_save, sender=Opportunity)
+@receiver(post_save, sender=Case)
+def refresh_account_rollups_on_save(sender, instance, created, **kwargs):
+    before = instance._rollup_inputs
+    after = _inputs(instance)
+    if created or before != after:
+        old_account = before[0] if before[0] is not _UNKNOWN else None
+        rollups.refresh([old_account, instance.account_id])
+    instance._rollup_inputs = after
+
+
+@receiver(post_delete, sender=Opportunity)
+@receiver(post_delete, sender=Case)
+def refresh_account_rollups_on_delete(sender, instance, **kwargs):
+    rollups.refresh([instance.account_id])
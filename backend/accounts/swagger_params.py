@@ -7,10 +7,26 @@ The ``org`` header parameter that used to lead every list here is gone; see
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter
 
+from common.swagger_params import list_page_params
+
 organization_params = []
 
 account_get_params = [
     OpenApiParameter("name", OpenApiTypes.STR, OpenApiParameter.QUERY),
     OpenApiParameter("city", OpenApiTypes.STR, OpenApiParameter.QUERY),
     OpenApiParameter("tags", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter("won_amount__gte", OpenApiTypes.NUMBER, OpenApiParameter.QUERY),
+    OpenApiParameter("open_pipeline__gte", OpenApiTypes.NUMBER, OpenApiParameter.QUERY),
+    OpenApiParameter("open_tickets__gte", OpenApiTypes.NUMBER, OpenApiParameter.QUERY),
+    OpenApiParameter(
+        "ordering",
+        OpenApiTypes.STR,
+        OpenApiParameter.QUERY,
+        enum=[
+            f"{sign}{field}"
+            for field in ("created_at", "won_amount", "open_pipeline", "open_tickets")
+            for sign in ("-", "")
+        ],
+    ),
+    *list_page_params,
 ]
@@ -0,0 +1,139 @@
+"""Tests for the stored account rollups (accounts/rollups.py, accounts/signals.py).
+
+What has to hold: a deal or ticket moving between accounts, changing stage or
+status, or being deleted leaves both accounts it touched with the numbers a
+recount would give; a save that changes none of the inputs writes nothing to
+the account; the reconcile command repairs a write no signal saw; and the
+account list sorts and filters on the columns.
+"""
+
+import datetime
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import Account
+from cases.models import Case
+from opportunity.models import Opportunity
+
+
+def _deal(account, amount, stage="PROPOSAL", **extra):
+    return Opportunity.objects.create(
+        name=f"{stage} {amount}",
+        org=account.org,
+        account=account,
+        stage=stage,
+        amount=Decimal(amount),
+        **extra,
+    )
+
+
+def _ticket(account, status="New"):
+    return Case.objects.create(
+        name=f"Ticket {status}",
+        org=account.org,
+        account=account,
+        status=status,
+        priority="Normal",
+        case_type="Question",
+    )
+
+
+def _stored(account):
+    account.refresh_from_db()
+    return (account.won_amount, account.open_pipeline, account.open_tickets)
+
+
+@pytest.fixture
+def north(org_a):
+    return Account.objects.create(name="Northwind Traders", org=org_a)
+
+
+@pytest.fixture
+def south(org_a):
+    return Account.objects.create(name="Southwind Freight", org=org_a)
+
+
+@pytest.mark.django_db
+class TestSignals:
+    def test_winning_a_deal_moves_it_out_of_the_pipeline(self, north):
+        deal = _deal(north, "400")
+        assert _stored(north) == (Decimal("0"), Decimal("400"), 0)
+        deal.stage = "CLOSED_WON"
+        deal.closed_on = datetime.date(2026, 5, 4)
+        deal.save()
+        assert _stored(north) == (Decimal("400"), Decimal("0"), 0)
+        assert (north.won_count, north.first_won_on) == (1, datetime.date(2026, 5, 4))
+
+    def test_moving_a_deal_refreshes_both_accounts(self, north, south):
+        deal = _deal(north, "250")
+        deal = Opportunity.objects.get(pk=deal.pk)
+        deal.account = south
+        deal.save()
+        assert _stored(north) == (Decimal("0"), Decimal("0"), 0)
+        assert _stored(south) == (Decimal("0"), Decimal("250"), 0)
+
+    def test_tickets_count_until_closed_or_deleted(self, north):
+        ticket = _ticket(north)
+        other = _ticket(north, status="Assigned")
+        assert _stored(north)[2] == 2
+        ticket.status = "Closed"
+        ticket.save()
+        assert _stored(north)[2] == 1
+        other.delete()
+        assert _stored(north)[2] == 0
+
+    def test_an_unrelated_edit_leaves_the_account_alone(self, north):
+        deal = Opportunity.objects.get(pk=_deal(north, "100").pk)
+        deal.description = "Called back."
+        with CaptureQueriesContext(connection) as ctx:
+            deal.save()
+        assert not [q for q in ctx.captured_queries if 'UPDATE "accounts"' in q["sql"]]
+
+    def test_the_command_repairs_a_write_no_signal_saw(self, north, capsys):
+        deal = _deal(north, "900")
+        Opportunity.objects.filter(pk=deal.pk).update(stage="CLOSED_LOST")
+        assert _stored(north)[1] == Decimal("900")
+        call_command("recompute_account_rollups")
+        assert "Recomputed" in capsys.readouterr().out
+        assert _stored(north)[1] == Decimal("0")
+
+
+@pytest.mark.django_db
+class TestAccountList:
+    URL = "/api/accounts/"
+
+    def _names(self, client, query):
+        body = client.get(f"{self.URL}?{query}").json()
+        return [a["name"] for a in body["active_accounts"]["open_accounts"]]
+
+    def test_sorts_by_revenue(self, admin_client, north, south):
+        # Newest first would put Southwind first.
+        _deal(north, "300", stage="CLOSED_WON", closed_on=datetime.date(2026, 1, 1))
+        _deal(south, "100", stage="CLOSED_WON", closed_on=datetime.date(2026, 1, 1))
+        assert self._names(admin_client, "ordering=-won_amount") == [
+            "Northwind Traders",
+            "Southwind Freight",
+        ]
+        body = admin_client.get(f"{self.URL}?ordering=-won_amount&limit=1").json()
+        # Only the default order pages by cursor.
+        assert body["active_accounts"]["next_cursor"] is None
+        assert body["active_accounts"]["offset"] == 1
+
+    def test_filters_on_thresholds(self, admin_client, north, south):
+        _deal(north, "50")
+        _deal(south, "500")
+        _ticket(north)
+        _ticket(north)
+        _ticket(north)
+        assert self._names(admin_client, "open_pipeline__gte=100") == [
+            "Southwind Freight"
+        ]
+        assert self._names(admin_client, "open_tickets__gte=2.5") == [
+            "Northwind Traders"
+        ]
+        response = admin_client.get(f"{self.URL}?won_amount__gte=lots")
+        assert response.status_code == 400
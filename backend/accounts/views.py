@@ -1,32 +1,23 @@
 import json
+import math
 from decimal import Decimal
 
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError as DjangoValidationError
-from django.db.models import (
-    Count,
-    DateField,
-    DecimalField,
-    IntegerField,
-    Min,
-    OuterRef,
-    Q,
-    Subquery,
-    Sum,
-)
+from django.db.models import Q, Sum
 from django.db.models.functions import Coalesce
 from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from drf_spectacular.utils import extend_schema
 from rest_framework import status
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from accounts import access, swagger_params
 from accounts.models import Account
+from accounts.rollups import MONEY, per_account
 from accounts.serializer import (
     AccountCommentEditSwaggerSerializer,
     AccountCreateSerializer,
@@ -38,9 +29,8 @@ from accounts.serializer import (
     TagsSerializer,
 )
 from accounts.tasks import send_email, send_email_to_assigned_user
-from cases.models import Case
 from cases.serializer import CaseSerializer
-from cases.workflow import TERMINAL_STATUSES
+from common.custom_fields import apply_list_params as apply_custom_field_params
 from common.custom_fields import validate_payload as validate_custom_fields_payload
 from common.lookups import get_scoped_or_404
 from common.models import (
@@ -51,6 +41,7 @@ from common.models import (
     Tags,
     Teams,
 )
+from common.pagination import ListPagination
 from common.permissions import HasOrgContext, is_org_admin
 from common.serializer import (
     AttachmentsSerializer,
@@ -70,7 +61,12 @@ from common.utils import (
     get_or_create_tags,
     handle_m2m_assignment,
 )
-from common.validators import date_param, payload_id_list, uuid_list_param
+from common.validators import (
+    date_param,
+    decimal_param,
+    payload_id_list,
+    uuid_list_param,
+)
 from contacts.models import Contact
 from contacts.serializer import ContactSerializer
 from invoices.models import UNPAID_STATUSES, Invoice
@@ -79,121 +75,62 @@ from leads.models import Lead
 from leads.serializer import LeadSerializer
 from opportunity.models import SOURCES, STAGES, Opportunity
 from opportunity.serializer import OpportunitySerializer
-from opportunity.workflow import CLOSED_STAGES
 from tasks.serializer import TaskSerializer
 
-# Money and counts the account page shows about an account: what it has been
-# worth, what is still in play, what it owes, and what is on fire.
-#
-# These are annotations, never stored columns. A stored total is a total that
-# can be wrong. It goes stale the moment a deal moves or an invoice is paid,
-# and then the header disagrees with the very rows printed underneath it.
-ROLLUP_FIELDS = (
-    "won_amount",
-    "won_count",
-    "open_pipeline",
-    "open_deal_count",
-    "overdue_amount",
-    "open_tickets",
-    "first_won_on",
-)
-
-
-def _per_account(model, aggregate, output_field, **filters):
-    """One aggregate over one account's related rows, as a correlated subquery.
-
-    Not `.annotate(Sum(...), Count(...))` on the outer queryset: two aggregates
-    over two different relations join both tables at once, so every deal is
-    counted once per invoice and every total comes back multiplied. Each
-    aggregate therefore gets its own subquery, and the joins never meet.
-
-    `.values("account").annotate(...)` groups inside the subquery so it yields
-    at most one row. When an account has no matching rows it yields *none*, and
-    an empty subquery is NULL rather than zero, which is why every caller
-    wraps this in a `Coalesce`. Zero and "no invoices at all" look identical to
-    a reader of the page, and should.
-    """
-    return Subquery(
-        model.objects.filter(account=OuterRef("pk"), **filters)
-        .values("account")
-        .annotate(value=aggregate)
-        .values("value")[:1],
-        output_field=output_field,
-    )
-
-
-# Both derived from the definitions the deal and ticket modules already use, so
-# "open pipeline" here means what /opportunities means by it and "open tickets"
-# means what /tickets means by it. Spelling either list out again by hand is how
-# two pages end up disagreeing about the same account.
-OPEN_STAGES = [stage for stage, _label in STAGES if stage not in CLOSED_STAGES]
-OPEN_CASE_STATUSES = [
-    value for value, _label in STATUS_CHOICE if value not in TERMINAL_STATUSES
-]
-
-MONEY = DecimalField(max_digits=15, decimal_places=2)
-
 
 def annotate_rollups(queryset):
-    """Attach `ROLLUP_FIELDS` to an Account queryset.
+    """Attach `overdue_amount` to an Account queryset.
 
-    Used by both the list and the detail endpoint, so a number cannot change
-    meaning depending on which page you read it from.
+    The other rollups are columns (see `accounts/rollups.py`). This one turns
+    on today's date, so it cannot be stored; used by both the list and the
+    detail endpoint, so it cannot change meaning depending on which page you
+    read it from.
     """
-    zero = Decimal("0")
-    won = {"stage": "CLOSED_WON"}
-    unclosed = {"stage__in": OPEN_STAGES}
     past_due = {
         "status__in": UNPAID_STATUSES,
         "due_date__lt": timezone.localdate(),
         "amount_due__gt": 0,
     }
-
     return queryset.annotate(
-        # Booked revenue: deals actually won. Not cash collected; the invoices
-        # tell that story and are counted separately below.
-        won_amount=Coalesce(
-            _per_account(Opportunity, Sum("amount"), MONEY, **won), zero
-        ),
-        won_count=Coalesce(
-            _per_account(Opportunity, Count("id"), IntegerField(), **won), 0
-        ),
-        open_pipeline=Coalesce(
-            _per_account(Opportunity, Sum("amount"), MONEY, **unclosed), zero
-        ),
-        open_deal_count=Coalesce(
-            _per_account(Opportunity, Count("id"), IntegerField(), **unclosed), 0
-        ),
         # Past due and still owed. The due date is the fact; the "Overdue"
         # status is a nightly task's opinion about that fact, and can be a day
         # behind it. See UNPAID_STATUSES.
         overdue_amount=Coalesce(
-            _per_account(Invoice, Sum("amount_due"), MONEY, **past_due), zero
-        ),
-        open_tickets=Coalesce(
-            _per_account(
-                Case, Count("id"), IntegerField(), status__in=OPEN_CASE_STATUSES
-            ),
-            0,
+            per_account(Invoice, Sum("amount_due"), MONEY, **past_due),
+            Decimal("0"),
         ),
-        # The day this company stopped being a prospect: the close date of the
-        # first deal won against them. There is no contract or subscription
-        # model to ask, so this is derived from what the CRM actually knows
-        # rather than presented as a stored fact.
-        first_won_on=_per_account(Opportunity, Min("closed_on"), DateField(), **won),
     )
 
 
-class AccountsListView(APIView, LimitOffsetPagination):
+# `?ordering=` on the account list: the stored rollups and the default.
+# Whitelisted so callers cannot sort on arbitrary columns; `-id` is always the
+# tiebreak, which the `(org, -<rollup>, -id)` indexes carry.
+_ALLOWED_ACCOUNT_ORDERINGS = frozenset(
+    {
+        "-created_at",
+        "created_at",
+        "-won_amount",
+        "won_amount",
+        "-open_pipeline",
+        "open_pipeline",
+        "-open_tickets",
+        "open_tickets",
+    }
+)
+
+
+class AccountsListView(APIView, ListPagination):
     permission_classes = (IsAuthenticated, HasOrgContext)
     model = Account
     serializer_class = AccountSerializer
 
     def get_context_data(self, **kwargs):
         params = self.request.query_params
+        # Newest first, `-id` breaking ties. `-id` alone, a random UUID, was
+        # no order at all; this is also the order cursor pages follow.
         queryset = annotate_rollups(
             self.model.objects.filter(org=self.request.profile.org)
-        ).order_by("-id")
+        ).order_by("-created_at", "-id")
         if not is_org_admin(self.request.profile):
             queryset = queryset.filter(
                 Q(created_by=self.request.profile.user)
@@ -221,14 +158,26 @@ class AccountsListView(APIView, LimitOffsetPagination):
             created_at_lte = date_param(params, "created_at__lte")
             if created_at_lte:
                 queryset = queryset.filter(created_at__lte=created_at_lte)
-            # Custom-field filters: ?cf_<key>=<value> -> custom_fields contains pair.
-            for raw_key, raw_value in params.items():
-                if raw_key.startswith("cf_") and raw_value:
-                    cf_key = raw_key[3:]
-                    if cf_key:
-                        queryset = queryset.filter(
-                            custom_fields__contains={cf_key: raw_value}
-                        )
+            # Thresholds on the stored rollups: "accounts worth at least X".
+            for field in ("won_amount", "open_pipeline"):
+                minimum = decimal_param(params, f"{field}__gte")
+                if minimum is not None:
+                    queryset = queryset.filter(**{f"{field}__gte": minimum})
+            open_tickets = decimal_param(params, "open_tickets__gte")
+            if open_tickets is not None:
+                # A count: "at least 2.5 tickets" is at least 3.
+                queryset = queryset.filter(
+                    open_tickets__gte=math.ceil(Decimal(open_tickets))
+                )
+            # Custom-field filters and sorts: ?cf_<key>=, ?ordering=cf_<key>.
+            queryset = apply_custom_field_params(
+                queryset, "Account", params, self.request.profile.org
+            )
+            # Ordering: whitelisted; anything but the default pages by offset
+            # (common/pagination.py).
+            ordering = params.get("ordering")
+            if ordering in _ALLOWED_ACCOUNT_ORDERINGS:
+                queryset = queryset.order_by(ordering, "-id")
 
         context = {}
 
@@ -238,22 +187,14 @@ class AccountsListView(APIView, LimitOffsetPagination):
         results_accounts_active = self.paginate_queryset(
             queryset_active.distinct(), self.request, view=self
         )
-        if results_accounts_active:
-            offset = queryset_active.filter(
-                id__gte=results_accounts_active[-1].id
-            ).count()
-            if offset == queryset_active.count():
-                offset = None
-        else:
-            offset = 0
         accounts_active = AccountSerializer(results_accounts_active, many=True).data
-        context["per_page"] = 10
-        page_number = int(self.offset / 10) + 1
-        context["page_number"] = page_number
+        context["per_page"] = self.limit
+        context["page_number"] = self.page_number()
         context["active_accounts"] = {
-            "offset": offset,
+            "offset": self.next_offset,
+            "next_cursor": self.next_cursor,
             "open_accounts": accounts_active,
-            "open_accounts_count": queryset_active.count(),
+            "open_accounts_count": self.count,
         }
 
         # Inactive accounts
@@ -261,14 +202,11 @@ class AccountsListView(APIView, LimitOffsetPagination):
         results_accounts_inactive = self.paginate_queryset(
             queryset_inactive.distinct(), self.request, view=self
         )
-        if results_accounts_inactive:
-            offset = queryset_inactive.filter(
-                id__gte=results_accounts_inactive[-1].id
-            ).count()
-            if offset == queryset_inactive.count():
-                offset = None
-        else:
-            offset = 0
+        closed_accounts = {
+            "offset": self.next_offset,
+            "next_cursor": self.next_cursor,
+            "close_accounts_count": self.count,
+        }
         accounts_inactive = AccountSerializer(results_accounts_inactive, many=True).data
 
         # The contact and lead catalogues below exist for the account *form*
@@ -290,9 +228,8 @@ class AccountsListView(APIView, LimitOffsetPagination):
         contacts = contact_qs.values("id", "first_name")
         context["contacts"] = contacts
         context["closed_accounts"] = {
-            "offset": offset,
+            **closed_accounts,
             "close_accounts": accounts_inactive,
-            "close_accounts_count": queryset_inactive.count(),
         }
         context["teams"] = TeamsSerializer(
             Teams.objects.filter(org=self.request.profile.org), many=True
@@ -0,0 +1,277 @@
+"""Tests for the compiled calendar behind add_business_hours.
+
+``add_business_hours`` used to walk forward one day at a time. That walker is
+kept below as the reference, and the compiled arithmetic is held to its
+answers over randomized calendars, holidays, timezones (DST included) and
+start instants. ``business_seconds_between`` is checked as its inverse. The
+benchmark class pins the cost of long SLAs, where the walker was slowest.
+"""
+
+import random
+import time as clock
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from business_hours import calendar as bh
+from business_hours.calendar import (
+    add_business_hours,
+    business_seconds_between,
+    compile_calendar,
+    get_default_calendar,
+)
+from business_hours.models import BusinessCalendar
+
+_UTC = ZoneInfo("UTC")
+_DAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+
+def _walk(start_dt, hours, windows, tz_name, holidays):
+    """The day-by-day walker add_business_hours used before compiling."""
+    if start_dt.tzinfo is None:
+        start_dt = start_dt.replace(tzinfo=_UTC)
+    tz = ZoneInfo(tz_name)
+    cur = start_dt.astimezone(tz)
+    remaining = timedelta(hours=float(hours))
+    for _ in range(366 * 5):
+        open_t, close_t = windows[cur.weekday()]
+        date_local = cur.date()
+        if (
+            open_t is None
+            or close_t is None
+            or close_t <= open_t
+            or date_local in holidays
+        ):
+            cur = datetime.combine(date_local + timedelta(days=1), time(), tzinfo=tz)
+            continue
+        day_open = datetime.combine(date_local, open_t, tzinfo=tz)
+        day_close = datetime.combine(date_local, close_t, tzinfo=tz)
+        if cur >= day_close:
+            cur = datetime.combine(date_local + timedelta(days=1), time(), tzinfo=tz)
+            continue
+        if cur < day_open:
+            cur = day_open
+        available = day_close - cur
+        if remaining <= available:
+            return (cur + remaining).astimezone(start_dt.tzinfo)
+        remaining -= available
+        cur = datetime.combine(date_local + timedelta(days=1), time(), tzinfo=tz)
+    raise AssertionError("walker ran out of days")
+
+
+def _random_windows(rng):
+    windows = []
+    for _ in range(7):
+        if rng.random() < 0.25:
+            windows.append((None, None))
+            continue
+        open_minutes = rng.randrange(0, 20 * 60, 15)
+        close_minutes = rng.randrange(open_minutes + 15, 24 * 60, 15)
+        windows.append(
+            (
+                time(open_minutes // 60, open_minutes % 60),
+                time(close_minutes // 60, close_minutes % 60),
+            )
+        )
+    if not any(o for o, _c in windows):
+        windows[0] = (time(9), time(17))
+    return windows
+
+
+def _make_calendar(org, windows, tz_name, holidays=(), name="Cal"):
+    fields = {}
+    for day, (open_t, close_t) in zip(_DAYS, windows, strict=True):
+        fields[f"{day}_open"] = open_t
+        fields[f"{day}_close"] = close_t
+    cal = BusinessCalendar.objects.create(
+        org=org, name=name, timezone=tz_name, is_default=False, **fields
+    )
+    for d in holidays:
+        cal.holidays.create(org=org, date=d, name="Off")
+    return cal
+
+
+@pytest.mark.django_db
+class TestMatchesWalker:
+    @pytest.mark.parametrize("seed", range(6))
+    @pytest.mark.parametrize(
+        "tz_name", ["UTC", "America/New_York", "Asia/Kolkata", "Australia/Sydney"]
+    )
+    def test_random_calendars(self, org_a, seed, tz_name):
+        rng = random.Random(f"{seed}-{tz_name}")
+        windows = _random_windows(rng)
+        origin = date(2026, 1, 1)
+        holidays = {origin + timedelta(days=rng.randrange(400)) for _ in range(25)}
+        cal = _make_calendar(org_a, windows, tz_name, holidays)
+        for _ in range(150):
+            start = datetime(2026, 1, 1, tzinfo=_UTC) + timedelta(
+                minutes=rng.randrange(365 * 24 * 60)
+            )
+            hours = rng.choice(
+                [rng.randrange(1, 9), rng.randrange(1, 200), rng.random() * 40]
+            )
+            assert add_business_hours(start, hours, cal) == _walk(
+                start, hours, windows, tz_name, holidays
+            ), (start, hours)
+
+    def test_ends_exactly_at_close(self, calendar_a):
+        start = datetime(2026, 5, 11, 9, 0, tzinfo=_UTC)
+        assert add_business_hours(start, 8, calendar_a) == datetime(
+            2026, 5, 11, 17, 0, tzinfo=_UTC
+        )
+
+    def test_holiday_on_a_closed_day_changes_nothing(self, calendar_a, holiday_factory):
+        holiday_factory(calendar_a, date=date(2026, 5, 9))  # Saturday
+        calendar_a = get_default_calendar(calendar_a.org_id)
+        start = datetime(2026, 5, 8, 16, 0, tzinfo=_UTC)
+        assert add_business_hours(start, 4, calendar_a) == datetime(
+            2026, 5, 11, 12, 0, tzinfo=_UTC
+        )
+
+    def test_dst_fall_back(self, ny_calendar):
+        ny = ZoneInfo("America/New_York")
+        # 2026-11-01 is the fall-back Sunday in NY.
+        start = datetime(2026, 10, 30, 16, 0, tzinfo=ny)  # Fri 4pm EDT
+        result = add_business_hours(start, 9, ny_calendar)
+        assert result.astimezone(ny) == datetime(2026, 11, 2, 17, 0, tzinfo=ny)
+        assert result.utcoffset() == timedelta(hours=-5)
+
+
+@pytest.mark.django_db
+class TestBusinessSecondsBetween:
+    def test_same_window(self, calendar_a):
+        a = datetime(2026, 5, 11, 10, 0, tzinfo=_UTC)
+        b = datetime(2026, 5, 11, 12, 30, tzinfo=_UTC)
+        assert business_seconds_between(a, b, calendar_a) == 2.5 * 3600
+
+    def test_over_a_weekend_and_holiday(self, calendar_a, holiday_factory):
+        holiday_factory(calendar_a, date=date(2026, 5, 11))  # Monday
+        calendar_a = get_default_calendar(calendar_a.org_id)
+        a = datetime(2026, 5, 8, 16, 0, tzinfo=_UTC)  # Fri 4pm
+        b = datetime(2026, 5, 12, 11, 0, tzinfo=_UTC)  # Tue 11am
+        assert business_seconds_between(a, b, calendar_a) == 3 * 3600
+
+    def test_outside_hours_is_zero(self, calendar_a):
+        a = datetime(2026, 5, 9, 10, 0, tzinfo=_UTC)  # Saturday
+        b = datetime(2026, 5, 11, 8, 0, tzinfo=_UTC)  # Monday before open
+        assert business_seconds_between(a, b, calendar_a) == 0
+
+    def test_reversed_is_negative(self, calendar_a):
+        a = datetime(2026, 5, 11, 10, 0, tzinfo=_UTC)
+        b = datetime(2026, 5, 11, 12, 0, tzinfo=_UTC)
+        assert business_seconds_between(b, a, calendar_a) == -7200
+
+    def test_no_calendar_is_wall_clock(self):
+        a = datetime(2026, 5, 9, 10, 0, tzinfo=_UTC)
+        assert business_seconds_between(a, a + timedelta(hours=30), None) == 30 * 3600
+
+    def test_naive_input_treated_as_utc(self, calendar_a):
+        a = datetime(2026, 5, 11, 10, 0)
+        b = datetime(2026, 5, 11, 11, 0, tzinfo=_UTC)
+        assert business_seconds_between(a, b, calendar_a) == 3600
+
+    @pytest.mark.parametrize("seed", range(4))
+    def test_inverts_add_business_hours(self, org_a, seed):
+        rng = random.Random(seed)
+        windows = _random_windows(rng)
+        holidays = {
+            date(2026, 1, 1) + timedelta(days=rng.randrange(200)) for _ in range(10)
+        }
+        cal = _make_calendar(org_a, windows, "America/New_York", holidays)
+        for _ in range(100):
+            start = datetime(2026, 1, 1, tzinfo=_UTC) + timedelta(
+                minutes=rng.randrange(180 * 24 * 60)
+            )
+            hours = rng.randrange(1, 100)
+            end = add_business_hours(start, hours, cal)
+            assert business_seconds_between(start, end, cal) == hours * 3600
+
+
+@pytest.mark.django_db
+class TestCompileCache:
+    def test_prefetched_calendar_costs_no_query(self, calendar_a, holiday_factory):
+        holiday_factory(calendar_a, date=date(2026, 5, 11))
+        cal = get_default_calendar(calendar_a.org_id)
+        start = datetime(2026, 5, 8, 16, 0, tzinfo=_UTC)
+        with CaptureQueriesContext(connection) as ctx:
+            for _ in range(50):
+                add_business_hours(start, 12, cal)
+        assert len(ctx.captured_queries) == 0
+
+    def test_unchanged_calendar_compiles_once(self, calendar_a):
+        bh._compile.cache_clear()
+        cal = get_default_calendar(calendar_a.org_id)
+        first = compile_calendar(cal)
+        assert compile_calendar(get_default_calendar(calendar_a.org_id)) is first
+        assert bh._compile.cache_info().misses == 1
+
+    def test_edits_compile_afresh(self, calendar_a, holiday_factory):
+        start = datetime(2026, 5, 11, 10, 0, tzinfo=_UTC)
+        before = add_business_hours(start, 4, get_default_calendar(calendar_a.org_id))
+        holiday_factory(calendar_a, date=date(2026, 5, 11))
+        after = add_business_hours(start, 4, get_default_calendar(calendar_a.org_id))
+        assert before == datetime(2026, 5, 11, 14, 0, tzinfo=_UTC)
+        assert after == datetime(2026, 5, 12, 13, 0, tzinfo=_UTC)
+
+        calendar_a.monday_open = calendar_a.tuesday_open = time(10, 0)
+        calendar_a.save()
+        moved = add_business_hours(start, 4, get_default_calendar(calendar_a.org_id))
+        assert moved == datetime(2026, 5, 12, 14, 0, tzinfo=_UTC)
+
+    def test_no_open_window_compiles_to_none(self, org_a):
+        cal = BusinessCalendar.objects.create(
+            org=org_a, name="Closed", is_default=False
+        )
+        assert compile_calendar(cal) is None
+        assert compile_calendar(None) is None
+
+
+@pytest.mark.slow
+@pytest.mark.django_db
+class TestBenchmark:
+    """The walker's cost grows with the span of the SLA; the compiled one's
+    with its logarithm. Wall-clock bounds, so ``slow`` and out of the CI
+    selection; run with ``-m slow``. Loose for a slow machine, and still fail
+    by an order of magnitude if a per-day loop comes back."""
+
+    def test_quarterly_sla_beats_the_walker(self, org_a):
+        rng = random.Random(3)
+        windows = [(time(9), time(17))] * 5 + [(None, None)] * 2
+        holidays = {
+            date(2026, 1, 1) + timedelta(days=rng.randrange(500)) for _ in range(40)
+        }
+        cal = _make_calendar(org_a, windows, "Europe/Berlin", holidays)
+        cal = BusinessCalendar.objects.prefetch_related("holidays").get(pk=cal.pk)
+        starts = [
+            datetime(2026, 1, 1, tzinfo=_UTC) + timedelta(minutes=rng.randrange(10**5))
+            for _ in range(2000)
+        ]
+        hours = 520  # about a quarter of 8-hour days
+
+        began = clock.perf_counter()
+        walked = [_walk(s, hours, windows, "Europe/Berlin", holidays) for s in starts]
+        walker_elapsed = clock.perf_counter() - began
+        began = clock.perf_counter()
+        compiled = [add_business_hours(s, hours, cal) for s in starts]
+        compiled_elapsed = clock.perf_counter() - began
+
+        assert compiled == walked
+        assert compiled_elapsed * 5 < walker_elapsed
+
+    def test_cost_does_not_grow_with_the_sla(self, calendar_a):
+        cal = get_default_calendar(calendar_a.org_id)
+        start = datetime(2026, 5, 11, 10, 0, tzinfo=_UTC)
+
+        def timed(hours):
+            began = clock.perf_counter()
+            for _ in range(2000):
+                add_business_hours(start, hours, cal)
+            return clock.perf_counter() - began
+
+        timed(8)  # warm the compile cache
+        day, year = timed(8), timed(8 * 260)
+        # The walker took 260 times as many steps for the year.
+        assert year < day * 3
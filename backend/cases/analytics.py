@@ -4,23 +4,31 @@ The functions here take a base `Case` queryset (already filtered by org +
 visibility + any caller-supplied filters) plus a [from_dt, to_dt) window
 and return JSON-friendly dicts that the views serialize directly.
 
-Why pull values into Python rather than use DB percentiles? SQLite (used in
-the test suite) has no `percentile_cont`. The volumes here (cases per org per
-window) sit well within the millions-of-rows-into-Python range; if a deployment
-ever pushes past that, switch to a Postgres-only path or the optional
-`CaseMetricsDaily` cache table called out in the spec.
+Medians and p90s are computed in the database on PostgreSQL
+(`cases.analytics_sql`, with `percentile_cont` and grouped counts), so FRT,
+MTTR, the agent rollup and the service overview return one row per day,
+priority or agent rather than one per case. SQLite (used in the test suite)
+has no `percentile_cont`; there the values are pulled into Python and reduced
+here, which is also the reference the SQL path is tested against.
+
+The service overview can go further and read its finished days from a daily
+rollup (`cases.metrics_rollup`), computing only today from cases.
 """
 
 from __future__ import annotations
 
 import math
+from bisect import bisect_left, bisect_right
 from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
 from typing import Iterable, Optional
 from uuid import UUID
 
+from django.db import connection
 from django.db.models import Q, QuerySet
 from django.utils import timezone
 
+from cases import analytics_sql, metrics_rollup
 from cases.workflow import DEFAULT_FIRST_RESPONSE_SLA, TERMINAL_STATUSES
 
 # ---------------------------------------------------------------------------
@@ -48,6 +56,11 @@ def _percentile(sorted_values: list[float], pct: float) -> Optional[float]:
     return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * frac
 
 
+def _in_database() -> bool:
+    """Whether percentiles are computed by the database (see module docstring)."""
+    return connection.vendor == "postgresql"
+
+
 def _hours_between(later: datetime, earlier: datetime) -> float:
     return (later - earlier).total_seconds() / 3600.0
 
@@ -120,6 +133,10 @@ def compute_frt(
     """
     from_dt, to_dt = _coerce_window(from_dt, to_dt)
     in_window = qs.filter(created_at__gte=from_dt, created_at__lt=to_dt)
+    if _in_database():
+        return analytics_sql.frt(
+            in_window, _bucket_dates(from_dt, to_dt), timezone.now()
+        )
 
     rows = list(
         in_window.values_list(
@@ -190,13 +207,15 @@ def compute_mttr(
 ) -> dict:
     """Mean Time To Resolution. Window scopes by `Case.resolved_at`."""
     from_dt, to_dt = _coerce_window(from_dt, to_dt)
-    rows = list(
-        qs.filter(
-            resolved_at__isnull=False,
-            resolved_at__gte=from_dt,
-            resolved_at__lt=to_dt,
-        ).values_list("id", "created_at", "resolved_at", "priority")
+    resolved = qs.filter(
+        resolved_at__isnull=False,
+        resolved_at__gte=from_dt,
+        resolved_at__lt=to_dt,
     )
+    if _in_database():
+        return analytics_sql.mttr(resolved)
+
+    rows = list(resolved.values_list("id", "created_at", "resolved_at", "priority"))
     deltas: list[float] = []
     by_priority_lists: dict[str, list[float]] = {}
     case_ids: list[UUID] = []
@@ -227,38 +246,41 @@ def compute_mttr(
     }
 
 
-def compute_backlog(
-    qs: QuerySet,
-    from_dt: Optional[datetime] = None,
-    to_dt: Optional[datetime] = None,
-) -> dict:
-    """Open + urgent counts at end of each day in window.
+def _backlog_series(rows: Iterable[tuple], days: list[date]) -> list[dict]:
+    """Open and urgent counts at the end of each of ``days`` (ascending).
 
-    Open at day D = created_at <= end_of_D AND (resolved_at IS NULL OR resolved_at > end_of_D).
-    Cheap with the new (org, resolved_at) index since we never scan more than
-    once per case row to materialize the window.
+    ``rows`` are ``(created_at, resolved_at, priority)`` triples. A case is
+    open at a day's end E when ``created_at < E`` and it is unresolved or
+    ``resolved_at > E``, so it is open over a contiguous run of days: from the
+    first end after it was created to the last end before it was resolved.
+    Two bisects find that run, a difference array records where it starts
+    and stops, and one prefix sum turns the array into the series.
+
+    That is O(cases * log days + days). Checking every case against every day
+    was O(cases * days): a year-long window over a large org meant hundreds of
+    millions of comparisons for one chart.
     """
-    from_dt, to_dt = _coerce_window(from_dt, to_dt)
-    rows = list(
-        qs.filter(
-            Q(created_at__lt=to_dt)
-            & (Q(resolved_at__isnull=True) | Q(resolved_at__gte=from_dt))
-        ).values_list("created_at", "resolved_at", "priority")
-    )
+    # In UTC, like the rows the database returns: aware datetimes sharing a
+    # tzinfo compare without consulting it, which is most of a bisect's cost.
+    ends = [_day_start(d + timedelta(days=1)).astimezone(dt_timezone.utc) for d in days]
+    open_delta = [0] * (len(ends) + 1)
+    urgent_delta = [0] * (len(ends) + 1)
+    for created_at, resolved_at, priority in rows:
+        first = bisect_right(ends, created_at)
+        stop = len(ends) if resolved_at is None else bisect_left(ends, resolved_at)
+        if first >= stop:
+            continue
+        open_delta[first] += 1
+        open_delta[stop] -= 1
+        if priority == "Urgent":
+            urgent_delta[first] += 1
+            urgent_delta[stop] -= 1
 
     series: list[dict] = []
-    for d in _bucket_dates(from_dt, to_dt):
-        end_of_day = _day_start(d + timedelta(days=1))
-        open_count = 0
-        urgent_count = 0
-        for created_at, resolved_at, priority in rows:
-            if created_at >= end_of_day:
-                continue
-            if resolved_at is not None and resolved_at <= end_of_day:
-                continue
-            open_count += 1
-            if priority == "Urgent":
-                urgent_count += 1
+    open_count = urgent_count = 0
+    for i, d in enumerate(days):
+        open_count += open_delta[i]
+        urgent_count += urgent_delta[i]
         series.append(
             {
                 "date": d.isoformat(),
@@ -266,8 +288,28 @@ def compute_backlog(
                 "urgent_count": urgent_count,
             }
         )
+    return series
+
+
+def compute_backlog(
+    qs: QuerySet,
+    from_dt: Optional[datetime] = None,
+    to_dt: Optional[datetime] = None,
+) -> dict:
+    """Open + urgent counts at end of each day in window.
+
+    Open at day D = created_at < end_of_D AND (resolved_at IS NULL OR resolved_at > end_of_D).
+    Cheap with the new (org, resolved_at) index since we never scan more than
+    once per case row to materialize the window; ``_backlog_series`` then
+    sweeps the rows once rather than once per day.
+    """
+    from_dt, to_dt = _coerce_window(from_dt, to_dt)
+    rows = qs.filter(
+        Q(created_at__lt=to_dt)
+        & (Q(resolved_at__isnull=True) | Q(resolved_at__gte=from_dt))
+    ).values_list("created_at", "resolved_at", "priority")
 
-    return {"series": series}
+    return {"series": _backlog_series(rows.iterator(), _bucket_dates(from_dt, to_dt))}
 
 
 def compute_agents(
@@ -283,6 +325,8 @@ def compute_agents(
     """
     from_dt, to_dt = _coerce_window(from_dt, to_dt)
     in_window = qs.filter(created_at__gte=from_dt, created_at__lt=to_dt)
+    if _in_database():
+        return analytics_sql.agents(in_window, timezone.now())
 
     rows = list(
         in_window.values_list(
@@ -570,6 +614,10 @@ def _business_hours_state(org_id) -> tuple[Optional[str], bool]:
     return cal.name, applied
 
 
+def _frt_bucket() -> dict:
+    return {"frt_minutes": [], "met": 0, "breached": 0}
+
+
 def _accumulate_frt(
     bucket: dict, created_at, first_response_at, sla_hours, now
 ) -> None:
@@ -592,53 +640,67 @@ def _accumulate_frt(
         bucket["breached"] += 1
 
 
-def _first_response_by_priority(created_rows, now) -> list[dict]:
-    """Per-priority first-response attainment, worst-priority first.
-
-    `target_minutes` is the org's promise for that priority (the global
-    workflow default, in minutes); `met`/`missed` are scored against each
-    case's own stored SLA. Priorities with no activity are still emitted with
-    zero counts and a null median so the card never collapses.
-    """
-    per: dict[str, dict] = {
-        prio: {"met": 0, "breached": 0, "frt_minutes": []}
-        for prio in _SERVICE_PRIORITY_ORDER
-    }
-    for _id, created_at, first_response_at, sla_hours, priority, _ctype in created_rows:
-        bucket = per.get(priority)
-        if bucket is None:
-            # Unknown priority string: skip rather than invent a column.
-            continue
-        _accumulate_frt(bucket, created_at, first_response_at, sla_hours, now)
+def _frt_figures(bucket: dict) -> dict:
+    """Reduce an `_accumulate_frt` bucket to the figures the overview shows."""
+    minutes = sorted(bucket.pop("frt_minutes"))
+    bucket["median_minutes"] = _percentile(minutes, 50)
+    bucket["responded"] = len(minutes)
+    return bucket
 
-    out: list[dict] = []
-    for prio in _SERVICE_PRIORITY_ORDER:
-        bucket = per[prio]
-        median = _percentile(sorted(bucket["frt_minutes"]), 50)
-        out.append(
-            {
-                "priority": prio,
-                "target_minutes": DEFAULT_FIRST_RESPONSE_SLA.get(prio, 4) * 60,
-                "median_minutes": round(median) if median is not None else None,
-                "met": bucket["met"],
-                "missed": bucket["breached"],
-            }
-        )
-    return out
 
+def _service_figures(qs, from_dt, to_dt, week_from, now) -> dict:
+    """Everything `compute_service_overview` reports, before formatting.
 
-def _agent_table(qs, from_dt, to_dt, now) -> list[dict]:
-    """Per-agent table: currently-open, closed-this-week, median FRT, breaches.
+    Counts per day, type and priority, the median resolution time, and the
+    per-agent columns. `cases.analytics_sql.service_figures` returns the same
+    dict from grouped queries on PostgreSQL; this is the path for databases
+    without `percentile_cont`, and reads every case in the window.
 
-    Each column has its own natural time basis: `open` is point-in-time (not
-    in a terminal status), `closed_this_week` is the trailing 7 days, and the
-    FRT/breach figures are over the [from, to) window. A case with N assignees
-    counts once per agent (M2M fan-out). The unassigned bucket is computed with
-    explicit `assigned_to__isnull=True` filters rather than a NULL row from the
-    M2M join, so it does not depend on whether Django emits an inner or outer
-    join for the multi-valued relation.
+    Each agent column has its own natural time basis: `open` is point-in-time
+    (not in a terminal status), `closed_this_week` is the trailing 7 days, and
+    the FRT/breach figures are over the [from, to) window. A case with N
+    assignees counts once per agent (M2M fan-out). The unassigned bucket is
+    computed with explicit `assigned_to__isnull=True` filters rather than a
+    NULL row from the M2M join, so it does not depend on whether Django emits
+    an inner or outer join for the multi-valued relation.
     """
-    week_from = now - timedelta(days=7)
+    created_rows = list(
+        qs.filter(created_at__gte=from_dt, created_at__lt=to_dt).values_list(
+            "id",
+            "created_at",
+            "first_response_at",
+            "sla_first_response_hours",
+            "priority",
+            "case_type",
+        )
+    )
+    resolved_rows = list(
+        qs.filter(
+            resolved_at__isnull=False,
+            resolved_at__gte=from_dt,
+            resolved_at__lt=to_dt,
+        ).values_list("id", "created_at", "resolved_at")
+    )
+
+    mttr_hours = sorted(
+        _hours_between(resolved_at, created_at)
+        for _id, created_at, resolved_at in resolved_rows
+    )
+    opened_by_day: dict[date, int] = {}
+    type_counts: dict[str, int] = {}
+    by_priority: dict[str, dict] = {}
+    for _id, created_at, fra, sla_hours, priority, case_type in created_rows:
+        d = timezone.localdate(created_at)
+        opened_by_day[d] = opened_by_day.get(d, 0) + 1
+        label = case_type or "Uncategorized"
+        type_counts[label] = type_counts.get(label, 0) + 1
+        bucket = by_priority.setdefault(priority, _frt_bucket())
+        _accumulate_frt(bucket, created_at, fra, sla_hours, now)
+    closed_by_day: dict[date, int] = {}
+    for _id, _created, resolved_at in resolved_rows:
+        d = timezone.localdate(resolved_at)
+        closed_by_day[d] = closed_by_day.get(d, 0) + 1
+
     open_qs = qs.exclude(status__in=TERMINAL_STATUSES)
     closed_week_qs = qs.filter(
         resolved_at__isnull=False, resolved_at__gte=week_from, resolved_at__lt=to_dt
@@ -649,14 +711,7 @@ def _agent_table(qs, from_dt, to_dt, now) -> list[dict]:
 
     def bucket(pid):
         return agents.setdefault(
-            pid,
-            {
-                "open": 0,
-                "closed_this_week": 0,
-                "frt_minutes": [],
-                "breached": 0,
-                "met": 0,
-            },
+            pid, {"open": 0, "closed_this_week": 0, **_frt_bucket()}
         )
 
     for _cid, pid in open_qs.values_list("id", "assigned_to"):
@@ -675,15 +730,58 @@ def _agent_table(qs, from_dt, to_dt, now) -> list[dict]:
         if pid is not None:
             _accumulate_frt(bucket(pid), created_at, fra, sla_hours, now)
 
-    # Unassigned bucket: explicit isnull filters (see docstring).
-    un = {"open": 0, "closed_this_week": 0, "frt_minutes": [], "breached": 0, "met": 0}
-    un["open"] = open_qs.filter(assigned_to__isnull=True).count()
-    un["closed_this_week"] = closed_week_qs.filter(assigned_to__isnull=True).count()
+    un = _frt_bucket()
     for _cid, created_at, fra, sla_hours in window_qs.filter(
         assigned_to__isnull=True
     ).values_list("id", "created_at", "first_response_at", "sla_first_response_hours"):
         _accumulate_frt(un, created_at, fra, sla_hours, now)
+    un = _frt_figures(un)
+    un["open"] = open_qs.filter(assigned_to__isnull=True).count()
+    un["closed_this_week"] = closed_week_qs.filter(assigned_to__isnull=True).count()
+
+    return {
+        "opened": len(created_rows),
+        "closed": len(resolved_rows),
+        "median_resolution_hours": _percentile(mttr_hours, 50),
+        "opened_by_day": opened_by_day,
+        "closed_by_day": closed_by_day,
+        "type_counts": type_counts,
+        "first_response": {prio: _frt_figures(b) for prio, b in by_priority.items()},
+        "agents": {pid: _frt_figures(b) for pid, b in agents.items()},
+        "unassigned": un,
+    }
+
+
+def _first_response_by_priority(by_priority: dict) -> list[dict]:
+    """Per-priority first-response attainment, worst-priority first.
+
+    `target_minutes` is the org's promise for that priority (the global
+    workflow default, in minutes); `met`/`missed` are scored against each
+    case's own stored SLA. Priorities with no activity are still emitted with
+    zero counts and a null median so the card never collapses. An unknown
+    priority string is skipped rather than given a column.
+    """
+    out: list[dict] = []
+    for prio in _SERVICE_PRIORITY_ORDER:
+        figures = by_priority.get(prio, {})
+        median = figures.get("median_minutes")
+        out.append(
+            {
+                "priority": prio,
+                "target_minutes": DEFAULT_FIRST_RESPONSE_SLA.get(prio, 4) * 60,
+                "median_minutes": round(median) if median is not None else None,
+                "met": figures.get("met", 0),
+                "missed": figures.get("breached", 0),
+            }
+        )
+    return out
 
+
+def _agent_table(agents: dict, un: dict) -> list[dict]:
+    """Per-agent table: currently-open, closed-this-week, median FRT, breaches.
+
+    See `_service_figures` for what each column counts.
+    """
     from common.models import Profile
 
     label_by_pid = {
@@ -694,7 +792,7 @@ def _agent_table(qs, from_dt, to_dt, now) -> list[dict]:
     }
 
     def _row(pid, name, b):
-        median = _percentile(sorted(b["frt_minutes"]), 50)
+        median = b["median_minutes"]
         return {
             "id": None if pid is None else str(pid),
             "name": name,
@@ -711,13 +809,13 @@ def _agent_table(qs, from_dt, to_dt, now) -> list[dict]:
 
     # Only show the unassigned line when it carries signal, so it does not
     # dangle as an all-zero row on a fully-triaged queue.
-    if un["open"] or un["closed_this_week"] or un["frt_minutes"] or un["breached"]:
+    if un["open"] or un["closed_this_week"] or un["responded"] or un["breached"]:
         rows.append(_row(None, "Unassigned", un))
     return rows
 
 
 def compute_service_overview(
-    qs: QuerySet, org_id, days: int = DEFAULT_SERVICE_DAYS
+    qs: QuerySet, org_id, days: int = DEFAULT_SERVICE_DAYS, *, rollup: bool = False
 ) -> dict:
     """Assemble the full /v2/tickets/analytics payload in one call.
 
@@ -726,41 +824,32 @@ def compute_service_overview(
     the org's day boundaries so `volume` has exactly `days` buckets and the last
     one is the org's today. `qs` must be the org-scoped Case queryset; this
     function does no visibility narrowing (the endpoint is admin-only).
+
+    With `rollup`, finished days are read from `CaseDailyMetrics` and only
+    today is computed from cases (`cases.metrics_rollup`). The rollup counts
+    `metrics_rollup.service_cases(org_id)`, so `qs` must be that queryset.
     """
     days = max(1, min(days, 90))
 
     now = timezone.now()
     to_dt = _day_start(timezone.localdate(now) + timedelta(days=1))
     from_dt = to_dt - timedelta(days=days)
+    week_from = now - timedelta(days=7)
 
-    created_rows = list(
-        qs.filter(created_at__gte=from_dt, created_at__lt=to_dt).values_list(
-            "id",
-            "created_at",
-            "first_response_at",
-            "sla_first_response_hours",
-            "priority",
-            "case_type",
+    if rollup:
+        figures = metrics_rollup.service_figures(
+            qs, org_id, from_dt, to_dt, week_from, now, _bucket_dates(from_dt, to_dt)
         )
-    )
-    resolved_rows = list(
-        qs.filter(
-            resolved_at__isnull=False,
-            resolved_at__gte=from_dt,
-            resolved_at__lt=to_dt,
-        ).values_list("id", "created_at", "resolved_at")
-    )
+    elif _in_database():
+        figures = analytics_sql.service_figures(qs, from_dt, to_dt, week_from, now)
+    else:
+        figures = _service_figures(qs, from_dt, to_dt, week_from, now)
 
-    # ---- totals ----
-    mttr_hours = sorted(
-        _hours_between(resolved_at, created_at)
-        for _id, created_at, resolved_at in resolved_rows
-    )
-    median_res = _percentile(mttr_hours, 50)
+    median_res = figures["median_resolution_hours"]
     calendar_name, business_hours_applied = _business_hours_state(org_id)
     totals = {
-        "opened": len(created_rows),
-        "closed": len(resolved_rows),
+        "opened": figures["opened"],
+        "closed": figures["closed"],
         "open_now": qs.exclude(status__in=TERMINAL_STATUSES).count(),
         "median_resolution_hours": round(median_res) if median_res is not None else 0,
         "window_days": days,
@@ -768,38 +857,27 @@ def compute_service_overview(
         "calendar_name": calendar_name,
     }
 
-    # ---- volume (opened/closed per day) ----
-    opened_by_day: dict[date, int] = {}
-    for _id, created_at, _fra, _sla, _prio, _ctype in created_rows:
-        d = timezone.localdate(created_at)
-        opened_by_day[d] = opened_by_day.get(d, 0) + 1
-    closed_by_day: dict[date, int] = {}
-    for _id, _created, resolved_at in resolved_rows:
-        d = timezone.localdate(resolved_at)
-        closed_by_day[d] = closed_by_day.get(d, 0) + 1
     volume = [
         {
             "date": d.isoformat(),
-            "opened": opened_by_day.get(d, 0),
-            "closed": closed_by_day.get(d, 0),
+            "opened": figures["opened_by_day"].get(d, 0),
+            "closed": figures["closed_by_day"].get(d, 0),
         }
         for d in _bucket_dates(from_dt, to_dt)
     ]
 
-    # ---- case-type mix (None → "Uncategorized") ----
-    type_counts: dict[str, int] = {}
-    for _id, _created, _fra, _sla, _prio, case_type in created_rows:
-        label = case_type or "Uncategorized"
-        type_counts[label] = type_counts.get(label, 0) + 1
+    # case-type mix (None → "Uncategorized")
     by_type = [
         {"case_type": label, "count": n}
-        for label, n in sorted(type_counts.items(), key=lambda kv: (-kv[1], kv[0]))
+        for label, n in sorted(
+            figures["type_counts"].items(), key=lambda kv: (-kv[1], kv[0])
+        )
     ]
 
     return {
         "totals": totals,
         "volume": volume,
-        "first_response": _first_response_by_priority(created_rows, now),
+        "first_response": _first_response_by_priority(figures["first_response"]),
         "by_type": by_type,
-        "by_agent": _agent_table(qs, from_dt, to_dt, now),
+        "by_agent": _agent_table(figures["agents"], figures["unassigned"]),
     }
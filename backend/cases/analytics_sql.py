@@ -0,0 +1,312 @@
+"""PostgreSQL aggregation for the cases analytics module.
+
+`cases.analytics` computes medians and p90s by pulling every case in the
+window into Python and sorting it, because SQLite (the test suite) has no
+`percentile_cont`. On PostgreSQL that meant a 90-day service overview for a
+busy desk shipped hundreds of thousands of rows to the app server on each
+page load, only to reduce them to a dozen numbers.
+
+The functions here answer the same questions with grouped aggregates
+(`percentile_cont(...) WITHIN GROUP`, `COUNT(*) FILTER (...)`, `GROUP BY`
+day / priority / assignee), so a call returns one row per group instead of
+one per case. `cases.analytics` calls them when `connection.vendor` is
+`"postgresql"` and keeps its Python path for everything else. Each returns
+exactly what the Python path returns for the same input; percentile_cont's
+continuous percentile is the same linear interpolation `_percentile` does.
+
+Every function takes the caller's windowed queryset and re-selects cases by
+primary key from it. The non-admin visibility filter joins assignees and
+watchers and relies on `distinct()`, which would let those joins multiply
+rows inside a `GROUP BY`; selecting by key first keeps one row per case
+(or per case and assignee, where the grouping asks for that).
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from django.db.models import (
+    Aggregate,
+    Avg,
+    Count,
+    DateTimeField,
+    F,
+    FloatField,
+    Func,
+    Q,
+    QuerySet,
+    Value,
+)
+from django.db.models.functions import Coalesce, TruncDate
+from django.db.models.lookups import GreaterThan, LessThanOrEqual
+
+from cases.models import Case
+from cases.workflow import TERMINAL_STATUSES
+
+
+class PercentileCont(Aggregate):
+    """``percentile_cont(fraction) WITHIN GROUP (ORDER BY expression)``.
+
+    ``fraction`` is in [0, 1] and comes from code, never from a request, so it
+    is written into the SQL rather than bound.
+    """
+
+    function = "PERCENTILE_CONT"
+    name = "PercentileCont"
+    template = (
+        "%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)%(filter)s"
+    )
+    output_field = FloatField()
+
+    def __init__(self, expression, fraction: float, **extra):
+        super().__init__(expression, fraction=float(fraction), **extra)
+
+
+class HoursBetween(Func):
+    """Hours from ``earlier`` to ``later``, as ``_hours_between`` computes them."""
+
+    template = "EXTRACT(EPOCH FROM (%(expressions)s))::double precision / 3600.0"
+    arg_joiner = " - "
+    arity = 2
+    output_field = FloatField()
+
+    def __init__(self, later, earlier, **extra):
+        super().__init__(later, earlier, **extra)
+
+
+def _by_key(qs: QuerySet) -> QuerySet:
+    return Case.objects.filter(pk__in=qs.values("pk"))
+
+
+def _hours(later: str, earlier: str = "created_at") -> HoursBetween:
+    return HoursBetween(F(later), F(earlier))
+
+
+def _waited(now: datetime) -> HoursBetween:
+    return HoursBetween(Value(now, output_field=DateTimeField()), F("created_at"))
+
+
+_FRT_SLA = Coalesce("sla_first_response_hours", 0)
+_RESOLUTION_SLA = Coalesce("sla_resolution_hours", 0)
+_RESPONDED = Q(first_response_at__isnull=False)
+
+
+def _frt_met() -> Q:
+    return _RESPONDED & Q(LessThanOrEqual(_hours("first_response_at"), _FRT_SLA))
+
+
+def _frt_breach(now: datetime) -> Q:
+    """The Python rule: responded over the SLA, or still waiting and past it."""
+    return (_RESPONDED & Q(GreaterThan(_hours("first_response_at"), _FRT_SLA))) | (
+        Q(first_response_at__isnull=True) & Q(GreaterThan(_waited(now), _FRT_SLA))
+    )
+
+
+def _resolution_breach(now: datetime) -> Q:
+    return (
+        Q(resolved_at__isnull=False)
+        & Q(GreaterThan(_hours("resolved_at"), _RESOLUTION_SLA))
+    ) | (Q(resolved_at__isnull=True) & Q(GreaterThan(_waited(now), _RESOLUTION_SLA)))
+
+
+def frt(in_window: QuerySet, days: list[date], now: datetime) -> dict:
+    """`compute_frt`'s payload for the cases in ``in_window``."""
+    cases = _by_key(in_window)
+    frt_hours = _hours("first_response_at")
+    overall = cases.aggregate(
+        median=PercentileCont(frt_hours, 0.5, filter=_RESPONDED),
+        p90=PercentileCont(frt_hours, 0.9, filter=_RESPONDED),
+        count=Count("id", filter=_RESPONDED),
+    )
+    by_day = {
+        row["day"]: row
+        for row in cases.filter(_RESPONDED)
+        .values(day=TruncDate("created_at"))
+        .annotate(median=PercentileCont(frt_hours, 0.5), count=Count("id"))
+        .order_by()
+    }
+    series = [
+        {
+            "bucket": d.isoformat(),
+            "median": by_day[d]["median"] if d in by_day else None,
+            "count": by_day[d]["count"] if d in by_day else 0,
+        }
+        for d in days
+    ]
+    breach_ids = [
+        str(cid) for cid in cases.filter(_frt_breach(now)).values_list("id", flat=True)
+    ]
+    return {
+        "median_hours": overall["median"],
+        "p90_hours": overall["p90"],
+        "count": overall["count"],
+        "breach_count": len(breach_ids),
+        "series": series,
+        "case_ids": [str(cid) for cid in in_window.values_list("id", flat=True)],
+        "breach_case_ids": breach_ids,
+    }
+
+
+def _resolution_stats() -> dict:
+    resolution_hours = _hours("resolved_at")
+    return {
+        "mean_hours": Avg(resolution_hours),
+        "median_hours": PercentileCont(resolution_hours, 0.5),
+        "p90_hours": PercentileCont(resolution_hours, 0.9),
+        "count": Count("id"),
+    }
+
+
+def mttr(resolved: QuerySet) -> dict:
+    """`compute_mttr`'s payload for the cases in ``resolved``."""
+    cases = _by_key(resolved)
+    out = cases.aggregate(**_resolution_stats())
+    out["by_priority"] = {
+        row.pop("priority"): row
+        for row in cases.values("priority").annotate(**_resolution_stats()).order_by()
+    }
+    out["case_ids"] = [str(cid) for cid in resolved.values_list("id", flat=True)]
+    return out
+
+
+def agents(in_window: QuerySet, now: datetime) -> list[dict]:
+    """`compute_agents`'s rows, one per assignee, for the cases in ``in_window``.
+
+    Grouping by assignee joins the many-to-many table, so each case counts
+    once per agent, as it does in Python. Unassigned cases come back from the
+    outer join as a ``None`` group and are dropped, as they are there.
+    """
+    rows = (
+        _by_key(in_window)
+        .values("assigned_to", "assigned_to__user__email")
+        .annotate(
+            handled=Count("id"),
+            avg_frt_hours=Avg(_hours("first_response_at"), filter=_RESPONDED),
+            csat_avg=Avg("csat_survey__rating"),
+            breach_count=Count("id", filter=_frt_breach(now))
+            + Count("id", filter=_resolution_breach(now)),
+        )
+        .order_by()
+    )
+    out = []
+    for row in rows:
+        if row["assigned_to"] is None:
+            continue
+        email = row["assigned_to__user__email"] or ""
+        out.append(
+            {
+                "profile_id": str(row["assigned_to"]),
+                "name": email,
+                "email": email,
+                "handled": row["handled"],
+                "avg_frt_hours": row["avg_frt_hours"],
+                "csat_avg": row["csat_avg"],
+                # Two checks per case: first response and resolution.
+                "breach_rate": row["breach_count"] / max(1, 2 * row["handled"]),
+            }
+        )
+    out.sort(key=lambda r: (-r["handled"], r["email"]))
+    return out
+
+
+def _frt_figures(now: datetime) -> dict:
+    """The per-bucket first-response figures of the service overview."""
+    return {
+        "median_minutes": PercentileCont(
+            _hours("first_response_at") * 60.0, 0.5, filter=_RESPONDED
+        ),
+        "responded": Count("id", filter=_RESPONDED),
+        "met": Count("id", filter=_frt_met()),
+        "breached": Count("id", filter=_frt_breach(now)),
+    }
+
+
+def _per_assignee(qs: QuerySet, **aggregates) -> list[dict]:
+    """``aggregates`` per assignee, without the outer join's ``None`` group:
+    the overview counts unassigned cases with explicit filters, as the Python
+    path does."""
+    rows = qs.values("assigned_to").annotate(**aggregates).order_by()
+    return [row for row in rows if row["assigned_to"] is not None]
+
+
+def _count_by_day(qs: QuerySet, field: str) -> dict[date, int]:
+    return {
+        row["day"]: row["n"]
+        for row in qs.values(day=TruncDate(field)).annotate(n=Count("id")).order_by()
+    }
+
+
+def service_figures(
+    qs: QuerySet,
+    from_dt: datetime,
+    to_dt: datetime,
+    week_from: datetime,
+    now: datetime,
+) -> dict:
+    """The reductions `compute_service_overview` formats, computed in SQL.
+
+    Returns the same dict as `analytics._service_figures`: counts per day,
+    type and priority, the median resolution, and per-agent figures.
+    """
+    cases = _by_key(qs)
+    created = cases.filter(created_at__gte=from_dt, created_at__lt=to_dt)
+    resolved = cases.filter(
+        resolved_at__isnull=False, resolved_at__gte=from_dt, resolved_at__lt=to_dt
+    )
+    resolved_totals = resolved.aggregate(
+        closed=Count("id"), median=PercentileCont(_hours("resolved_at"), 0.5)
+    )
+
+    # None and "" both read as uncategorized, so two groups can share a label.
+    type_counts: dict[str, int] = {}
+    for row in created.values("case_type").annotate(n=Count("id")).order_by():
+        label = row["case_type"] or "Uncategorized"
+        type_counts[label] = type_counts.get(label, 0) + row["n"]
+
+    open_cases = cases.exclude(status__in=TERMINAL_STATUSES)
+    closed_week = cases.filter(
+        resolved_at__isnull=False, resolved_at__gte=week_from, resolved_at__lt=to_dt
+    )
+    agents: dict = {}
+
+    def bucket(pid):
+        return agents.setdefault(
+            pid,
+            {
+                "open": 0,
+                "closed_this_week": 0,
+                "median_minutes": None,
+                "responded": 0,
+                "met": 0,
+                "breached": 0,
+            },
+        )
+
+    for column, source in (("open", open_cases), ("closed_this_week", closed_week)):
+        for row in _per_assignee(source, n=Count("id")):
+            bucket(row["assigned_to"])[column] = row["n"]
+    for row in _per_assignee(created, **_frt_figures(now)):
+        bucket(row.pop("assigned_to")).update(row)
+
+    unassigned = created.filter(assigned_to__isnull=True).aggregate(**_frt_figures(now))
+    unassigned["open"] = open_cases.filter(assigned_to__isnull=True).count()
+    unassigned["closed_this_week"] = closed_week.filter(
+        assigned_to__isnull=True
+    ).count()
+
+    return {
+        "opened": created.count(),
+        "closed": resolved_totals["closed"],
+        "median_resolution_hours": resolved_totals["median"],
+        "opened_by_day": _count_by_day(created, "created_at"),
+        "closed_by_day": _count_by_day(resolved, "resolved_at"),
+        "type_counts": type_counts,
+        "first_response": {
+            row.pop("priority"): row
+            for row in created.values("priority")
+            .annotate(**_frt_figures(now))
+            .order_by()
+        },
+        "agents": agents,
+        "unassigned": unassigned,
+    }
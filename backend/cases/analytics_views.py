@@ -15,6 +15,7 @@ from datetime import datetime, timedelta
 from typing import Optional
 from uuid import UUID
 
+from django.conf import settings
 from django.db.models import Q
 from django.http import StreamingHttpResponse
 from django.utils import timezone
@@ -24,7 +25,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from cases import analytics
+from cases import analytics, metrics_rollup
 from cases.access import is_org_admin
 from cases.analytics import DEFAULT_SERVICE_DAYS
 from cases.models import Case
@@ -207,10 +208,13 @@ class AnalyticsServiceView(_AnalyticsBaseView):
                 {"error": True, "errors": "Admin access required"}, status=403
             )
         days = _parse_days(request.query_params.get("days"))
-        qs = Case.objects.filter(
-            org=request.profile.org, is_active=True, merged_into__isnull=True
-        ).exclude(status="Duplicate")
-        data = analytics.compute_service_overview(qs, request.profile.org_id, days)
+        qs = metrics_rollup.service_cases(request.profile.org_id)
+        data = analytics.compute_service_overview(
+            qs,
+            request.profile.org_id,
+            days,
+            rollup=settings.CASE_METRICS_ROLLUP,
+        )
         return Response(data)
 
 
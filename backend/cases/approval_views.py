@@ -33,7 +33,7 @@ from cases.serializer import (
     ApprovalRuleSerializer,
     ApprovalSerializer,
 )
-from common.models import Activity
+from common import activity_buffer
 from common.permissions import HasOrgContext, is_org_admin
 from common.validators import uuid_param
 
@@ -98,7 +98,7 @@ def _admin_required():
 
 
 def _record(case, action, metadata, actor):
-    Activity.objects.create(
+    activity_buffer.record(
         user=actor,
         action=action,
         entity_type="Case",
@@ -7,6 +7,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from cases import metrics_rollup
 from cases.models import Case
 from common.models import Activity, Profile, Tags
 from common.permissions import HasOrgContext
@@ -93,8 +94,13 @@ class BulkDeleteCasesView(APIView):
         # Snapshot the cases so we can emit Activity rows after the bulk update
         # ; queryset.update() bypasses signals.
         qs = Case.objects.filter(pk__in=ids, org=org, is_active=True)
-        target_cases = list(qs.values("id", "name"))
+        target_cases = list(qs.values("id", "name", "created_at", "resolved_at"))
         deleted_count = qs.update(is_active=False)
+        metrics_rollup.mark_stale(
+            org.id,
+            [c["created_at"] for c in target_cases]
+            + [c["resolved_at"] for c in target_cases],
+        )
         if target_cases:
             Activity.objects.bulk_create(
                 [
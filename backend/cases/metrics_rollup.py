@@ -0,0 +1,430 @@
+"""Daily rollup of service figures behind the service overview.
+
+`analytics.compute_service_overview` used to reduce every case in its window
+on each page load, so the 90-day view cost ninety days of cases every time a
+manager opened it. Finished days do not change much, so each one is reduced
+once into `CaseDailyMetrics` rows (one per priority and scope, see the model)
+and the overview merges those rows with today, which it still computes from
+cases. Medians come from per-minute histograms, so they merge exactly; the
+only difference from the live figures is that durations are counted in whole
+minutes.
+
+A day is always rebuilt whole from its cases, never adjusted in place, so a
+rebuilt day is exactly what the live computation would say. What changes is
+when it is rebuilt, tracked per org-day by `CaseMetricsDay`:
+
+* The case signals mark the days a saved, deleted or reassigned case touches
+  as stale (`mark_stale`), and so do the few writes that bypass signals.
+* An unanswered case becomes a first-response breach by the clock alone.
+  Each day records when its earliest one will (`next_flip_at`).
+* Reading a window (`ensure_built`) first rebuilds any of its days that are
+  stale, past their flip time, built in another timezone, or never built. That
+  is a handful of days at most; a cold cache builds the window once.
+* `cases.tasks.reconcile_case_daily_metrics` does the same every night for
+  every org, ahead of the readers, and rebuilds the last few days outright to
+  repair writes nothing marked.
+
+Days are the org's calendar days: readers run under the org's timezone, as
+the rest of the analytics module does.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Count, Q, QuerySet
+from django.utils import timezone
+
+from cases.models import Case, CaseDailyMetrics, CaseMetricsDay
+from cases.workflow import TERMINAL_STATUSES
+
+ALL = CaseDailyMetrics.SCOPE_ALL
+AGENT = CaseDailyMetrics.SCOPE_AGENT
+UNASSIGNED = CaseDailyMetrics.SCOPE_UNASSIGNED
+
+# How many finished days the nightly reconcile rebuilds regardless of marks.
+RECONCILE_DAYS = 7
+
+_FIGURES = (
+    "created_count",
+    "resolved_count",
+    "frt_met",
+    "frt_breached",
+    "frt_minutes",
+    "resolution_minutes",
+    "type_counts",
+)
+
+
+def service_cases(org_id) -> QuerySet:
+    """The cases the service overview counts: active, unmerged, not duplicates."""
+    return Case.objects.filter(
+        org_id=org_id, is_active=True, merged_into__isnull=True
+    ).exclude(status="Duplicate")
+
+
+# ---------------------------------------------------------------------------
+# Histograms ({minutes: cases}, string keys once stored as JSON)
+
+
+def _add(histogram: dict, minutes: float) -> None:
+    key = str(round(minutes))
+    histogram[key] = histogram.get(key, 0) + 1
+
+
+def _merge(into: dict, histogram: dict) -> None:
+    for key, n in histogram.items():
+        into[key] = into.get(key, 0) + n
+
+
+def histogram_percentile(histogram: dict, pct: float) -> Optional[float]:
+    """`analytics._percentile` over the values the histogram counts."""
+    counts = sorted((int(k), n) for k, n in histogram.items() if n)
+    total = sum(n for _v, n in counts)
+    if not total:
+        return None
+    rank = (pct / 100.0) * (total - 1)
+    lo, hi = math.floor(rank), math.ceil(rank)
+
+    def value_at(index):
+        seen = 0
+        for value, n in counts:
+            seen += n
+            if index < seen:
+                return value
+        return counts[-1][0]
+
+    low = value_at(lo)
+    if lo == hi:
+        return float(low)
+    return low + (value_at(hi) - low) * (rank - lo)
+
+
+# ---------------------------------------------------------------------------
+# Building
+
+
+def _day_bounds(day: date) -> tuple[datetime, datetime]:
+    tz = timezone.get_current_timezone()
+    start = datetime.combine(day, datetime.min.time(), tzinfo=tz)
+    end = datetime.combine(day + timedelta(days=1), datetime.min.time(), tzinfo=tz)
+    return start, end
+
+
+def _empty() -> dict:
+    return {
+        "created_count": 0,
+        "resolved_count": 0,
+        "frt_met": 0,
+        "frt_breached": 0,
+        "frt_minutes": {},
+        "resolution_minutes": {},
+        "type_counts": {},
+    }
+
+
+def _hours(later: datetime, earlier: datetime) -> float:
+    return (later - earlier).total_seconds() / 3600.0
+
+
+def build(org_id, start: datetime, end: datetime, now: datetime):
+    """Reduce the cases of ``[start, end)`` to rollup figures.
+
+    Returns ``(rows, next_flip_at)``: ``rows`` maps ``(priority, scope,
+    agent_id)`` to a figures dict, and ``next_flip_at`` is when the earliest
+    unanswered, not yet breached case opened in the span will breach.
+    """
+    cases = service_cases(org_id).filter(
+        Q(created_at__gte=start, created_at__lt=end)
+        | Q(resolved_at__gte=start, resolved_at__lt=end)
+    )
+    assignees = defaultdict(list)
+    for case_id, profile_id in Case.assigned_to.through.objects.filter(
+        case__in=cases
+    ).values_list("case_id", "profile_id"):
+        assignees[case_id].append(profile_id)
+
+    rows: dict[tuple, dict] = {}
+    next_flip: Optional[datetime] = None
+
+    def row(*key):
+        return rows.setdefault(key, _empty())
+
+    for (
+        case_id,
+        created_at,
+        first_response_at,
+        resolved_at,
+        sla_hours,
+        priority,
+        case_type,
+    ) in cases.values_list(
+        "id",
+        "created_at",
+        "first_response_at",
+        "resolved_at",
+        "sla_first_response_hours",
+        "priority",
+        "case_type",
+    ):
+        everyone = row(priority, ALL, None)
+        targets = [everyone] + (
+            [row(priority, AGENT, pid) for pid in assignees[case_id]]
+            or [row(priority, UNASSIGNED, None)]
+        )
+
+        if start <= created_at < end:
+            label = case_type or "Uncategorized"
+            everyone["type_counts"][label] = everyone["type_counts"].get(label, 0) + 1
+            # The same outcome `analytics._accumulate_frt` scores.
+            sla = sla_hours or 0
+            frt_hours = met = breached = None
+            if first_response_at is not None:
+                frt_hours = _hours(first_response_at, created_at)
+                met, breached = frt_hours <= sla, frt_hours > sla
+            elif _hours(now, created_at) > sla:
+                breached = True
+            else:
+                flip = created_at + timedelta(hours=sla)
+                next_flip = flip if next_flip is None else min(next_flip, flip)
+            for figures in targets:
+                figures["created_count"] += 1
+                if frt_hours is not None:
+                    _add(figures["frt_minutes"], frt_hours * 60.0)
+                figures["frt_met"] += bool(met)
+                figures["frt_breached"] += bool(breached)
+
+        if resolved_at is not None and start <= resolved_at < end:
+            minutes = _hours(resolved_at, created_at) * 60.0
+            for figures in targets:
+                figures["resolved_count"] += 1
+                _add(figures["resolution_minutes"], minutes)
+
+    return rows, next_flip
+
+
+def rebuild_days(org_id, days: Iterable[date], now: Optional[datetime] = None):
+    """Rebuild and store the rollup of each of ``days``. Returns the count."""
+    now = now or timezone.now()
+    tz_name = timezone.get_current_timezone_name()
+    rebuilt = 0
+    for day in days:
+        start, end = _day_bounds(day)
+        rows, next_flip = build(org_id, start, end, now)
+        with transaction.atomic():
+            CaseDailyMetrics.objects.filter(org_id=org_id, day=day).delete()
+            CaseDailyMetrics.objects.bulk_create(
+                CaseDailyMetrics(
+                    org_id=org_id,
+                    day=day,
+                    priority=priority,
+                    scope=scope,
+                    agent_id=agent_id,
+                    **figures,
+                )
+                for (priority, scope, agent_id), figures in rows.items()
+            )
+            CaseMetricsDay.objects.update_or_create(
+                org_id=org_id,
+                day=day,
+                defaults={
+                    "timezone": tz_name,
+                    "starts_at": start,
+                    "ends_at": end,
+                    "stale": False,
+                    "next_flip_at": next_flip,
+                },
+            )
+        rebuilt += 1
+    return rebuilt
+
+
+def days_needing_rebuild(org_id, days: list[date], now: datetime) -> list[date]:
+    """Those of ``days`` whose stored rows cannot be read as they are."""
+    current = set(
+        CaseMetricsDay.objects.filter(
+            org_id=org_id,
+            day__in=days,
+            stale=False,
+            timezone=timezone.get_current_timezone_name(),
+        )
+        .filter(Q(next_flip_at__isnull=True) | Q(next_flip_at__gte=now))
+        .values_list("day", flat=True)
+    )
+    return [d for d in days if d not in current]
+
+
+def ensure_built(org_id, days: list[date], now: datetime) -> int:
+    return rebuild_days(org_id, days_needing_rebuild(org_id, days, now), now)
+
+
+def reconcile(org_id, days: int = RECONCILE_DAYS, now=None) -> int:
+    """Rebuild the last ``days`` finished days and every other finished day
+    that needs it. Returns the number of days rebuilt."""
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    recent = {today - timedelta(days=i) for i in range(1, days + 1)}
+    flagged = (
+        CaseMetricsDay.objects.filter(org_id=org_id, day__lt=today)
+        .filter(
+            Q(stale=True)
+            | Q(next_flip_at__lt=now)
+            | ~Q(timezone=timezone.get_current_timezone_name())
+        )
+        .values_list("day", flat=True)
+    )
+    return rebuild_days(org_id, sorted(recent.union(flagged)), now)
+
+
+def mark_stale(org_id, instants: Iterable[Optional[datetime]]) -> None:
+    """Mark the built days containing any of ``instants`` for rebuild.
+
+    Matched on each day's stored bounds, so the caller need not know the
+    org's timezone. A day that was never built needs no mark.
+    """
+    match = Q()
+    for instant in {i for i in instants if i is not None}:
+        match |= Q(starts_at__lte=instant, ends_at__gt=instant)
+    if match:
+        CaseMetricsDay.objects.filter(match, org_id=org_id, stale=False).update(
+            stale=True
+        )
+
+
+def mark_case_stale(case, *others) -> None:
+    """`mark_stale` for the days of ``case``, and of earlier copies of it."""
+    instants = []
+    for version in (case, *others):
+        if version is not None:
+            instants += [version.created_at, version.resolved_at]
+    mark_stale(case.org_id, instants)
+
+
+# ---------------------------------------------------------------------------
+# Reading
+
+
+def _frt_figures(met=0, breached=0, histogram=None) -> dict:
+    histogram = histogram or {}
+    return {
+        "median_minutes": histogram_percentile(histogram, 50),
+        "responded": sum(histogram.values()),
+        "met": met,
+        "breached": breached,
+    }
+
+
+def service_figures(
+    qs: QuerySet,
+    org_id,
+    from_dt: datetime,
+    to_dt: datetime,
+    week_from: datetime,
+    now: datetime,
+    days: list[date],
+) -> dict:
+    """`analytics._service_figures`, from the rollup plus today.
+
+    ``days`` are the window's dates; every one before today is read from
+    stored rows (rebuilt first where needed) and today is built in memory.
+    ``qs`` is only used for the point-in-time agent columns (open now, closed
+    in the trailing week), which are grouped counts either way.
+    """
+    today = timezone.localdate(now)
+    finished = [d for d in days if d < today]
+    ensure_built(org_id, finished, now)
+
+    stored = (
+        (
+            row["day"],
+            row["priority"],
+            row["scope"],
+            row["agent_id"],
+            {name: row[name] for name in _FIGURES},
+        )
+        for row in CaseDailyMetrics.objects.filter(
+            org_id=org_id, day__in=finished
+        ).values("day", "priority", "scope", "agent_id", *_FIGURES)
+    )
+    live_start, _ = _day_bounds(today)
+    live_rows, _ = build(org_id, max(live_start, from_dt), to_dt, now)
+    live = (
+        (today, priority, scope, agent_id, figures)
+        for (priority, scope, agent_id), figures in live_rows.items()
+    )
+
+    opened_by_day: dict[date, int] = {}
+    closed_by_day: dict[date, int] = {}
+    type_counts: dict[str, int] = {}
+    resolution: dict = {}
+    by_priority: dict[str, dict] = {}
+    by_agent: dict = {}
+    unassigned = {"met": 0, "breached": 0, "histogram": {}}
+
+    def fold(acc, figures):
+        acc["met"] += figures["frt_met"]
+        acc["breached"] += figures["frt_breached"]
+        _merge(acc["histogram"], figures["frt_minutes"])
+
+    for day, priority, scope, agent_id, figures in (*stored, *live):
+        if scope == ALL:
+            opened_by_day[day] = opened_by_day.get(day, 0) + figures["created_count"]
+            closed_by_day[day] = closed_by_day.get(day, 0) + figures["resolved_count"]
+            _merge(type_counts, figures["type_counts"])
+            _merge(resolution, figures["resolution_minutes"])
+            fold(
+                by_priority.setdefault(
+                    priority, {"met": 0, "breached": 0, "histogram": {}}
+                ),
+                figures,
+            )
+        elif scope == AGENT and figures["created_count"]:
+            fold(
+                by_agent.setdefault(
+                    agent_id, {"met": 0, "breached": 0, "histogram": {}}
+                ),
+                figures,
+            )
+        elif scope == UNASSIGNED:
+            fold(unassigned, figures)
+
+    agents = {pid: _frt_figures(**acc) for pid, acc in by_agent.items()}
+    open_qs = qs.exclude(status__in=TERMINAL_STATUSES)
+    closed_week_qs = qs.filter(
+        resolved_at__isnull=False, resolved_at__gte=week_from, resolved_at__lt=to_dt
+    )
+    for column, source in (("open", open_qs), ("closed_this_week", closed_week_qs)):
+        for row in source.values("assigned_to").annotate(n=Count("id")).order_by():
+            pid = row["assigned_to"]
+            if pid is None:
+                continue
+            agents.setdefault(pid, _frt_figures())
+            agents[pid][column] = row["n"]
+    for figures in agents.values():
+        figures.setdefault("open", 0)
+        figures.setdefault("closed_this_week", 0)
+
+    un = _frt_figures(**unassigned)
+    un["open"] = open_qs.filter(assigned_to__isnull=True).count()
+    un["closed_this_week"] = closed_week_qs.filter(assigned_to__isnull=True).count()
+
+    median_resolution = histogram_percentile(resolution, 50)
+    return {
+        "opened": sum(opened_by_day.values()),
+        "closed": sum(closed_by_day.values()),
+        "median_resolution_hours": (
+            None if median_resolution is None else median_resolution / 60.0
+        ),
+        "opened_by_day": opened_by_day,
+        "closed_by_day": closed_by_day,
+        "type_counts": type_counts,
+        "first_response": {
+            prio: _frt_figures(**acc) for prio, acc in by_priority.items()
+        },
+        "agents": agents,
+        "unassigned": un,
+    }
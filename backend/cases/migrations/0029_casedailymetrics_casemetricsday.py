@@ -0,0 +1,228 @@
+# Generated by Django 6.0.9 on 2026-10-18 07:46
+
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import connection, migrations, models
+
+from common.rls import get_disable_policy_sql, get_enable_policy_sql
+
+TABLES = ("case_daily_metrics", "case_metrics_day")
+
+
+def enable_rls(apps, schema_editor):
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        for table in TABLES:
+            cursor.execute(get_enable_policy_sql(table))
+
+
+def disable_rls(apps, schema_editor):
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        for table in TABLES:
+            cursor.execute(get_disable_policy_sql(table))
+
+
+class Migration(migrations.Migration):
+    # RLS policy creation can't run inside an atomic block.
+    atomic = False
+
+    dependencies = [
+        ("cases", "0028_inboundmailbox_webhook_secret_help_text"),
+        ("common", "0021_org_auto_close_children"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CaseDailyMetrics",
+            fields=[
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Created At"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Last Modified At"
+                    ),
+                ),
+                (
+                    "id",
+                    models.UUIDField(
+                        db_index=True,
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("priority", models.CharField(max_length=64)),
+                (
+                    "scope",
+                    models.CharField(
+                        choices=[
+                            ("all", "All cases"),
+                            ("agent", "One agent"),
+                            ("unassigned", "Unassigned"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                ("created_count", models.PositiveIntegerField(default=0)),
+                ("resolved_count", models.PositiveIntegerField(default=0)),
+                ("frt_met", models.PositiveIntegerField(default=0)),
+                ("frt_breached", models.PositiveIntegerField(default=0)),
+                ("frt_minutes", models.JSONField(blank=True, default=dict)),
+                ("resolution_minutes", models.JSONField(blank=True, default=dict)),
+                ("type_counts", models.JSONField(blank=True, default=dict)),
+                (
+                    "agent",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="common.profile",
+                    ),
+                ),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="%(class)s_created_by",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Created By",
+                    ),
+                ),
+                (
+                    "org",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="case_daily_metrics",
+                        to="common.org",
+                    ),
+                ),
+                (
+                    "updated_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="%(class)s_updated_by",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Last Modified By",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Case Daily Metrics",
+                "verbose_name_plural": "Case Daily Metrics",
+                "db_table": "case_daily_metrics",
+                "indexes": [
+                    models.Index(
+                        fields=["org", "day"], name="case_daily__org_id_88c06d_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(("agent__isnull", True)),
+                        fields=("org", "day", "priority", "scope"),
+                        name="uniq_case_daily_metrics_scope",
+                    ),
+                    models.UniqueConstraint(
+                        condition=models.Q(("agent__isnull", False)),
+                        fields=("org", "day", "priority", "agent"),
+                        name="uniq_case_daily_metrics_agent",
+                    ),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="CaseMetricsDay",
+            fields=[
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Created At"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Last Modified At"
+                    ),
+                ),
+                (
+                    "id",
+                    models.UUIDField(
+                        db_index=True,
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("timezone", models.CharField(max_length=64)),
+                ("starts_at", models.DateTimeField()),
+                ("ends_at", models.DateTimeField()),
+                ("stale", models.BooleanField(default=False)),
+                ("next_flip_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="%(class)s_created_by",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Created By",
+                    ),
+                ),
+                (
+                    "org",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="case_metrics_days",
+                        to="common.org",
+                    ),
+                ),
+                (
+                    "updated_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="%(class)s_updated_by",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Last Modified By",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Case Metrics Day",
+                "verbose_name_plural": "Case Metrics Days",
+                "db_table": "case_metrics_day",
+                "indexes": [
+                    models.Index(
+                        fields=["org", "starts_at"],
+                        name="case_metric_org_id_c77965_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("org", "day"), name="uniq_case_metrics_day"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(enable_rls, reverse_code=disable_rls),
+    ]
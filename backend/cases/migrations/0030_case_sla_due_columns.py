@@ -0,0 +1,70 @@
+# Stored SLA deadlines for Case (cases/sla.py).
+#
+# Adds the two deadline columns, indexes each with the org for the cases still
+# waiting on that SLA, and fills them for existing rows against each org's
+# default business calendar. New and saved rows are filled by
+# SlaDueField.pre_save; a calendar or holiday edit recomputes the org through
+# the `recompute_case_sla_deadlines` task, which runs the same helper.
+# Reversing drops the columns, so there is nothing for the backfill to undo.
+
+from django.db import migrations, models
+
+import cases.sla
+from business_hours.calendar import compile_calendar
+from cases.sla import recompute_sla_deadlines
+
+
+def backfill(apps, schema_editor):
+    Case = apps.get_model("cases", "Case")
+    BusinessCalendar = apps.get_model("business_hours", "BusinessCalendar")
+    org_ids = Case.objects.order_by().values_list("org_id", flat=True).distinct()
+    for org_id in org_ids:
+        calendar = (
+            BusinessCalendar.objects.filter(org_id=org_id, is_default=True)
+            .prefetch_related("holidays")
+            .first()
+        )
+        recompute_sla_deadlines(
+            Case.objects.filter(org_id=org_id), compile_calendar(calendar)
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("business_hours", "0001_initial"),
+        ("cases", "0029_casedailymetrics_casemetricsday"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="case",
+            name="sla_first_response_due_at",
+            field=cases.sla.SlaDueField(
+                blank=True, hours="sla_first_response_hours", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="case",
+            name="sla_resolution_due_at",
+            field=cases.sla.SlaDueField(
+                blank=True, hours="sla_resolution_hours", null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="case",
+            index=models.Index(
+                condition=models.Q(("first_response_at__isnull", True)),
+                fields=["org", "sla_first_response_due_at"],
+                name="case_org_frt_due_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="case",
+            index=models.Index(
+                condition=models.Q(("resolved_at__isnull", True)),
+                fields=["org", "sla_resolution_due_at"],
+                name="case_org_resolution_due_idx",
+            ),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -12,6 +12,8 @@ from common.models import Org, Profile, Tags, Teams
 from common.utils import CASE_TYPE, CURRENCY_CODES, PRIORITY_CHOICE, STATUS_CHOICE
 from contacts.models import Contact
 
+from .sla import SLA_INPUTS, SlaDueField, compile_calendar, sla_due_at
+
 # Cleanup notes:
 # - Removed 'created_on_arrow' property from Case and Solution (frontend computes its own timestamps)
 # - Fixed case_type default from "" to None (empty string is bad default for nullable field)
@@ -93,6 +95,13 @@ class Case(AssignableMixin, BaseModel):
     sla_paused_at = models.DateTimeField(blank=True, null=True)
     sla_paused_seconds = models.PositiveIntegerField(default=0)
 
+    # The SLA deadlines, stored so "past due" is an indexed range query for
+    # the breach scanner and the list filter. Computed on save from the
+    # fields above and the org's business calendar, recomputed in bulk when
+    # the calendar changes; excludes a pause still running. See cases/sla.py.
+    sla_first_response_due_at = SlaDueField(hours="sla_first_response_hours")
+    sla_resolution_due_at = SlaDueField(hours="sla_resolution_hours")
+
     # Escalation tracking (driven by cases.tasks.scan_for_breached_cases)
     last_escalation_fired_at = models.DateTimeField(
         _("Last Escalation Fired At"),
@@ -167,6 +176,18 @@ class Case(AssignableMixin, BaseModel):
             models.Index(fields=["status", "kanban_order"]),
             # Analytics resolution-window scans (MTTR by_priority, SLA breach).
             models.Index(fields=["org", "resolved_at"], name="case_org_resolved_idx"),
+            # SLA breach scanner and `?sla_breached=true`: the open cases of
+            # an org past a deadline, per SLA (see cases/sla.py).
+            models.Index(
+                fields=["org", "sla_first_response_due_at"],
+                name="case_org_frt_due_idx",
+                condition=models.Q(first_response_at__isnull=True),
+            ),
+            models.Index(
+                fields=["org", "sla_resolution_due_at"],
+                name="case_org_resolution_due_idx",
+                condition=models.Q(resolved_at__isnull=True),
+            ),
             # Listing children of a parent (Tier 3 parent-child).
             models.Index(fields=["parent"], name="case_parent_idx"),
         ]
@@ -278,7 +299,19 @@ class Case(AssignableMixin, BaseModel):
                     self.priority, 24
                 )
 
-        super().save(*args, **kwargs)
+        # A partial save that moves an SLA input writes the deadlines with it.
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and SLA_INPUTS.intersection(update_fields):
+            kwargs["update_fields"] = {
+                *update_fields,
+                "sla_first_response_due_at",
+                "sla_resolution_due_at",
+            }
+
+        try:
+            super().save(*args, **kwargs)
+        finally:
+            self.__dict__.pop("_sla_save_calendar", None)
 
     def _sla_calendar(self):
         """Resolve the org's default BusinessCalendar (or None for 24/7)."""
@@ -288,25 +321,34 @@ class Case(AssignableMixin, BaseModel):
             return None
         return get_default_calendar(self.org_id)
 
-    def _sla_deadline(self, hours):
-        """Compute a deadline by walking ``hours`` business hours forward
-        from ``created_at`` and pushing the answer forward by any time the
-        case has spent in the Pending status (customer wait time).
-        """
-        from business_hours.calendar import add_business_hours
+    def _sla_deadline(self, stored, hours):
+        """The deadline: ``hours`` business hours after ``created_at``, pushed
+        forward by any time the case has spent in the Pending status
+        (customer wait time).
 
-        if not self.created_at or hours is None:
+        ``stored`` is the persisted deadline column, which already includes
+        the banked wait; only a pause still running is added here. A case
+        not yet saved (or a row the backfill has not reached) is computed
+        live from the calendar.
+        """
+        deadline = stored
+        if deadline is None:
+            deadline = sla_due_at(
+                self.created_at,
+                hours,
+                self.sla_paused_seconds,
+                compile_calendar(self._sla_calendar()),
+            )
+        if deadline is None:
             return None
-        deadline = add_business_hours(self.created_at, hours, self._sla_calendar())
-        # Customer wait time accumulated while Pending shifts the deadline
-        # forward verbatim. We don't try to walk this through business hours
-        # again because it represents real elapsed time the agent had to wait,
-        # not a target that respects the calendar.
-        paused = self.sla_paused_seconds or 0
+        # Customer wait time shifts the deadline forward verbatim. We don't
+        # try to walk this through business hours again because it
+        # represents real elapsed time the agent had to wait, not a target
+        # that respects the calendar.
         if self.sla_paused_at is not None:
-            paused += max(int((timezone.now() - self.sla_paused_at).total_seconds()), 0)
-        if paused:
-            deadline = deadline + timedelta(seconds=paused)
+            paused = int((timezone.now() - self.sla_paused_at).total_seconds())
+            if paused > 0:
+                deadline = deadline + timedelta(seconds=paused)
         return deadline
 
     @property
@@ -332,12 +374,14 @@ class Case(AssignableMixin, BaseModel):
     @property
     def first_response_sla_deadline(self):
         """Return the deadline for first response in business hours."""
-        return self._sla_deadline(self.sla_first_response_hours)
+        return self._sla_deadline(
+            self.sla_first_response_due_at, self.sla_first_response_hours
+        )
 
     @property
     def resolution_sla_deadline(self):
         """Return the deadline for resolution in business hours."""
-        return self._sla_deadline(self.sla_resolution_hours)
+        return self._sla_deadline(self.sla_resolution_due_at, self.sla_resolution_hours)
 
 
 class CaseWatcher(BaseModel):
@@ -688,6 +732,36 @@ class EscalationPolicy(BaseModel):
         return f"EscalationPolicy(org={self.org_id}, priority={self.priority})"
 
 
+class EscalationScanRun(BaseModel):
+    """One run of `scan_for_breached_cases`, across every org.
+
+    Written when the run starts and finished when it ends, so a row with no
+    `finished_at` is a run in progress: the next beat tick finds it, records
+    itself as `skipped` and leaves, rather than escalating the same cases a
+    second time alongside it. Not org-scoped (no `org` column, so not in
+    `ORG_SCOPED_TABLES`); kept for `SCAN_RUN_RETENTION_DAYS`.
+    """
+
+    started_at = models.DateTimeField(db_index=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration_ms = models.PositiveIntegerField(null=True, blank=True)
+    skipped = models.BooleanField(default=False)
+    orgs_scanned = models.PositiveIntegerField(default=0)
+    cases_breached = models.PositiveIntegerField(default=0)
+    cases_escalated = models.PositiveIntegerField(default=0)
+    notifications_sent = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Escalation Scan Run"
+        verbose_name_plural = "Escalation Scan Runs"
+        db_table = "escalation_scan_run"
+        ordering = ("-started_at",)
+
+    def __str__(self):
+        state = "skipped" if self.skipped else f"{self.duration_ms}ms"
+        return f"EscalationScanRun({self.started_at:%Y-%m-%d %H:%M}, {state})"
+
+
 class InboundMailbox(BaseModel):
     """Per-org inbound email address configuration. See docs/cases/tier1/email-to-ticket.md.
 
@@ -1052,6 +1126,110 @@ class TimeEntry(BaseModel):
         super().save(*args, **kwargs)
 
 
+class CaseDailyMetrics(BaseModel):
+    """One org-day of service figures, for one priority and one scope.
+
+    The service overview (`analytics.compute_service_overview`) reads these
+    for every finished day in its window and computes only today from cases,
+    so a 90-day window costs the same as a 1-day one. `cases/metrics_rollup.py`
+    builds them; see it for how they are kept current.
+
+    `scope` says whose cases a row counts: every case (`all`), the cases one
+    agent is assigned to (`agent`, with `agent` set), or the cases nobody is
+    (`unassigned`). A case with two assignees is in two agent rows and once in
+    the `all` row, the same fan-out the live figures have.
+
+    Figures attach to the day of the event they count: `created_count`, the
+    first-response figures and `type_counts` to the day a case was opened,
+    `resolved_count` and `resolution_minutes` to the day it was resolved.
+    The `*_minutes` columns are histograms, `{minutes: cases}`, so medians
+    over any span of days can be read from the merged counts.
+    """
+
+    SCOPE_ALL = "all"
+    SCOPE_AGENT = "agent"
+    SCOPE_UNASSIGNED = "unassigned"
+    SCOPE_CHOICES = (
+        (SCOPE_ALL, "All cases"),
+        (SCOPE_AGENT, "One agent"),
+        (SCOPE_UNASSIGNED, "Unassigned"),
+    )
+
+    org = models.ForeignKey(
+        Org, on_delete=models.CASCADE, related_name="case_daily_metrics"
+    )
+    day = models.DateField()
+    priority = models.CharField(max_length=64)
+    scope = models.CharField(max_length=16, choices=SCOPE_CHOICES)
+    agent = models.ForeignKey(
+        Profile, on_delete=models.CASCADE, null=True, blank=True, related_name="+"
+    )
+    created_count = models.PositiveIntegerField(default=0)
+    resolved_count = models.PositiveIntegerField(default=0)
+    frt_met = models.PositiveIntegerField(default=0)
+    frt_breached = models.PositiveIntegerField(default=0)
+    frt_minutes = models.JSONField(default=dict, blank=True)
+    resolution_minutes = models.JSONField(default=dict, blank=True)
+    type_counts = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        verbose_name = "Case Daily Metrics"
+        verbose_name_plural = "Case Daily Metrics"
+        db_table = "case_daily_metrics"
+        indexes = [models.Index(fields=["org", "day"])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=("org", "day", "priority", "scope"),
+                condition=models.Q(agent__isnull=True),
+                name="uniq_case_daily_metrics_scope",
+            ),
+            models.UniqueConstraint(
+                fields=("org", "day", "priority", "agent"),
+                condition=models.Q(agent__isnull=False),
+                name="uniq_case_daily_metrics_agent",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.priority} {self.scope} {self.agent_id or ''}"
+
+
+class CaseMetricsDay(BaseModel):
+    """Whether one org-day's `CaseDailyMetrics` rows can be read as they are.
+
+    `stale` is set by the case signals when a case on this day changes, and
+    `next_flip_at` is when the earliest unanswered case on it will go past its
+    first-response SLA, which changes its figures with no write at all. A day
+    with no row here has never been built. `starts_at`/`ends_at` are the
+    day's bounds in `timezone`, which is what lets a signal find the day of a
+    timestamp without knowing the org's timezone.
+    """
+
+    org = models.ForeignKey(
+        Org, on_delete=models.CASCADE, related_name="case_metrics_days"
+    )
+    day = models.DateField()
+    timezone = models.CharField(max_length=64)
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField()
+    stale = models.BooleanField(default=False)
+    next_flip_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Case Metrics Day"
+        verbose_name_plural = "Case Metrics Days"
+        db_table = "case_metrics_day"
+        indexes = [models.Index(fields=["org", "starts_at"])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=("org", "day"), name="uniq_case_metrics_day"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.org_id} {self.day}{' (stale)' if self.stale else ''}"
+
+
 # Tier 3 approval workflows. The two model classes live in cases/approvals.py
 # but must be importable through ``cases.models`` so Django's app registry,
 # `makemigrations`, and existing reverse-related lookups all resolve them.
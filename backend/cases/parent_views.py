@@ -22,7 +22,7 @@ from rest_framework.views import APIView
 
 from cases.models import Case
 from cases.parent_guards import check_parent_link
-from common.models import Activity
+from common import activity_buffer
 from common.permissions import HasOrgContext
 
 TREE_MAX_DEPTH = Case.PARENT_MAX_DEPTH
@@ -54,7 +54,7 @@ def _build_tree(case, depth=0):
 
 
 def _record(case, action, metadata, actor):
-    Activity.objects.create(
+    activity_buffer.record(
         user=actor,
         action=action,
         entity_type="Case",
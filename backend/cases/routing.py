@@ -27,7 +27,8 @@ from django.db.models import Count, Q
 
 from cases.models import RoutingRule, RoutingRuleState
 from cases.workflow import TERMINAL_STATUSES
-from common.models import Activity, Profile
+from common import activity_buffer
+from common.models import Profile
 
 logger = logging.getLogger(__name__)
 
@@ -325,7 +326,7 @@ def _apply(
     if decision.reason:
         metadata["reason"] = decision.reason
 
-    Activity.objects.create(
+    activity_buffer.record(
         user=None,
         action="ROUTED",
         entity_type="Case",
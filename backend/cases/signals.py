@@ -18,6 +18,7 @@ import logging
 
 from crum import get_current_user
 from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
 from django.db.models.signals import (
     m2m_changed,
     post_delete,
@@ -27,8 +28,12 @@ from django.db.models.signals import (
 from django.dispatch import receiver
 from django.utils import timezone
 
+from accounts import rollups as account_rollups
+from business_hours.models import BusinessCalendar, BusinessHoliday
+from cases import metrics_rollup
 from cases.models import Case, ReopenPolicy, Solution, TimeEntry
-from common.models import Activity, Comment
+from common import activity_buffer
+from common.models import Comment
 
 REOPEN_TRIGGER_STATUS = "Closed"
 REOPEN_DEFAULTS = {
@@ -108,7 +113,7 @@ def _create_activity(case, action, metadata=None, actor=None):
     metadata = _truncate_metadata(metadata or {})
     if actor is None:
         actor = _resolve_actor()
-    Activity.objects.create(
+    activity_buffer.record(
         user=actor,
         action=action,
         entity_type="Case",
@@ -243,6 +248,7 @@ def _maybe_stamp_first_response(case, comment):
     Case.objects.filter(pk=case.pk, first_response_at__isnull=True).update(
         first_response_at=stamped
     )
+    metrics_rollup.mark_case_stale(case)
 
 
 @receiver(post_save, sender=Case)
@@ -356,6 +362,53 @@ def case_assigned_to_changed(sender, instance, action, pk_set, **kwargs):
     _create_activity(instance, "ASSIGN", metadata)
 
 
+@receiver(post_save, sender=Case)
+@receiver(post_delete, sender=Case)
+def case_changed_mark_rollup_stale(sender, instance, **kwargs):
+    """Send the days this case counts on, before and after, for a rebuild.
+
+    Cheap when nothing is built for them: one UPDATE that matches no rows.
+    See `cases/metrics_rollup.py`.
+    """
+    metrics_rollup.mark_case_stale(instance, getattr(instance, "_audit_old", None))
+
+
+@receiver(m2m_changed, sender=Case.assigned_to.through)
+def case_assignees_changed_mark_rollup_stale(
+    sender, instance, action, pk_set, reverse, **kwargs
+):
+    """A reassigned case moves between the agent rows of its days."""
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        metrics_rollup.mark_case_stale(instance)
+        return
+    # `profile.case_assigned_users.add(...)`: the cases are in pk_set. A
+    # reverse clear does not say which cases it cleared; the nightly
+    # reconcile picks those up.
+    for case in Case.objects.filter(pk__in=pk_set or ()).only(
+        "org_id", "created_at", "resolved_at"
+    ):
+        metrics_rollup.mark_case_stale(case)
+
+
+@receiver(post_save, sender=BusinessCalendar)
+@receiver(post_delete, sender=BusinessCalendar)
+@receiver(post_save, sender=BusinessHoliday)
+@receiver(post_delete, sender=BusinessHoliday)
+def business_hours_changed_recompute_sla(sender, instance, **kwargs):
+    """Move the org's stored SLA deadlines onto the edited calendar.
+
+    The deadlines are computed at case save (`cases/sla.py`), so a change of
+    windows, timezone, default or holidays would otherwise leave them on the
+    old calendar. Recomputed in the background once the edit commits.
+    """
+    from cases.tasks import recompute_case_sla_deadlines
+
+    org_id = str(instance.org_id)
+    transaction.on_commit(lambda: recompute_case_sla_deadlines.delay(org_id))
+
+
 @receiver(m2m_changed, sender=Solution.cases.through)
 def solution_cases_changed(sender, instance, action, pk_set, reverse, **kwargs):
     """
@@ -441,10 +494,14 @@ def _evaluate_reopen(case, comment):
     # `.update()` skips signals, so the resolved_at reset that
     # `case_pre_save_stamp_resolved_at` does on a normal save has to be
     # written out by hand here. A reopened ticket is not a resolved one.
+    # The day it was resolved on loses it from the rollup too.
+    metrics_rollup.mark_case_stale(case)
     case.resolved_at = None
     Case.objects.filter(pk=case.pk).update(
         status=case.status, closed_on=None, resolved_at=None
     )
+    # Nor does the account's open-ticket count see it.
+    account_rollups.refresh([case.account_id])
     _create_activity(
         case,
         "REOPENED",
@@ -501,10 +558,14 @@ def maybe_reopen_for_inbound_email(case, email_message):
     # `.update()` skips signals, so the resolved_at reset that
     # `case_pre_save_stamp_resolved_at` does on a normal save has to be
     # written out by hand here. A reopened ticket is not a resolved one.
+    # The day it was resolved on loses it from the rollup too.
+    metrics_rollup.mark_case_stale(case)
     case.resolved_at = None
     Case.objects.filter(pk=case.pk).update(
         status=case.status, closed_on=None, resolved_at=None
     )
+    # Nor does the account's open-ticket count see it.
+    account_rollups.refresh([case.account_id])
     _create_activity(
         case,
         "REOPENED",
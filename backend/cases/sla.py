@@ -0,0 +1,197 @@
+"""Persisted SLA deadlines for cases.
+
+A case's first-response and resolution deadlines are ``created_at`` plus its
+SLA hours of working time on the org's default business calendar, pushed out
+by the customer wait already banked in ``sla_paused_seconds``. They used to be
+worked out on every read, which made "which cases are past due" a question
+only Python could answer: the breach scanner loaded every open case of every
+org to ask it, and the ``?sla_breached=true`` list filter fell back to a
+wall-clock approximation that ignored business hours altogether.
+
+The deadlines are now stored on the case (``sla_first_response_due_at``,
+``sla_resolution_due_at``) by ``SlaDueField`` on save, and recomputed in bulk
+by ``recompute_sla_deadlines`` when what they were computed from changes
+underneath them: the org's calendar, its holidays (see the business-hours
+signals in ``cases/signals.py``). "Past due" is then a range predicate on an
+indexed column, ``first_response_breached`` / ``resolution_breached``.
+
+A pause in progress is the one input not folded into the stored value, since
+it grows by the second. A paused case is past due when its deadline had
+already passed at the moment it was paused; the read-side properties on
+``Case`` add the running pause to the stored value as before.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Optional
+
+from django.db import models
+from django.db.models import F, Q
+
+from business_hours.calendar import (
+    CompiledCalendar,
+    compile_calendar,
+    get_default_calendar,
+)
+
+FIRST_RESPONSE_DUE = "sla_first_response_due_at"
+RESOLUTION_DUE = "sla_resolution_due_at"
+DUE_FIELDS = (FIRST_RESPONSE_DUE, RESOLUTION_DUE)
+
+# The case columns the stored deadlines are computed from. A save whose
+# `update_fields` names any of these writes the deadlines too.
+SLA_INPUTS = frozenset(
+    {
+        "created_at",
+        "sla_first_response_hours",
+        "sla_resolution_hours",
+        "sla_paused_seconds",
+    }
+)
+
+
+def sla_due_at(
+    created_at: Optional[datetime],
+    hours,
+    paused_seconds,
+    compiled: Optional[CompiledCalendar],
+) -> Optional[datetime]:
+    """``hours`` working hours after ``created_at``, plus banked wait time.
+
+    ``compiled`` is the org's compiled calendar, ``None`` for 24/7. The wait
+    is added verbatim, not walked through the calendar: it is real time the
+    agent spent waiting on the customer, not a target.
+    """
+    if created_at is None or hours is None:
+        return None
+    if compiled is None or hours <= 0:
+        due = created_at + timedelta(hours=float(hours))
+    else:
+        due = compiled.add(created_at, hours)
+    return due + timedelta(seconds=paused_seconds or 0)
+
+
+def org_calendar(org_id) -> Optional[CompiledCalendar]:
+    """The org's default calendar, compiled (``None`` for 24/7)."""
+    if not org_id:
+        return None
+    return compile_calendar(get_default_calendar(org_id))
+
+
+def _save_calendar(instance) -> Optional[CompiledCalendar]:
+    # Both deadline fields are computed in the same save; resolve the
+    # calendar once for the pair. `Case.save` drops the memo afterwards so a
+    # long-lived instance never computes against an outdated calendar.
+    memo = instance.__dict__.get("_sla_save_calendar")
+    if memo is not None and memo[0] == instance.org_id:
+        return memo[1]
+    compiled = org_calendar(instance.org_id)
+    instance._sla_save_calendar = (instance.org_id, compiled)
+    return compiled
+
+
+class SlaDueField(models.DateTimeField):
+    """A deadline column maintained from the case's SLA inputs on save.
+
+    ``hours`` names the SLA-hours field the deadline counts. When none of
+    ``SLA_INPUTS`` changed since the row was read (``_audit_old``, stashed by
+    the pre_save signal) the stored value is kept, so an ordinary edit does
+    not look up the calendar. Runs after the pre_save signals, so it sees the
+    pause counter they settle and the ``created_at`` stamped on insert.
+    """
+
+    def __init__(self, *args, hours=None, **kwargs):
+        self.hours = hours
+        kwargs.setdefault("null", True)
+        kwargs.setdefault("blank", True)
+        kwargs["editable"] = False
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs["hours"] = self.hours
+        kwargs.pop("editable", None)
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        old = model_instance.__dict__.get("_audit_old")
+        current = getattr(old, self.attname, None) if old is not None else None
+        if current is not None and all(
+            getattr(old, name) == getattr(model_instance, name)
+            for name in (self.hours, "created_at", "sla_paused_seconds")
+        ):
+            value = current
+        else:
+            value = sla_due_at(
+                model_instance.created_at,
+                getattr(model_instance, self.hours),
+                model_instance.sla_paused_seconds,
+                _save_calendar(model_instance),
+            )
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+def _past_due(field: str, now: datetime) -> Q:
+    # Unpaused: the deadline is behind us. Paused: the clock stopped at
+    # `sla_paused_at`, so only a deadline already behind that moment counts.
+    return Q(sla_paused_at__isnull=True, **{f"{field}__lt": now}) | Q(
+        sla_paused_at__isnull=False, **{f"{field}__lt": F("sla_paused_at")}
+    )
+
+
+def first_response_breached(now: datetime) -> Q:
+    """Cases still waiting for a first response past their deadline."""
+    return Q(first_response_at__isnull=True) & _past_due(FIRST_RESPONSE_DUE, now)
+
+
+def resolution_breached(now: datetime) -> Q:
+    """Unresolved cases past their resolution deadline."""
+    return Q(resolved_at__isnull=True) & _past_due(RESOLUTION_DUE, now)
+
+
+def sla_breached(now: datetime) -> Q:
+    """Either SLA breached. Served by the two partial ``(org, due)`` indexes."""
+    return first_response_breached(now) | resolution_breached(now)
+
+
+def recompute_sla_deadlines(queryset, compiled, batch_size: int = 1000) -> int:
+    """Recompute the stored deadlines of every case in ``queryset``.
+
+    ``compiled`` is the calendar the cases are on, so ``queryset`` holds one
+    org's cases. Works with a migration's historical model. Streams the rows
+    and writes back only those whose deadline moved; returns how many.
+    """
+    fields = ("id", *SLA_INPUTS, *DUE_FIELDS)
+    changed = []
+    updated = 0
+    for case in queryset.only(*fields).order_by("pk").iterator(chunk_size=batch_size):
+        dirty = False
+        for field, hours in (
+            (FIRST_RESPONSE_DUE, case.sla_first_response_hours),
+            (RESOLUTION_DUE, case.sla_resolution_hours),
+        ):
+            due = sla_due_at(case.created_at, hours, case.sla_paused_seconds, compiled)
+            if getattr(case, field) != due:
+                setattr(case, field, due)
+                dirty = True
+        if dirty:
+            changed.append(case)
+        if len(changed) >= batch_size:
+            queryset.model.objects.bulk_update(changed, DUE_FIELDS)
+            updated += len(changed)
+            changed = []
+    if changed:
+        queryset.model.objects.bulk_update(changed, DUE_FIELDS)
+        updated += len(changed)
+    return updated
+
+
+def recompute_org_sla_deadlines(org_id) -> int:
+    """Recompute every deadline in the org against its current calendar."""
+    from cases.models import Case
+
+    return recompute_sla_deadlines(
+        Case.objects.filter(org_id=org_id), org_calendar(org_id)
+    )
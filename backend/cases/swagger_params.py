@@ -7,6 +7,8 @@ The ``org`` header parameter that used to lead every list here is gone; see
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter
 
+from common.swagger_params import list_page_params
+
 organization_params = []
 
 cases_list_get_params = [
@@ -14,4 +16,5 @@ cases_list_get_params = [
     OpenApiParameter("status", OpenApiTypes.STR, OpenApiParameter.QUERY),
     OpenApiParameter("priority", OpenApiTypes.STR, OpenApiParameter.QUERY),
     OpenApiParameter("account", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    *list_page_params,
 ]
@@ -1,20 +1,29 @@
 import hashlib
 import logging
+from collections import defaultdict
 from datetime import timedelta
 
 from celery import shared_task
 from django.core.mail import EmailMessage
 from django.core.signing import TimestampSigner
-from django.db.models import Q
+from django.db.models import BooleanField, ExpressionWrapper, Q
 from django.template.loader import render_to_string
 from django.utils import timezone
 
-from cases.models import Case, CsatSurvey, EscalationPolicy, TimeEntry
+from cases import sla
+from cases.models import (
+    Case,
+    CsatSurvey,
+    EscalationPolicy,
+    EscalationScanRun,
+    TimeEntry,
+)
 from cases.notifications import case_link
 from cases.workflow import TERMINAL_STATUSES
 from common.links import frontend_url
-from common.models import Activity, Org, Profile
-from common.tasks import set_rls_context
+from common.models import Activity, Org, Profile, Teams
+from common.org_time import activate_org_timezone
+from common.tasks import clear_rls_context, set_rls_context
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +41,16 @@ CSAT_SIGNER_SALT = "cases.csat_survey"
 ESCALATION_COUNT_CAP = 3
 # Minimum gap between escalation attempts on the same case (prevents storming).
 ESCALATION_COOLDOWN_MINUTES = 60
+# Breached cases are escalated, and their counters and activities written, this
+# many at a time.
+ESCALATION_BATCH_SIZE = 500
+# The beat interval of `scan_for_breached_cases`. A run longer than this is
+# logged, and the tick that lands on it skips.
+SCAN_INTERVAL = timedelta(minutes=5)
+# A run with no `finished_at` after this long is presumed dead and stops
+# blocking later ticks.
+SCAN_RUN_LEASE = timedelta(minutes=30)
+SCAN_RUN_RETENTION_DAYS = 14
 
 
 @shared_task
@@ -60,132 +79,216 @@ def send_email_to_assigned_user(recipients, case_id, org_id):
             msg.send()
 
 
-def _dispatch_breach(case, action, target_profile, team, org_id):
-    """Apply one breach action (notify / reassign / notify_and_reassign).
+def _breach_recipients(target_id, team_member_ids):
+    """Who a notify action emails: the policy's target, then its team."""
+    recipients = []
+    if target_id is not None:
+        recipients.append(str(target_id))
+    recipients.extend(str(pid) for pid in team_member_ids)
+    # de-dupe while preserving order
+    seen = set()
+    return [r for r in recipients if not (r in seen or seen.add(r))]
+
+
+def _team_members(policies):
+    """Active member ids of every team the org's policies CC, in one query."""
+    team_ids = {p.notify_team_id for p in policies if p.notify_team_id}
+    members = defaultdict(list)
+    if team_ids:
+        rows = (
+            Teams.users.through.objects.filter(
+                teams_id__in=team_ids, profile__is_active=True
+            )
+            .order_by("pk")
+            .values_list("teams_id", "profile_id")
+        )
+        for team_id, profile_id in rows:
+            members[team_id].append(profile_id)
+    return members
+
+
+def _escalate_batch(batch, policies, team_members, digests, now, org_id):
+    """Apply the policies to one batch of breached cases. Returns escalations.
 
-    Returns the list of profile_ids that received an email so callers can record
-    them in the Activity metadata. Reassignment replaces the assignee set.
+    Counters and ESCALATED activities are written with one ``bulk_update`` and
+    one ``bulk_create`` for the batch. Reassignment stays a per-case
+    ``assigned_to.set``: the m2m signals behind it (ASSIGN activity, search
+    visibility, dashboard and rollup invalidation) are what keep the rest of
+    the app in step with a new assignee. Notifications are only collected
+    into ``digests`` (recipient -> case ids), sent once per run.
     """
-    notified_ids = []
-    if action in ("reassign", "notify_and_reassign") and target_profile is not None:
-        case.assigned_to.set([target_profile])
-    if action in ("notify", "notify_and_reassign"):
-        recipients = []
-        if target_profile is not None:
-            recipients.append(str(target_profile.id))
-        if team is not None:
-            recipients.extend(
-                str(pid)
-                for pid in team.users.filter(is_active=True).values_list(
-                    "id", flat=True
+    escalated, activities = [], []
+    for case in batch:
+        policy = policies[case.priority]
+        breaches_metadata = []
+        reassign_to = None
+        for breach_type, breached, action, target_id in (
+            (
+                "first_response",
+                case.first_response_breach,
+                policy.first_response_action,
+                policy.first_response_target_id,
+            ),
+            (
+                "resolution",
+                case.resolution_breach,
+                policy.resolution_action,
+                policy.resolution_target_id,
+            ),
+        ):
+            if not breached or target_id is None:
+                continue
+            notified = []
+            if action in ("reassign", "notify_and_reassign"):
+                reassign_to = target_id
+            if action in ("notify", "notify_and_reassign"):
+                notified = _breach_recipients(
+                    target_id, team_members.get(policy.notify_team_id, ())
                 )
+                for profile_id in notified:
+                    if case.pk not in digests[profile_id]:
+                        digests[profile_id].append(case.pk)
+            breaches_metadata.append(
+                {
+                    "breach_type": breach_type,
+                    "action": action,
+                    "target_profile_id": str(target_id),
+                    "notified_profile_ids": notified,
+                }
             )
-        # de-dupe while preserving order
-        seen = set()
-        recipients = [r for r in recipients if not (r in seen or seen.add(r))]
-        if recipients:
-            try:
-                send_email_to_assigned_user.delay(recipients, str(case.id), str(org_id))
-            except (
-                Exception
-            ):  # pragma: no cover. Broker glitches shouldn't lose the escalation
-                logger.exception(
-                    "Failed to enqueue escalation email for case=%s", case.pk
-                )
-            notified_ids = recipients
-    return notified_ids
+        if not breaches_metadata:
+            continue
 
+        if reassign_to is not None:
+            case.assigned_to.set([reassign_to])
+        case.escalation_count = (case.escalation_count or 0) + 1
+        case.last_escalation_fired_at = now
+        case.updated_at = now
+        escalated.append(case)
+        activities.append(
+            Activity(
+                user=None,
+                action="ESCALATED",
+                entity_type="Case",
+                entity_id=case.pk,
+                entity_name=str(case)[:255],
+                metadata={
+                    "breaches": breaches_metadata,
+                    "policy_id": str(policy.id),
+                    "escalation_count": case.escalation_count,
+                },
+                org_id=org_id,
+            )
+        )
 
-def _scan_org(org):
-    """Run the breach scan for one org. Returns count of cases escalated."""
-    now = timezone.now()
-    cooldown_cutoff = now - timezone.timedelta(minutes=ESCALATION_COOLDOWN_MINUTES)
+    if escalated:
+        Case.objects.bulk_update(
+            escalated, ["escalation_count", "last_escalation_fired_at", "updated_at"]
+        )
+        Activity.objects.bulk_create(activities)
+    return len(escalated)
+
+
+def _scan_org(org, now=None):
+    """Run the breach scan for one org.
+
+    Returns ``(breached, escalated, notifications)``: the candidate cases past
+    a deadline, how many of them a policy escalated, and the digest emails
+    enqueued.
+    """
+    now = now or timezone.now()
+    policies = {
+        p.priority: p for p in EscalationPolicy.objects.filter(org=org, is_active=True)
+    }
+    if not policies:
+        return 0, 0, 0
 
+    cooldown_cutoff = now - timezone.timedelta(minutes=ESCALATION_COOLDOWN_MINUTES)
     candidate_qs = (
-        Case.objects.filter(org=org, is_active=True)
+        Case.objects.filter(org=org, is_active=True, priority__in=list(policies))
         .exclude(status__in=TERMINAL_STATUSES)
         .filter(escalation_count__lt=ESCALATION_COUNT_CAP)
         .filter(
             Q(last_escalation_fired_at__isnull=True)
             | Q(last_escalation_fired_at__lt=cooldown_cutoff)
         )
+        # Only the cases past a stored deadline: a range scan on the partial
+        # (org, due) indexes rather than every open case of the org. Which
+        # SLA was breached comes back with the row.
+        .filter(sla.sla_breached(now))
+        .annotate(
+            first_response_breach=ExpressionWrapper(
+                sla.first_response_breached(now), output_field=BooleanField()
+            ),
+            resolution_breach=ExpressionWrapper(
+                sla.resolution_breached(now), output_field=BooleanField()
+            ),
+        )
+        .only("id", "name", "priority", "org_id", "escalation_count")
+        .order_by("pk")
     )
 
-    fired = 0
-    policies = {
-        p.priority: p for p in EscalationPolicy.objects.filter(org=org, is_active=True)
-    }
-    if not policies:
-        return 0
-
-    for case in candidate_qs.iterator():
-        first_breach = case.is_sla_first_response_breached
-        resolution_breach = case.is_sla_resolution_breached
-        if not (first_breach or resolution_breach):
-            continue
-
-        policy = policies.get(case.priority)
-        if policy is None:
-            continue
-
-        breaches_metadata = []
-        if first_breach and policy.first_response_target_id is not None:
-            notified = _dispatch_breach(
-                case,
-                policy.first_response_action,
-                policy.first_response_target,
-                policy.notify_team,
-                org.id,
+    team_members = _team_members(policies.values())
+    digests = defaultdict(list)
+    breached = escalated = 0
+    batch = []
+    for case in candidate_qs.iterator(chunk_size=ESCALATION_BATCH_SIZE):
+        breached += 1
+        batch.append(case)
+        if len(batch) >= ESCALATION_BATCH_SIZE:
+            escalated += _escalate_batch(
+                batch, policies, team_members, digests, now, org.id
             )
-            breaches_metadata.append(
-                {
-                    "breach_type": "first_response",
-                    "action": policy.first_response_action,
-                    "target_profile_id": str(policy.first_response_target_id),
-                    "notified_profile_ids": notified,
-                }
-            )
-        if resolution_breach and policy.resolution_target_id is not None:
-            notified = _dispatch_breach(
-                case,
-                policy.resolution_action,
-                policy.resolution_target,
-                policy.notify_team,
-                org.id,
+            batch = []
+    if batch:
+        escalated += _escalate_batch(
+            batch, policies, team_members, digests, now, org.id
+        )
+
+    for profile_id, case_ids in digests.items():
+        try:
+            send_escalation_digest.delay(
+                profile_id, [str(pk) for pk in case_ids], str(org.id)
             )
-            breaches_metadata.append(
-                {
-                    "breach_type": "resolution",
-                    "action": policy.resolution_action,
-                    "target_profile_id": str(policy.resolution_target_id),
-                    "notified_profile_ids": notified,
-                }
+        except (
+            Exception
+        ):  # pragma: no cover. Broker glitches shouldn't lose the escalation
+            logger.exception(
+                "Failed to enqueue escalation digest for profile=%s", profile_id
             )
+    return breached, escalated, len(digests)
 
-        if not breaches_metadata:
-            continue
 
-        case.escalation_count = (case.escalation_count or 0) + 1
-        case.last_escalation_fired_at = now
-        case.save(
-            update_fields=["escalation_count", "last_escalation_fired_at", "updated_at"]
-        )
-        Activity.objects.create(
-            user=None,
-            action="ESCALATED",
-            entity_type="Case",
-            entity_id=case.pk,
-            entity_name=str(case)[:255],
-            metadata={
-                "breaches": breaches_metadata,
-                "policy_id": str(policy.id),
-                "escalation_count": case.escalation_count,
-            },
-            org_id=org.id,
-        )
-        fired += 1
+def _begin_scan_run(now):
+    """Record a run starting, or a skipped one if another is still going.
 
-    return fired
+    A run unfinished after ``SCAN_RUN_LEASE`` is taken to have died (a killed
+    worker never writes ``finished_at``) and no longer blocks. On Postgres the
+    check and the insert hold a transaction-scoped advisory lock, so two
+    workers picking up the same tick cannot both see the table empty.
+    """
+    from django.db import connection, transaction
+
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT pg_advisory_xact_lock(hashtext(%s))",
+                    ["cases.scan_for_breached_cases"],
+                )
+        running = EscalationScanRun.objects.filter(
+            finished_at__isnull=True, started_at__gte=now - SCAN_RUN_LEASE
+        ).first()
+        if running is not None:
+            logger.warning(
+                "Escalation scan skipped: the run started at %s is still going",
+                running.started_at,
+            )
+            EscalationScanRun.objects.create(
+                started_at=now, finished_at=now, duration_ms=0, skipped=True
+            )
+            return None
+        return EscalationScanRun.objects.create(started_at=now)
 
 
 @shared_task
@@ -193,34 +296,105 @@ def scan_for_breached_cases():
     """Periodic scanner that fires escalation actions on SLA-breached cases.
 
     Runs once every 5 minutes via Celery beat. For each org with at least one
-    active EscalationPolicy, checks non-terminal cases past either SLA deadline
-    that haven't escalated within the last hour and whose escalation_count is
-    below the cap, then dispatches the configured action(s) and records a single
-    Activity(action='ESCALATED').
+    active EscalationPolicy, selects the non-terminal cases past either SLA
+    deadline that haven't escalated within the last hour and whose
+    escalation_count is below the cap, dispatches the configured action(s) and
+    records a single Activity(action='ESCALATED') per case. Each recipient gets
+    one digest email per run, however many of their cases breached.
+
+    Every run is recorded as an `EscalationScanRun` with its duration and
+    counts; a tick that finds the previous run still going skips itself.
+    Returns the number of cases escalated.
     """
-    total = 0
+    started = timezone.now()
+    run = _begin_scan_run(started)
+    if run is None:
+        return 0
+
+    total = breached = notifications = orgs = 0
     org_ids = (
         EscalationPolicy.objects.filter(is_active=True)
         .values_list("org_id", flat=True)
         .distinct()
     )
-    for org in Org.objects.filter(id__in=list(org_ids)):
-        set_rls_context(org.id)
-        try:
-            total += _scan_org(org)
-        except Exception:  # pragma: no cover
-            logger.exception("Escalation scan failed for org=%s", org.id)
-    # Reset RLS context so the worker doesn't leak the last org's context to
-    # whatever task runs next on the same connection. set_rls_context() no-ops
-    # on falsy values, so clear the session variable directly.
-    from django.db import connection
-
-    if connection.vendor == "postgresql":
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT set_config('app.current_org', '', false)")
+    try:
+        for org in Org.objects.filter(id__in=list(org_ids)):
+            set_rls_context(org.id)
+            orgs += 1
+            try:
+                org_breached, org_escalated, org_sent = _scan_org(org, started)
+            except Exception:  # pragma: no cover
+                logger.exception("Escalation scan failed for org=%s", org.id)
+                continue
+            breached += org_breached
+            total += org_escalated
+            notifications += org_sent
+    finally:
+        # Reset RLS context so the worker doesn't leak the last org's context
+        # to whatever task runs next on the same connection.
+        clear_rls_context()
+        finished = timezone.now()
+        run.finished_at = finished
+        run.duration_ms = int((finished - started).total_seconds() * 1000)
+        run.orgs_scanned = orgs
+        run.cases_breached = breached
+        run.cases_escalated = total
+        run.notifications_sent = notifications
+        run.save()
+        if finished - started > SCAN_INTERVAL:
+            logger.warning(
+                "Escalation scan took %sms, longer than the beat interval",
+                run.duration_ms,
+            )
+        EscalationScanRun.objects.filter(
+            started_at__lt=started - timedelta(days=SCAN_RUN_RETENTION_DAYS)
+        ).delete()
     return total
 
 
+@shared_task
+def send_escalation_digest(profile_id, case_ids, org_id):
+    """Email one recipient every case escalated to them in a scan run."""
+    set_rls_context(org_id)
+    try:
+        profile = (
+            Profile.objects.select_related("user")
+            .filter(id=profile_id, is_active=True)
+            .first()
+        )
+        if profile is None:
+            return
+        cases = list(
+            Case.objects.filter(id__in=case_ids)
+            .order_by("created_at")
+            .only("id", "name", "priority")
+        )
+        if not cases:
+            return
+        context = {
+            "user": profile.user,
+            "cases": [
+                {
+                    "name": case.name,
+                    "priority": case.priority,
+                    "url": frontend_url(case_link(case.id)),
+                }
+                for case in cases
+            ],
+            "case_count": len(cases),
+            "url": frontend_url("/tickets"),
+        }
+        subject = (
+            f"[BottleCRM] {len(cases)} case{'s' if len(cases) > 1 else ''} breached SLA"
+        )
+        html_content = render_to_string("cases/escalation_digest.html", context=context)
+        msg = EmailMessage(subject, html_content, to=[profile.user.email])
+        msg.content_subtype = "html"
+        msg.send()
+    finally:
+        clear_rls_context()
+
+
 # ---------------------------------------------------------------------------
 # CSAT (Tier 2 csat)
 
@@ -390,3 +564,52 @@ def auto_stop_stale_timers(threshold_hours=TIME_ENTRY_AUTO_STOP_HOURS):
         with connection.cursor() as cursor:
             cursor.execute("SELECT set_config('app.current_org', '', false)")
     return stopped
+
+
+# ---------------------------------------------------------------------------
+# Service overview rollup (cases/metrics_rollup.py).
+
+
+@shared_task
+def reconcile_case_daily_metrics(days=None):
+    """Nightly: rebuild each org's recent and flagged rollup days.
+
+    Readers rebuild what they need on their own; this runs ahead of them so a
+    morning page load finds every day current, and rebuilds the last
+    ``days`` (default `metrics_rollup.RECONCILE_DAYS`) outright, which covers
+    writes that changed a case without marking its day (raw SQL, a reverse
+    clear of assignees). Days are the org's, so its timezone is activated.
+
+    Returns the number of org-days rebuilt.
+    """
+    from cases import metrics_rollup
+
+    days = metrics_rollup.RECONCILE_DAYS if days is None else days
+    rebuilt = 0
+    try:
+        for org in Org.objects.filter(is_active=True).iterator():
+            set_rls_context(org.id)
+            activate_org_timezone(org)
+            try:
+                rebuilt += metrics_rollup.reconcile(org.id, days)
+            except Exception:  # pragma: no cover
+                logger.exception("Case metrics reconcile failed for org=%s", org.id)
+    finally:
+        timezone.deactivate()
+        clear_rls_context()
+    return rebuilt
+
+
+@shared_task
+def recompute_case_sla_deadlines(org_id):
+    """Recompute the org's stored SLA deadlines against its current calendar.
+
+    Enqueued when a business calendar or holiday of the org changes (see
+    `cases/signals.py`); the case saves themselves keep the columns current
+    otherwise. Returns the number of cases whose deadline moved.
+    """
+    set_rls_context(org_id)
+    try:
+        return sla.recompute_org_sla_deadlines(org_id)
+    finally:
+        clear_rls_context()
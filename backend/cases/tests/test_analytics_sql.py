@@ -0,0 +1,188 @@
+"""Tests for the PostgreSQL aggregation path (cases/analytics_sql.py).
+
+On PostgreSQL the analytics functions compute percentiles and counts in the
+database; elsewhere they reduce rows in Python. The Python path is the
+reference, so the first class checks the dispatch on any database and the
+second runs both paths over the same cases and expects the same payloads.
+That one needs ``percentile_cont`` and runs only under
+``--ds=crm.test_settings_postgres``.
+"""
+
+from __future__ import annotations
+
+import random
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+
+from cases import analytics, analytics_sql
+from cases.models import Case, CsatSurvey
+
+
+@pytest.fixture
+def cases_qs(org_a):
+    return Case.objects.filter(org=org_a)
+
+
+class TestDispatch:
+    @pytest.mark.parametrize(
+        "compute, target",
+        [
+            (analytics.compute_frt, "frt"),
+            (analytics.compute_mttr, "mttr"),
+            (analytics.compute_agents, "agents"),
+        ],
+    )
+    def test_postgres_reads_the_database_path(
+        self, compute, target, monkeypatch, cases_qs
+    ):
+        monkeypatch.setattr(analytics, "_in_database", lambda: True)
+        monkeypatch.setattr(analytics_sql, target, lambda *args: "from sql")
+        assert compute(cases_qs) == "from sql"
+
+    def test_service_overview_formats_the_database_figures(
+        self, monkeypatch, cases_qs, org_a
+    ):
+        figures = {
+            "opened": 3,
+            "closed": 1,
+            "median_resolution_hours": 2.4,
+            "opened_by_day": {timezone.localdate(): 3},
+            "closed_by_day": {},
+            "type_counts": {"Incident": 2, "Uncategorized": 1},
+            "first_response": {
+                "High": {
+                    "median_minutes": 90.4,
+                    "responded": 2,
+                    "met": 1,
+                    "breached": 1,
+                }
+            },
+            "agents": {},
+            "unassigned": {
+                "median_minutes": None,
+                "responded": 0,
+                "met": 0,
+                "breached": 0,
+                "open": 0,
+                "closed_this_week": 0,
+            },
+        }
+        monkeypatch.setattr(analytics, "_in_database", lambda: True)
+        monkeypatch.setattr(analytics_sql, "service_figures", lambda *args: figures)
+
+        out = analytics.compute_service_overview(cases_qs, org_a.id, days=7)
+
+        assert out["totals"]["opened"] == 3
+        assert out["totals"]["median_resolution_hours"] == 2
+        assert out["volume"][-1]["opened"] == 3
+        assert out["by_type"] == [
+            {"case_type": "Incident", "count": 2},
+            {"case_type": "Uncategorized", "count": 1},
+        ]
+        high = next(r for r in out["first_response"] if r["priority"] == "High")
+        assert (high["median_minutes"], high["met"], high["missed"]) == (90, 1, 1)
+        assert out["by_agent"] == []
+
+
+def _seed(org, profiles, n=60, seed=7):
+    """``n`` cases over the last ten days: a mix of responded, resolved,
+    overdue, multi-assignee, unassigned and surveyed."""
+    rng = random.Random(seed)
+    now = timezone.now()
+    for i in range(n):
+        case = Case.objects.create(
+            org=org,
+            name=f"Case {i}",
+            status=rng.choice(["New", "Assigned", "Closed"]),
+            priority=rng.choice(["Urgent", "High", "Normal", "Low"]),
+            case_type=rng.choice(["Incident", "Question", None, ""]),
+            sla_first_response_hours=rng.choice([1, 4, 8]),
+            sla_resolution_hours=rng.choice([8, 24, 72]),
+        )
+        created = now - timedelta(minutes=rng.randrange(10 * 24 * 60))
+        fields = {"created_at": created}
+        if rng.random() < 0.7:
+            fields["first_response_at"] = created + timedelta(
+                minutes=rng.randrange(12 * 60)
+            )
+        if rng.random() < 0.5:
+            resolved = created + timedelta(minutes=rng.randrange(4 * 24 * 60))
+            fields["resolved_at"] = min(resolved, now)
+        Case.objects.filter(pk=case.pk).update(**fields)
+        case.assigned_to.set(rng.sample(profiles, rng.randrange(len(profiles) + 1)))
+        if rng.random() < 0.3:
+            CsatSurvey.objects.create(
+                org=org,
+                case=case,
+                token_hash=f"{i:064d}",
+                sent_at=now,
+                expires_at=now + timedelta(days=7),
+                rating=rng.randrange(1, 6),
+            )
+
+
+def _both_paths(monkeypatch, compute):
+    monkeypatch.setattr(analytics, "_in_database", lambda: False)
+    python = compute()
+    monkeypatch.setattr(analytics, "_in_database", lambda: True)
+    return python, compute()
+
+
+def _close(a, b):
+    if a is None or b is None:
+        return a is b
+    return a == pytest.approx(b, abs=1e-6)
+
+
+@pytest.mark.postgres_only
+@pytest.mark.django_db
+class TestMatchesPython:
+    @pytest.fixture(autouse=True)
+    def _require_postgres(self, org_a, admin_profile, user_profile, settings):
+        if connection.vendor != "postgresql":
+            pytest.skip("percentile_cont requires PostgreSQL")
+        settings.TIME_ZONE = "Asia/Kolkata"
+        with timezone.override("Asia/Kolkata"):
+            _seed(org_a, [admin_profile, user_profile])
+            yield
+
+    def test_frt(self, monkeypatch, cases_qs):
+        py, sql = _both_paths(monkeypatch, lambda: analytics.compute_frt(cases_qs))
+        for key in ("median_hours", "p90_hours"):
+            assert _close(py[key], sql[key])
+        assert py["count"] == sql["count"]
+        assert py["breach_count"] == sql["breach_count"]
+        assert set(py["breach_case_ids"]) == set(sql["breach_case_ids"])
+        assert sorted(py["case_ids"]) == sorted(sql["case_ids"])
+        for a, b in zip(py["series"], sql["series"], strict=True):
+            assert (a["bucket"], a["count"]) == (b["bucket"], b["count"])
+            assert _close(a["median"], b["median"])
+
+    def test_mttr(self, monkeypatch, cases_qs):
+        py, sql = _both_paths(monkeypatch, lambda: analytics.compute_mttr(cases_qs))
+        assert py["count"] == sql["count"]
+        assert py["by_priority"].keys() == sql["by_priority"].keys()
+        for key in ("mean_hours", "median_hours", "p90_hours"):
+            assert _close(py[key], sql[key])
+            for prio in py["by_priority"]:
+                assert _close(
+                    py["by_priority"][prio][key], sql["by_priority"][prio][key]
+                )
+
+    def test_agents(self, monkeypatch, cases_qs):
+        py, sql = _both_paths(monkeypatch, lambda: analytics.compute_agents(cases_qs))
+        assert [r["profile_id"] for r in py] == [r["profile_id"] for r in sql]
+        for a, b in zip(py, sql, strict=True):
+            assert a["handled"] == b["handled"]
+            for key in ("avg_frt_hours", "csat_avg", "breach_rate"):
+                assert _close(a[key], b[key])
+
+    def test_service_overview(self, monkeypatch, cases_qs, org_a):
+        py, sql = _both_paths(
+            monkeypatch,
+            lambda: analytics.compute_service_overview(cases_qs, org_a.id, days=14),
+        )
+        assert py == sql
@@ -158,14 +158,17 @@ class TestCloseGate:
 
 @pytest.mark.django_db
 class TestRequestApprovalEndpoint:
-    def test_auto_resolves_rule(self, admin_client, admin_user, org_a):
+    def test_auto_resolves_rule(
+        self, admin_client, admin_user, org_a, django_capture_on_commit_callbacks
+    ):
         case = _make_case(org_a, admin_user, priority="Urgent")
         _make_rule(org_a, match_priority="Urgent")
-        res = admin_client.post(
-            f"/api/cases/{case.id}/request-approval/",
-            data={"note": "please review"},
-            format="json",
-        )
+        with django_capture_on_commit_callbacks(execute=True):
+            res = admin_client.post(
+                f"/api/cases/{case.id}/request-approval/",
+                data={"note": "please review"},
+                format="json",
+            )
         assert res.status_code == 201, res.content
         assert res.data["state"] == "pending"
         assert res.data["case_summary"]["id"] == str(case.id)
@@ -218,16 +221,23 @@ class TestStateTransitions:
         return case, rule, approval
 
     def test_approve_records_activity(
-        self, admin_client, admin_profile, user_profile, regular_user, org_a
+        self,
+        admin_client,
+        admin_profile,
+        user_profile,
+        regular_user,
+        org_a,
+        django_capture_on_commit_callbacks,
     ):
         # Requested by the USER, approved by the admin. A requester and an
         # approver who are different people, which the rule now requires.
         case, rule, approval = self._setup(org_a, user_profile, regular_user)
-        res = admin_client.post(
-            f"/api/cases/approvals/{approval.id}/approve/",
-            data={"note": "ok"},
-            format="json",
-        )
+        with django_capture_on_commit_callbacks(execute=True):
+            res = admin_client.post(
+                f"/api/cases/approvals/{approval.id}/approve/",
+                data={"note": "ok"},
+                format="json",
+            )
         assert res.status_code == 200
         assert res.data["state"] == "approved"
         approval.refresh_from_db()
@@ -236,7 +246,13 @@ class TestStateTransitions:
         assert Activity.objects.filter(entity_id=case.id, action="APPROVED").exists()
 
     def test_reject_requires_reason(
-        self, admin_client, admin_profile, user_profile, regular_user, org_a
+        self,
+        admin_client,
+        admin_profile,
+        user_profile,
+        regular_user,
+        org_a,
+        django_capture_on_commit_callbacks,
     ):
         case, rule, approval = self._setup(org_a, user_profile, regular_user)
         bare = admin_client.post(
@@ -244,11 +260,12 @@ class TestStateTransitions:
         )
         assert bare.status_code == 400
 
-        ok = admin_client.post(
-            f"/api/cases/approvals/{approval.id}/reject/",
-            data={"reason": "needs more triage"},
-            format="json",
-        )
+        with django_capture_on_commit_callbacks(execute=True):
+            ok = admin_client.post(
+                f"/api/cases/approvals/{approval.id}/reject/",
+                data={"reason": "needs more triage"},
+                format="json",
+            )
         assert ok.status_code == 200
         approval.refresh_from_db()
         assert approval.state == "rejected"
@@ -292,6 +309,7 @@ class TestStateTransitions:
         regular_user,
         user_profile,
         org_a,
+        django_capture_on_commit_callbacks,
     ):
         # Approval requested by `user_profile`, attempted cancel by ADMIN succeeds.
         case = _make_case(org_a, regular_user, priority="Urgent")
@@ -305,9 +323,10 @@ class TestStateTransitions:
         )
 
         # Admin cancels (allowed).
-        res = admin_client.post(
-            f"/api/cases/approvals/{approval.id}/cancel/", data={}, format="json"
-        )
+        with django_capture_on_commit_callbacks(execute=True):
+            res = admin_client.post(
+                f"/api/cases/approvals/{approval.id}/cancel/", data={}, format="json"
+            )
         assert res.status_code == 200, res.content
         approval.refresh_from_db()
         assert approval.state == "cancelled"
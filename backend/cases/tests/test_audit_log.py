@@ -21,16 +21,20 @@ def _case_activities(case):
 
 @pytest.mark.django_db
 class TestCaseSignalActivities:
-    def test_create_emits_create_activity(self, admin_client, org_a):
-        # Use the API so request middleware sets crum's current user.
-        response = admin_client.post(
-            "/api/cases/",
-            {
-                "name": "New audited case",
-                "status": "New",
-                "priority": "High",
-            },
-        )
+    def test_create_emits_create_activity(
+        self, admin_client, org_a, django_capture_on_commit_callbacks
+    ):
+        # Use the API so request middleware sets crum's current user. The
+        # request's activity rows are written when its transaction commits.
+        with django_capture_on_commit_callbacks(execute=True):
+            response = admin_client.post(
+                "/api/cases/",
+                {
+                    "name": "New audited case",
+                    "status": "New",
+                    "priority": "High",
+                },
+            )
         assert response.status_code == 200
         case_id = response.json()["id"]
         rows = list(
@@ -40,12 +44,15 @@ class TestCaseSignalActivities:
         )
         assert "CREATE" in rows
 
-    def test_status_change_emits_status_changed(self, admin_client, case_a):
-        response = admin_client.patch(
-            f"/api/cases/{case_a.pk}/",
-            {"status": "Pending"},
-            content_type="application/json",
-        )
+    def test_status_change_emits_status_changed(
+        self, admin_client, case_a, django_capture_on_commit_callbacks
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            response = admin_client.patch(
+                f"/api/cases/{case_a.pk}/",
+                {"status": "Pending"},
+                content_type="application/json",
+            )
         assert response.status_code == 200, response.content
         rows = _case_activities(case_a)
         status_rows = [r for r in rows if r.action == "STATUS_CHANGED"]
@@ -53,12 +60,15 @@ class TestCaseSignalActivities:
         meta = status_rows[0].metadata
         assert meta == {"before": "New", "after": "Pending"}
 
-    def test_priority_change_emits_priority_changed(self, admin_client, case_a):
-        response = admin_client.patch(
-            f"/api/cases/{case_a.pk}/",
-            {"priority": "Urgent"},
-            content_type="application/json",
-        )
+    def test_priority_change_emits_priority_changed(
+        self, admin_client, case_a, django_capture_on_commit_callbacks
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            response = admin_client.patch(
+                f"/api/cases/{case_a.pk}/",
+                {"priority": "Urgent"},
+                content_type="application/json",
+            )
         assert response.status_code == 200, response.content
         priority_rows = [
             r for r in _case_activities(case_a) if r.action == "PRIORITY_CHANGED"
@@ -131,13 +141,16 @@ class TestCaseSignalActivities:
 
 @pytest.mark.django_db
 class TestActivityFeedAPI:
-    def test_detail_includes_recent_activities(self, admin_client, case_a):
+    def test_detail_includes_recent_activities(
+        self, admin_client, case_a, django_capture_on_commit_callbacks
+    ):
         # Generate a couple of activity rows.
-        admin_client.patch(
-            f"/api/cases/{case_a.pk}/",
-            {"status": "Pending"},
-            content_type="application/json",
-        )
+        with django_capture_on_commit_callbacks(execute=True):
+            admin_client.patch(
+                f"/api/cases/{case_a.pk}/",
+                {"status": "Pending"},
+                content_type="application/json",
+            )
         response = admin_client.get(f"/api/cases/{case_a.pk}/")
         assert response.status_code == 200
         data = response.json()
@@ -146,14 +159,17 @@ class TestActivityFeedAPI:
         actions = {row["action"] for row in data["activities"]}
         assert "STATUS_CHANGED" in actions
 
-    def test_activities_endpoint_paginates(self, admin_client, case_a):
+    def test_activities_endpoint_paginates(
+        self, admin_client, case_a, django_capture_on_commit_callbacks
+    ):
         # Drive enough rows to paginate (status flips back-and-forth).
         for status in ("Pending", "New", "Pending", "New", "Pending"):
-            admin_client.patch(
-                f"/api/cases/{case_a.pk}/",
-                {"status": status},
-                content_type="application/json",
-            )
+            with django_capture_on_commit_callbacks(execute=True):
+                admin_client.patch(
+                    f"/api/cases/{case_a.pk}/",
+                    {"status": status},
+                    content_type="application/json",
+                )
         response = admin_client.get(f"/api/cases/{case_a.pk}/activities/?limit=2")
         assert response.status_code == 200
         body = response.json()
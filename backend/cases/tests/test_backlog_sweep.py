@@ -0,0 +1,131 @@
+"""Tests for the backlog sweep (cases.analytics._backlog_series).
+
+The sweep replaced a loop that checked every case against every day, so the
+first class holds it to that loop's answers on randomized data, boundaries
+and org timezones included. The benchmark class pins the cost on synthetic
+windows far larger than the test database could hold.
+"""
+
+import random
+import time
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+
+import pytest
+from django.utils import timezone
+
+from cases import analytics
+
+
+def _naive_series(rows, days):
+    """The per-day loop compute_backlog used before the sweep."""
+    series = []
+    for d in days:
+        end_of_day = analytics._day_start(d + timedelta(days=1))
+        open_count = urgent_count = 0
+        for created_at, resolved_at, priority in rows:
+            if created_at >= end_of_day:
+                continue
+            if resolved_at is not None and resolved_at <= end_of_day:
+                continue
+            open_count += 1
+            if priority == "Urgent":
+                urgent_count += 1
+        series.append(
+            {
+                "date": d.isoformat(),
+                "open_count": open_count,
+                "urgent_count": urgent_count,
+            }
+        )
+    return series
+
+
+def _window(days):
+    start = date(2026, 1, 1)
+    return [start + timedelta(days=i) for i in range(days)]
+
+
+def _rows(n, days, seed=0):
+    """``n`` cases spread over ``days`` days from 2026-01-01, a third unresolved.
+
+    Some timestamps sit exactly on a UTC midnight so day boundaries get hit.
+    """
+    rng = random.Random(seed)
+    origin = datetime(2025, 12, 25, tzinfo=dt_timezone.utc)
+    span = (days + 14) * 86400
+    rows = []
+    for _ in range(n):
+        created = origin + timedelta(seconds=rng.randrange(span))
+        if rng.random() < 0.1:
+            created = created.replace(hour=0, minute=0, second=0)
+        if rng.random() < 0.33:
+            resolved = None
+        else:
+            resolved = created + timedelta(seconds=rng.randrange(10 * 86400))
+            if rng.random() < 0.1:
+                resolved = resolved.replace(hour=0, minute=0, second=0)
+                resolved = max(resolved, created)
+        rows.append((created, resolved, rng.choice(["Low", "Normal", "Urgent"])))
+    return rows
+
+
+class TestBacklogSweep:
+    @pytest.mark.parametrize("seed", range(5))
+    @pytest.mark.parametrize("tz", ["UTC", "Asia/Kolkata", "America/New_York"])
+    def test_matches_the_per_day_loop(self, seed, tz):
+        days = _window(45)
+        rows = _rows(400, 45, seed=seed)
+        with timezone.override(tz):
+            assert analytics._backlog_series(rows, days) == _naive_series(rows, days)
+
+    def test_created_on_a_boundary_counts_from_the_next_day(self):
+        days = _window(2)
+        with timezone.override("UTC"):
+            boundary = analytics._day_start(days[1])
+            out = analytics._backlog_series([(boundary, None, "Urgent")], days)
+        assert [row["open_count"] for row in out] == [0, 1]
+        assert [row["urgent_count"] for row in out] == [0, 1]
+
+    def test_resolved_on_a_boundary_is_closed_that_day(self):
+        days = _window(2)
+        with timezone.override("UTC"):
+            created = analytics._day_start(days[0])
+            resolved = analytics._day_start(days[1])
+            out = analytics._backlog_series([(created, resolved, "Low")], days)
+        assert [row["open_count"] for row in out] == [0, 0]
+
+    def test_no_days(self):
+        assert analytics._backlog_series(_rows(10, 5), []) == []
+
+
+@pytest.mark.slow
+class TestBacklogBenchmark:
+    """The sweep's cost is one bisect pair per case, not one check per case
+    per day. Wall-clock bounds, so ``slow`` and out of the CI selection; run
+    with ``-m slow``. Loose enough for a slow machine, and still fail by an
+    order of magnitude if the per-day loop comes back."""
+
+    def test_year_window_over_200k_cases(self):
+        days = _window(365)
+        rows = _rows(200_000, 365, seed=1)
+        with timezone.override("UTC"):
+            start = time.perf_counter()
+            series = analytics._backlog_series(rows, days)
+            elapsed = time.perf_counter() - start
+        assert len(series) == 365
+        # 73 million checks took over two minutes; the sweep, well under a second.
+        assert elapsed < 3.0
+
+    def test_sweep_beats_the_per_day_loop(self):
+        days = _window(90)
+        rows = _rows(10_000, 90, seed=2)
+        with timezone.override("UTC"):
+            start = time.perf_counter()
+            naive = _naive_series(rows, days)
+            naive_elapsed = time.perf_counter() - start
+            start = time.perf_counter()
+            sweep = analytics._backlog_series(rows, days)
+            sweep_elapsed = time.perf_counter() - start
+        assert sweep == naive
+        assert sweep_elapsed * 10 < naive_elapsed
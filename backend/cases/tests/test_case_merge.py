@@ -75,7 +75,12 @@ def _make_case(
 @pytest.mark.django_db
 class TestCaseMergeHappyPath:
     def test_merge_repoints_comments_attachments_and_emails(
-        self, admin_client, admin_user, admin_profile, org_a
+        self,
+        admin_client,
+        admin_user,
+        admin_profile,
+        org_a,
+        django_capture_on_commit_callbacks,
     ):
         primary = _make_case(org_a, admin_user, name="Primary")
         duplicate = _make_case(
@@ -95,7 +100,10 @@ class TestCaseMergeHappyPath:
             received_at=timezone.now(),
         )
 
-        response = admin_client.post(f"/api/cases/{duplicate.id}/merge/{primary.id}/")
+        with django_capture_on_commit_callbacks(execute=True):
+            response = admin_client.post(
+                f"/api/cases/{duplicate.id}/merge/{primary.id}/"
+            )
         assert response.status_code == 200, response.content
         body = response.json()
         assert body["error"] is False
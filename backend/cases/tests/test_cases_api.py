@@ -17,6 +17,7 @@ from rest_framework import status
 
 from accounts.models import Account
 from cases.models import Case, CasePipeline, CaseStage, Solution
+from cases.sla import recompute_org_sla_deadlines
 from common.models import Attachments, Comment, Tags, Teams
 from contacts.models import Contact
 
@@ -1491,6 +1492,8 @@ class TestCaseModelMethods:
         Case.objects.filter(pk=case.pk).update(
             created_at=timezone.now() - timedelta(hours=100)
         )
+        # A raw update bypasses save(); move the stored deadlines with it.
+        recompute_org_sla_deadlines(org_a.id)
         case.refresh_from_db()
         assert case.is_sla_first_response_breached is True
 
@@ -1530,6 +1533,8 @@ class TestCaseModelMethods:
         Case.objects.filter(pk=case.pk).update(
             created_at=timezone.now() - timedelta(hours=100)
         )
+        # A raw update bypasses save(); move the stored deadlines with it.
+        recompute_org_sla_deadlines(org_a.id)
         case.refresh_from_db()
         assert case.is_sla_resolution_breached is True
 
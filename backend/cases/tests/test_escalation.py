@@ -9,10 +9,18 @@ from datetime import timedelta
 from unittest.mock import patch
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
-from cases.models import Case, EscalationPolicy
-from cases.tasks import ESCALATION_COUNT_CAP
+from cases.models import Case, EscalationPolicy, EscalationScanRun
+from cases.sla import recompute_org_sla_deadlines
+from cases.tasks import (
+    ESCALATION_COUNT_CAP,
+    SCAN_RUN_LEASE,
+    SCAN_RUN_RETENTION_DAYS,
+    send_escalation_digest,
+)
 from cases.tasks import scan_for_breached_cases as _scan_for_breached_cases
 from common.models import Activity, Profile, Teams, User
 from conftest import restore_rls_context, rls_org
@@ -72,6 +80,9 @@ def _create_breached_case(admin_user, org, priority="Urgent", hours_old=5):
     Case.objects.filter(pk=case.pk).update(
         created_at=timezone.now() - timedelta(hours=hours_old)
     )
+    # A raw update bypasses save(); move the stored deadlines with it.
+    with rls_org(org):
+        recompute_org_sla_deadlines(org.id)
     case.refresh_from_db()
     return case
 
@@ -203,14 +214,14 @@ class TestEscalationPolicyAPI:
 
 @pytest.mark.django_db
 class TestScanForBreachedCases:
-    @patch("cases.tasks.send_email_to_assigned_user")
+    @patch("cases.tasks.send_escalation_digest")
     def test_no_policy_does_not_fire(self, mock_email, admin_user, org_a):
         _create_breached_case(admin_user, org_a)
         assert scan_for_breached_cases() == 0
         assert Activity.objects.filter(action="ESCALATED").count() == 0
         mock_email.delay.assert_not_called()
 
-    @patch("cases.tasks.send_email_to_assigned_user")
+    @patch("cases.tasks.send_escalation_digest")
     def test_notify_action_fires_once(self, mock_email, admin_user, org_a):
         target = _make_target_profile(org_a)
         _make_policy(
@@ -233,7 +244,7 @@ class TestScanForBreachedCases:
         assert breach_types == {"first_response", "resolution"}
         assert mock_email.delay.called
 
-    @patch("cases.tasks.send_email_to_assigned_user")
+    @patch("cases.tasks.send_escalation_digest")
     def test_reassign_action_replaces_assignee(self, mock_email, admin_user, org_a):
         target = _make_target_profile(org_a)
         other = _make_target_profile(org_a, "other@test.com")
@@ -251,7 +262,7 @@ class TestScanForBreachedCases:
         case.refresh_from_db()
         assert list(case.assigned_to.all()) == [target]
 
-    @patch("cases.tasks.send_email_to_assigned_user")
+    @patch("cases.tasks.send_escalation_digest")
     def test_cooldown_prevents_double_fire(self, mock_email, admin_user, org_a):
         target = _make_target_profile(org_a)
         _make_policy(org_a, target, priority="Urgent")
@@ -262,7 +273,7 @@ class TestScanForBreachedCases:
         assert scan_for_breached_cases() == 0
         assert Activity.objects.filter(action="ESCALATED").count() == 1
 
-    @patch("cases.tasks.send_email_to_assigned_user")
+    @patch("cases.tasks.send_escalation_digest")
     def test_cap_prevents_runaway_escalation(self, mock_email, admin_user, org_a):
         target = _make_target_profile(org_a)
         _make_policy(org_a, target, priority="Urgent")
@@ -272,7 +283,7 @@ class TestScanForBreachedCases:
         assert scan_for_breached_cases() == 0
         assert Activity.objects.filter(action="ESCALATED").count() == 0
 
-    @patch("cases.tasks.send_email_to_assigned_user")
+    @patch("cases.tasks.send_escalation_digest")
     def test_terminal_cases_skipped(self, mock_email, admin_user, org_a):
         target = _make_target_profile(org_a)
         _make_policy(org_a, target, priority="Urgent")
@@ -280,14 +291,14 @@ class TestScanForBreachedCases:
         Case.objects.filter(pk=case.pk).update(status="Closed")
         assert scan_for_breached_cases() == 0
 
-    @patch("cases.tasks.send_email_to_assigned_user")
+    @patch("cases.tasks.send_escalation_digest")
     def test_inactive_policy_skipped(self, mock_email, admin_user, org_a):
         target = _make_target_profile(org_a)
         _make_policy(org_a, target, priority="Urgent", is_active=False)
         _create_breached_case(admin_user, org_a)
         assert scan_for_breached_cases() == 0
 
-    @patch("cases.tasks.send_email_to_assigned_user")
+    @patch("cases.tasks.send_escalation_digest")
     def test_team_members_added_to_notify_recipients(
         self, mock_email, admin_user, org_a
     ):
@@ -305,14 +316,12 @@ class TestScanForBreachedCases:
         )
         _create_breached_case(admin_user, org_a)
         scan_for_breached_cases()
-        # Look at any of the .delay calls. Recipients should include both ids
-        called_recipients = []
-        for call in mock_email.delay.call_args_list:
-            called_recipients.extend(call.args[0])
+        # One digest per recipient: the target and the team member.
+        called_recipients = [call.args[0] for call in mock_email.delay.call_args_list]
         assert str(target.id) in called_recipients
         assert str(member.id) in called_recipients
 
-    @patch("cases.tasks.send_email_to_assigned_user")
+    @patch("cases.tasks.send_escalation_digest")
     def test_only_first_response_breached(self, mock_email, admin_user, org_a):
         target = _make_target_profile(org_a)
         _make_policy(org_a, target, priority="Urgent")
@@ -323,7 +332,7 @@ class TestScanForBreachedCases:
         breach_types = {b["breach_type"] for b in activity.metadata["breaches"]}
         assert breach_types == {"first_response"}
 
-    @patch("cases.tasks.send_email_to_assigned_user")
+    @patch("cases.tasks.send_escalation_digest")
     def test_first_response_recorded_skips_after_response(
         self, mock_email, admin_user, org_a
     ):
@@ -480,3 +489,104 @@ class TestEscalationBreachCounts:
         _case_with_sla(user_b, org_b, created_ago=timedelta(hours=5))
         row = _policy_row(admin_client.get(POLICIES_URL), "Urgent")
         assert row["breaches_last_30d"] == {"first_response": 0, "resolution": 0}
+
+
+# ---------------------------------------------------------------------------
+# Batching, digests and the run record
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.django_db
+class TestScanBatching:
+    @patch("cases.tasks.send_escalation_digest")
+    def test_one_digest_per_recipient(self, mock_digest, admin_user, org_a):
+        target = _make_target_profile(org_a)
+        _make_policy(org_a, target, priority="Urgent")
+        cases = [_create_breached_case(admin_user, org_a) for _ in range(3)]
+
+        assert scan_for_breached_cases() == 3
+        mock_digest.delay.assert_called_once()
+        profile_id, case_ids, org_id = mock_digest.delay.call_args.args
+        assert profile_id == str(target.id)
+        assert sorted(case_ids) == sorted(str(c.id) for c in cases)
+        assert org_id == str(org_a.id)
+
+    @patch("cases.tasks.send_escalation_digest")
+    def test_query_count_does_not_grow_with_the_batch(
+        self, mock_digest, admin_user, org_a
+    ):
+        target = _make_target_profile(org_a)
+        _make_policy(org_a, target, priority="Urgent")
+        counts = []
+        for n in (2, 12):
+            for _ in range(n):
+                _create_breached_case(admin_user, org_a)
+            with CaptureQueriesContext(connection) as ctx:
+                assert scan_for_breached_cases() == n
+            counts.append(len(ctx.captured_queries))
+        assert counts[0] == counts[1]
+
+    @patch("cases.tasks.send_escalation_digest")
+    def test_run_is_recorded(self, mock_digest, admin_user, org_a):
+        target = _make_target_profile(org_a)
+        _make_policy(org_a, target, priority="Urgent")
+        _create_breached_case(admin_user, org_a)
+        _create_breached_case(admin_user, org_a)
+
+        scan_for_breached_cases()
+
+        run = EscalationScanRun.objects.get()
+        assert run.finished_at is not None and run.duration_ms is not None
+        assert (run.skipped, run.orgs_scanned) == (False, 1)
+        assert (run.cases_breached, run.cases_escalated) == (2, 2)
+        assert run.notifications_sent == 1
+
+    @patch("cases.tasks.send_escalation_digest")
+    def test_overlapping_run_is_skipped(self, mock_digest, admin_user, org_a):
+        target = _make_target_profile(org_a)
+        _make_policy(org_a, target, priority="Urgent")
+        case = _create_breached_case(admin_user, org_a)
+        EscalationScanRun.objects.create(
+            started_at=timezone.now() - timedelta(minutes=4)
+        )
+
+        assert scan_for_breached_cases() == 0
+
+        case.refresh_from_db()
+        assert case.escalation_count == 0
+        assert EscalationScanRun.objects.filter(skipped=True).count() == 1
+
+    @patch("cases.tasks.send_escalation_digest")
+    def test_abandoned_run_does_not_block(self, mock_digest, admin_user, org_a):
+        target = _make_target_profile(org_a)
+        _make_policy(org_a, target, priority="Urgent")
+        _create_breached_case(admin_user, org_a)
+        EscalationScanRun.objects.create(
+            started_at=timezone.now() - SCAN_RUN_LEASE - timedelta(minutes=1)
+        )
+        assert scan_for_breached_cases() == 1
+
+    def test_old_runs_are_pruned(self, org_a):
+        old = EscalationScanRun.objects.create(
+            started_at=timezone.now() - timedelta(days=SCAN_RUN_RETENTION_DAYS + 1),
+            finished_at=timezone.now(),
+        )
+        scan_for_breached_cases()
+        assert not EscalationScanRun.objects.filter(pk=old.pk).exists()
+
+    def test_digest_email_lists_every_case(self, admin_user, org_a, mailoutbox):
+        target = _make_target_profile(org_a)
+        cases = [
+            Case.objects.create(
+                name=f"Outage {i}", status="New", priority="Urgent", org=org_a
+            )
+            for i in range(2)
+        ]
+        send_escalation_digest(
+            str(target.id), [str(c.id) for c in cases], str(org_a.id)
+        )
+        restore_rls_context()
+        assert len(mailoutbox) == 1
+        assert mailoutbox[0].to == [target.user.email]
+        assert "2 cases" in mailoutbox[0].subject
+        assert "Outage 0" in mailoutbox[0].body and "Outage 1" in mailoutbox[0].body
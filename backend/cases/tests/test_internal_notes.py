@@ -105,7 +105,7 @@ class TestCrossOrgIsolation:
 @pytest.mark.django_db
 class TestVisibilityFlipAuditLogged:
     def test_flip_public_to_internal_emits_comment_activity(
-        self, admin_client, case_a, admin_profile
+        self, admin_client, case_a, admin_profile, django_capture_on_commit_callbacks
     ):
         comment = _make_comment(
             case_a, admin_profile, text="leaked?", is_internal=False
@@ -115,11 +115,12 @@ class TestVisibilityFlipAuditLogged:
             entity_type="Case", entity_id=case_a.pk, action="COMMENT"
         ).count()
 
-        response = admin_client.patch(
-            f"/api/cases/comment/{comment.pk}/",
-            {"is_internal": True},
-            format="json",
-        )
+        with django_capture_on_commit_callbacks(execute=True):
+            response = admin_client.patch(
+                f"/api/cases/comment/{comment.pk}/",
+                {"is_internal": True},
+                format="json",
+            )
         assert response.status_code == 200, response.content
 
         flip_rows = list(
@@ -138,16 +139,17 @@ class TestVisibilityFlipAuditLogged:
         assert meta.get("comment_id") == str(comment.pk)
 
     def test_flip_internal_to_public_emits_comment_activity(
-        self, admin_client, case_a, admin_profile
+        self, admin_client, case_a, admin_profile, django_capture_on_commit_callbacks
     ):
         comment = _make_comment(
             case_a, admin_profile, text="oops private", is_internal=True
         )
-        response = admin_client.patch(
-            f"/api/cases/comment/{comment.pk}/",
-            {"is_internal": False},
-            format="json",
-        )
+        with django_capture_on_commit_callbacks(execute=True):
+            response = admin_client.patch(
+                f"/api/cases/comment/{comment.pk}/",
+                {"is_internal": False},
+                format="json",
+            )
         assert response.status_code == 200, response.content
 
         latest = (
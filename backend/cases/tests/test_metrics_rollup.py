@@ -0,0 +1,210 @@
+"""Tests for the service overview rollup (cases/metrics_rollup.py).
+
+The live computation (`analytics._service_figures`) is the reference: with
+the rollup on, the overview must return the same payload. The seeded cases
+sit on whole minutes, the rollup's resolution, so the two agree exactly.
+The rest covers when stored days are rebuilt: after an edit, when an
+unanswered case goes past its SLA, in another timezone, and nightly.
+"""
+
+from __future__ import annotations
+
+import random
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from cases import analytics, metrics_rollup
+from cases.models import Case, CaseDailyMetrics, CaseMetricsDay
+from cases.tasks import reconcile_case_daily_metrics
+
+
+def _seed(org, profiles, n=80, seed=11):
+    """``n`` cases over the last twenty days, on whole minutes."""
+    rng = random.Random(seed)
+    now = timezone.now().replace(second=0, microsecond=0)
+    for i in range(n):
+        case = Case.objects.create(
+            org=org,
+            name=f"Case {i}",
+            status=rng.choice(["New", "Assigned", "Closed"]),
+            priority=rng.choice(["Urgent", "High", "Normal", "Low"]),
+            case_type=rng.choice(["Incident", "Question", None, ""]),
+            sla_first_response_hours=rng.choice([1, 4, 8]),
+        )
+        created = now - timedelta(minutes=rng.randrange(20 * 24 * 60))
+        fields = {"created_at": created}
+        if rng.random() < 0.7:
+            fields["first_response_at"] = created + timedelta(
+                minutes=rng.randrange(12 * 60)
+            )
+        if rng.random() < 0.5:
+            resolved = created + timedelta(minutes=rng.randrange(4 * 24 * 60))
+            fields["resolved_at"] = min(resolved, now)
+        Case.objects.filter(pk=case.pk).update(**fields)
+        case.assigned_to.set(rng.sample(profiles, rng.randrange(len(profiles) + 1)))
+
+
+def _overview(org, days=14, rollup=True):
+    return analytics.compute_service_overview(
+        metrics_rollup.service_cases(org.id), org.id, days, rollup=rollup
+    )
+
+
+@pytest.fixture
+def seeded(org_a, admin_profile, user_profile):
+    _seed(org_a, [admin_profile, user_profile])
+    return org_a
+
+
+class TestMatchesLive:
+    @pytest.mark.parametrize("tz", ["UTC", "Asia/Kolkata", "America/New_York"])
+    @pytest.mark.parametrize("days", [1, 7, 14])
+    def test_same_payload(self, seeded, tz, days):
+        with timezone.override(tz):
+            live = _overview(seeded, days, rollup=False)
+            assert _overview(seeded, days) == live
+            # And again from the stored rows alone.
+            assert _overview(seeded, days) == live
+
+    def test_builds_each_finished_day_once(self, seeded):
+        _overview(seeded, days=14)
+        assert CaseMetricsDay.objects.filter(org=seeded).count() == 13
+        assert not CaseMetricsDay.objects.filter(
+            org=seeded, day=timezone.localdate()
+        ).exists()
+
+    def test_window_length_does_not_change_the_query_count(self, seeded):
+        _overview(seeded, days=90)
+        counts = []
+        for days in (14, 90):
+            with CaptureQueriesContext(connection) as ctx:
+                _overview(seeded, days)
+            counts.append(len(ctx.captured_queries))
+        assert counts[0] == counts[1]
+
+
+class TestRebuild:
+    def _past_case(self, org, days_ago=3, **fields):
+        case = Case.objects.create(org=org, name="Past", priority="High")
+        created = timezone.now() - timedelta(days=days_ago)
+        Case.objects.filter(pk=case.pk).update(created_at=created, **fields)
+        case.refresh_from_db()
+        return case
+
+    def test_saving_a_case_marks_its_days_stale(self, org_a):
+        case = self._past_case(org_a, sla_first_response_hours=4)
+        _overview(org_a)
+        day = timezone.localdate(case.created_at)
+        assert not CaseMetricsDay.objects.get(org=org_a, day=day).stale
+
+        case.first_response_at = case.created_at + timedelta(hours=1)
+        case.save()
+
+        assert CaseMetricsDay.objects.get(org=org_a, day=day).stale
+        high = next(
+            r for r in _overview(org_a)["first_response"] if r["priority"] == "High"
+        )
+        assert (high["median_minutes"], high["met"], high["missed"]) == (60, 1, 0)
+        assert not CaseMetricsDay.objects.get(org=org_a, day=day).stale
+
+    def test_reassignment_moves_the_case_between_agent_rows(self, org_a, admin_profile):
+        case = self._past_case(org_a)
+        _overview(org_a)
+        case.assigned_to.add(admin_profile)
+
+        agent_ids = [row["id"] for row in _overview(org_a)["by_agent"]]
+        assert str(admin_profile.id) in agent_ids
+        assert CaseDailyMetrics.objects.filter(
+            org=org_a, scope=CaseDailyMetrics.SCOPE_AGENT, agent=admin_profile
+        ).exists()
+
+    def test_bulk_delete_marks_days_stale(self, org_a, admin_client):
+        case = self._past_case(org_a)
+        _overview(org_a)
+        response = admin_client.post(
+            "/api/cases/bulk/delete/", {"ids": [str(case.id)]}, format="json"
+        )
+        assert response.status_code == 200
+        assert CaseMetricsDay.objects.get(
+            org=org_a, day=timezone.localdate(case.created_at)
+        ).stale
+
+    def test_unanswered_case_is_rebuilt_when_it_breaches(self, org_a):
+        case = self._past_case(org_a, days_ago=2, sla_first_response_hours=4)
+        day = timezone.localdate(case.created_at)
+        earlier = case.created_at + timedelta(hours=1)
+        metrics_rollup.rebuild_days(org_a.id, [day], now=earlier)
+        marker = CaseMetricsDay.objects.get(org=org_a, day=day)
+        assert marker.next_flip_at == case.created_at + timedelta(hours=4)
+        assert metrics_rollup.days_needing_rebuild(org_a.id, [day], earlier) == []
+
+        high = next(
+            r for r in _overview(org_a)["first_response"] if r["priority"] == "High"
+        )
+        assert high["missed"] == 1
+        assert CaseMetricsDay.objects.get(org=org_a, day=day).next_flip_at is None
+
+    def test_another_timezone_rebuilds(self, org_a):
+        self._past_case(org_a)
+        with timezone.override("UTC"):
+            _overview(org_a)
+        with timezone.override("Asia/Tokyo"):
+            day = timezone.localdate() - timedelta(days=1)
+            assert metrics_rollup.days_needing_rebuild(
+                org_a.id, [day], timezone.now()
+            ) == [day]
+            _overview(org_a)
+            assert (
+                CaseMetricsDay.objects.get(org=org_a, day=day).timezone == "Asia/Tokyo"
+            )
+
+    def test_mark_stale_only_touches_days_containing_the_instants(self, org_a):
+        today = timezone.localdate()
+        days = [today - timedelta(days=i) for i in (1, 2, 3)]
+        metrics_rollup.rebuild_days(org_a.id, days)
+        start, _end = metrics_rollup._day_bounds(days[1])
+        metrics_rollup.mark_stale(org_a.id, [start, None])
+        stale = set(
+            CaseMetricsDay.objects.filter(org=org_a, stale=True).values_list(
+                "day", flat=True
+            )
+        )
+        assert stale == {days[1]}
+
+
+class TestReconcile:
+    def test_rebuilds_recent_and_flagged_days(self, seeded):
+        today = timezone.localdate()
+        old = today - timedelta(days=30)
+        metrics_rollup.rebuild_days(seeded.id, [old])
+        CaseMetricsDay.objects.filter(org=seeded, day=old).update(stale=True)
+
+        rebuilt = reconcile_case_daily_metrics(days=7)
+
+        assert rebuilt == 8
+        built = set(
+            CaseMetricsDay.objects.filter(org=seeded).values_list("day", flat=True)
+        )
+        assert built == {old} | {today - timedelta(days=i) for i in range(1, 8)}
+        assert not CaseMetricsDay.objects.filter(org=seeded, stale=True).exists()
+
+
+class TestHistogramPercentile:
+    @pytest.mark.parametrize("seed", range(5))
+    @pytest.mark.parametrize("pct", [0, 10, 50, 90, 100])
+    def test_matches_the_sorted_list_percentile(self, seed, pct):
+        rng = random.Random(seed)
+        values = [rng.randrange(500) for _ in range(rng.randrange(1, 60))]
+        histogram = {}
+        for v in values:
+            metrics_rollup._add(histogram, v)
+        assert metrics_rollup.histogram_percentile(histogram, pct) == pytest.approx(
+            analytics._percentile(sorted(values), pct)
+        )
+
+    def test_empty(self):
+        assert metrics_rollup.histogram_percentile({}, 50) is None
@@ -155,15 +155,21 @@ class TestTreeEndpoint:
 @pytest.mark.django_db
 class TestLinkEndpoint:
     def test_link_parent_records_activity(
-        self, admin_client, admin_user, admin_profile, org_a
+        self,
+        admin_client,
+        admin_user,
+        admin_profile,
+        org_a,
+        django_capture_on_commit_callbacks,
     ):
         parent = _make_case(org_a, admin_user, name="Parent", is_problem=True)
         child = _make_case(org_a, admin_user, name="Child")
-        resp = admin_client.post(
-            f"/api/cases/{child.id}/link/",
-            {"parent_id": str(parent.id)},
-            format="json",
-        )
+        with django_capture_on_commit_callbacks(execute=True):
+            resp = admin_client.post(
+                f"/api/cases/{child.id}/link/",
+                {"parent_id": str(parent.id)},
+                format="json",
+            )
         assert resp.status_code == 200, resp.content
         child.refresh_from_db()
         assert child.parent_id == parent.id
@@ -172,12 +178,20 @@ class TestLinkEndpoint:
         a = _activity_for(child, "LINKED_PARENT").first()
         assert a.metadata["parent_id"] == str(parent.id)
 
-    def test_unlink_clears_parent(self, admin_client, admin_user, admin_profile, org_a):
+    def test_unlink_clears_parent(
+        self,
+        admin_client,
+        admin_user,
+        admin_profile,
+        org_a,
+        django_capture_on_commit_callbacks,
+    ):
         parent = _make_case(org_a, admin_user, name="P")
         child = _make_case(org_a, admin_user, name="C", parent=parent)
-        resp = admin_client.post(
-            f"/api/cases/{child.id}/link/", {"parent_id": None}, format="json"
-        )
+        with django_capture_on_commit_callbacks(execute=True):
+            resp = admin_client.post(
+                f"/api/cases/{child.id}/link/", {"parent_id": None}, format="json"
+            )
         assert resp.status_code == 200, resp.content
         child.refresh_from_db()
         assert child.parent_id is None
@@ -258,16 +272,17 @@ class TestCloseWithChildren:
         assert resp.json()["cascaded_case_ids"] == []
 
     def test_cascade_override_true_closes_descendants(
-        self, admin_client, admin_user, org_a
+        self, admin_client, admin_user, org_a, django_capture_on_commit_callbacks
     ):
         parent = _make_case(org_a, admin_user, name="P", is_problem=True)
         c1 = _make_case(org_a, admin_user, name="C1", parent=parent)
         c2 = _make_case(org_a, admin_user, name="C2", parent=parent)
-        resp = admin_client.post(
-            f"/api/cases/{parent.id}/close-with-children/",
-            {"resolution_comment": "rolled out fix", "cascade": True},
-            format="json",
-        )
+        with django_capture_on_commit_callbacks(execute=True):
+            resp = admin_client.post(
+                f"/api/cases/{parent.id}/close-with-children/",
+                {"resolution_comment": "rolled out fix", "cascade": True},
+                format="json",
+            )
         assert resp.status_code == 200
         parent.refresh_from_db()
         c1.refresh_from_db()
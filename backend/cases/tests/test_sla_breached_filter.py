@@ -1,16 +1,14 @@
 """Regression tests for the ``?sla_breached=true`` case filter.
 
-The filter is raw SQL in ``.extra(where=[...])``. Written with unqualified
-column names it resolved fine against a bare ``Case`` queryset and raised
-``ProgrammingError: column reference "first_response_at" is ambiguous`` the
-moment the queryset joined a table sharing any of those names. Combining the
-filter with a status list did exactly that, so ``/api/cases/?sla_breached=true``
-answered 500 for any authenticated caller.
-
-These assert the shape of the generated SQL rather than executing it, so they
-run on the SQLite test database. The clause itself is Postgres-specific
-(``INTERVAL``), so an execution test could only run under the
-``postgres_only`` marker and would not guard the default suite.
+The filter was once raw SQL in ``.extra(where=[...])``. Written with
+unqualified column names it resolved fine against a bare ``Case`` queryset and
+raised ``ProgrammingError: column reference "first_response_at" is ambiguous``
+the moment the queryset joined a table sharing any of those names. Combining
+the filter with a status list did exactly that, so
+``/api/cases/?sla_breached=true`` answered 500 for any authenticated caller.
+
+It is an ORM predicate on the stored deadline columns now (cases/sla.py), but
+the shape assertions stay as the guard against a return to raw SQL.
 """
 
 from django.http import QueryDict
@@ -20,10 +18,10 @@ from cases.views import apply_case_list_filters
 
 SLA_COLUMNS = (
     "first_response_at",
-    "sla_first_response_hours",
+    "sla_first_response_due_at",
     "resolved_at",
-    "sla_resolution_hours",
-    "created_at",
+    "sla_resolution_due_at",
+    "sla_paused_at",
 )
 
 
@@ -42,7 +40,7 @@ def _where_sql(queryset):
 
 
 def test_sla_breached_qualifies_every_column():
-    """Each column the raw clause names must carry its table.
+    """Each column the clause names must carry its table.
 
     An unqualified name here is the exact bug this test exists for: it works
     until the queryset joins, then answers 500.
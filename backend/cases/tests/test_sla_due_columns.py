@@ -0,0 +1,227 @@
+"""Tests for the stored SLA deadline columns (cases/sla.py).
+
+The live computation, ``add_business_hours`` from ``created_at`` plus banked
+wait, is the reference: the columns must hold it after every way a case's
+deadline can move (create, an SLA-hours edit, a pause, a calendar or holiday
+edit), and the breach predicate the scanner and list filter run must agree
+with the ``is_sla_*_breached`` properties.
+"""
+
+from __future__ import annotations
+
+import random
+from datetime import date, datetime, time, timedelta
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from business_hours.calendar import add_business_hours, get_default_calendar
+from business_hours.models import BusinessCalendar, BusinessHoliday
+from cases import sla
+from cases.models import Case, EscalationPolicy
+from cases.tasks import recompute_case_sla_deadlines, scan_for_breached_cases
+
+_UTC = ZoneInfo("UTC")
+# A Friday, an hour before close.
+FRIDAY_4PM = datetime(2026, 10, 16, 16, 0, tzinfo=_UTC)
+
+
+@pytest.fixture
+def calendar_a(org_a):
+    weekdays = ("monday", "tuesday", "wednesday", "thursday", "friday")
+    return BusinessCalendar.objects.create(
+        org=org_a,
+        name="Default",
+        timezone="UTC",
+        is_default=True,
+        **{f"{day}_open": time(9, 0) for day in weekdays},
+        **{f"{day}_close": time(17, 0) for day in weekdays},
+    )
+
+
+def _case(org, created_at=FRIDAY_4PM, **fields):
+    fields.setdefault("priority", "High")
+    case = Case.objects.create(org=org, name="SLA", status="New", **fields)
+    case.created_at = created_at
+    case.save(update_fields=["created_at"])
+    return case
+
+
+def _expected(case, hours):
+    deadline = add_business_hours(
+        case.created_at, hours, get_default_calendar(case.org_id)
+    )
+    return deadline + timedelta(seconds=case.sla_paused_seconds)
+
+
+def _stored(case):
+    case.refresh_from_db()
+    return case.sla_first_response_due_at, case.sla_resolution_due_at
+
+
+@pytest.mark.django_db
+class TestColumnsOnSave:
+    def test_create_stores_business_hours_deadlines(self, org_a, calendar_a):
+        case = _case(org_a, sla_first_response_hours=4, sla_resolution_hours=24)
+        # 1h left on Friday, then 3h on Monday; 24h is three working days.
+        assert _stored(case) == (
+            datetime(2026, 10, 19, 12, 0, tzinfo=_UTC),
+            datetime(2026, 10, 21, 16, 0, tzinfo=_UTC),
+        )
+
+    def test_without_a_calendar_is_wall_clock(self, org_a):
+        case = _case(org_a, sla_first_response_hours=4)
+        assert case.sla_first_response_due_at == FRIDAY_4PM + timedelta(hours=4)
+
+    def test_hours_edit_moves_the_deadline(self, org_a, calendar_a):
+        case = _case(org_a, sla_first_response_hours=4)
+        case.sla_first_response_hours = 8
+        case.save(update_fields=["sla_first_response_hours"])
+        assert _stored(case)[0] == _expected(case, 8)
+
+    def test_ordinary_edit_does_not_read_the_calendar(self, org_a, calendar_a):
+        case = _case(org_a)
+        case.name = "Renamed"
+        with CaptureQueriesContext(connection) as ctx:
+            case.save()
+        assert not any("business_calendar" in q["sql"] for q in ctx.captured_queries)
+
+    def test_resume_banks_the_wait_into_the_deadline(self, org_a, calendar_a):
+        case = _case(org_a, sla_first_response_hours=4)
+        before = case.sla_first_response_due_at
+        case.status = "Pending"
+        case.save()
+        assert _stored(case)[0] == before
+        case.sla_paused_at = timezone.now() - timedelta(hours=2)
+        case.save(update_fields=["sla_paused_at"])
+        case.status = "New"
+        case.save()
+        case.refresh_from_db()
+        assert case.sla_paused_seconds >= 7190
+        assert case.sla_first_response_due_at == before + timedelta(
+            seconds=case.sla_paused_seconds
+        )
+
+    def test_property_adds_the_running_pause(self, org_a, calendar_a):
+        case = _case(org_a, sla_first_response_hours=4)
+        paused_at = timezone.now() - timedelta(hours=1)
+        Case.objects.filter(pk=case.pk).update(sla_paused_at=paused_at)
+        case.refresh_from_db()
+        with patch(
+            "django.utils.timezone.now", return_value=paused_at + timedelta(hours=1)
+        ):
+            assert case.first_response_sla_deadline == (
+                case.sla_first_response_due_at + timedelta(hours=1)
+            )
+
+
+@pytest.mark.django_db
+class TestRecompute:
+    def test_calendar_edit_enqueues_a_recompute(
+        self, org_a, calendar_a, django_capture_on_commit_callbacks
+    ):
+        with patch("cases.tasks.recompute_case_sla_deadlines.delay") as delay:
+            with django_capture_on_commit_callbacks(execute=True):
+                calendar_a.friday_close = time(16, 0)
+                calendar_a.save()
+        delay.assert_called_once_with(str(org_a.id))
+
+    def test_holiday_moves_the_deadlines(
+        self, org_a, calendar_a, django_capture_on_commit_callbacks
+    ):
+        case = _case(org_a, sla_first_response_hours=4)
+        with patch("cases.tasks.recompute_case_sla_deadlines.delay") as delay:
+            with django_capture_on_commit_callbacks(execute=True):
+                BusinessHoliday.objects.create(
+                    org=org_a, calendar=calendar_a, date=date(2026, 10, 19), name="Off"
+                )
+        delay.assert_called_once_with(str(org_a.id))
+
+        assert recompute_case_sla_deadlines(str(org_a.id)) == 1
+        assert _stored(case)[0] == datetime(2026, 10, 20, 12, 0, tzinfo=_UTC)
+        # Nothing moved the second time.
+        assert recompute_case_sla_deadlines(str(org_a.id)) == 0
+
+    def test_fills_rows_without_deadlines(self, org_a, calendar_a):
+        cases = [_case(org_a, sla_first_response_hours=h) for h in (1, 4, 9)]
+        Case.objects.update(sla_first_response_due_at=None, sla_resolution_due_at=None)
+        sla.recompute_sla_deadlines(
+            Case.objects.filter(org=org_a), sla.org_calendar(org_a.id), batch_size=2
+        )
+        for case in cases:
+            first, resolution = _stored(case)
+            assert first == _expected(case, case.sla_first_response_hours)
+            assert resolution == _expected(case, case.sla_resolution_hours)
+
+
+@pytest.mark.django_db
+class TestBreachPredicate:
+    def test_matches_the_properties(self, org_a, calendar_a):
+        rng = random.Random(7)
+        base = timezone.now()
+        for i in range(60):
+            case = _case(
+                org_a,
+                created_at=base - timedelta(minutes=rng.randrange(7 * 24 * 60)),
+                sla_first_response_hours=rng.choice([1, 4, 8]),
+                sla_resolution_hours=rng.choice([8, 24]),
+            )
+            fields = {}
+            if rng.random() < 0.3:
+                fields["first_response_at"] = base
+            if rng.random() < 0.2:
+                fields["resolved_at"] = base
+            if rng.random() < 0.3:
+                fields["sla_paused_at"] = base - timedelta(
+                    minutes=rng.randrange(3 * 24 * 60)
+                )
+            Case.objects.filter(pk=case.pk).update(**fields)
+
+        with patch("django.utils.timezone.now", return_value=base):
+            expected = {
+                c.pk
+                for c in Case.objects.filter(org=org_a)
+                if c.is_sla_first_response_breached or c.is_sla_resolution_breached
+            }
+            found = set(
+                Case.objects.filter(org=org_a)
+                .filter(sla.sla_breached(base))
+                .values_list("pk", flat=True)
+            )
+        assert expected and found == expected
+
+    def test_list_filter_honours_business_hours(self, org_a, calendar_a, admin_client):
+        case = _case(org_a, sla_first_response_hours=4)
+        saturday = datetime(2026, 10, 17, 10, 0, tzinfo=_UTC)
+        with patch("django.utils.timezone.now", return_value=saturday):
+            response = admin_client.get("/api/cases/?sla_breached=true")
+        ids = [c["id"] for c in response.data["cases"]]
+        # Eighteen wall-clock hours late, but only one working hour gone.
+        assert str(case.id) not in ids
+
+        monday = datetime(2026, 10, 19, 12, 30, tzinfo=_UTC)
+        with patch("django.utils.timezone.now", return_value=monday):
+            response = admin_client.get("/api/cases/?sla_breached=true")
+        assert str(case.id) in [c["id"] for c in response.data["cases"]]
+
+    def test_scanner_only_escalates_cases_past_due(
+        self, org_a, calendar_a, admin_profile
+    ):
+        due = _case(org_a, created_at=timezone.now() - timedelta(days=10))
+        not_due = _case(org_a, created_at=timezone.now())
+        EscalationPolicy.objects.create(
+            org=org_a,
+            priority="High",
+            first_response_action="notify",
+            first_response_target=admin_profile,
+            is_active=True,
+        )
+        with patch("cases.tasks.send_escalation_digest.delay"):
+            scan_for_breached_cases()
+        due.refresh_from_db()
+        not_due.refresh_from_db()
+        assert (due.escalation_count, not_due.escalation_count) == (1, 0)
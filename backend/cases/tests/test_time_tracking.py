@@ -240,22 +240,28 @@ class TestStartStop:
 @pytest.mark.django_db
 class TestManualEntry:
     def test_creates_with_full_window_and_emits_activity(
-        self, admin_client, admin_user, admin_profile, org_a
+        self,
+        admin_client,
+        admin_user,
+        admin_profile,
+        org_a,
+        django_capture_on_commit_callbacks,
     ):
         case = _make_case(org_a, admin_user)
         start = timezone.now() - timedelta(hours=2)
         end = timezone.now() - timedelta(hours=1)
-        resp = admin_client.post(
-            f"/api/cases/{case.id}/time-entries/",
-            {
-                "started_at": start.isoformat(),
-                "ended_at": end.isoformat(),
-                "description": "Backfilled",
-                "billable": True,
-                "hourly_rate": "120.00",
-            },
-            format="json",
-        )
+        with django_capture_on_commit_callbacks(execute=True):
+            resp = admin_client.post(
+                f"/api/cases/{case.id}/time-entries/",
+                {
+                    "started_at": start.isoformat(),
+                    "ended_at": end.isoformat(),
+                    "description": "Backfilled",
+                    "billable": True,
+                    "hourly_rate": "120.00",
+                },
+                format="json",
+            )
         assert resp.status_code == 201, resp.content
         assert (
             Activity.objects.filter(
@@ -592,7 +598,12 @@ class TestSignalAndAutoStop:
         )
 
     def test_stop_emits_time_logged(
-        self, admin_client, admin_user, admin_profile, org_a
+        self,
+        admin_client,
+        admin_user,
+        admin_profile,
+        org_a,
+        django_capture_on_commit_callbacks,
     ):
         case = _make_case(org_a, admin_user)
         entry = _entry(
@@ -600,7 +611,8 @@ class TestSignalAndAutoStop:
             admin_profile,
             started_at=timezone.now() - timedelta(minutes=10),
         )
-        admin_client.post(f"/api/time-entries/{entry.id}/stop/", {}, format="json")
+        with django_capture_on_commit_callbacks(execute=True):
+            admin_client.post(f"/api/time-entries/{entry.id}/stop/", {}, format="json")
         assert (
             Activity.objects.filter(entity_id=case.id, action="TIME_LOGGED").count()
             == 1
@@ -197,6 +197,11 @@ urlpatterns = [
         import_views.CaseImportCommitView.as_view(),
         name="cases_import_commit",
     ),
+    path(
+        "import/jobs/",
+        import_views.CaseImportJobView.as_view(),
+        name="cases_import_job",
+    ),
     # Case ↔ Solution linking (M2M endpoints, must be before <uid:pk>/ patterns)
     path(
         "<uid:pk>/solutions/",
@@ -12,7 +12,6 @@ from drf_spectacular.utils import (
     inline_serializer,
 )
 from rest_framework import serializers, status
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -40,8 +39,10 @@ from cases.serializer import (
     EmailMessageSerializer,
     ReopenPolicySerializer,
 )
+from cases.sla import sla_breached
 from cases.solution_serializers import SolutionSerializer
 from cases.tasks import send_email_to_assigned_user
+from common.custom_fields import apply_list_params as apply_custom_field_params
 from common.custom_fields import validate_payload as validate_custom_fields_payload
 from common.models import (
     Activity,
@@ -52,6 +53,7 @@ from common.models import (
     Tags,
     Teams,
 )
+from common.pagination import ListPagination
 from common.permissions import HasOrgContext
 from common.serializer import (
     ActivitySerializer,
@@ -88,13 +90,14 @@ _ALLOWED_CASE_ORDERINGS = frozenset(
 )
 
 
-def apply_case_list_filters(queryset, params):
+def apply_case_list_filters(queryset, params, org=None):
     """Apply the case-list query-param filters to ``queryset``.
 
     Shared between CaseListView and WatchingListView so both endpoints accept
     the same filter chips from the mobile client. Caller is responsible for
     the base scope (org membership, watcher allowance, etc.). This only
-    layers in user-supplied filters.
+    layers in user-supplied filters. ``org`` types the ``cf_`` filters by its
+    custom-field definitions; without it they compare as text.
     """
     if not params:
         return queryset
@@ -133,36 +136,14 @@ def apply_case_list_filters(queryset, params):
     if created_at_lte:
         queryset = queryset.filter(created_at__lte=created_at_lte)
     if params.get("sla_breached") == "true":
-        # Wall-clock approximation matching the mobile card's
-        # `isFirstResponseSlaBreached` getter; `Case.is_sla_*_breached` uses
-        # business hours, but the badges on both clients compute from
-        # created_at + hours, so this filter mirrors what the user actually
-        # sees on the row. Postgres-specific (INTERVAL).
-        #
-        # Every column is table-qualified. Unqualified, these resolve fine
-        # against a bare Case queryset and raise
-        # `ProgrammingError: column reference "first_response_at" is ambiguous`
-        # the moment the queryset joins a table sharing any of these names,
-        # which is what a filter combination such as `?sla_breached=true` plus
-        # a status list produced: a 500 for any authenticated caller.
-        queryset = queryset.extra(
-            where=[
-                '("case"."first_response_at" IS NULL '
-                'AND "case"."sla_first_response_hours" IS NOT NULL '
-                'AND "case"."created_at" + "case"."sla_first_response_hours" '
-                "* INTERVAL '1 hour' < NOW()) "
-                'OR ("case"."resolved_at" IS NULL '
-                'AND "case"."sla_resolution_hours" IS NOT NULL '
-                'AND "case"."created_at" + "case"."sla_resolution_hours" '
-                "* INTERVAL '1 hour' < NOW())"
-            ]
-        )
-    # Custom-field filters: ?cf_<key>=<value> -> custom_fields contains pair.
-    for raw_key, raw_value in params.items():
-        if raw_key.startswith("cf_") and raw_value:
-            cf_key = raw_key[3:]
-            if cf_key:
-                queryset = queryset.filter(custom_fields__contains={cf_key: raw_value})
+        # Past a stored business-hours deadline (cases/sla.py), the same
+        # condition `Case.is_sla_*_breached` and the breach scanner apply, as
+        # a range predicate on the partial (org, due) indexes. The ORM
+        # table-qualifies every column, so the filter survives any join the
+        # other parameters add.
+        queryset = queryset.filter(sla_breached(timezone.now()))
+    # Custom-field filters and sorts: ?cf_<key>=, ?ordering=cf_<key>.
+    queryset = apply_custom_field_params(queryset, "Case", params, org)
     # Ordering: whitelisted so callers can't sort on arbitrary cols.
     ordering = params.get("ordering")
     if ordering in _ALLOWED_CASE_ORDERINGS:
@@ -171,7 +152,7 @@ def apply_case_list_filters(queryset, params):
     return queryset
 
 
-class CaseListView(APIView, LimitOffsetPagination):
+class CaseListView(APIView, ListPagination):
     permission_classes = (IsAuthenticated, HasOrgContext)
     model = Case
 
@@ -222,7 +203,7 @@ class CaseListView(APIView, LimitOffsetPagination):
             ).distinct()
             profiles = profiles.filter(role="ADMIN")
 
-        queryset = apply_case_list_filters(queryset, params)
+        queryset = apply_case_list_filters(queryset, params, self.request.profile.org)
 
         context = {}
 
@@ -245,16 +226,11 @@ class CaseListView(APIView, LimitOffsetPagination):
         results_cases = self.paginate_queryset(queryset, self.request, view=self)
         cases = CaseSerializer(results_cases, many=True).data
 
-        if results_cases:
-            offset = queryset.filter(id__gte=results_cases[-1].id).count()
-            if offset == queryset.count():
-                offset = None
-        else:
-            offset = 0
         context.update(
             {
                 "cases_count": self.count,
-                "offset": offset,
+                "offset": self.next_offset,
+                "next_cursor": self.next_cursor,
             }
         )
         context["cases"] = cases
@@ -286,8 +262,9 @@ class CaseListView(APIView, LimitOffsetPagination):
             200: inline_serializer(
                 name="CaseListResponse",
                 fields={
-                    "cases_count": serializers.IntegerField(),
+                    "cases_count": serializers.IntegerField(allow_null=True),
                     "offset": serializers.IntegerField(allow_null=True),
+                    "next_cursor": serializers.CharField(allow_null=True),
                     "cases": CaseSerializer(many=True),
                     "status": serializers.ListField(),
                     "priority": serializers.ListField(),
@@ -1180,21 +1157,22 @@ class CaseSolutionLinkView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class CaseActivityListView(APIView, LimitOffsetPagination):
+class CaseActivityListView(APIView, ListPagination):
     """Paginated audit-log feed for a single Case (newest-first)."""
 
     permission_classes = (IsAuthenticated, HasOrgContext)
 
     @extend_schema(
         tags=["Cases"],
-        parameters=swagger_params.organization_params,
+        parameters=swagger_params.list_page_params,
         responses={
             200: inline_serializer(
                 name="CaseActivityListResponse",
                 fields={
                     "activities": ActivitySerializer(many=True),
-                    "count": serializers.IntegerField(),
+                    "count": serializers.IntegerField(allow_null=True),
                     "offset": serializers.IntegerField(allow_null=True),
+                    "next_cursor": serializers.CharField(allow_null=True),
                 },
             )
         },
@@ -1203,21 +1181,26 @@ class CaseActivityListView(APIView, LimitOffsetPagination):
         case = get_case_or_404(request.profile, pk)
         assert_case_read_access(request.profile, case)
 
-        queryset = Activity.objects.filter(
-            entity_type="Case",
-            entity_id=case.id,
-            org=request.profile.org,
-        ).select_related("user__user")
+        queryset = (
+            Activity.objects.filter(
+                entity_type="Case",
+                entity_id=case.id,
+                org=request.profile.org,
+            )
+            .select_related("user__user")
+            .order_by("-created_at", "-id")
+        )
 
         page = self.paginate_queryset(queryset, request, view=self)
         data = ActivitySerializer(page, many=True).data
-        if page:
-            offset = queryset.filter(id__gte=page[-1].id).count()
-            if offset == queryset.count():
-                offset = None
-        else:
-            offset = 0
-        return Response({"activities": data, "count": self.count, "offset": offset})
+        return Response(
+            {
+                "activities": data,
+                "count": self.count,
+                "offset": self.next_offset,
+                "next_cursor": self.next_cursor,
+            }
+        )
 
 
 def _reopen_analytics(org):
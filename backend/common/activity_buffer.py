@@ -0,0 +1,150 @@
+"""Collect a request's Activity rows and write them with one INSERT.
+
+Every save of a tracked record writes an ``Activity`` from its post_save
+signal (``common/signals.py``, ``cases/signals.py``), and the routing,
+approval and parent/child views add their own. Each was an
+``Activity.objects.create`` on the spot, so a request that saves N records
+(a bulk case edit, a pack applied to an org) paid N extra INSERTs, one round
+trip apiece, inside the request.
+
+``record`` is now the one way an Activity is written. Within a ``buffered()``
+scope it holds the row back, and when the scope ends all the scope's rows go
+to the database in a single ``bulk_create``. ``ActivityBufferMiddleware``
+opens a scope around every request. Outside a scope (a management command,
+most Celery tasks) ``record`` writes straight away, as before.
+
+An Activity describes a change, and is only true if that change commits. A
+row recorded inside a transaction therefore joins the buffer from
+``transaction.on_commit``: if the transaction, or only the savepoint the row
+was recorded in, rolls back, Django drops the callback and the row with it,
+just as the INSERT it replaces would have been rolled back. A scope that ends
+with a transaction still open flushes when that transaction commits.
+
+With ``settings.ACTIVITY_WRITE_OFFLOAD`` the flush hands the rows to the
+``common.tasks.write_activities`` Celery task instead of inserting them, one
+task per org, so the request does not wait for the INSERT at all. The rows
+then reach the feed a moment later, when a worker picks them up.
+
+``created_at`` is set when a row is written, not when it is recorded, so the
+rows of one request share the timestamp of its flush, in the order they were
+recorded.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from contextlib import contextmanager
+from functools import partial
+from uuid import UUID
+
+from crum import get_current_user
+from django.conf import settings
+from django.db import connection, transaction
+
+from common.models import Activity
+
+logger = logging.getLogger(__name__)
+
+# What the offload task needs to rebuild a row. `id` is assigned on record,
+# so a row keeps the same id whichever way it is written.
+ROW_FIELDS = (
+    "id",
+    "user_id",
+    "action",
+    "entity_type",
+    "entity_id",
+    "entity_name",
+    "description",
+    "metadata",
+    "org_id",
+    "created_by_id",
+    "updated_by_id",
+)
+
+_local = threading.local()
+
+
+class ActivityBuffer:
+    """The rows recorded in one scope that have yet to be written."""
+
+    def __init__(self):
+        self.activities: list[Activity] = []
+
+    def add(self, activity: Activity) -> None:
+        self.activities.append(activity)
+
+    def flush(self) -> None:
+        activities, self.activities = self.activities, []
+        write(activities)
+
+
+def _flush(buffer: ActivityBuffer) -> None:
+    count = len(buffer.activities)
+    try:
+        buffer.flush()
+    except Exception:
+        # The records themselves are saved; losing their activity rows is not
+        # worth failing a response already computed.
+        logger.exception("Failed to write %s activities", count)
+
+
+@contextmanager
+def buffered():
+    """Hold back the Activity rows recorded inside, and write them together.
+
+    A scope opened inside another joins it, so the outermost one flushes.
+    One that ends inside a transaction flushes when it commits; on_commit
+    runs callbacks in order, so after the rows the transaction queued.
+    """
+    if getattr(_local, "buffer", None) is not None:
+        yield _local.buffer
+        return
+    buffer = _local.buffer = ActivityBuffer()
+    try:
+        yield buffer
+    finally:
+        _local.buffer = None
+        if connection.in_atomic_block:
+            transaction.on_commit(partial(_flush, buffer))
+        else:
+            _flush(buffer)
+
+
+def record(**fields) -> Activity:
+    """Write an Activity with ``fields``, or buffer it if a scope is open."""
+    activity = Activity(**fields)
+    # `bulk_create` does not go through `BaseModel.save`, which credits the
+    # request user; do it here, so both ways of writing agree.
+    user = get_current_user()
+    if user is not None and not user.is_anonymous:
+        activity.created_by = activity.updated_by = user
+    buffer = getattr(_local, "buffer", None)
+    if buffer is None:
+        activity.save()
+    elif connection.in_atomic_block:
+        transaction.on_commit(partial(buffer.add, activity))
+    else:
+        buffer.add(activity)
+    return activity
+
+
+def write(activities: list[Activity]) -> None:
+    """Insert ``activities`` now, or queue them when writes are offloaded."""
+    if not activities:
+        return
+    if not settings.ACTIVITY_WRITE_OFFLOAD:
+        Activity.objects.bulk_create(activities)
+        return
+    from common.tasks import write_activities
+
+    by_org: dict[str, list[dict]] = {}
+    for activity in activities:
+        by_org.setdefault(str(activity.org_id), []).append(_row(activity))
+    for org_id, rows in by_org.items():
+        write_activities.delay(rows, org_id)
+
+
+def _row(activity: Activity) -> dict:
+    row = {name: getattr(activity, name) for name in ROW_FIELDS}
+    return {k: str(v) if isinstance(v, UUID) else v for k, v in row.items()}
@@ -4,15 +4,27 @@ The CustomFieldDefinition model in common/models.py stores schema rows; this
 module is the cross-cutting validator everyone uses to coerce/check values
 before persisting them on an entity's `custom_fields` JSONField.
 
+It is also the query side: the ``?cf_<key>`` filters and ``?ordering=cf_<key>``
+sorts every list view with a custom-field target accepts
+(``apply_list_params``), and the per-field expression indexes an operator can
+add for a field an org filters or sorts on heavily.
+
 See docs/cases/tier1/custom-fields.md and docs/cases/COORDINATION_DECISIONS.md.
 """
 
 from __future__ import annotations
 
+import hashlib
 import logging
 from datetime import date
+from functools import reduce
+from operator import or_
 from typing import Any
 
+from django.core.validators import validate_slug
+from django.db import connection
+from django.db.models import Q
+from django.db.models.fields.json import KeyTransform
 from rest_framework import serializers as drf_serializers
 
 logger = logging.getLogger(__name__)
@@ -32,6 +44,21 @@ SUPPORTED_TARGETS: set[str] = {
 }
 
 
+# The model behind each target, as an app label. The migration that indexes
+# the `custom_fields` columns reads its table names from here.
+TARGET_MODELS: dict[str, str] = {
+    "Account": "accounts.Account",
+    "Case": "cases.Case",
+    "Contact": "contacts.Contact",
+    "Estimate": "invoices.Estimate",
+    "Invoice": "invoices.Invoice",
+    "Lead": "leads.Lead",
+    "Opportunity": "opportunity.Opportunity",
+    "RecurringInvoice": "invoices.RecurringInvoice",
+    "Task": "tasks.Task",
+}
+
+
 def is_supported_target(target_model: str) -> bool:
     return target_model in SUPPORTED_TARGETS
 
@@ -196,3 +223,206 @@ def validate_payload(
             errors.setdefault(defn.key, "is required")
 
     return cleaned, errors
+
+
+# --- Querying ---------------------------------------------------------------
+#
+# `?cf_<key>=<value>` is equality, `?cf_<key>__in=a,b` is any of a list, and
+# `?cf_<key>__gte=` / `__lte` / `__gt` / `__lt` are ranges on number and date
+# fields. `?ordering=cf_<key>` / `-cf_<key>` sorts by one, rows without it
+# last. Values are coerced by the org's definition of the key, the way
+# `validate_payload` coerced them on the way in: `?cf_seats=5` has to match
+# the stored number 5.0, which the raw string "5" never did. A key the org has
+# no definition for is compared as text, as every `cf_` filter used to be.
+#
+# On PostgreSQL, equality and `__in` are `custom_fields @> {"key": value}`,
+# answered by the GIN (jsonb_path_ops) index on every `custom_fields` column
+# (common/0044). GIN cannot answer a range or an ORDER BY; those read
+# `custom_fields -> 'key'`, which an expression index on `(org_id,
+# custom_fields -> 'key')` answers, created per hot field with
+# `manage.py custom_field_index`. Elsewhere (SQLite, the test suite) every
+# comparison is on the key's extracted value, which needs no index support.
+
+FILTER_PREFIX = "cf_"
+RANGE_OPERATORS = ("gte", "lte", "gt", "lt")
+RANGE_FIELD_TYPES = ("number", "date")
+LIST_FIELD_TYPES = ("text", "textarea", "dropdown")
+
+
+def _split_param(name: str):
+    """``cf_<key>[__<op>]`` as ``(key, op)``; op is ``None`` for equality."""
+    key = name[len(FILTER_PREFIX) :]
+    head, sep, op = key.rpartition("__")
+    if sep and head and op in RANGE_OPERATORS + ("in",):
+        return head, op
+    return key, None
+
+
+def _coerce_param(definition, param: str, raw: str):
+    """A query value coerced like a stored one; 400 naming ``param`` if it can't be."""
+    if definition is None:
+        return raw
+    value, error = _coerce_value(definition.field_type, raw)
+    if error:
+        raise drf_serializers.ValidationError({param: [f"'{raw}' {error}."]})
+    return value
+
+
+def _definitions(target_model: str, org) -> dict:
+    from common.models import CustomFieldDefinition  # avoid import cycle
+
+    if org is None:
+        return {}
+    return {
+        d.key: d
+        for d in CustomFieldDefinition.objects.filter(
+            org=org, target_model=target_model, is_active=True
+        )
+    }
+
+
+def _ordering_key(params):
+    ordering = params.get("ordering") or ""
+    key = ordering.removeprefix("-")
+    if not key.startswith(FILTER_PREFIX) or key == FILTER_PREFIX:
+        return None, False
+    return key[len(FILTER_PREFIX) :], ordering.startswith("-")
+
+
+def apply_list_params(queryset, target_model: str, params, org):
+    """Apply the ``cf_`` filters and any ``ordering=cf_<key>`` to ``queryset``.
+
+    ``org`` is whose definitions type the values; ``None`` compares every
+    value as text. A value the definition cannot coerce, or a range or list
+    on a field type that has none, is a 400 naming the parameter.
+    """
+    filters = [
+        (name, raw)
+        for name, raw in params.items()
+        if name.startswith(FILTER_PREFIX) and len(name) > len(FILTER_PREFIX) and raw
+    ]
+    order_key, descending = _ordering_key(params)
+    if not filters and order_key is None:
+        return queryset
+
+    definitions = _definitions(target_model, org)
+    postgres = connection.vendor == "postgresql"
+    for n, (name, raw) in enumerate(filters):
+        key, op = _split_param(name)
+        definition = definitions.get(key)
+        field_type = definition.field_type if definition else None
+        # Each key's value as an alias, so the JSON-aware lookups Django
+        # registers on a key transform apply, and a key with `__` in it is not
+        # read as a chain of lookups.
+        alias = f"_cf_{n}"
+        queryset = queryset.alias(**{alias: KeyTransform(key, "custom_fields")})
+
+        if op in RANGE_OPERATORS:
+            if field_type not in RANGE_FIELD_TYPES:
+                raise drf_serializers.ValidationError(
+                    {name: ["Ranges apply to number and date fields only."]}
+                )
+            value = _coerce_param(definition, name, raw)
+            queryset = queryset.filter(**{f"{alias}__{op}": value})
+            continue
+
+        if op == "in":
+            if field_type is not None and field_type not in LIST_FIELD_TYPES:
+                raise drf_serializers.ValidationError(
+                    {name: ["Lists apply to text and dropdown fields only."]}
+                )
+            values = [
+                _coerce_param(definition, name, part.strip())
+                for part in raw.split(",")
+                if part.strip()
+            ]
+        else:
+            values = [_coerce_param(definition, name, raw)]
+        if not values:
+            continue
+        if postgres:
+            queryset = queryset.filter(
+                reduce(or_, (Q(custom_fields__contains={key: v}) for v in values))
+            )
+        else:
+            queryset = queryset.filter(**{f"{alias}__in": values})
+
+    if order_key is not None and order_key in definitions:
+        value = KeyTransform(order_key, "custom_fields")
+        queryset = queryset.order_by(
+            value.desc(nulls_last=True) if descending else value.asc(nulls_last=True),
+            "-id",
+        )
+    return queryset
+
+
+# --- Expression indexes -------------------------------------------------------
+#
+# For a field one org filters by range or sorts by on a large table: a b-tree
+# on `(org_id, custom_fields -> 'key')`, the expression `apply_list_params`
+# compares and sorts on. Built CONCURRENTLY, so it cannot run in a
+# transaction, and as the table's owner, which the RLS-restricted application
+# role is not; hence a management command (`custom_field_index`) rather than
+# a button. PostgreSQL only.
+
+
+def gin_index_name(table: str) -> str:
+    return f"{table}_custom_fields_gin"
+
+
+def expression_index_name(table: str, key: str) -> str:
+    name = f"{table}_cf_{key}_idx".replace("-", "_")
+    if len(name) <= 63:
+        return name
+    digest = hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()[:8]
+    return f"{table[:40]}_cf_{digest}_idx"
+
+
+def _table(target_model: str) -> str:
+    from django.apps import apps
+
+    if target_model not in TARGET_MODELS:
+        raise ValueError(
+            f"{target_model!r} is not a custom-field target. Choose from: "
+            + ", ".join(sorted(TARGET_MODELS))
+        )
+    return apps.get_model(TARGET_MODELS[target_model])._meta.db_table
+
+
+def expression_indexes() -> list[tuple[str, str]]:
+    """``(table, index name)`` of every custom-field expression index."""
+    tables = [_table(target) for target in sorted(TARGET_MODELS)]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT tablename, indexname FROM pg_indexes "
+            "WHERE schemaname = current_schema() AND tablename = ANY(%s) "
+            "AND indexdef LIKE %s ORDER BY tablename, indexname",
+            [tables, "%custom_fields -> %"],
+        )
+        return cursor.fetchall()
+
+
+def create_expression_index(target_model: str, key: str) -> str:
+    """Index ``(org_id, custom_fields -> key)`` on the target's table; return its name."""
+    validate_slug(key)
+    table = _table(target_model)
+    name = expression_index_name(table, key)
+    quote = connection.ops.quote_name
+    # The key is a slug, checked above, so it is safe as a literal; DDL takes
+    # no bind parameters.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {quote(name)} "
+            f"ON {quote(table)} (org_id, (custom_fields -> '{key}'))"
+        )
+    return name
+
+
+def drop_expression_index(target_model: str, key: str) -> str:
+    validate_slug(key)
+    name = expression_index_name(_table(target_model), key)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DROP INDEX CONCURRENTLY IF EXISTS {connection.ops.quote_name(name)}"
+        )
+    return name
@@ -0,0 +1,120 @@
+"""Aggregations behind the KPI dashboard (``ApiHomeView``).
+
+Every number on the home screen is a count or a sum over one of five models.
+They used to be asked for one at a time: a ``count()`` per entity, four more
+for the urgent counts, and a count plus a ``Sum`` for every entry of
+``STAGES``, each re-running the ``_owned_or_assigned`` subquery for a member.
+That is 25-odd round trips per page load, and the number grew with every
+stage added to the pipeline.
+
+Here each model is asked once. The individual numbers become conditional
+aggregates (``Count(filter=...)`` / ``Sum(filter=...)``) over the same base
+queryset, so the dashboard costs one query per model whatever the number of
+stages or urgent filters, and a member's visibility subquery is evaluated once
+per model rather than once per number.
+
+The functions take querysets the caller has already scoped to the org and
+narrowed to what the caller may see. Nothing here decides visibility.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from django.db.models import Count, DecimalField, F, Q, QuerySet, Sum
+from django.db.models.functions import Coalesce
+
+from common.utils import STAGES
+
+# Sales stages a deal can still be worked in. The pipeline value, the weighted
+# pipeline and "open deals" count these and nothing else; the Today queue uses
+# the same list for deal aging.
+OPEN_STAGES = ["PROSPECTING", "QUALIFICATION", "PROPOSAL", "NEGOTIATION"]
+
+# Task statuses that still want doing.
+OPEN_TASK_STATUSES = ["New", "In Progress"]
+
+
+def in_currency(currency: str) -> Q:
+    """Deals whose amount can be added up in ``currency``. A blank or null
+    currency is read as the org's own, which is how deals are entered."""
+    return Q(currency=currency) | Q(currency__isnull=True) | Q(currency="")
+
+
+def _money(expression, condition: Q):
+    """``Sum`` over the rows matching ``condition``, never ``None``: an empty
+    bucket reads as zero, as it did when each bucket was its own query."""
+    return Coalesce(Sum(expression, filter=condition), 0, output_field=DecimalField())
+
+
+def lead_metrics(all_leads: QuerySet, today: date) -> dict:
+    """Every lead number the dashboard shows, in one query.
+
+    ``all_leads`` includes converted and closed leads because the conversion
+    rate needs them. ``active`` and the urgent counts exclude both, the same
+    ``exclude()`` the view applied before, null statuses included.
+    """
+    active = ~Q(status__in=["converted", "closed"])
+    return all_leads.aggregate(
+        total=Count("pk"),
+        converted=Count("pk", filter=Q(status="converted")),
+        active=Count("pk", filter=active),
+        followups_today=Count("pk", filter=active & Q(next_follow_up=today)),
+        hot=Count(
+            "pk",
+            filter=active & Q(rating="HOT", status__in=["assigned", "in process"]),
+        ),
+    )
+
+
+def task_metrics(tasks: QuerySet, today: date) -> dict:
+    """Overdue and due-today counts for open tasks, in one query."""
+    still_open = Q(status__in=OPEN_TASK_STATUSES)
+    return tasks.aggregate(
+        overdue=Count("pk", filter=still_open & Q(due_date__lt=today)),
+        due_today=Count("pk", filter=still_open & Q(due_date=today)),
+    )
+
+
+def opportunity_metrics(
+    opportunities: QuerySet, currency: str, month_start: datetime
+) -> dict:
+    """The pipeline and revenue figures, in one query.
+
+    Counts include every deal whatever its currency. Money only adds up the
+    deals in ``currency``, since summing dollars and rupees gives a number that
+    means nothing; ``other_currency_count`` says how many were left out.
+
+    Returns the flat totals plus ``pipeline_by_stage``, keyed by stage code in
+    ``STAGES`` order, with a count, a value and the stage's label.
+    """
+    same_currency = in_currency(currency)
+    open_deal = Q(stage__in=OPEN_STAGES)
+
+    aggregates = {
+        "total": Count("pk"),
+        "open_count": Count("pk", filter=open_deal),
+        "other_currency_count": Count("pk", filter=~same_currency),
+        "pipeline_value": _money("amount", open_deal & same_currency),
+        "weighted_pipeline": _money(
+            F("amount") * F("probability") / 100, open_deal & same_currency
+        ),
+        "won_this_month": _money(
+            "amount",
+            Q(stage="CLOSED_WON", updated_at__gte=month_start) & same_currency,
+        ),
+    }
+    for code, _label in STAGES:
+        aggregates[f"{code}__count"] = Count("pk", filter=Q(stage=code))
+        aggregates[f"{code}__value"] = _money("amount", Q(stage=code) & same_currency)
+    totals = opportunities.aggregate(**aggregates)
+
+    totals["pipeline_by_stage"] = {
+        code: {
+            "count": totals.pop(f"{code}__count"),
+            "value": float(totals.pop(f"{code}__value") or 0),
+            "label": label,
+        }
+        for code, label in STAGES
+    }
+    return totals
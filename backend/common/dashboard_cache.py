@@ -0,0 +1,194 @@
+"""Cached dashboard snapshots, invalidated by version rather than by expiry.
+
+The home dashboard and the Today queue are read far more often than the rows
+behind them change, and in a large org every load recomputed all of it for
+every user. This module keeps the computed sections in the ``dashboard`` cache
+(Redis in production, the same server Celery uses) and serves repeat loads
+from there.
+
+Invalidation is by version. Each org holds a counter per tracked entity
+("lead", "task", ...), bumped by ``post_save``/``post_delete`` on that model
+(see ``common/signals.py``). A section names the entities it is computed from,
+and its cache key embeds their current versions, so a write makes the old key
+unreachable and nothing has to find and delete it. Sections are keyed
+separately, which is what lets a saved task recompute the task numbers and
+leave the pipeline alone.
+
+A snapshot is per org for admins, who see everything, and per profile for
+members, whose numbers are narrowed to their own rows. Keys also carry the
+org's calendar day, because "overdue" and "due today" move at midnight with
+no write to announce it, and expire after ``DASHBOARD_CACHE_TIMEOUT`` so that
+writes no signal sees (``QuerySet.update()``, ``bulk_create``) cannot leave a
+number wrong for longer than that.
+
+The cache is an accelerator, never a dependency: if it cannot be reached the
+sections are computed live and the page loads as it did before.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = "dashboard"
+
+# Model label -> the entity name its writes bump. SalesGoal is here because a
+# goal's target and period are part of the goal summary; Case and Invoice
+# because the Today queue lists them.
+TRACKED_MODELS = {
+    "accounts.Account": "account",
+    "contacts.Contact": "contact",
+    "leads.Lead": "lead",
+    "opportunity.Opportunity": "opportunity",
+    "opportunity.SalesGoal": "goal",
+    "tasks.Task": "task",
+    "cases.Case": "case",
+    "invoices.Invoice": "invoice",
+}
+
+HITS_KEY = "stats:hits"
+MISSES_KEY = "stats:misses"
+
+
+@dataclass
+class Section:
+    """One independently cached part of a snapshot.
+
+    ``compute`` takes no arguments and returns something the cache can pickle;
+    ``depends_on`` lists the entities whose writes make it stale. ``scope``
+    overrides the snapshot's scope for a section that differs per caller even
+    where the rest of the snapshot is shared.
+    """
+
+    depends_on: tuple[str, ...]
+    compute: Callable[[], Any]
+    scope: str | None = None
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _timeout():
+    return getattr(settings, "DASHBOARD_CACHE_TIMEOUT", 300)
+
+
+def _version_key(org_id, entity):
+    return f"v:{org_id}:{entity}"
+
+
+def _bump_now(org_id, entity):
+    cache = _cache()
+    key = _version_key(org_id, entity)
+    try:
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Never bumped, or evicted. Any value that differs from what a
+            # cached section was keyed with will do; `add` keeps a concurrent
+            # bump that got here first.
+            if not cache.add(key, 1, timeout=None):
+                cache.incr(key)
+    except Exception:
+        logger.warning("Could not bump dashboard version %s", key, exc_info=True)
+
+
+def bump(org_id, entity):
+    """Mark every cached section that depends on ``entity`` in ``org_id`` stale.
+
+    Bumped twice: now, so the rest of this request (and a test) sees it, and
+    again on commit, so a snapshot another request computed from the
+    pre-commit rows in between is not the one that survives.
+    """
+    if org_id is None:
+        return
+    _bump_now(org_id, entity)
+    transaction.on_commit(lambda: _bump_now(org_id, entity))
+
+
+def bump_for_instance(instance):
+    """``bump`` for a tracked model instance; a no-op for anything else."""
+    entity = TRACKED_MODELS.get(instance._meta.label)
+    if entity is not None:
+        bump(getattr(instance, "org_id", None), entity)
+
+
+def load_sections(org, scope, sections: dict[str, Section], fresh=False):
+    """Return ``({name: value}, outcome)`` for ``sections``.
+
+    ``scope`` is ``"org"`` for a caller who sees the whole org and the profile
+    id otherwise. Cached sections are returned as they are; missing or stale
+    ones are computed and stored. ``fresh`` recomputes everything and stores the
+    result, which is what a user asking for current numbers expects to see on
+    the next load too.
+
+    ``outcome`` is ``"hit"``, ``"miss"``, ``"partial"`` or ``"bypass"``, for the
+    response header; ``"bypass"`` also covers a cache that could not be reached.
+    """
+    cache = _cache()
+    today = timezone.localdate().isoformat()
+    entities = sorted({e for s in sections.values() for e in s.depends_on})
+
+    try:
+        stored = cache.get_many([_version_key(org.id, e) for e in entities])
+        versions = {e: stored.get(_version_key(org.id, e), 0) for e in entities}
+        keys = {
+            name: ":".join(
+                [f"s:{org.id}:{section.scope or scope}:{name}:{today}"]
+                + [f"{e}{versions[e]}" for e in section.depends_on]
+            )
+            for name, section in sections.items()
+        }
+        cached = {} if fresh else cache.get_many(list(keys.values()))
+    except Exception:
+        logger.warning("Dashboard cache unavailable; computing live", exc_info=True)
+        return {name: s.compute() for name, s in sections.items()}, "bypass"
+
+    values = {}
+    to_store = {}
+    for name, section in sections.items():
+        if keys[name] in cached:
+            values[name] = cached[keys[name]]
+        else:
+            values[name] = to_store[keys[name]] = section.compute()
+
+    hits = len(sections) - len(to_store)
+    try:
+        if to_store:
+            cache.set_many(to_store, timeout=_timeout())
+        if not fresh:
+            _count(HITS_KEY, hits)
+            _count(MISSES_KEY, len(to_store))
+    except Exception:
+        logger.warning("Could not store dashboard snapshot", exc_info=True)
+
+    if fresh:
+        return values, "bypass"
+    if not to_store:
+        return values, "hit"
+    return values, "partial" if hits else "miss"
+
+
+def _count(key, n):
+    if not n:
+        return
+    cache = _cache()
+    try:
+        cache.incr(key, n)
+    except ValueError:
+        if not cache.add(key, n, timeout=None):
+            cache.incr(key, n)
+
+
+def stats():
+    """Section hits and misses since the counters were last cleared."""
+    stored = _cache().get_many([HITS_KEY, MISSES_KEY])
+    return {"hits": stored.get(HITS_KEY, 0), "misses": stored.get(MISSES_KEY, 0)}
@@ -0,0 +1,304 @@
+"""Background CSV imports: store the upload, stream it, commit it in chunks.
+
+The contacts and cases importers run their preview/commit pair inside the
+request. Both read the whole upload, parse it into one list and, on commit,
+parse it a second time; the lead upload parsed it the same way and handed
+every row to ``create_lead_from_file`` as a Celery argument, so the file's
+size was bounded by the broker's message limit as much as by the upload cap.
+
+An ``ImportJob`` is the other way through. ``start_job`` checks the header,
+puts the upload in file storage and queues ``common.tasks.run_import_job``.
+The worker ``run_job`` then reads the stored file twice, a chunk of
+``CHUNK_SIZE`` rows at a time, holding only the current chunk:
+
+* **Validation.** Every chunk is validated and its row errors recorded on
+  the job, and the rows are counted. An importer that is all-or-nothing
+  (contacts, cases: "fix the file first", as their commit endpoints say)
+  stops here if any row failed, having written nothing.
+* **Import.** The chunks are validated again, since the organization may have
+  changed since the first pass, and the valid rows of each are committed in
+  their own transaction. Lead imports skip their invalid rows rather than
+  refuse the file, as the lead upload always has.
+
+The job's counters are saved after every chunk; ``GET /api/import-jobs/<id>/``
+is what the client polls. The stored file is deleted when the job finishes.
+
+What each kind of record needs is an ``Importer``, registered by dotted path
+in ``IMPORTERS`` so this module imports no app's models.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import logging
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from common.models import ImportJob
+
+logger = logging.getLogger(__name__)
+
+# Rows validated, committed and reported per step.
+CHUNK_SIZE = 1000
+# Row errors kept on the job. The count is exact past this; the list is not.
+MAX_STORED_ERRORS = 500
+# A stored file is read a chunk at a time, so the cap is about storage and
+# the time a job takes rather than memory. The in-request importers keep 5 MB.
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+
+IMPORTERS = {
+    "contacts": "contacts.services.csv_import.IMPORTER",
+    "cases": "cases.services.csv_import.IMPORTER",
+    "leads": "leads.csv_import.IMPORTER",
+}
+
+DECODE_ERROR = (
+    "File could not be decoded as UTF-8. Save your CSV as UTF-8 and try again."
+)
+
+
+class ImportFileError(Exception):
+    """The file as a whole cannot be imported (header, encoding, size)."""
+
+
+@dataclass(frozen=True)
+class Importer:
+    """How to read, check and write one kind of record.
+
+    * ``read(fileobj)`` yields ``(row_number, record)`` from a binary stream
+      and raises ``ImportFileError`` for a file it cannot take, at the first
+      ``next()`` if the header is the problem.
+    * ``validate(records, org, state)`` returns ``(errors, valid_rows)`` for
+      a chunk. ``errors`` have ``row`` and ``to_dict()``. ``state`` is a
+      fresh ``new_state()`` per pass, carried across its chunks for checks
+      that span the file, like a repeated email.
+    * ``commit(valid_rows, org, profile)`` writes a chunk and returns the new
+      records' ids, or a ``Committed`` when it can also refuse single rows.
+      It runs inside a transaction.
+    * ``finish(count, first_id, org, profile)`` runs once, after the last
+      chunk, when anything was created.
+    """
+
+    read: Callable[[Any], Iterator[tuple[int, dict]]]
+    validate: Callable[[list, Any, Any], tuple[list, list]]
+    commit: Callable[[list, Any, Any], list[str]]
+    finish: Callable[[int, str, Any, Any], None] | None = None
+    new_state: Callable[[], Any] = dict
+    all_or_nothing: bool = True
+
+
+@dataclass
+class Committed:
+    """What a chunk's commit wrote, and the rows the database refused.
+
+    Only an importer that is not all-or-nothing has a use for ``failed``: it
+    reports a row that breaks a constraint on insert (a concurrent import of
+    the same email) and carries on with the rest, as it does with the rows
+    that failed validation.
+    """
+
+    ids: list[str]
+    failed: list = field(default_factory=list)
+
+
+def get_importer(kind: str) -> Importer:
+    return import_string(IMPORTERS[kind])
+
+
+def read_csv(fileobj, encoding: str = "utf-8-sig") -> Iterator[list[str]]:
+    """Yield the rows of a binary CSV stream, decoding as it goes.
+
+    The text wrapper is detached on the way out so that it does not close
+    ``fileobj``, which belongs to the caller.
+    """
+    text = io.TextIOWrapper(fileobj, encoding=encoding, newline="")
+    try:
+        yield from csv.reader(text)
+    except UnicodeDecodeError:
+        raise ImportFileError(DECODE_ERROR) from None
+    except csv.Error as exc:
+        raise ImportFileError(f"Not a valid CSV file: {exc}") from None
+    finally:
+        text.detach()
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def start_job(
+    kind: str, upload, profile, max_bytes: int = MAX_UPLOAD_BYTES
+) -> ImportJob:
+    """Check ``upload``'s header, store it and queue its import.
+
+    Raises ``ImportFileError`` for a file that is too big or whose header the
+    importer refuses, so the caller can answer ``400`` at once rather than
+    have the client poll its way to the same message.
+    """
+    from common.tasks import run_import_job
+
+    importer = get_importer(kind)
+    # Reading the first record is enough to check the header.
+    next(importer.read(upload), None)
+    upload.seek(0)
+
+    job = ImportJob(
+        org=profile.org,
+        kind=kind,
+        requested_by=profile,
+        file_name=(upload.name or "")[:255],
+    )
+    job.file.save(f"{job.id}.csv", upload, save=False)
+    # The size the storage holds, not the client's word for it.
+    if job.file.size > max_bytes:
+        job.file.delete(save=False)
+        raise ImportFileError(
+            f"File exceeds the {max_bytes // (1024 * 1024)} MB upload limit"
+        )
+    job.save()
+    transaction.on_commit(lambda: run_import_job.delay(str(job.id), str(job.org_id)))
+    return job
+
+
+class _Stop(Exception):
+    """End the job as failed with this message."""
+
+
+@dataclass
+class _Progress:
+    created: int = 0
+    first_id: str | None = None
+    rows_with_errors: set = field(default_factory=set)
+
+
+def run_job(job: ImportJob) -> ImportJob:
+    """Validate and import ``job``'s file. Always leaves the job finished."""
+    importer = get_importer(job.kind)
+    progress = _Progress()
+    job.status = "validating"
+    job.started_at = timezone.now()
+    job.save(update_fields=["status", "started_at", "updated_at"])
+    try:
+        _validate_file(job, importer, progress)
+        if importer.all_or_nothing and job.error_count:
+            raise _Stop("Fix the invalid rows before importing")
+        _import_file(job, importer, progress)
+    except (ImportFileError, _Stop) as exc:
+        job.status, job.message = "failed", str(exc)
+    except Exception:
+        logger.exception("Import job %s failed", job.id)
+        job.status = "failed"
+        job.message = _partial("The import stopped unexpectedly", job)
+    else:
+        job.status = "succeeded"
+    finally:
+        if progress.created and importer.finish is not None:
+            try:
+                importer.finish(
+                    progress.created, progress.first_id, job.org, job.requested_by
+                )
+            except Exception:
+                logger.exception("Import job %s: finishing step failed", job.id)
+        if job.file:
+            job.file.delete(save=False)
+        job.finished_at = timezone.now()
+        job.save()
+    return job
+
+
+def _validate_file(job, importer, progress):
+    state = importer.new_state()
+    job.processed_rows = 0
+    with job.file.open("rb") as fileobj:
+        for chunk in chunked(importer.read(fileobj), CHUNK_SIZE):
+            errors, _valid = importer.validate(chunk, job.org, state)
+            _record_errors(job, errors, progress)
+            job.processed_rows += len(chunk)
+            job.save(
+                update_fields=[
+                    "processed_rows",
+                    "error_count",
+                    "errors",
+                    "updated_at",
+                ]
+            )
+    job.total_rows = job.processed_rows
+
+
+def _import_file(job, importer, progress):
+    state = importer.new_state()
+    job.status = "importing"
+    job.processed_rows = 0
+    job.save(update_fields=["status", "total_rows", "processed_rows", "updated_at"])
+    with job.file.open("rb") as fileobj:
+        for chunk in chunked(importer.read(fileobj), CHUNK_SIZE):
+            errors, valid = importer.validate(chunk, job.org, state)
+            if errors and importer.all_or_nothing:
+                # Valid a moment ago: someone added a clashing record since.
+                _record_errors(job, errors, progress)
+                raise _Stop(_partial("Rows changed validity during the import", job))
+            # A row that went bad since the first pass is skipped like one that
+            # was bad all along; the ones already reported are not twice.
+            _record_errors(
+                job,
+                [e for e in errors if e.row not in progress.rows_with_errors],
+                progress,
+            )
+            try:
+                with transaction.atomic():
+                    result = importer.commit(valid, job.org, job.requested_by)
+            except IntegrityError:
+                raise _Stop(
+                    _partial(
+                        "A record was created concurrently that conflicts with "
+                        "this import",
+                        job,
+                    )
+                ) from None
+            if not isinstance(result, Committed):
+                result = Committed(result)
+            if result.ids:
+                progress.created += len(result.ids)
+                progress.first_id = progress.first_id or result.ids[0]
+            for error in result.failed:
+                job.failed_count += 1
+                if len(job.errors) < MAX_STORED_ERRORS:
+                    job.errors.append(error.to_dict())
+            job.created_count = progress.created
+            job.processed_rows += len(chunk)
+            job.save(
+                update_fields=[
+                    "created_count",
+                    "processed_rows",
+                    "error_count",
+                    "failed_count",
+                    "errors",
+                    "updated_at",
+                ]
+            )
+
+
+def _partial(reason: str, job) -> str:
+    if not job.created_count:
+        return f"{reason}. Nothing was imported; check the file and try again."
+    return (
+        f"{reason}. The first {job.processed_rows} rows were imported; remove "
+        "them from the file before trying again."
+    )
+
+
+def _record_errors(job, errors, progress):
+    for error in errors:
+        if error.row not in progress.rows_with_errors:
+            progress.rows_with_errors.add(error.row)
+            job.error_count += 1
+        if len(job.errors) < MAX_STORED_ERRORS:
+            job.errors.append(error.to_dict())
@@ -0,0 +1,63 @@
+"""
+Recompute the normalized duplicate-detection columns (``NormalizedField``).
+
+``phone_normalized`` on Contact, Lead and Account and ``website_domain`` on
+Account are written on every save and filled for existing rows by the
+migrations that added them. Writes that skip ``save()`` (``QuerySet.update()``,
+``bulk_update``, raw SQL) can leave them stale; this puts them right.
+
+Usage:
+    python manage.py backfill_normalized_fields                  # every model
+    python manage.py backfill_normalized_fields --model contacts.Contact
+    python manage.py backfill_normalized_fields --batch-size 5000
+
+Streams each table in primary-key order and writes only the rows whose value
+changed, one ``bulk_update`` per batch. Safe to re-run. It reads every org's
+rows, so run it as the role migrations run as, not the RLS-restricted one.
+"""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from common.duplicate_detection import NormalizedField, backfill_normalized_fields
+
+
+def _models_with_normalized_fields():
+    return [
+        model
+        for model in apps.get_models()
+        if any(isinstance(f, NormalizedField) for f in model._meta.concrete_fields)
+    ]
+
+
+class Command(BaseCommand):
+    help = "Recompute normalized phone and domain columns used by duplicate detection"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model",
+            help="Only this model, as app_label.ModelName",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows read and written per batch (default 1000)",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        models = _models_with_normalized_fields()
+        if options["model"]:
+            models = [m for m in models if m._meta.label == options["model"]]
+            if not models:
+                raise CommandError(
+                    f"{options['model']} has no normalized fields. Choose from: "
+                    + ", ".join(m._meta.label for m in _models_with_normalized_fields())
+                )
+
+        for model in models:
+            changed = backfill_normalized_fields(model, options["batch_size"])
+            self.stdout.write(f"{model._meta.label}: {changed} row(s) updated")
@@ -0,0 +1,74 @@
+"""
+Add or drop the expression index for one hot custom field.
+
+Every ``custom_fields`` column has a GIN index (common/0044), which answers
+``?cf_<key>=`` equality and lists. It cannot answer a range
+(``?cf_<key>__gte=``) or a sort (``?ordering=cf_<key>``); on a large table a
+field used that way wants a b-tree on ``(org_id, custom_fields -> 'key')``,
+the expression those queries read. See ``common/custom_fields.py``.
+
+Usage:
+    python manage.py custom_field_index --list
+    python manage.py custom_field_index Opportunity renewal_date
+    python manage.py custom_field_index Opportunity renewal_date --drop
+
+Built and dropped CONCURRENTLY, so writes to the table carry on meanwhile.
+Run it as the role migrations run as: only the table's owner can index it.
+PostgreSQL only.
+"""
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from common import custom_fields
+
+
+class Command(BaseCommand):
+    help = "Create or drop the expression index for a filtered/sorted custom field"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "target",
+            nargs="?",
+            help="Custom-field target, e.g. Case or Opportunity",
+        )
+        parser.add_argument("key", nargs="?", help="The field's key")
+        parser.add_argument(
+            "--drop",
+            action="store_true",
+            help="Drop the index instead of creating it",
+        )
+        parser.add_argument(
+            "--list",
+            action="store_true",
+            help="List the custom-field expression indexes that exist",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Custom-field indexes are only supported on PostgreSQL.")
+
+        if options["list"]:
+            indexes = custom_fields.expression_indexes()
+            for table, name in indexes:
+                self.stdout.write(f"{table}: {name}")
+            if not indexes:
+                self.stdout.write("No custom-field expression indexes.")
+            return
+
+        if not options["target"] or not options["key"]:
+            raise CommandError("Give a target and a key, or --list.")
+        try:
+            if options["drop"]:
+                name = custom_fields.drop_expression_index(
+                    options["target"], options["key"]
+                )
+                self.stdout.write(self.style.SUCCESS(f"Dropped {name}"))
+            else:
+                name = custom_fields.create_expression_index(
+                    options["target"], options["key"]
+                )
+                self.stdout.write(self.style.SUCCESS(f"Created {name}"))
+        except (ValidationError, ValueError) as exc:
+            raise CommandError(exc) from None
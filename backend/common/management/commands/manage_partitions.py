@@ -0,0 +1,75 @@
+"""
+Maintain the monthly partitions of ``activity`` and ``notification``.
+
+Creates the partitions for this month and the next ones, and applies history
+retention: partitions older than the longest history any org keeps are
+dropped (or archived), and an org that keeps less has its older rows
+deleted. See ``common/partitions.py``. Runs nightly through the
+``common.tasks.maintain_partitions`` beat entry; run it by hand after
+changing a retention, or with ``--dry-run`` to see what it would do.
+
+Usage:
+    python manage.py manage_partitions                    # create + retention
+    python manage.py manage_partitions --months-ahead 6   # create further out
+    python manage.py manage_partitions --archive          # keep old partitions
+    python manage.py manage_partitions --dry-run          # report only
+
+``--archive`` detaches an expired partition and moves it to the ``archive``
+schema instead of dropping it, to be dumped and dropped by hand. On a
+database other than PostgreSQL the tables are not partitioned, and only the
+retention DELETE runs.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from common import partitions
+
+
+class Command(BaseCommand):
+    help = "Create future activity/notification partitions and apply retention"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=settings.PARTITION_MONTHS_AHEAD,
+            help="Months after this one to create partitions for "
+            f"(default {settings.PARTITION_MONTHS_AHEAD})",
+        )
+        parser.add_argument(
+            "--archive",
+            action="store_true",
+            help=f"Move expired partitions to the '{partitions.ARCHIVE_SCHEMA}' "
+            "schema instead of dropping them",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would change without changing it",
+        )
+
+    def handle(self, *args, **options):
+        if options["months_ahead"] < 0:
+            raise CommandError("--months-ahead cannot be negative")
+
+        dry_run = options["dry_run"]
+        reports = partitions.maintain(
+            months_ahead=options["months_ahead"],
+            archive=options["archive"],
+            dry_run=dry_run,
+        )
+        verb = "Would" if dry_run else "Did"
+        removal = "archive" if options["archive"] else "drop"
+        for report in reports:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{report.table}:"))
+            if not partitions.is_partitioned(report.table):
+                self.stdout.write("  not partitioned")
+            for name in report.created:
+                self.stdout.write(f"  {verb} create {name}")
+            for name in report.removed:
+                self.stdout.write(f"  {verb} {removal} {name}")
+            self.stdout.write(
+                f"  {verb} delete {report.deleted} rows past their org's retention"
+            )
+        self.stdout.write(self.style.SUCCESS("Done"))
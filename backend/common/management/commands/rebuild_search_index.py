@@ -0,0 +1,72 @@
+"""
+Rebuild the global search documents (``SearchDocument``) from the records.
+
+Run once after deploying the search index, since signals only index records
+as they are written, and again whenever documents may have drifted (bulk
+imports through ``bulk_create``, hand-written SQL).
+
+Usage:
+    python manage.py rebuild_search_index                 # every org
+    python manage.py rebuild_search_index --org <uuid>    # one org
+    python manage.py rebuild_search_index --batch-size 2000
+
+Records are streamed per model in batches of ``--batch-size``, each written
+with one upsert, so memory stays flat however large the org. Documents whose
+record no longer exists are removed. Safe to re-run, and safe to run while the
+app is serving: a document is replaced in place, never absent.
+"""
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from common.models import Org
+from common.search_index import BATCH_SIZE, reindex_org
+from common.tasks import clear_rls_context, set_rls_context
+
+
+class Command(BaseCommand):
+    help = "Rebuild the global search index for one org or all of them"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--org",
+            help="Only rebuild this org (its UUID)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help=f"Records read and written per batch (default {BATCH_SIZE})",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        orgs = Org.objects.order_by("name")
+        if options["org"]:
+            try:
+                orgs = orgs.filter(id=options["org"])
+                found = orgs.exists()
+            except (ValidationError, ValueError):
+                found = False
+            if not found:
+                raise CommandError(f"No org with id {options['org']}")
+
+        total = 0
+        try:
+            for org in orgs:
+                set_rls_context(org.id)
+                counts = {}
+                for label, count in reindex_org(org.id, batch_size=batch_size):
+                    counts[label] = counts.get(label, 0) + count
+                    if options["verbosity"] > 1:
+                        self.stdout.write(f"  {label}: {counts[label]}")
+                indexed = sum(counts.values())
+                total += indexed
+                self.stdout.write(f"{org.name}: {indexed} document(s)")
+        finally:
+            clear_rls_context()
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} document(s)"))
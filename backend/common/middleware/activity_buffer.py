@@ -0,0 +1,17 @@
+"""Write each request's Activity rows in one INSERT (common/activity_buffer.py).
+
+Listed after ``RequireOrgContext`` so the flush runs while the request's RLS
+context is still set: ``activity`` is org-scoped, and an INSERT outside the
+context is refused by the policy's check.
+"""
+
+from common.activity_buffer import buffered
+
+
+class ActivityBufferMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with buffered():
+            return self.get_response(request)
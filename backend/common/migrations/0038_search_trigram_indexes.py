@@ -0,0 +1,79 @@
+# Trigram GIN indexes for the global search palette (GlobalSearchView).
+#
+# Each index is on UPPER(column::text) with gin_trgm_ops, which is the exact
+# expression Django writes for `icontains` on PostgreSQL. The search query does
+# not change; the planner simply has an index for it. The list of columns lives
+# in common/search.py beside the fields the view searches.
+#
+# The indexes are raw SQL in a RunPython rather than Meta.indexes because the
+# test suite builds its SQLite schema from the models, and SQLite has no GIN.
+# Same reason the RLS migrations look the way they do.
+#
+# atomic = False so each index can be built CONCURRENTLY: a plain CREATE INDEX
+# holds a write lock on the table for the whole build, which on a large
+# `lead` or `case` table is an outage.
+#
+# pg_trgm is a trusted extension (PostgreSQL 13+), so the database owner can
+# create it. Where the role cannot, this prints why and skips: search still
+# works, unindexed and unranked, exactly as it did before.
+
+from django.db import DatabaseError, migrations
+
+from common.search import TRIGRAM_INDEXES, trigram_index_name
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        print("Trigram search indexes are only supported on PostgreSQL. Skipping.")
+        return
+
+    quote = schema_editor.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        except DatabaseError as exc:
+            print(f"  Could not create pg_trgm ({exc}). Skipping search indexes.")
+            return
+
+        for table, column in TRIGRAM_INDEXES:
+            cursor.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS "
+                f"{quote(trigram_index_name(table, column))} ON {quote(table)} "
+                f"USING gin (UPPER({quote(column)}::text) gin_trgm_ops)"
+            )
+    print(f"  Created {len(TRIGRAM_INDEXES)} trigram search index(es)")
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    """Drop the indexes; leave pg_trgm, which something else may use."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    quote = schema_editor.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        for table, column in TRIGRAM_INDEXES:
+            cursor.execute(
+                "DROP INDEX CONCURRENTLY IF EXISTS "
+                f"{quote(trigram_index_name(table, column))}"
+            )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("common", "0037_org_timezone"),
+        ("accounts", "0008_account_is_sample"),
+        ("cases", "0028_inboundmailbox_webhook_secret_help_text"),
+        ("contacts", "0013_contact_is_sample"),
+        (
+            "invoices",
+            "0010_estimate_accepted_by_email_estimate_accepted_by_name_and_more",
+        ),
+        ("leads", "0016_alter_leadpipeline_is_default"),
+        ("opportunity", "0015_drop_orphan_deal_pipeline_tables"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,179 @@
+# Generated by Django 6.0.9 on 2026-10-18 07:01
+
+#
+# The global search document table (common/search_index.py), with RLS like
+# every org-scoped table and, where pg_trgm is installed, trigram indexes on
+# the two columns the palette matches. The table starts empty: run
+# `manage.py rebuild_search_index` once after deploying, or keep
+# SEARCH_USE_INDEX=False until it has run.
+#
+# The indexes are raw SQL for the reason common/0038 gives (SQLite has no
+# GIN). The table is new and empty, so they are built plainly rather than
+# CONCURRENTLY; atomic = False is for the RLS policy, as in common/0032.
+
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import connection, migrations, models
+
+from common.rls import get_disable_policy_sql, get_enable_policy_sql
+from common.search import DOCUMENT_TRIGRAM_INDEXES, trigram_index_name
+
+
+def enable_rls_and_indexes(apps, schema_editor):
+    if connection.vendor != "postgresql":
+        return
+    quote = schema_editor.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(get_enable_policy_sql("search_document"))
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            print("  pg_trgm is not installed. Skipping search document indexes.")
+            return
+        for table, column in DOCUMENT_TRIGRAM_INDEXES:
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS "
+                f"{quote(trigram_index_name(table, column))} ON {quote(table)} "
+                f"USING gin (UPPER({quote(column)}::text) gin_trgm_ops)"
+            )
+
+
+def disable_rls_and_indexes(apps, schema_editor):
+    if connection.vendor != "postgresql":
+        return
+    quote = schema_editor.quote_name
+    with connection.cursor() as cursor:
+        for table, column in DOCUMENT_TRIGRAM_INDEXES:
+            cursor.execute(
+                f"DROP INDEX IF EXISTS {quote(trigram_index_name(table, column))}"
+            )
+        cursor.execute(get_disable_policy_sql("search_document"))
+
+
+class Migration(migrations.Migration):
+    # RLS policy creation can't run inside an atomic block.
+    atomic = False
+
+    dependencies = [
+        ("common", "0038_search_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchDocument",
+            fields=[
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Created At"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Last Modified At"
+                    ),
+                ),
+                (
+                    "id",
+                    models.UUIDField(
+                        db_index=True,
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                    ),
+                ),
+                (
+                    "entity_type",
+                    models.CharField(
+                        choices=[
+                            ("lead", "Lead"),
+                            ("deal", "Deal"),
+                            ("account", "Account"),
+                            ("contact", "Contact"),
+                            ("ticket", "Ticket"),
+                            ("invoice", "Invoice"),
+                            ("solution", "Solution"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                ("entity_id", models.UUIDField()),
+                ("title", models.CharField(max_length=255)),
+                ("subtitle", models.CharField(blank=True, default="", max_length=255)),
+                ("search_text", models.TextField(blank=True, default="")),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="%(class)s_created_by",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Created By",
+                    ),
+                ),
+                (
+                    "org",
+                    models.ForeignKey(
+                        help_text="Organization this record belongs to",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(class)s_set",
+                        to="common.org",
+                    ),
+                ),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "updated_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="%(class)s_updated_by",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Last Modified By",
+                    ),
+                ),
+                (
+                    "visible_to",
+                    models.ManyToManyField(
+                        blank=True, related_name="search_documents", to="common.profile"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Search Document",
+                "verbose_name_plural": "Search Documents",
+                "db_table": "search_document",
+                "indexes": [
+                    models.Index(
+                        fields=["org", "-created_at"],
+                        name="search_docu_org_id_6dbd51_idx",
+                    ),
+                    models.Index(
+                        fields=["org", "entity_type"],
+                        name="search_docu_org_id_17c089_idx",
+                    ),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("entity_type", "entity_id"),
+                        name="uniq_search_document_per_entity",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(
+            enable_rls_and_indexes, reverse_code=disable_rls_and_indexes
+        ),
+    ]
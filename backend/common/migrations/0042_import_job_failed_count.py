@@ -0,0 +1,17 @@
+# Generated by Django 6.0.9 on 2026-10-18 08:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("common", "0041_import_job"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="importjob",
+            name="failed_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
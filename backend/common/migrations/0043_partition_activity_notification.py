@@ -0,0 +1,61 @@
+# Generated by Django 6.0.9 on 2026-10-18 09:18
+
+#
+# Monthly range partitions for `activity` and `notification`, and the per-org
+# retention that drops them (common/partitions.py). PostgreSQL only: elsewhere
+# the tables stay plain. The existing table is attached as the first
+# partition, so no rows are copied on the way forward; the reverse copies
+# them back into a plain table. atomic = False as the RLS migrations are;
+# each table converts in its own transaction.
+
+import django.core.validators
+from django.conf import settings
+from django.db import connection, migrations, models
+
+from common.partitions import TABLES, partition_table, unpartition_table
+
+
+def partition(apps, schema_editor):
+    if connection.vendor != "postgresql":
+        return
+    for table in TABLES:
+        partition_table(table, settings.PARTITION_MONTHS_AHEAD)
+
+
+def unpartition(apps, schema_editor):
+    if connection.vendor != "postgresql":
+        return
+    for table in TABLES:
+        unpartition_table(table)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("common", "0042_import_job_failed_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="org",
+            name="activity_retention_days",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Days of activity history to keep. Empty uses the default.",
+                null=True,
+                validators=[django.core.validators.MinValueValidator(1)],
+            ),
+        ),
+        migrations.AddField(
+            model_name="org",
+            name="notification_retention_days",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Days of notifications to keep. Empty uses the default.",
+                null=True,
+                validators=[django.core.validators.MinValueValidator(1)],
+            ),
+        ),
+        migrations.RunPython(partition, unpartition),
+    ]
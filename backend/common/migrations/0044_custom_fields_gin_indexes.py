@@ -0,0 +1,71 @@
+# GIN indexes on every `custom_fields` column (common/custom_fields.py).
+#
+# `?cf_<key>=<value>` on a list view is `custom_fields @> '{"key": value}'` on
+# PostgreSQL, and nothing indexed those columns, so every custom-field filter
+# read the org's whole table. jsonb_path_ops is the smaller, faster GIN opclass
+# for exactly that operator; it does not answer `?` (has_key), which nothing
+# here asks. The tables are the custom-field targets, read from
+# `TARGET_MODELS`.
+#
+# Raw SQL in a RunPython rather than Meta.indexes for the reason common/0038
+# gives: the test suite builds its SQLite schema from the models, and SQLite
+# has no GIN. atomic = False so each index is built CONCURRENTLY.
+
+from django.db import migrations
+
+from common.custom_fields import TARGET_MODELS, gin_index_name
+
+
+def _tables(apps):
+    return [apps.get_model(label)._meta.db_table for label in TARGET_MODELS.values()]
+
+
+def create_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        print("custom_fields GIN indexes are only supported on PostgreSQL. Skipping.")
+        return
+
+    quote = schema_editor.quote_name
+    tables = _tables(apps)
+    with schema_editor.connection.cursor() as cursor:
+        for table in tables:
+            cursor.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS "
+                f"{quote(gin_index_name(table))} ON {quote(table)} "
+                "USING gin (custom_fields jsonb_path_ops)"
+            )
+    print(f"  Created {len(tables)} custom_fields GIN index(es)")
+
+
+def drop_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    quote = schema_editor.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        for table in _tables(apps):
+            cursor.execute(
+                f"DROP INDEX CONCURRENTLY IF EXISTS {quote(gin_index_name(table))}"
+            )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("common", "0043_partition_activity_notification"),
+        ("accounts", "0010_account_rollup_columns"),
+        ("cases", "0031_escalationscanrun"),
+        ("contacts", "0014_normalized_duplicate_keys"),
+        (
+            "invoices",
+            "0010_estimate_accepted_by_email_estimate_accepted_by_name_and_more",
+        ),
+        ("leads", "0017_normalized_duplicate_keys"),
+        ("opportunity", "0015_drop_orphan_deal_pipeline_tables"),
+        ("tasks", "0013_alter_taskpipeline_is_default"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_gin_indexes, drop_gin_indexes),
+    ]
@@ -8,6 +8,7 @@ import uuid
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.core.validators import MinValueValidator
 from django.db import models
 from django.utils import timezone
 from django.utils.text import slugify
@@ -169,6 +170,23 @@ class Org(BaseModel):
         help_text="Label overrides, e.g. {'lead.plural': 'Enquiries'}.",
     )
 
+    # History retention (common/partitions.py). NULL follows the deployment's
+    # ACTIVITY_RETENTION_DAYS / NOTIFICATION_RETENTION_DAYS. A value longer
+    # than the default holds back the partition drop for everyone; a shorter
+    # one is enforced by deleting this org's older rows.
+    activity_retention_days = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(1)],
+        help_text="Days of activity history to keep. Empty uses the default.",
+    )
+    notification_retention_days = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(1)],
+        help_text="Days of notifications to keep. Empty uses the default.",
+    )
+
     class Meta:
         verbose_name = "Organization"
         verbose_name_plural = "Organizations"
@@ -635,6 +653,8 @@ class Activity(BaseModel):
         ("UNLINKED_PARENT", "Unlinked Parent"),
         ("PARENT_CLOSED_CASCADE", "Parent Closed Cascade"),
         ("TIME_LOGGED", "Time Logged"),
+        # One row per CSV import, standing in for a CREATE per imported row.
+        ("IMPORTED", "Imported"),
     )
 
     ENTITY_TYPE_CHOICES = (
@@ -1037,3 +1057,142 @@ class PackApplication(BaseOrgModel):
 
     def __str__(self):
         return f"{self.pack_id} v{self.pack_version} → {self.org.name}"
+
+
+class SearchDocument(BaseOrgModel):
+    """One searchable record, denormalized for the global search palette.
+
+    ``GlobalSearchView`` used to ask seven tables for a match on every
+    keystroke. Each lead, deal, account, contact, ticket, invoice and
+    knowledge-base article now also has a row here, so the palette is one
+    indexed query. ``common/search_index.py`` builds the rows, signals keep
+    them current, and ``manage.py rebuild_search_index`` rebuilds an org.
+
+    ``id`` is the indexed record's own id, not a fresh one. Ids are UUIDs, so
+    they do not collide across the seven tables, and knowing the document id
+    without a lookup is what lets a whole batch be upserted and its visibility
+    rows replaced in a fixed number of queries.
+
+    ``owner`` and ``visible_to`` carry the record's read visibility for members
+    who are not admins: its creator, and the profiles assigned to it (plus the
+    watchers, for a ticket). Which types an admin sees in full is the view's
+    rule, not the row's.
+    """
+
+    ENTITY_TYPE_CHOICES = (
+        ("lead", "Lead"),
+        ("deal", "Deal"),
+        ("account", "Account"),
+        ("contact", "Contact"),
+        ("ticket", "Ticket"),
+        ("invoice", "Invoice"),
+        ("solution", "Solution"),
+    )
+
+    entity_type = models.CharField(max_length=16, choices=ENTITY_TYPE_CHOICES)
+    entity_id = models.UUIDField()
+    title = models.CharField(max_length=255)
+    subtitle = models.CharField(max_length=255, blank=True, default="")
+    # Every searched field of the record, one per line. Matched as a substring
+    # and, on PostgreSQL, served by a trigram index (common/0039).
+    search_text = models.TextField(blank=True, default="")
+    owner = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    visible_to = models.ManyToManyField(
+        Profile, related_name="search_documents", blank=True
+    )
+
+    class Meta:
+        verbose_name = "Search Document"
+        verbose_name_plural = "Search Documents"
+        db_table = "search_document"
+        indexes = [
+            models.Index(fields=["org", "-created_at"]),
+            models.Index(fields=["org", "entity_type"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=("entity_type", "entity_id"),
+                name="uniq_search_document_per_entity",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.entity_type}: {self.title}"
+
+
+class ImportJob(BaseOrgModel):
+    """One CSV import running in the background (``common/imports.py``).
+
+    The contacts and cases importers used to read the upload into memory,
+    parse all of it into one list and parse it again to commit, inside the
+    request; the lead importer parsed it the same way and then sent every row
+    to Celery as the task's argument. A job instead keeps the upload in file
+    storage and the worker streams it, so neither the web process, the worker
+    nor the broker ever holds more than a chunk of it.
+
+    The row counters are updated after every chunk and are what the polling
+    endpoint reports. ``processed_rows`` counts through the file once per
+    phase: validation, then import. ``total_rows`` is known once validation
+    has read to the end. ``errors`` keeps the first
+    ``imports.MAX_STORED_ERRORS`` row errors in the preview's shape;
+    ``error_count`` counts every row that had one. An importer that skips
+    invalid rows rather than refusing the file (leads) imports everything
+    else, so for it ``error_count`` is the rows skipped. ``failed_count`` is
+    the rows that passed validation and were refused on insert anyway, which
+    the same importer also reports row by row rather than stopping the job.
+    """
+
+    KIND_CHOICES = (
+        ("contacts", "Contacts"),
+        ("cases", "Cases"),
+        ("leads", "Leads"),
+    )
+    STATUS_CHOICES = (
+        ("queued", "Queued"),
+        ("validating", "Validating"),
+        ("importing", "Importing"),
+        ("succeeded", "Succeeded"),
+        ("failed", "Failed"),
+    )
+
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default="queued")
+    # Emptied when the job finishes; the rows are in the database by then.
+    file = models.FileField(max_length=1000, upload_to="imports/%Y/%m/", blank=True)
+    file_name = models.CharField(max_length=255, blank=True, default="")
+    requested_by = models.ForeignKey(
+        Profile,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="import_jobs",
+    )
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    processed_rows = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    message = models.TextField(blank=True, default="")
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Import Job"
+        verbose_name_plural = "Import Jobs"
+        db_table = "import_job"
+        ordering = ("-created_at",)
+        indexes = [models.Index(fields=["org", "-created_at"])]
+
+    def __str__(self):
+        return f"{self.kind} import ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in ("succeeded", "failed")
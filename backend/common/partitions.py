@@ -0,0 +1,408 @@
+"""Monthly range partitions for the ``activity`` and ``notification`` tables.
+
+Both tables only grow: every tracked write adds an activity row, every
+assignment and mention a notification. Nothing ever removed activity, and the
+nightly ``purge_read_notifications`` removes notifications with a DELETE that
+walks the table's index, leaves the space to vacuum, and grows with the table.
+The feeds read the newest rows of a table that is mostly old ones.
+
+On PostgreSQL, migration ``common/0043`` turns each table into a parent
+``PARTITION BY RANGE (created_at)`` with one partition a month:
+
+* The existing table becomes the first partition, ``<table>_legacy``,
+  holding everything before the month after the migration ran. It is
+  attached behind a validated CHECK constraint, so the conversion moves no
+  rows and needs no long lock.
+* ``<table>_YYYYMM`` partitions follow, created ``PARTITION_MONTHS_AHEAD``
+  months ahead by ``manage.py manage_partitions`` (nightly through
+  ``common.tasks.maintain_partitions``).
+* ``<table>_default`` catches a row for a month nobody created, so a missed
+  maintenance run never fails a write. It should stay empty.
+
+Retention is now a partition drop. ``ACTIVITY_RETENTION_DAYS`` and
+``NOTIFICATION_RETENTION_DAYS`` set the deployment default, and an org can
+set its own on ``Org.activity_retention_days`` /
+``Org.notification_retention_days``. A partition is dropped, or moved to the
+``archive`` schema with ``--archive``, once its newest possible row is older
+than the longest history any org keeps. An org that keeps less than that has
+its older rows deleted, and because the DELETE is bounded by ``created_at`` it
+touches only the partitions past its cutoff. With no retention set anywhere
+(the default), nothing is removed.
+
+The Django models are unchanged. The primary key in the database becomes
+``(id, created_at)``, as PostgreSQL requires the partition key in every
+unique constraint; ids are UUIDs generated in Python, so ``id`` stays unique
+in practice, and ``common.tasks.write_activities``, which relied on ``id``
+alone for its idempotency, now checks for existing ids itself.
+
+RLS: the parent carries the org isolation policies from ``common/rls``,
+which apply to every row read or written through it. Each partition gets the
+same policies too, so a partition addressed by name is no less isolated than
+its parent.
+
+On any other database the tables stay plain and retention is enforced by
+DELETE alone, which is what the test suite (SQLite) exercises.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from common.rls import get_enable_policy_sql
+
+logger = logging.getLogger(__name__)
+
+# table -> (model, Org retention field, retention setting)
+TABLES = {
+    "activity": (
+        "common.Activity",
+        "activity_retention_days",
+        "ACTIVITY_RETENTION_DAYS",
+    ),
+    "notification": (
+        "common.Notification",
+        "notification_retention_days",
+        "NOTIFICATION_RETENTION_DAYS",
+    ),
+}
+
+ARCHIVE_SCHEMA = "archive"
+
+_BOUND = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+@dataclass
+class Partition:
+    name: str
+    # None for MINVALUE / MAXVALUE, both None for the default partition.
+    lower: datetime | None
+    upper: datetime | None
+    is_default: bool = False
+
+
+@dataclass
+class Report:
+    """What ``maintain`` did, or would do, to one table."""
+
+    table: str
+    created: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    deleted: int = 0
+
+
+def month_start(moment: datetime) -> datetime:
+    moment = moment.astimezone(dt_timezone.utc)
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, n: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + n
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_{month:%Y%m}"
+
+
+def _literal(moment: datetime) -> str:
+    # DDL takes no parameters; the bound comes from a datetime, never input.
+    return f"'{moment.isoformat()}'"
+
+
+def is_partitioned(table: str) -> bool:
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+            [table],
+        )
+        return cursor.fetchone() is not None
+
+
+def partitions(table: str) -> list[Partition]:
+    """The partitions attached to ``table``, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+            "FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s AND pg_table_is_visible(p.oid)",
+            [table],
+        )
+        rows = cursor.fetchall()
+    found = [_partition(name, bound) for name, bound in rows]
+    epoch = datetime.min.replace(tzinfo=dt_timezone.utc)
+    return sorted(found, key=lambda p: (p.is_default, p.lower or epoch))
+
+
+def _partition(name: str, bound: str) -> Partition:
+    """Read a partition's bounds from ``pg_get_expr(relpartbound)``."""
+    match = _BOUND.search(bound)
+    if match is None:
+        return Partition(name, None, None, is_default=True)
+    lower, upper = (
+        None if value.endswith("VALUE") else parse_datetime(value.strip("'"))
+        for value in match.groups()
+    )
+    return Partition(name, lower, upper)
+
+
+def _covered(existing: list[Partition], month: datetime) -> bool:
+    return any(
+        not p.is_default
+        and (p.lower is None or p.lower <= month)
+        and (p.upper is None or p.upper > month)
+        for p in existing
+    )
+
+
+def create_partitions(table: str, months_ahead: int, now=None, dry_run=False):
+    """Create the partitions for this month and ``months_ahead`` after it."""
+    existing = partitions(table)
+    first = month_start(now or timezone.now())
+    created = []
+    for n in range(months_ahead + 1):
+        month = add_months(first, n)
+        if _covered(existing, month):
+            continue
+        name = partition_name(table, month)
+        created.append(name)
+        if dry_run:
+            continue
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    f'CREATE TABLE "{name}" PARTITION OF "{table}" '
+                    f"FOR VALUES FROM ({_literal(month)}) "
+                    f"TO ({_literal(add_months(month, 1))})"
+                )
+                cursor.execute(get_enable_policy_sql(name))
+        except DatabaseError:
+            # Rows for this month already sit in the default partition, which
+            # PostgreSQL will not let a new partition take over silently.
+            logger.exception(
+                "Could not create partition %s; move its rows out of %s_default "
+                "and run manage_partitions again",
+                name,
+                table,
+            )
+            created.remove(name)
+    return created
+
+
+def retention(table: str) -> tuple[int | None, dict]:
+    """The longest history any org keeps, and each org's own, in days.
+
+    ``None`` means forever. An org without its own setting keeps the
+    deployment default.
+    """
+    _model, org_field, setting = TABLES[table]
+    default = getattr(settings, setting) or None
+    Org = apps.get_model("common", "Org")
+    per_org = {
+        org_id: days or default
+        for org_id, days in Org.objects.values_list("id", org_field).iterator()
+    }
+    kept = set(per_org.values()) or {default}
+    longest = None if None in kept else max(kept)
+    return longest, per_org
+
+
+def remove_expired(table, longest, now=None, archive=False, dry_run=False):
+    """Detach the partitions entirely older than ``longest`` days.
+
+    Dropped, or with ``archive`` moved to the ``archive`` schema, where they
+    can be dumped and dropped by hand. The default partition is never
+    removed.
+    """
+    if longest is None:
+        return []
+    cutoff = (now or timezone.now()) - timedelta(days=longest)
+    expired = [
+        p.name
+        for p in partitions(table)
+        if not p.is_default and p.upper is not None and p.upper <= cutoff
+    ]
+    if dry_run:
+        return expired
+    for name in expired:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"')
+            if archive:
+                cursor.execute(f'CREATE SCHEMA IF NOT EXISTS "{ARCHIVE_SCHEMA}"')
+                cursor.execute(f'ALTER TABLE "{name}" SET SCHEMA "{ARCHIVE_SCHEMA}"')
+            else:
+                cursor.execute(f'DROP TABLE "{name}"')
+        logger.info("%s partition %s", "Archived" if archive else "Dropped", name)
+    return expired
+
+
+def delete_expired_rows(table, longest, per_org, partitioned, now=None, dry_run=False):
+    """Delete the rows of each org that keeps less history than ``longest``.
+
+    On a partitioned table the rest went with their partitions. On a plain
+    one every org with a retention is pruned here.
+    """
+    from common.tasks import clear_rls_context, set_rls_context
+
+    model = apps.get_model(TABLES[table][0])
+    now = now or timezone.now()
+    deleted = 0
+    try:
+        for org_id, days in per_org.items():
+            if days is None or (
+                partitioned and longest is not None and days >= longest
+            ):
+                continue
+            set_rls_context(org_id)
+            rows = model.objects.filter(
+                org_id=org_id, created_at__lt=now - timedelta(days=days)
+            )
+            if dry_run:
+                deleted += rows.count()
+            else:
+                deleted += rows.delete()[0]
+    finally:
+        clear_rls_context()
+    return deleted
+
+
+def maintain(months_ahead=None, archive=False, dry_run=False, now=None):
+    """Create the coming partitions and apply retention to every table."""
+    if months_ahead is None:
+        months_ahead = settings.PARTITION_MONTHS_AHEAD
+    reports = []
+    for table in TABLES:
+        report = Report(table)
+        partitioned = is_partitioned(table)
+        longest, per_org = retention(table)
+        if partitioned:
+            report.created = create_partitions(table, months_ahead, now, dry_run)
+            report.removed = remove_expired(table, longest, now, archive, dry_run)
+        report.deleted = delete_expired_rows(
+            table, longest, per_org, partitioned, now, dry_run
+        )
+        reports.append(report)
+    return reports
+
+
+# Conversion, run once by migration common/0043 (and undone by its reverse).
+
+
+def _indexes(cursor, table):
+    cursor.execute(
+        "SELECT i.relname, pg_get_indexdef(i.oid) FROM pg_index x "
+        "JOIN pg_class i ON i.oid = x.indexrelid "
+        "WHERE x.indrelid = %s::regclass AND NOT x.indisprimary",
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def _constraints(cursor, table, kind):
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = %s",
+        [table, kind],
+    )
+    return cursor.fetchall()
+
+
+def partition_table(table: str, months_ahead: int, now=None) -> None:
+    """Turn plain ``table`` into a monthly-partitioned one, in place."""
+    legacy = f"{table}_legacy"
+    bound = _literal(add_months(month_start(now or timezone.now()), 1))
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Read before the rename, so the definitions name the new parent.
+        indexes = _indexes(cursor, table)
+        foreign_keys = _constraints(cursor, table, "f")
+        ((primary_key, _definition),) = _constraints(cursor, table, "p")
+
+        cursor.execute(f'ALTER TABLE "{table}" RENAME TO "{legacy}"')
+        # Index names are per schema; the parent's take the originals, which
+        # the migrations that created them know them by.
+        for name, _definition in indexes:
+            cursor.execute(f'ALTER INDEX "{name}" RENAME TO "{name[:56]}_legacy"')
+        cursor.execute(f'ALTER TABLE "{legacy}" DROP CONSTRAINT "{primary_key}"')
+        cursor.execute(
+            f'ALTER TABLE "{legacy}" ADD CONSTRAINT "{legacy}_pkey" '
+            "PRIMARY KEY (id, created_at)"
+        )
+
+        cursor.execute(
+            f'CREATE TABLE "{table}" (LIKE "{legacy}" INCLUDING DEFAULTS '
+            "INCLUDING CONSTRAINTS INCLUDING STORAGE) PARTITION BY RANGE (created_at)"
+        )
+        cursor.execute(
+            f'ALTER TABLE "{table}" ADD CONSTRAINT "{primary_key}" '
+            "PRIMARY KEY (id, created_at)"
+        )
+        for name, definition in foreign_keys:
+            cursor.execute(
+                f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" {definition}'
+            )
+        for _name, definition in indexes:
+            cursor.execute(definition)
+
+        # With the bound proven by a validated CHECK, ATTACH skips its scan;
+        # ATTACH also adopts the legacy indexes and keys matching the parent's.
+        cursor.execute(
+            f'ALTER TABLE "{legacy}" ADD CONSTRAINT "{legacy}_bound" '
+            f"CHECK (created_at < {bound}) NOT VALID"
+        )
+        cursor.execute(f'ALTER TABLE "{legacy}" VALIDATE CONSTRAINT "{legacy}_bound"')
+        cursor.execute(
+            f'ALTER TABLE "{table}" ATTACH PARTITION "{legacy}" '
+            f"FOR VALUES FROM (MINVALUE) TO ({bound})"
+        )
+        cursor.execute(f'ALTER TABLE "{legacy}" DROP CONSTRAINT "{legacy}_bound"')
+        cursor.execute(f'CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT')
+
+        # The legacy partition kept the policies it had as the table.
+        cursor.execute(get_enable_policy_sql(table))
+        cursor.execute(get_enable_policy_sql(f"{table}_default"))
+    create_partitions(table, months_ahead, now)
+
+
+def unpartition_table(table: str) -> None:
+    """Undo ``partition_table``: copy every partition back into a plain table."""
+    plain = f"{table}_plain"
+    with transaction.atomic(), connection.cursor() as cursor:
+        indexes = _indexes(cursor, table)
+        foreign_keys = _constraints(cursor, table, "f")
+        ((primary_key, _definition),) = _constraints(cursor, table, "p")
+
+        cursor.execute(
+            f'CREATE TABLE "{plain}" (LIKE "{table}" INCLUDING DEFAULTS '
+            "INCLUDING CONSTRAINTS INCLUDING STORAGE)"
+        )
+        # FORCE would hide every row from the owner, who has no org context.
+        cursor.execute(f'ALTER TABLE "{table}" NO FORCE ROW LEVEL SECURITY')
+        cursor.execute(f'INSERT INTO "{plain}" SELECT * FROM "{table}"')
+        cursor.execute(f'DROP TABLE "{table}" CASCADE')
+        cursor.execute(f'ALTER TABLE "{plain}" RENAME TO "{table}"')
+        cursor.execute(
+            f'ALTER TABLE "{table}" ADD CONSTRAINT "{primary_key}" PRIMARY KEY (id)'
+        )
+        for name, definition in foreign_keys:
+            cursor.execute(
+                f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" {definition}'
+            )
+        for _name, definition in indexes:
+            # A partitioned index is defined `ON ONLY` its parent.
+            cursor.execute(definition.replace(" ON ONLY ", " ON ", 1))
+        cursor.execute(get_enable_policy_sql(table))
@@ -118,6 +118,13 @@ ORG_SCOPED_TABLES = [
     "notification",
     # Case watchers (Tier 2 watchers-mentions)
     "case_watcher",
+    # Service overview rollup (cases/metrics_rollup.py)
+    "case_daily_metrics",
+    "case_metrics_day",
+    # Global search documents, stamped by common/0039
+    "search_document",
+    # Background CSV imports (common/imports.py), stamped by common/0041
+    "import_job",
     # Business hours (Tier 2 business-hours-sla)
     "business_calendar",
     "business_holiday",
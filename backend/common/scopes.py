@@ -65,6 +65,9 @@ API_RESOURCES = frozenset(
         "custom-fields",
         "dashboard",
         "documents",
+        # Polling a background import. Read-only: the jobs are started under
+        # the importing resource's own root (`contacts`, `cases`, `leads`).
+        "import-jobs",
         "invoices",
         "leads",
         "macros",
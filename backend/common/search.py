@@ -0,0 +1,165 @@
+"""Matching and ranking for the global search palette (``GlobalSearchView``).
+
+The palette fires a request on every keystroke, and each request asks seven
+tables for a case-insensitive substring across up to five columns. Django
+renders ``icontains`` on PostgreSQL as ``UPPER(col::text) LIKE UPPER('%q%')``,
+which no B-tree can serve: every keystroke was seven sequential scans, and the
+palette slowed down in step with the org.
+
+On PostgreSQL the columns below carry ``pg_trgm`` GIN indexes built over that
+same ``UPPER(col::text)`` expression (``common/migrations/0038``), so the query
+the ORM already writes becomes a bitmap index scan and matching is unchanged.
+The trigram backend then ranks the matches by word similarity, so the handful
+shown per type are the closest ones rather than the first ones found.
+
+SQLite (the test suite) has neither GIN nor ``pg_trgm``. It gets the plain
+``icontains`` backend, which is what search did before any of this, and the
+same result set in model order. ``SEARCH_BACKEND`` in settings can name either
+class, or another with the same ``filter`` signature, to force a choice.
+
+The palette itself reads the search document table (``common/search_index.py``),
+whose ``title`` and ``search_text`` carry the same kind of index
+(``common/0039``). The per-table indexes serve the ``SEARCH_USE_INDEX = False``
+path.
+"""
+
+from __future__ import annotations
+
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils.module_loading import import_string
+
+# The searched columns per palette type, as ORM paths. A path through a
+# foreign key (``account__name``) is served by the index on the far table.
+SEARCH_FIELDS = {
+    "lead": ["title", "first_name", "last_name", "email", "company_name"],
+    "deal": ["name", "description", "account__name"],
+    "account": ["name", "email", "website", "industry"],
+    "contact": ["first_name", "last_name", "email", "organization"],
+    "ticket": ["name", "description", "account__name"],
+    "invoice": ["invoice_number", "invoice_title", "client_name", "account__name"],
+    "solution": ["title", "description"],
+}
+
+# What the palette matches in a ``SearchDocument`` (common/search_index.py),
+# and how much a title match counts against one elsewhere in the record.
+DOCUMENT_FIELDS = ["title", "search_text"]
+DOCUMENT_WEIGHTS = {"title": 1.0, "search_text": 0.6}
+
+# (table, column) pairs that get a trigram index, read by the migration that
+# builds them. Listed rather than derived from SEARCH_FIELDS: a joined path such
+# as ``account__name`` is served by the far table's index, and a new entry here
+# does nothing until a migration creates it.
+TRIGRAM_INDEXES = [
+    ("lead", "title"),
+    ("lead", "first_name"),
+    ("lead", "last_name"),
+    ("lead", "email"),
+    ("lead", "company_name"),
+    ("opportunity", "name"),
+    ("opportunity", "description"),
+    ("accounts", "name"),
+    ("accounts", "email"),
+    ("accounts", "website"),
+    ("accounts", "industry"),
+    ("contacts", "first_name"),
+    ("contacts", "last_name"),
+    ("contacts", "email"),
+    ("contacts", "organization"),
+    ("case", "name"),
+    ("case", "description"),
+    ("invoice", "invoice_number"),
+    ("invoice", "invoice_title"),
+    ("invoice", "client_name"),
+    ("solution", "title"),
+    ("solution", "description"),
+]
+
+
+# The same, for the search document table. Kept apart from the list above
+# because common/0038 reads that one and runs before the table exists.
+DOCUMENT_TRIGRAM_INDEXES = [
+    ("search_document", "title"),
+    ("search_document", "search_text"),
+]
+
+
+def trigram_index_name(table, column):
+    return f"{table}_{column}_trgm_idx"
+
+
+class IContainsBackend:
+    """Substring match on every field, in the queryset's own order.
+
+    ``weights`` (field -> multiplier) only matters to a backend that ranks.
+    """
+
+    def filter(self, queryset, fields, query, weights=None):
+        return queryset.filter(
+            reduce(or_, (Q(**{f"{field}__icontains": query}) for field in fields))
+        )
+
+
+class TrigramBackend(IContainsBackend):
+    """The same match, ranked by ``pg_trgm`` word similarity, best first.
+
+    The rank is the best similarity over the searched fields: a lead whose
+    last name is the query outranks one whose company merely contains it.
+    Nulls count as no similarity, so a sparse record cannot sort to the top.
+    A field's ``weights`` entry scales its similarity, so a match in a title
+    can outrank the same match in a description.
+    """
+
+    def filter(self, queryset, fields, query, weights=None):
+        weights = weights or {}
+        scores = [
+            Coalesce(
+                TrigramWordSimilarity(query, field),
+                Value(0.0),
+                output_field=FloatField(),
+            )
+            * Value(weights.get(field, 1.0))
+            for field in fields
+        ]
+        rank = scores[0] if len(scores) == 1 else Greatest(*scores)
+        return (
+            super()
+            .filter(queryset, fields, query)
+            .annotate(search_rank=rank)
+            .order_by("-search_rank")
+        )
+
+
+_trigram_installed = None
+
+
+def _has_trigram():
+    """Whether ``pg_trgm`` is installed, asked once per process.
+
+    The migration skips the extension where the role may not create it, and
+    ranking with a function that does not exist would turn every search into
+    a 500. Without it the indexes are absent too, so plain matching loses
+    nothing but the order.
+    """
+    global _trigram_installed
+    if _trigram_installed is None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _trigram_installed = cursor.fetchone() is not None
+    return _trigram_installed
+
+
+def get_backend():
+    """The backend for this database, unless ``SEARCH_BACKEND`` names one."""
+    configured = getattr(settings, "SEARCH_BACKEND", None)
+    if configured:
+        return import_string(configured)()
+    if connection.vendor == "postgresql" and _has_trigram():
+        return TrigramBackend()
+    return IContainsBackend()
@@ -0,0 +1,253 @@
+"""The denormalized search index behind the global search palette.
+
+Every searchable record has one ``SearchDocument`` row holding what the palette
+shows (title, subtitle), what it matches against (``search_text``, the record's
+``SEARCH_FIELDS`` values) and who may see it. The palette then asks one table
+for a keystroke instead of seven.
+
+Rows are kept current three ways:
+
+* ``common/signals.py`` refreshes a record's row when it is saved, deleted or
+  (re)assigned, or gains or loses a watcher. That is one upsert in the writer's own transaction, so a record
+  can be found the moment it exists and never after it is gone.
+* A record's row also shows its account's name. Renaming an account queues
+  ``reindex_search_documents`` for the deals, tickets and invoices under it,
+  which can be many rows and need not hold up the save.
+* Writes that send no signal (``QuerySet.update()``, ``bulk_create``) and a
+  database that predates the index are caught up by the same task, or by
+  ``manage.py rebuild_search_index``.
+
+Indexing works in batches throughout: one upsert for the documents and two
+statements for their visibility rows per batch, whatever the batch holds.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable
+
+from django.apps import apps
+from django.db import transaction
+
+from common.models import SearchDocument
+from common.search import SEARCH_FIELDS
+
+BATCH_SIZE = 500
+
+
+def _name(first, last):
+    return f"{first or ''} {last or ''}".strip()
+
+
+def _account_name(obj):
+    return obj.account.name if obj.account_id else ""
+
+
+@dataclass(frozen=True)
+class Source:
+    """How one model becomes search documents.
+
+    ``audience`` names the many-to-many fields (to ``Profile``) whose members
+    may open the record besides its creator. ``select_related`` covers what
+    ``title``, ``subtitle`` and the searched fields read through a foreign key.
+    """
+
+    label: str
+    entity_type: str
+    title: Callable
+    subtitle: Callable
+    audience: tuple[str, ...] = ("assigned_to",)
+    select_related: tuple[str, ...] = ()
+
+
+SOURCES = [
+    Source(
+        "leads.Lead",
+        "lead",
+        title=lambda o: (
+            o.title or _name(o.first_name, o.last_name) or o.email or "Untitled lead"
+        ),
+        subtitle=lambda o: o.company_name or o.email or "",
+    ),
+    Source(
+        "opportunity.Opportunity",
+        "deal",
+        title=lambda o: o.name,
+        subtitle=lambda o: _account_name(o) or o.stage or "",
+        select_related=("account",),
+    ),
+    Source(
+        "accounts.Account",
+        "account",
+        title=lambda o: o.name,
+        subtitle=lambda o: o.email or o.industry or "",
+    ),
+    Source(
+        "contacts.Contact",
+        "contact",
+        title=lambda o: (
+            _name(o.first_name, o.last_name) or o.email or "Unnamed contact"
+        ),
+        subtitle=lambda o: o.organization or o.email or "",
+    ),
+    Source(
+        "cases.Case",
+        "ticket",
+        title=lambda o: o.name,
+        subtitle=lambda o: _account_name(o) or o.status or "",
+        audience=("assigned_to", "watchers"),
+        select_related=("account",),
+    ),
+    Source(
+        "invoices.Invoice",
+        "invoice",
+        title=lambda o: o.invoice_number or o.invoice_title or "Invoice",
+        subtitle=lambda o: o.client_name or _account_name(o) or o.status or "",
+        select_related=("account",),
+    ),
+    Source(
+        "cases.Solution",
+        "solution",
+        title=lambda o: o.title,
+        subtitle=lambda o: o.status or "",
+        audience=(),
+    ),
+]
+
+SOURCES_BY_LABEL = {source.label: source for source in SOURCES}
+
+# Types whose rows show the account's name, and so go stale when it changes.
+ACCOUNT_DEPENDENTS = ["opportunity.Opportunity", "cases.Case", "invoices.Invoice"]
+
+
+def _resolve(obj, path):
+    for attr in path.split("__"):
+        obj = getattr(obj, attr, None)
+        if obj is None:
+            return ""
+    return str(obj)
+
+
+def _document(source, obj):
+    values = (_resolve(obj, path) for path in SEARCH_FIELDS[source.entity_type])
+    return SearchDocument(
+        id=obj.pk,
+        org_id=obj.org_id,
+        entity_type=source.entity_type,
+        entity_id=obj.pk,
+        title=(source.title(obj) or "")[:255],
+        subtitle=(source.subtitle(obj) or "")[:255],
+        search_text="\n".join(v for v in values if v),
+        owner_id=obj.created_by_id,
+    )
+
+
+def index_objects(source, objects):
+    """Upsert the documents for ``objects``, all instances of ``source``'s model.
+
+    The audience fields are read from the prefetch cache where the caller
+    prefetched them, and queried per object where it did not.
+    """
+    objects = list(objects)
+    if not objects:
+        return 0
+    with transaction.atomic():
+        SearchDocument.objects.bulk_create(
+            [_document(source, obj) for obj in objects],
+            update_conflicts=True,
+            unique_fields=["id"],
+            update_fields=["title", "subtitle", "search_text", "owner", "updated_at"],
+        )
+        if source.audience:
+            _replace_audience(
+                {
+                    obj.pk: {
+                        profile.pk
+                        for field in source.audience
+                        for profile in getattr(obj, field).all()
+                    }
+                    for obj in objects
+                }
+            )
+    return len(objects)
+
+
+def _replace_audience(audience):
+    """Replace the visibility rows of the documents keyed in ``audience``."""
+    through = SearchDocument.visible_to.through
+    through.objects.filter(searchdocument_id__in=list(audience)).delete()
+    through.objects.bulk_create(
+        through(searchdocument_id=doc_id, profile_id=profile_id)
+        for doc_id, profiles in audience.items()
+        for profile_id in profiles
+    )
+
+
+def refresh(instance):
+    """Bring ``instance``'s document up to date. No-op for unindexed models.
+
+    An account whose name changed also queues a reindex of the records under
+    it, after the commit so the task reads the new name.
+    """
+    source = SOURCES_BY_LABEL.get(instance._meta.label)
+    if source is None:
+        return
+    renamed = (
+        source.entity_type == "account"
+        and SearchDocument.objects.filter(pk=instance.pk)
+        .exclude(title=source.title(instance)[:255])
+        .exists()
+    )
+    index_objects(source, [instance])
+    if renamed:
+        from common.tasks import reindex_search_documents
+
+        org_id, account_id = str(instance.org_id), str(instance.pk)
+        transaction.on_commit(
+            lambda: reindex_search_documents.delay(
+                org_id, labels=ACCOUNT_DEPENDENTS, account_id=account_id
+            )
+        )
+
+
+def remove(instance):
+    """Delete ``instance``'s document, if its model is indexed."""
+    if instance._meta.label in SOURCES_BY_LABEL:
+        SearchDocument.objects.filter(pk=instance.pk).delete()
+
+
+def reindex_org(org_id, labels=None, account_id=None, batch_size=BATCH_SIZE):
+    """Rebuild the documents of ``org_id``, yielding ``(label, count)`` per batch.
+
+    Each model is streamed with ``iterator()``, so memory holds one batch
+    whatever the org's size. ``labels`` narrows the models and ``account_id``
+    the records, to those under one account. Documents whose record no longer
+    exists are deleted at the end of a full rebuild, which is what lets it
+    recover from deletes no signal saw.
+    """
+    for source in SOURCES:
+        if labels is not None and source.label not in labels:
+            continue
+        queryset = (
+            apps.get_model(source.label)
+            .objects.filter(org_id=org_id)
+            .select_related(*source.select_related)
+            .prefetch_related(*source.audience)
+            .order_by("pk")
+        )
+        if account_id is not None:
+            queryset = queryset.filter(account_id=account_id)
+        batch = []
+        for obj in queryset.iterator(chunk_size=batch_size):
+            batch.append(obj)
+            if len(batch) == batch_size:
+                yield source.label, index_objects(source, batch)
+                batch = []
+        if batch:
+            yield source.label, index_objects(source, batch)
+
+        if labels is None and account_id is None:
+            live = apps.get_model(source.label).objects.filter(org_id=org_id)
+            SearchDocument.objects.filter(
+                org_id=org_id, entity_type=source.entity_type
+            ).exclude(entity_id__in=live.values("pk")).delete()
@@ -16,9 +16,20 @@ can never surface a record the caller could not open from the list:
 * knowledge-base articles. Org-wide, every member reads them.
 
 Matching stays on the server; the whole record set never reaches the browser.
+How it matches, and in what order, is ``common/search.py``: trigram-indexed and
+ranked on PostgreSQL, plain ``icontains`` on SQLite.
+
+Where it matches is the search document table (``common/search_index.py``):
+one row per record, carrying the record's creator and assignees, so the rules
+above become one ``WHERE`` over one table and a keystroke is one query rather
+than seven. ``SEARCH_USE_INDEX = False`` goes back to asking each table, which
+is what to run between deploying the table and the first
+``manage.py rebuild_search_index``, and what the benchmark measures against.
 """
 
-from django.db.models import Q
+from django.conf import settings
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -26,7 +37,14 @@ from rest_framework.views import APIView
 from accounts.models import Account
 from cases.access import is_org_admin, visible_cases_qs
 from cases.models import Solution
+from common.models import SearchDocument
 from common.permissions import HasOrgContext
+from common.search import (
+    DOCUMENT_FIELDS,
+    DOCUMENT_WEIGHTS,
+    SEARCH_FIELDS,
+    get_backend,
+)
 from contacts.models import Contact
 from invoices.models import Invoice
 from leads.models import Lead
@@ -37,6 +55,8 @@ from opportunity.models import Opportunity
 PER_TYPE = 6
 # One-character queries match almost everything; wait for a second character.
 MIN_QUERY = 2
+# Result groups in the order the palette lists them.
+TYPE_ORDER = [code for code, _label in SearchDocument.ENTITY_TYPE_CHOICES]
 
 
 def _own_filter(profile):
@@ -63,157 +83,206 @@ def _scope_superuser(qs, profile, user):
     return qs.filter(_own_filter(profile)).distinct()
 
 
-class GlobalSearchView(APIView):
-    """``GET /api/search/?q=<query>``. A handful of matches per record type."""
+def _unrestricted_types(profile, user):
+    """The types ``profile`` sees in full, by the same rules as above."""
+    types = {"solution"}
+    if is_org_admin(profile):
+        types |= {"account", "contact", "ticket"}
+    if is_org_admin(profile) or user.is_superuser:
+        types |= {"lead", "deal", "invoice"}
+    return types
 
-    permission_classes = (IsAuthenticated, HasOrgContext)
 
-    def get(self, request):
-        q = (request.query_params.get("q") or "").strip()
-        if len(q) < MIN_QUERY:
-            return Response({"query": q, "results": []})
+def search_documents(profile, user, q, backend):
+    """The palette results from the search document table, in one query.
 
-        profile = request.profile
-        org = profile.org
-        user = request.user
-        results = []
-
-        # Leads
-        leads = _scope_superuser(Lead.objects.filter(org=org), profile, user).filter(
-            Q(title__icontains=q)
-            | Q(first_name__icontains=q)
-            | Q(last_name__icontains=q)
-            | Q(email__icontains=q)
-            | Q(company_name__icontains=q)
-        )[:PER_TYPE]
-        for lead in leads:
-            name = lead.title or f"{lead.first_name} {lead.last_name}".strip()
-            results.append(
-                {
-                    "type": "lead",
-                    "id": str(lead.id),
-                    "title": name or lead.email or "Untitled lead",
-                    "subtitle": lead.company_name or lead.email or "",
-                }
-            )
-
-        # Deals (Opportunity)
-        deals = _scope_superuser(
+    Each type keeps its best ``PER_TYPE`` matches: a row number over the
+    matches, partitioned by type and in the backend's order, filtered in the
+    same statement.
+    """
+    docs = SearchDocument.objects.filter(org=profile.org)
+    unrestricted = _unrestricted_types(profile, user)
+    if len(unrestricted) < len(TYPE_ORDER):
+        shared = SearchDocument.visible_to.through.objects.filter(
+            profile=profile
+        ).values("searchdocument_id")
+        docs = docs.filter(
+            Q(entity_type__in=unrestricted) | Q(owner=user) | Q(pk__in=shared)
+        )
+
+    matched = backend.filter(docs, DOCUMENT_FIELDS, q, weights=DOCUMENT_WEIGHTS)
+    rows = matched.annotate(
+        type_rank=Window(
+            RowNumber(),
+            partition_by=F("entity_type"),
+            order_by=matched.query.order_by or ("title",),
+        )
+    ).filter(type_rank__lte=PER_TYPE)
+
+    rows = sorted(
+        rows.values("entity_type", "entity_id", "title", "subtitle", "type_rank"),
+        key=lambda row: (TYPE_ORDER.index(row["entity_type"]), row["type_rank"]),
+    )
+    return [
+        {
+            "type": row["entity_type"],
+            "id": str(row["entity_id"]),
+            "title": row["title"],
+            "subtitle": row["subtitle"],
+        }
+        for row in rows
+    ]
+
+
+def fan_out_search(profile, user, q, backend):
+    """The palette results asked of each record table in turn, seven queries."""
+    org = profile.org
+    results = []
+
+    # Leads
+    leads = backend.filter(
+        _scope_superuser(Lead.objects.filter(org=org), profile, user),
+        SEARCH_FIELDS["lead"],
+        q,
+    )[:PER_TYPE]
+    for lead in leads:
+        name = lead.title or f"{lead.first_name} {lead.last_name}".strip()
+        results.append(
+            {
+                "type": "lead",
+                "id": str(lead.id),
+                "title": name or lead.email or "Untitled lead",
+                "subtitle": lead.company_name or lead.email or "",
+            }
+        )
+
+    # Deals (Opportunity)
+    deals = backend.filter(
+        _scope_superuser(
             Opportunity.objects.filter(org=org).select_related("account"),
             profile,
             user,
-        ).filter(
-            Q(name__icontains=q)
-            | Q(description__icontains=q)
-            | Q(account__name__icontains=q)
-        )[:PER_TYPE]
-        for deal in deals:
-            results.append(
-                {
-                    "type": "deal",
-                    "id": str(deal.id),
-                    "title": deal.name,
-                    "subtitle": (deal.account.name if deal.account_id else "")
-                    or deal.stage
-                    or "",
-                }
-            )
-
-        # Accounts
-        accounts = _scope_orgadmin(Account.objects.filter(org=org), profile).filter(
-            Q(name__icontains=q)
-            | Q(email__icontains=q)
-            | Q(website__icontains=q)
-            | Q(industry__icontains=q)
-        )[:PER_TYPE]
-        for account in accounts:
-            results.append(
-                {
-                    "type": "account",
-                    "id": str(account.id),
-                    "title": account.name,
-                    "subtitle": account.email or account.industry or "",
-                }
-            )
-
-        # Contacts
-        contacts = _scope_orgadmin(Contact.objects.filter(org=org), profile).filter(
-            Q(first_name__icontains=q)
-            | Q(last_name__icontains=q)
-            | Q(email__icontains=q)
-            | Q(organization__icontains=q)
-        )[:PER_TYPE]
-        for contact in contacts:
-            name = f"{contact.first_name} {contact.last_name}".strip()
-            results.append(
-                {
-                    "type": "contact",
-                    "id": str(contact.id),
-                    "title": name or contact.email or "Unnamed contact",
-                    "subtitle": contact.organization or contact.email or "",
-                }
-            )
-
-        # Tickets (Case): the module's own read-visibility helper
-        cases = (
-            visible_cases_qs(profile)
-            .select_related("account")
-            .filter(
-                Q(name__icontains=q)
-                | Q(description__icontains=q)
-                | Q(account__name__icontains=q)
-            )[:PER_TYPE]
+        ),
+        SEARCH_FIELDS["deal"],
+        q,
+    )[:PER_TYPE]
+    for deal in deals:
+        results.append(
+            {
+                "type": "deal",
+                "id": str(deal.id),
+                "title": deal.name,
+                "subtitle": (deal.account.name if deal.account_id else "")
+                or deal.stage
+                or "",
+            }
+        )
+
+    # Accounts
+    accounts = backend.filter(
+        _scope_orgadmin(Account.objects.filter(org=org), profile),
+        SEARCH_FIELDS["account"],
+        q,
+    )[:PER_TYPE]
+    for account in accounts:
+        results.append(
+            {
+                "type": "account",
+                "id": str(account.id),
+                "title": account.name,
+                "subtitle": account.email or account.industry or "",
+            }
+        )
+
+    # Contacts
+    contacts = backend.filter(
+        _scope_orgadmin(Contact.objects.filter(org=org), profile),
+        SEARCH_FIELDS["contact"],
+        q,
+    )[:PER_TYPE]
+    for contact in contacts:
+        name = f"{contact.first_name} {contact.last_name}".strip()
+        results.append(
+            {
+                "type": "contact",
+                "id": str(contact.id),
+                "title": name or contact.email or "Unnamed contact",
+                "subtitle": contact.organization or contact.email or "",
+            }
         )
-        for case in cases:
-            results.append(
-                {
-                    "type": "ticket",
-                    "id": str(case.id),
-                    "title": case.name,
-                    "subtitle": (case.account.name if case.account_id else "")
-                    or case.status
-                    or "",
-                }
-            )
-
-        # Invoices
-        invoices = _scope_superuser(
+
+    # Tickets (Case): the module's own read-visibility helper
+    cases = backend.filter(
+        visible_cases_qs(profile).select_related("account"),
+        SEARCH_FIELDS["ticket"],
+        q,
+    )[:PER_TYPE]
+    for case in cases:
+        results.append(
+            {
+                "type": "ticket",
+                "id": str(case.id),
+                "title": case.name,
+                "subtitle": (case.account.name if case.account_id else "")
+                or case.status
+                or "",
+            }
+        )
+
+    # Invoices
+    invoices = backend.filter(
+        _scope_superuser(
             Invoice.objects.filter(org=org).select_related("account"),
             profile,
             user,
-        ).filter(
-            Q(invoice_number__icontains=q)
-            | Q(invoice_title__icontains=q)
-            | Q(client_name__icontains=q)
-            | Q(account__name__icontains=q)
-        )[:PER_TYPE]
-        for invoice in invoices:
-            results.append(
-                {
-                    "type": "invoice",
-                    "id": str(invoice.id),
-                    "title": invoice.invoice_number
-                    or invoice.invoice_title
-                    or "Invoice",
-                    "subtitle": invoice.client_name
-                    or (invoice.account.name if invoice.account_id else "")
-                    or invoice.status
-                    or "",
-                }
-            )
-
-        # Knowledge base (Solution): org-wide, every member reads
-        solutions = Solution.objects.filter(org=org).filter(
-            Q(title__icontains=q) | Q(description__icontains=q)
-        )[:PER_TYPE]
-        for solution in solutions:
-            results.append(
-                {
-                    "type": "solution",
-                    "id": str(solution.id),
-                    "title": solution.title,
-                    "subtitle": solution.status or "",
-                }
-            )
+        ),
+        SEARCH_FIELDS["invoice"],
+        q,
+    )[:PER_TYPE]
+    for invoice in invoices:
+        results.append(
+            {
+                "type": "invoice",
+                "id": str(invoice.id),
+                "title": invoice.invoice_number or invoice.invoice_title or "Invoice",
+                "subtitle": invoice.client_name
+                or (invoice.account.name if invoice.account_id else "")
+                or invoice.status
+                or "",
+            }
+        )
+
+    # Knowledge base (Solution): org-wide, every member reads
+    solutions = backend.filter(
+        Solution.objects.filter(org=org), SEARCH_FIELDS["solution"], q
+    )[:PER_TYPE]
+    for solution in solutions:
+        results.append(
+            {
+                "type": "solution",
+                "id": str(solution.id),
+                "title": solution.title,
+                "subtitle": solution.status or "",
+            }
+        )
+
+    return results
+
 
+class GlobalSearchView(APIView):
+    """``GET /api/search/?q=<query>``. A handful of matches per record type."""
+
+    permission_classes = (IsAuthenticated, HasOrgContext)
+
+    def get(self, request):
+        q = (request.query_params.get("q") or "").strip()
+        if len(q) < MIN_QUERY:
+            return Response({"query": q, "results": []})
+
+        profile = request.profile
+        backend = get_backend()
+        if getattr(settings, "SEARCH_USE_INDEX", True):
+            results = search_documents(profile, request.user, q, backend)
+        else:
+            results = fan_out_search(profile, request.user, q, backend)
         return Response({"query": q, "results": results})
@@ -18,6 +18,7 @@ from common.models import (
     Comment,
     CustomFieldDefinition,
     Document,
+    ImportJob,
     Notification,
     Org,
     PersonalAccessToken,
@@ -160,6 +161,9 @@ class OrgSettingsSerializer(serializers.ModelSerializer):
             # Case-handling behaviour (org-wide switches). Editable only here.
             "csat_enabled",
             "auto_close_children_on_parent_close",
+            # History retention in days; null follows the deployment default.
+            "activity_retention_days",
+            "notification_retention_days",
             # Vertical pack. Read-only -- see the class docstring.
             "vertical",
             "terminology",
@@ -324,6 +328,30 @@ class NotificationSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
+class ImportJobSerializer(serializers.ModelSerializer):
+    """A background CSV import's progress, as the client polls it."""
+
+    class Meta:
+        model = ImportJob
+        fields = (
+            "id",
+            "kind",
+            "status",
+            "file_name",
+            "total_rows",
+            "processed_rows",
+            "created_count",
+            "error_count",
+            "failed_count",
+            "errors",
+            "message",
+            "created_at",
+            "started_at",
+            "finished_at",
+        )
+        read_only_fields = fields
+
+
 class LeadCommentSerializer(serializers.ModelSerializer):
     """Comment serializer with user details for display"""
 
@@ -6,10 +6,13 @@ to automatically create Activity records when entities are created, updated, or
 """
 
 from crum import get_current_request
-from django.db.models.signals import post_delete, post_save
+from django.apps import apps
+from django.db.models import ManyToManyField
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 
-from common.models import Activity
+from common import activity_buffer, dashboard_cache, search_index
+from common.models import Profile, SearchDocument
 
 
 def get_entity_name(instance):
@@ -52,7 +55,7 @@ def create_activity(instance, action, entity_type):
         return
 
     # Create activity record
-    Activity.objects.create(
+    activity_buffer.record(
         user=profile,
         action=action,
         entity_type=entity_type,
@@ -136,3 +139,90 @@ def invoice_post_save(sender, instance, created, **kwargs):
 @receiver(post_delete, sender="invoices.Invoice")
 def invoice_post_delete(sender, instance, **kwargs):
     create_activity(instance, "DELETE", "Invoice")
+
+
+# Dashboard snapshot invalidation. Every tracked model bumps its entity's
+# version on write, and on assignment changes, since a member's snapshot counts
+# the rows assigned to them. See common/dashboard_cache.py.
+def _bump_dashboard(sender, instance, **kwargs):
+    dashboard_cache.bump_for_instance(instance)
+
+
+def _bump_dashboard_on_assign(sender, instance, action, model, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if isinstance(instance, Profile):
+        # Reverse side, e.g. `profile.lead_assigned_users.add(...)`: the rows
+        # that changed are `model`'s, and they are in the profile's org.
+        dashboard_cache.bump(
+            instance.org_id, dashboard_cache.TRACKED_MODELS[model._meta.label]
+        )
+    else:
+        dashboard_cache.bump_for_instance(instance)
+
+
+for _label in dashboard_cache.TRACKED_MODELS:
+    post_save.connect(_bump_dashboard, sender=_label, dispatch_uid=f"dash-{_label}")
+    post_delete.connect(_bump_dashboard, sender=_label, dispatch_uid=f"dash-{_label}")
+    _model = apps.get_model(_label)
+    if isinstance(_model._meta.get_field("assigned_to"), ManyToManyField):
+        m2m_changed.connect(
+            _bump_dashboard_on_assign,
+            sender=_model.assigned_to.through,
+            dispatch_uid=f"dash-assign-{_label}",
+        )
+
+
+# Search index. A record's document is rewritten on save and dropped on delete,
+# and rewritten again when who may see it changes: an assignment from either
+# side, or a ticket watcher (a through model, so it sends post_save rather than
+# m2m_changed). See common/search_index.py.
+def _refresh_search(sender, instance, **kwargs):
+    search_index.refresh(instance)
+
+
+def _remove_search(sender, instance, **kwargs):
+    search_index.remove(instance)
+
+
+def _refresh_search_on_assign(sender, instance, action, model, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not isinstance(instance, Profile):
+        search_index.refresh(instance)
+        return
+    if action == "post_clear":
+        # Reverse clear reports no pks; the records this profile could see
+        # through its documents are the ones that may have changed.
+        through = SearchDocument.visible_to.through
+        pk_set = through.objects.filter(profile=instance).values("searchdocument_id")
+    for record in model.objects.filter(pk__in=pk_set):
+        search_index.refresh(record)
+
+
+def _refresh_search_on_watch(sender, instance, **kwargs):
+    case = instance.case
+    if case is not None:
+        search_index.refresh(case)
+
+
+for _source in search_index.SOURCES:
+    _label = _source.label
+    post_save.connect(_refresh_search, sender=_label, dispatch_uid=f"search-{_label}")
+    post_delete.connect(_remove_search, sender=_label, dispatch_uid=f"search-{_label}")
+    _model = apps.get_model(_label)
+    for _field in _source.audience:
+        _through = getattr(_model, _field).through
+        if _through._meta.auto_created:
+            m2m_changed.connect(
+                _refresh_search_on_assign,
+                sender=_through,
+                dispatch_uid=f"search-{_label}-{_field}",
+            )
+
+post_save.connect(
+    _refresh_search_on_watch, sender="cases.CaseWatcher", dispatch_uid="search-watch"
+)
+post_delete.connect(
+    _refresh_search_on_watch, sender="cases.CaseWatcher", dispatch_uid="search-watch"
+)
@@ -18,6 +18,30 @@ from drf_spectacular.utils import OpenApiParameter
 
 organization_params = []
 
+# The paging parameters of a list on `common.pagination.ListPagination`.
+list_page_params = [
+    OpenApiParameter("limit", OpenApiTypes.INT, OpenApiParameter.QUERY),
+    OpenApiParameter(
+        "offset",
+        OpenApiTypes.INT,
+        OpenApiParameter.QUERY,
+        description="Rows to skip. Ignored when `cursor` is given.",
+    ),
+    OpenApiParameter(
+        "cursor",
+        OpenApiTypes.STR,
+        OpenApiParameter.QUERY,
+        description="The `next_cursor` of the previous page.",
+    ),
+    OpenApiParameter(
+        "count",
+        OpenApiTypes.STR,
+        OpenApiParameter.QUERY,
+        enum=["exact", "estimate", "none"],
+        description="How the total is counted. `none` leaves it null.",
+    ),
+]
+
 user_list_params = [
     OpenApiParameter("email", OpenApiTypes.STR, OpenApiParameter.QUERY),
     OpenApiParameter(
@@ -380,6 +380,31 @@ def purge_read_notifications(days=NOTIFICATION_PURGE_DAYS):
     return deleted
 
 
+@shared_task
+def maintain_partitions():
+    """Create the coming months' partitions and apply history retention.
+
+    The nightly run of ``manage.py manage_partitions``; see
+    ``common/partitions.py``. Returns what it did per table.
+    """
+    from common import partitions
+
+    reports = partitions.maintain()
+    for report in reports:
+        if report.created or report.removed or report.deleted:
+            logger.info(
+                "%s: created %s, removed %s, deleted %s expired rows",
+                report.table,
+                report.created,
+                report.removed,
+                report.deleted,
+            )
+    return {
+        r.table: {"created": r.created, "removed": r.removed, "deleted": r.deleted}
+        for r in reports
+    }
+
+
 @shared_task
 def flush_expired_refresh_tokens():
     """Delete refresh-token bookkeeping rows whose tokens have already expired.
@@ -406,3 +431,90 @@ def flush_expired_refresh_tokens():
         expired.delete()
         logger.info("Flushed %s expired refresh token records", count)
     return count
+
+
+@shared_task
+def reindex_search_documents(org_id=None, labels=None, account_id=None):
+    """Rebuild global search documents, for one org or (``org_id=None``) all.
+
+    Signals keep documents current for writes that go through ``save()`` and
+    ``delete()``. This catches up everything else: ``QuerySet.update()``,
+    ``bulk_create``, raw SQL, an account rename reaching the records under it
+    (``labels`` and ``account_id`` narrow the work to those), and a database
+    that predates the index. Scheduled weekly via celery-beat as a backstop.
+
+    Sets the RLS context per org, because both the indexed tables and
+    `search_document` are org-scoped, and clears it at the end.
+
+    Returns the number of documents written.
+    """
+    from common.search_index import reindex_org
+
+    org_ids = (
+        [org_id]
+        if org_id is not None
+        else Org.objects.values_list("id", flat=True).iterator()
+    )
+    written = 0
+    try:
+        for oid in org_ids:
+            set_rls_context(oid)
+            for _label, count in reindex_org(oid, labels=labels, account_id=account_id):
+                written += count
+    finally:
+        clear_rls_context()
+    logger.info("Reindexed %s search documents", written)
+    return written
+
+
+@shared_task
+def run_import_job(job_id, org_id):
+    """Run a queued ``ImportJob`` (see ``common/imports.py``).
+
+    A job already started, or finished, is left alone: a redelivered message
+    must not import the file twice.
+    """
+    from common.imports import run_job
+    from common.models import ImportJob
+
+    set_rls_context(org_id)
+    try:
+        # Claimed with a conditional UPDATE, so two deliveries cannot both win.
+        jobs = ImportJob.objects.filter(pk=job_id, org_id=org_id)
+        if not jobs.filter(status="queued").update(status="validating"):
+            return None
+        job = jobs.select_related("org", "requested_by__user").get()
+        return run_job(job).status
+    finally:
+        clear_rls_context()
+
+
+@shared_task
+def write_activities(rows, org_id):
+    """Insert one org's buffered activity rows (``common/activity_buffer.py``).
+
+    Queued instead of the request's own INSERT when
+    ``ACTIVITY_WRITE_OFFLOAD`` is on. The rows carry their ids, so a
+    redelivered message inserts nothing twice. The ids are looked up rather
+    than left to a conflict on the key: on the partitioned table the key is
+    ``(id, created_at)`` (common/partitions.py), and ``created_at`` is new on
+    every attempt.
+    """
+    from common.models import Activity
+
+    set_rls_context(org_id)
+    try:
+        written = set(
+            map(
+                str,
+                Activity.objects.filter(id__in=[row["id"] for row in rows]).values_list(
+                    "id", flat=True
+                ),
+            )
+        )
+        Activity.objects.bulk_create(
+            [Activity(**row) for row in rows if row["id"] not in written]
+        )
+    finally:
+        clear_rls_context()
+    return len(rows)
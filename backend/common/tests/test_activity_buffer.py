@@ -0,0 +1,173 @@
+"""Tests for the buffered Activity writer (common/activity_buffer.py).
+
+A request's activity rows are held back and written with one INSERT when it
+ends. What has to hold: nothing is lost (the rows a bulk edit produced are
+all there afterwards), a row recorded in a savepoint that rolls back is never
+written, the request user is still credited, and with offloading on, the
+rows travel to the worker grouped by org and land once however often the
+message is delivered.
+
+Each test runs inside a transaction that never commits, so a scope's flush
+and its rows wait on ``on_commit``; ``django_capture_on_commit_callbacks``
+runs them where the transaction would have committed.
+"""
+
+from unittest.mock import patch
+
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from cases.models import Case
+from common import activity_buffer
+from common.models import Activity
+from common.tasks import write_activities
+
+
+def _record(org, name="Case"):
+    return activity_buffer.record(
+        action="UPDATE",
+        entity_type="Case",
+        entity_id=org.id,
+        entity_name=name,
+        org=org,
+    )
+
+
+def _activity_inserts(ctx):
+    return [
+        q for q in ctx.captured_queries if q["sql"].startswith('INSERT INTO "activity"')
+    ]
+
+
+@pytest.mark.django_db
+class TestBuffered:
+    def test_without_a_scope_rows_are_written_at_once(self, org_a):
+        _record(org_a)
+        assert Activity.objects.count() == 1
+
+    def test_a_scope_writes_its_rows_with_one_insert(
+        self, org_a, django_capture_on_commit_callbacks
+    ):
+        with (
+            CaptureQueriesContext(connection) as ctx,
+            django_capture_on_commit_callbacks(execute=True),
+        ):
+            with activity_buffer.buffered():
+                for n in range(5):
+                    _record(org_a, f"Case {n}")
+                assert Activity.objects.count() == 0
+        assert len(_activity_inserts(ctx)) == 1
+        assert Activity.objects.count() == 5
+
+    def test_a_nested_scope_joins_the_outer_one(
+        self, org_a, django_capture_on_commit_callbacks
+    ):
+        with (
+            CaptureQueriesContext(connection) as ctx,
+            django_capture_on_commit_callbacks(execute=True),
+        ):
+            with activity_buffer.buffered():
+                _record(org_a, "outer")
+                with activity_buffer.buffered():
+                    _record(org_a, "inner")
+        assert len(_activity_inserts(ctx)) == 1
+        assert Activity.objects.count() == 2
+
+    def test_nothing_is_written_before_the_transaction_commits(
+        self, org_a, django_capture_on_commit_callbacks
+    ):
+        with django_capture_on_commit_callbacks() as callbacks:
+            with activity_buffer.buffered():
+                _record(org_a)
+        assert not Activity.objects.exists()
+        for callback in callbacks:
+            callback()
+        assert Activity.objects.count() == 1
+
+    def test_a_rolled_back_savepoint_drops_its_rows(
+        self, org_a, django_capture_on_commit_callbacks
+    ):
+        with (
+            django_capture_on_commit_callbacks(execute=True),
+            activity_buffer.buffered(),
+        ):
+            _record(org_a, "kept")
+            try:
+                with transaction.atomic():
+                    _record(org_a, "rolled back")
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            with transaction.atomic():
+                _record(org_a, "committed")
+        assert set(Activity.objects.values_list("entity_name", flat=True)) == {
+            "kept",
+            "committed",
+        }
+
+
+@pytest.mark.django_db
+def test_a_bulk_edit_request_inserts_its_activities_once(
+    admin_client, admin_profile, org_a, django_capture_on_commit_callbacks
+):
+    cases = [
+        Case.objects.create(org=org_a, name=f"Case {n}", status="New", priority="Low")
+        for n in range(4)
+    ]
+    Activity.objects.all().delete()
+    with (
+        CaptureQueriesContext(connection) as ctx,
+        django_capture_on_commit_callbacks(execute=True),
+    ):
+        response = admin_client.post(
+            "/api/cases/bulk/update/",
+            {"ids": [str(c.pk) for c in cases], "fields": {"priority": "High"}},
+            content_type="application/json",
+        )
+    assert response.status_code == 200
+    assert len(_activity_inserts(ctx)) == 1
+    changes = Activity.objects.filter(action="PRIORITY_CHANGED")
+    assert changes.count() == 4
+    assert {a.created_by_id for a in changes} == {admin_profile.user_id}
+
+
+@pytest.mark.django_db
+class TestOffload:
+    @pytest.fixture(autouse=True)
+    def _offload(self, settings):
+        settings.ACTIVITY_WRITE_OFFLOAD = True
+
+    def test_rows_are_queued_per_org(
+        self, org_a, org_b, django_capture_on_commit_callbacks
+    ):
+        with (
+            patch("common.tasks.write_activities.delay") as delay,
+            django_capture_on_commit_callbacks(execute=True),
+        ):
+            with activity_buffer.buffered():
+                _record(org_a)
+                _record(org_b)
+                _record(org_a)
+        assert not Activity.objects.exists()
+        queued = {
+            org_id: rows for rows, org_id in (c.args for c in delay.call_args_list)
+        }
+        assert {k: len(v) for k, v in queued.items()} == {
+            str(org_a.id): 2,
+            str(org_b.id): 1,
+        }
+
+    def test_the_task_writes_the_rows_once(
+        self, org_a, django_capture_on_commit_callbacks
+    ):
+        with (
+            patch("common.tasks.write_activities.delay") as delay,
+            django_capture_on_commit_callbacks(execute=True),
+        ):
+            with activity_buffer.buffered():
+                recorded = _record(org_a)
+        rows, org_id = delay.call_args.args
+        write_activities(rows, org_id)
+        write_activities(rows, org_id)
+        assert list(Activity.objects.values_list("pk", flat=True)) == [recorded.pk]
@@ -0,0 +1,123 @@
+"""Tests for the custom-field query layer (common/custom_fields.py).
+
+On SQLite every comparison reads the key's extracted value; PostgreSQL's
+containment path is what the GIN indexes serve, and is not exercised here.
+What has to hold: a value is matched by the type its definition gives it (a
+number query finds a stored number), ranges and lists work and refuse field
+types they make no sense on, a key with no definition still filters as text,
+sorting puts rows without the field last, and one org's definitions never
+type another org's query.
+"""
+
+import pytest
+from django.http import QueryDict
+from rest_framework.exceptions import ValidationError
+
+from common import custom_fields
+from common.custom_fields import apply_list_params, expression_index_name
+from common.models import CustomFieldDefinition
+from opportunity.models import Opportunity
+
+URL = "/api/opportunities/"
+
+
+def _define(org, key, field_type, **extra):
+    return CustomFieldDefinition.objects.create(
+        org=org,
+        target_model="Opportunity",
+        key=key,
+        label=key.title(),
+        field_type=field_type,
+        **extra,
+    )
+
+
+def _deal(org, name, **values):
+    return Opportunity.objects.create(name=name, org=org, custom_fields=values)
+
+
+def _names(org, query):
+    queryset = apply_list_params(
+        Opportunity.objects.filter(org=org).order_by("name"),
+        "Opportunity",
+        QueryDict(query),
+        org,
+    )
+    return list(queryset.values_list("name", flat=True))
+
+
+@pytest.fixture
+def deals(org_a):
+    _define(org_a, "seats", "number")
+    _define(org_a, "renewal", "date")
+    _define(
+        org_a,
+        "tier",
+        "dropdown",
+        options=[
+            {"value": "gold", "label": "Gold"},
+            {"value": "silver", "label": "Silver"},
+            {"value": "bronze", "label": "Bronze"},
+        ],
+    )
+    _deal(org_a, "A", seats=5.0, renewal="2026-03-01", tier="gold", note="x")
+    _deal(org_a, "B", seats=50.0, renewal="2026-09-01", tier="silver")
+    _deal(org_a, "C", tier="bronze")
+
+
+@pytest.mark.django_db
+class TestFilters:
+    def test_a_number_matches_a_stored_number(self, org_a, deals):
+        assert _names(org_a, "cf_seats=5") == ["A"]
+
+    def test_ranges_on_numbers_and_dates(self, org_a, deals):
+        assert _names(org_a, "cf_seats__gte=10") == ["B"]
+        assert _names(org_a, "cf_seats__lt=10") == ["A"]
+        assert _names(
+            org_a, "cf_renewal__gte=2026-01-01&cf_renewal__lte=2026-06-30"
+        ) == ["A"]
+
+    def test_a_list_of_dropdown_values(self, org_a, deals):
+        assert _names(org_a, "cf_tier__in=gold,bronze") == ["A", "C"]
+
+    def test_an_undefined_key_compares_as_text(self, org_a, deals):
+        assert _names(org_a, "cf_note=x") == ["A"]
+
+    def test_bad_values_and_operators_are_400s(self, org_a, deals):
+        for query in ("cf_seats=lots", "cf_tier__gte=gold", "cf_seats__in=1,2"):
+            with pytest.raises(ValidationError) as exc:
+                _names(org_a, query)
+            assert query.split("=")[0] in exc.value.detail
+
+    def test_another_orgs_definition_does_not_type_the_query(self, org_a, org_b, deals):
+        # org_b has no `seats` definition, so to org_b it is not a number
+        # field and cannot take a range.
+        with pytest.raises(ValidationError):
+            _names(org_b, "cf_seats__gte=1")
+
+
+@pytest.mark.django_db
+class TestOrdering:
+    def test_sorts_with_missing_values_last(self, org_a, deals):
+        assert _names(org_a, "ordering=-cf_seats") == ["B", "A", "C"]
+        assert _names(org_a, "ordering=cf_seats") == ["A", "B", "C"]
+
+    def test_an_undefined_key_is_not_a_sort(self, org_a, deals):
+        assert _names(org_a, "ordering=-cf_note") == ["A", "B", "C"]
+
+    def test_the_list_view_filters_and_sorts(self, admin_client, deals):
+        body = admin_client.get(f"{URL}?cf_seats__gte=1&ordering=-cf_seats").json()
+        assert [o["name"] for o in body["opportunities"]] == ["B", "A"]
+        assert admin_client.get(f"{URL}?cf_seats=lots").status_code == 400
+
+
+class TestIndexNames:
+    def test_names_fit_postgres(self):
+        assert expression_index_name("opportunity", "renewal-date") == (
+            "opportunity_cf_renewal_date_idx"
+        )
+        assert len(expression_index_name("opportunity", "k" * 64)) <= 63
+
+    def test_unknown_targets_are_refused(self):
+        with pytest.raises(ValueError):
+            custom_fields._table("Widget")
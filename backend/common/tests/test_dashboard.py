@@ -5,15 +5,19 @@ Run with: pytest common/tests/test_dashboard.py -v
 """
 
 import uuid
+from datetime import date
 
 import pytest
+from django.utils import timezone
 from rest_framework import status
 
 from accounts.models import Account
 from common.models import Activity
+from common.utils import STAGES
 from contacts.models import Contact
 from leads.models import Lead
 from opportunity.models import Opportunity
+from tasks.models import Task
 
 
 @pytest.mark.django_db
@@ -383,3 +387,228 @@ class TestDashboardSendsOnlyWhatItRenders:
         response = admin_client.get(self.url)
 
         assert response.data["accounts_count"] == 2
+
+
+def _task(org, title, due_date, status="New"):
+    return Task.objects.create(
+        title=title, org=org, due_date=due_date, status=status, priority="Medium"
+    )
+
+
+@pytest.mark.django_db
+class TestDashboardQueryCost:
+    """The dashboard costs one query per model, not one per number.
+
+    It used to ask for each count separately and for a count plus a sum per
+    pipeline stage: 25-odd queries for an empty org, re-running the member's
+    visibility subquery for every one. The numbers are now conditional
+    aggregates (common/dashboard.py), so what is pinned here is that the
+    query count holds still as the data grows.
+    """
+
+    url = "/api/dashboard/"
+
+    def _deal(self, org, stage, amount, currency=None):
+        return Opportunity.objects.create(
+            name=f"{stage} deal",
+            org=org,
+            stage=stage,
+            amount=amount,
+            probability=50,
+            currency=currency,
+        )
+
+    def _measure(self, client, django_assert_num_queries, expected):
+        # The first request of a process pays for one-off lookups (the JWT's
+        # user and profile, content types), so measure the second. `fresh`
+        # skips the snapshot cache: this is the cost of computing it.
+        client.get(self.url)
+        with django_assert_num_queries(expected):
+            response = client.get(self.url + "?fresh=1")
+        assert response.status_code == status.HTTP_200_OK
+        return response
+
+    def test_an_empty_org_and_a_full_pipeline_cost_the_same(
+        self, admin_client, org_a, django_assert_num_queries
+    ):
+        self._measure(admin_client, django_assert_num_queries, 13)
+        for stage, _label in STAGES:
+            self._deal(org_a, stage, 100)
+            self._deal(org_a, stage, 50, currency="EUR")
+        self._measure(admin_client, django_assert_num_queries, 13)
+
+    def test_a_member_pays_no_more_per_stage_than_with_no_deals(
+        self, user_client, org_a, django_assert_num_queries
+    ):
+        """One more than an admin: the visibility filter reads
+        ``profile.user``. What matters is that it stays one more."""
+        self._measure(user_client, django_assert_num_queries, 14)
+        for stage, _label in STAGES:
+            self._deal(org_a, stage, 100)
+        self._measure(user_client, django_assert_num_queries, 14)
+
+    def test_per_stage_numbers_come_out_of_the_single_query(self, admin_client, org_a):
+        org_a.default_currency = "USD"
+        org_a.save()
+        self._deal(org_a, "PROPOSAL", 100)
+        self._deal(org_a, "PROPOSAL", 40, currency="USD")
+        self._deal(org_a, "PROPOSAL", 999, currency="EUR")
+        self._deal(org_a, "CLOSED_LOST", 10)
+
+        data = admin_client.get(self.url).data
+        proposal = data["pipeline_by_stage"]["PROPOSAL"]
+
+        # Counted whatever the currency, valued only in the org's own.
+        assert proposal == {"count": 3, "value": 140.0, "label": "Proposal"}
+        assert data["pipeline_by_stage"]["CLOSED_LOST"]["count"] == 1
+        assert data["pipeline_by_stage"]["NEGOTIATION"] == {
+            "count": 0,
+            "value": 0.0,
+            "label": "Negotiation",
+        }
+        assert list(data["pipeline_by_stage"]) == [code for code, _ in STAGES]
+        metrics = data["revenue_metrics"]
+        assert metrics["pipeline_value"] == 140.0
+        assert metrics["weighted_pipeline"] == 70.0
+        assert metrics["other_currency_count"] == 1
+
+    def test_urgent_counts_match_their_filters(self, admin_client, org_a):
+        today = timezone.localdate()
+        _task(org_a, "Late", date(2000, 1, 1))
+        _task(org_a, "Now", today)
+        _task(org_a, "Done", today, status="Completed")
+        Lead.objects.create(
+            first_name="F", last_name="U", org=org_a, next_follow_up=today
+        )
+        Lead.objects.create(
+            first_name="C",
+            last_name="L",
+            org=org_a,
+            status="closed",
+            next_follow_up=today,
+        )
+        Lead.objects.create(
+            first_name="H", last_name="ot", org=org_a, status="assigned", rating="HOT"
+        )
+
+        data = admin_client.get(self.url).data
+
+        assert data["urgent_counts"] == {
+            "overdue_tasks": 1,
+            "tasks_due_today": 1,
+            "followups_today": 1,
+            "hot_leads": 1,
+        }
+        # A lead with no status is still an active lead, as it was under
+        # exclude(); the closed one is not.
+        assert data["leads_count"] == 2
+
+
+@pytest.mark.django_db
+class TestDashboardSnapshotCache:
+    """Repeat loads are served from the snapshot; writes make it stale.
+
+    See common/dashboard_cache.py. The cache is in-process under the test
+    settings, and keyed by org, so each test starts cold.
+    """
+
+    url = "/api/dashboard/"
+
+    def test_a_repeat_load_is_a_hit_and_costs_only_the_live_parts(
+        self, admin_client, org_a, django_assert_num_queries
+    ):
+        first = admin_client.get(self.url)
+        assert first["X-Dashboard-Cache"] == "miss"
+
+        # Auth, the RLS context and the activity feed, which is never cached.
+        with django_assert_num_queries(5):
+            second = admin_client.get(self.url)
+        assert second["X-Dashboard-Cache"] == "hit"
+        assert second.data == first.data
+
+    def test_a_save_recomputes_only_its_own_section(
+        self, admin_client, org_a, django_assert_num_queries
+    ):
+        admin_client.get(self.url)
+        Account.objects.create(name="New", org=org_a)
+
+        # The account count, and nothing else, is asked for again.
+        with django_assert_num_queries(6):
+            response = admin_client.get(self.url)
+        assert response["X-Dashboard-Cache"] == "partial"
+        assert response.data["accounts_count"] == 1
+
+    def test_a_delete_invalidates_too(self, admin_client, org_a):
+        deal = Opportunity.objects.create(name="D", org=org_a, stage="PROPOSAL")
+        assert admin_client.get(self.url).data["opportunities_count"] == 1
+        deal.delete()
+        assert admin_client.get(self.url).data["opportunities_count"] == 0
+
+    def test_an_assignment_invalidates_the_members_snapshot(
+        self, user_client, org_a, user_profile
+    ):
+        lead = Lead.objects.create(first_name="A", last_name="B", org=org_a)
+        assert user_client.get(self.url).data["leads_count"] == 0
+
+        lead.assigned_to.add(user_profile)
+
+        assert user_client.get(self.url).data["leads_count"] == 1
+
+    def test_fresh_bypasses_the_snapshot(self, admin_client, org_a):
+        admin_client.get(self.url)
+        # A write no signal sees: the snapshot cannot know about it.
+        Account.objects.create(name="Old", org=org_a)
+        admin_client.get(self.url)
+        Account.objects.filter(org=org_a).update(is_active=False)
+
+        assert admin_client.get(self.url).data["accounts_count"] == 1
+        fresh = admin_client.get(self.url + "?fresh=1")
+        assert fresh["X-Dashboard-Cache"] == "bypass"
+        assert fresh.data["accounts_count"] == 0
+        # And what it computed is what the next load is served.
+        assert admin_client.get(self.url).data["accounts_count"] == 0
+
+    def test_admin_and_member_snapshots_are_kept_apart(
+        self, admin_client, user_client, org_a
+    ):
+        Account.objects.create(name="Admin's", org=org_a)
+
+        assert admin_client.get(self.url).data["accounts_count"] == 1
+        assert user_client.get(self.url).data["accounts_count"] == 0
+
+    def test_another_orgs_write_leaves_this_snapshot_alone(
+        self, admin_client, org_a, org_b
+    ):
+        admin_client.get(self.url)
+        Account.objects.create(name="Elsewhere", org=org_b)
+
+        assert admin_client.get(self.url)["X-Dashboard-Cache"] == "hit"
+
+    def test_hits_and_misses_are_counted(self, admin_client, org_a):
+        from common import dashboard_cache
+
+        before = dashboard_cache.stats()
+        admin_client.get(self.url)
+        admin_client.get(self.url)
+        after = dashboard_cache.stats()
+
+        sections = 6
+        assert after["misses"] - before["misses"] == sections
+        assert after["hits"] - before["hits"] == sections
+
+    def test_an_unreachable_cache_falls_back_to_computing(
+        self, admin_client, org_a, monkeypatch
+    ):
+        from common import dashboard_cache
+
+        class Down:
+            def get_many(self, keys):
+                raise ConnectionError("redis is down")
+
+        monkeypatch.setattr(dashboard_cache, "_cache", lambda: Down())
+        Account.objects.create(name="Acc", org=org_a)
+
+        response = admin_client.get(self.url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response["X-Dashboard-Cache"] == "bypass"
+        assert response.data["accounts_count"] == 1
@@ -2,15 +2,21 @@
 Tests for common/duplicate_detection.py - DuplicateDetector utility class.
 
 Covers normalize_phone, normalize_domain, find_duplicate_contacts,
-find_duplicate_leads, and find_duplicate_accounts.
+find_duplicate_leads, and find_duplicate_accounts, plus the normalized columns
+that turn phone and website matches into indexed lookups.
 
 Run with: pytest common/tests/test_duplicate_detection.py -v
 """
 
+import re
+import time
+from io import StringIO
+
 import pytest
+from django.core.management import call_command
 
 from accounts.models import Account
-from common.duplicate_detection import DuplicateDetector
+from common.duplicate_detection import DuplicateDetector, DuplicateGroup
 from contacts.models import Contact
 from leads.models import Lead
 
@@ -351,3 +357,293 @@ class TestFindDuplicateAccounts:
         dupes = DuplicateDetector.find_duplicate_accounts(org_a, name="AB Corp")
         # Exact match won't find "AB Industries", and first word "AB" is < 3 chars
         assert len(dupes) == 0
+
+
+@pytest.mark.django_db
+class TestNormalizedColumns:
+    """``phone_normalized`` / ``website_domain`` stay equal to what the
+    detector would compute, on every write path that calls ``pre_save``."""
+
+    def test_create_and_edit_keep_the_columns_current(self, org_a):
+        acct = Account.objects.create(
+            name="Acme",
+            phone="+1 (555) 111-2222",
+            website="https://www.Acme.com/about",
+            org=org_a,
+        )
+        assert acct.phone_normalized == "5551112222"
+        assert acct.website_domain == "acme.com"
+
+        acct.phone = ""
+        acct.website = "http://acme.io"
+        acct.save()
+        acct.refresh_from_db()
+        assert acct.phone_normalized == ""
+        assert acct.website_domain == "acme.io"
+
+    def test_bulk_create_fills_the_column(self, org_a):
+        Contact.objects.bulk_create(
+            [Contact(first_name="A", last_name="B", phone="555.123.4567", org=org_a)]
+        )
+        assert Contact.objects.get().phone_normalized == "5551234567"
+
+    def test_the_column_is_not_writable_by_hand(self, org_a):
+        lead = Lead.objects.create(
+            first_name="Bob", phone="555-987-6543", phone_normalized="0", org=org_a
+        )
+        lead.refresh_from_db()
+        assert lead.phone_normalized == "5559876543"
+
+    def test_phone_and_domain_checks_are_one_query_each(
+        self, org_a, django_assert_num_queries
+    ):
+        for i in range(20):
+            Account.objects.create(
+                name=f"Acct {i}",
+                phone=f"555-000-{i:04d}",
+                website=f"https://a{i}.example.com",
+                org=org_a,
+            )
+        with django_assert_num_queries(1):
+            dupes = DuplicateDetector.find_duplicate_accounts(
+                org_a, phone="(555) 000-0007"
+            )
+        assert [a.name for a in dupes] == ["Acct 7"]
+        with django_assert_num_queries(1):
+            dupes = DuplicateDetector.find_duplicate_accounts(
+                org_a, website="a3.example.com"
+            )
+        assert [a.name for a in dupes] == ["Acct 3"]
+
+    def test_backfill_repairs_rows_written_around_save(self, org_a):
+        contact = Contact.objects.create(
+            first_name="A", last_name="B", phone="555-123-4567", org=org_a
+        )
+        Contact.objects.filter(pk=contact.pk).update(phone="555-765-4321")
+        assert not DuplicateDetector.find_duplicate_contacts(org_a, phone="5557654321")
+
+        out = StringIO()
+        call_command("backfill_normalized_fields", stdout=out)
+
+        assert "contacts.Contact: 1 row(s) updated" in out.getvalue()
+        assert DuplicateDetector.find_duplicate_contacts(org_a, phone="5557654321") == [
+            contact
+        ]
+
+
+@pytest.mark.django_db
+class TestFindDuplicatesBatch:
+    """DuplicateDetector.find_duplicates_batch, the import-sized entry point."""
+
+    def test_matches_against_stored_rows(self, org_a):
+        stored = Contact.objects.create(
+            first_name="Alice", last_name="Smith", email="alice@example.com", org=org_a
+        )
+        groups = DuplicateDetector.find_duplicates_batch(
+            org_a,
+            "contact",
+            [
+                {"first_name": "Bob", "last_name": "Jones"},
+                {"email": "ALICE@example.com"},
+            ],
+        )
+        assert groups == [
+            DuplicateGroup(candidates=[1], existing=[stored.pk], matched_on={"email"})
+        ]
+
+    def test_finds_duplicates_within_the_batch(self, org_a):
+        groups = DuplicateDetector.find_duplicates_batch(
+            org_a,
+            "lead",
+            [
+                {"phone": "+1 (555) 123-4567"},
+                {"email": "other@example.com"},
+                {"phone": "555.123.4567"},
+            ],
+        )
+        assert groups == [
+            DuplicateGroup(candidates=[0, 2], existing=[], matched_on={"phone"})
+        ]
+
+    def test_groups_are_transitive(self, org_a):
+        """A shares an email with B, B a phone with C: one group of three."""
+        groups = DuplicateDetector.find_duplicates_batch(
+            org_a,
+            "contact",
+            [
+                {"email": "a@example.com"},
+                {"email": "a@example.com", "phone": "555-000-1111"},
+                {"phone": "(555) 000-1111"},
+            ],
+        )
+        assert len(groups) == 1
+        assert groups[0].candidates == [0, 1, 2]
+        assert groups[0].matched_on == {"email", "phone"}
+
+    def test_accounts_match_on_name_and_domain(self, org_a):
+        by_name = Account.objects.create(name="Acme Corp", org=org_a)
+        by_site = Account.objects.create(
+            name="Globex", website="https://www.globex.com", org=org_a
+        )
+        groups = DuplicateDetector.find_duplicates_batch(
+            org_a,
+            "account",
+            [{"name": "ACME CORP"}, {"name": "Globex Intl", "website": "globex.com/x"}],
+        )
+        assert [(g.candidates, g.existing, g.matched_on) for g in groups] == [
+            ([0], [by_name.pk], {"name"}),
+            ([1], [by_site.pk], {"domain"}),
+        ]
+
+    def test_people_match_on_the_full_name_only(self, org_a):
+        stored = Lead.objects.create(first_name="Ada", last_name="Byron", org=org_a)
+        Lead.objects.create(first_name="Ada", last_name="King", org=org_a)
+        groups = DuplicateDetector.find_duplicates_batch(
+            org_a,
+            "lead",
+            [{"first_name": "ada", "last_name": "byron"}, {"first_name": "Ada"}],
+        )
+        assert [(g.candidates, g.existing) for g in groups] == [([0], [stored.pk])]
+
+    def test_inactive_and_other_org_rows_are_not_duplicates(self, org_a, org_b):
+        Contact.objects.create(
+            first_name="A", last_name="B", email="x@example.com", org=org_b
+        )
+        Contact.objects.create(
+            first_name="A",
+            last_name="B",
+            email="y@example.com",
+            is_active=False,
+            org=org_a,
+        )
+        groups = DuplicateDetector.find_duplicates_batch(
+            org_a, "contact", [{"email": "x@example.com"}, {"email": "y@example.com"}]
+        )
+        assert groups == []
+
+    def test_include_inactive_counts_inactive_rows(self, org_a):
+        inactive = Lead.objects.create(
+            title="Archived", email="gone@example.com", is_active=False, org=org_a
+        )
+        groups = DuplicateDetector.find_duplicates_batch(
+            org_a, "lead", [{"email": "GONE@example.com"}], include_inactive=True
+        )
+        assert groups == [
+            DuplicateGroup(candidates=[0], existing=[inactive.pk], matched_on={"email"})
+        ]
+
+    def test_query_count_does_not_grow_with_the_batch(
+        self, org_a, django_assert_num_queries
+    ):
+        Contact.objects.create(
+            first_name="A", last_name="B", email="c7@example.com", org=org_a
+        )
+        records = [
+            {
+                "email": f"c{i}@example.com",
+                "phone": f"555-100-{i:04d}",
+                "first_name": "Row",
+                "last_name": str(i),
+            }
+            for i in range(300)
+        ]
+        # One query per kind of key: email, phone, name.
+        with django_assert_num_queries(3):
+            groups = DuplicateDetector.find_duplicates_batch(org_a, "contact", records)
+        assert [g.candidates for g in groups] == [[7]]
+
+    def test_unknown_entity_is_refused(self, org_a):
+        with pytest.raises(ValueError):
+            DuplicateDetector.find_duplicates_batch(org_a, "case", [{}])
+
+
+@pytest.mark.django_db
+class TestFindStoredKeys:
+    """DuplicateDetector.find_stored_keys, batch mode's lookup for the importers."""
+
+    def test_returns_the_taken_keys_by_kind(self, org_a):
+        Contact.objects.create(
+            first_name="Ada",
+            last_name="Byron",
+            email="ada@example.com",
+            phone="+1 (555) 123-4567",
+            org=org_a,
+        )
+        stored = DuplicateDetector.find_stored_keys(
+            org_a,
+            "contact",
+            [
+                {"email": "ADA@example.com"},
+                {"phone": "555.123.4567"},
+                {"first_name": "ada", "last_name": "byron"},
+                {"email": "new@example.com", "first_name": "Ada", "last_name": "King"},
+            ],
+        )
+        assert stored == {
+            "email": {"ada@example.com"},
+            "phone": {"5551234567"},
+            "name": {"ada|byron"},
+        }
+
+    def test_inactive_rows_count_only_when_asked(self, org_a):
+        Lead.objects.create(
+            title="Archived", email="gone@example.com", is_active=False, org=org_a
+        )
+        records = [{"email": "gone@example.com"}]
+        assert DuplicateDetector.find_stored_keys(org_a, "lead", records) == {}
+        assert DuplicateDetector.find_stored_keys(
+            org_a, "lead", records, include_inactive=True
+        ) == {"email": {"gone@example.com"}}
+
+    def test_repeats_within_the_batch_are_not_its_concern(
+        self, org_a, django_assert_num_queries
+    ):
+        # The importers track those themselves, from chunk to chunk.
+        with django_assert_num_queries(1):
+            stored = DuplicateDetector.find_stored_keys(
+                org_a, "lead", [{"email": "a@example.com"}, {"email": "a@example.com"}]
+            )
+        assert stored == {}
+
+
+@pytest.mark.slow
+@pytest.mark.django_db
+def test_benchmark_phone_lookup_at_100k_contacts(org_a):
+    """One duplicate check against 100,000 contacts, before and after.
+
+    "Before" is the removed code path, run inline: load every contact with a
+    phone and normalize each in Python. The assertion only asks for an order
+    of magnitude; being wall-clock, it is ``slow`` and out of the CI
+    selection (run with ``-m slow``).
+    """
+    Contact.objects.bulk_create(
+        (
+            Contact(
+                first_name="C",
+                last_name=str(i),
+                phone=f"+1 (555) {i // 10000:03d}-{i % 10000:04d}",
+                org=org_a,
+            )
+            for i in range(100_000)
+        ),
+        batch_size=5000,
+    )
+    target = "555-009-9999"  # the last row written
+
+    start = time.perf_counter()
+    wanted = DuplicateDetector.normalize_phone(target)
+    scanned = [
+        c
+        for c in Contact.objects.filter(org=org_a, is_active=True)
+        .exclude(phone__isnull=True)
+        .exclude(phone="")
+        if re.sub(r"[^\d]", "", c.phone)[-10:] == wanted
+    ]
+    scan = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = DuplicateDetector.find_duplicate_contacts(org_a, phone=target)
+    lookup = time.perf_counter() - start
+
+    assert indexed == scanned and len(indexed) == 1
+    assert lookup * 10 < scan
@@ -200,14 +200,16 @@ class TestAlertEmailsLinkToTheirPage:
     def test_stale_deal_alert_links_to_the_rotten_filter(
         self, org_a, admin_user, admin_profile
     ):
-        from opportunity.tasks import send_stale_deals_alert
+        from opportunity.tasks import send_stale_deals_digest
 
         with impersonate(admin_user):
             deal = Opportunity.objects.create(
                 name="Stalled", org=org_a, stage="QUALIFICATION"
             )
 
-        send_stale_deals_alert(org_a, [(deal, 40, 14)])
+        send_stale_deals_digest(
+            str(admin_profile.id), [[str(deal.id), 40, 14]], str(org_a.id)
+        )
 
         assert len(mail.outbox) == 1
         assert _button_href(mail.outbox[0]) == f"{FRONTEND}/pipeline?rotten=true"
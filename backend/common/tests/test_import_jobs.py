@@ -0,0 +1,205 @@
+"""Tests for background CSV imports (common/imports.py).
+
+A job is started by an importer's endpoint, which stores the file and queues
+``run_import_job``; the tests run that task inline. What matters beyond the
+in-request importers: the file is read a chunk at a time (checks that span the
+file still hold across chunk boundaries), progress and row errors land on the
+job, the all-or-nothing rule survives chunking, and the stored file is gone
+once the job is.
+"""
+
+import io
+from unittest.mock import patch
+
+import pytest
+from django.core.files.storage import default_storage
+from django.db import IntegrityError
+
+from cases.models import Case
+from common import imports
+from common.models import Activity, ImportJob
+from common.tasks import run_import_job
+from contacts.models import Contact
+from leads.models import Lead
+
+
+def _upload(text, name="import.csv"):
+    upload = io.BytesIO(text.encode())
+    upload.name = name
+    return upload
+
+
+@pytest.fixture
+def start(django_capture_on_commit_callbacks):
+    """POST a file to an import endpoint; return the response and the task."""
+
+    def _start(client, url, text, field="file"):
+        with patch("common.tasks.run_import_job.delay") as delay:
+            with django_capture_on_commit_callbacks(execute=True):
+                response = client.post(url, {field: _upload(text)}, format="multipart")
+        return response, delay
+
+    return _start
+
+
+def _run(delay):
+    job_id, org_id = delay.call_args.args
+    run_import_job(job_id, org_id)
+    return ImportJob.objects.get(pk=job_id)
+
+
+CONTACTS_URL = "/api/contacts/import/jobs/"
+CONTACTS = "first_name,last_name,email\n" + "".join(
+    f"Ada{n},Byte,ada{n}@example.com\n" for n in range(5)
+)
+
+
+@pytest.mark.django_db
+class TestContactJobs:
+    @pytest.fixture(autouse=True)
+    def _small_chunks(self, monkeypatch):
+        monkeypatch.setattr(imports, "CHUNK_SIZE", 2)
+
+    def test_imports_the_file_in_the_background(
+        self, admin_client, org_a, admin_profile, start
+    ):
+        response, delay = start(admin_client, CONTACTS_URL, CONTACTS)
+        assert response.status_code == 202
+        assert response.json()["status"] == "queued"
+        stored = ImportJob.objects.get().file.name
+        assert default_storage.exists(stored)
+        assert Contact.objects.count() == 0
+
+        job = _run(delay)
+        assert (job.status, job.total_rows, job.processed_rows) == ("succeeded", 5, 5)
+        assert job.created_count == Contact.objects.filter(org=org_a).count() == 5
+        assert job.requested_by == admin_profile
+        # One aggregated activity for the import, as the in-request commit.
+        assert Activity.objects.get(org=org_a).metadata["created"] == 5
+        # The rows are in the database; the upload is not kept.
+        assert not job.file and not default_storage.exists(stored)
+
+    def test_header_errors_are_answered_at_once(self, admin_client, start):
+        response, delay = start(
+            admin_client, CONTACTS_URL, "first_name,nickname\nAda,A\n"
+        )
+        assert response.status_code == 400
+        assert "last_name" in response.json()["message"]
+        assert not ImportJob.objects.exists()
+        delay.assert_not_called()
+
+    def test_an_invalid_row_fails_the_job_before_anything_is_written(
+        self, admin_client, org_a, start
+    ):
+        # Row 4 repeats row 1's email: different chunks, same file.
+        text = CONTACTS.replace("ada3@", "ada0@")
+        _, delay = start(admin_client, CONTACTS_URL, text)
+        job = _run(delay)
+        assert job.status == "failed"
+        assert job.message == "Fix the invalid rows before importing"
+        assert job.error_count == 1
+        assert job.errors == [
+            {
+                "row": 4,
+                "field": "email",
+                "message": "Duplicate email also used by row 1 in this file",
+            }
+        ]
+        assert Contact.objects.count() == 0
+
+    def test_a_conflict_mid_import_keeps_the_chunks_before_it(
+        self, admin_client, org_a, start, monkeypatch
+    ):
+        _, delay = start(admin_client, CONTACTS_URL, CONTACTS)
+        real = Contact.objects.bulk_create
+        calls = []
+
+        def second_chunk_conflicts(objs, **kwargs):
+            calls.append(len(objs))
+            if len(calls) == 2:
+                raise IntegrityError("duplicate key value violates unique constraint")
+            return real(objs, **kwargs)
+
+        monkeypatch.setattr(Contact.objects, "bulk_create", second_chunk_conflicts)
+        job = _run(delay)
+        assert job.status == "failed"
+        assert job.created_count == Contact.objects.count() == 2
+        assert "first 2 rows were imported" in job.message
+
+    def test_a_redelivered_message_does_not_import_twice(self, admin_client, start):
+        _, delay = start(admin_client, CONTACTS_URL, CONTACTS)
+        _run(delay)
+        assert run_import_job(*delay.call_args.args) is None
+        assert Contact.objects.count() == 5
+
+    def test_needs_import_rights(self, user_client):
+        response = user_client.post(
+            CONTACTS_URL, {"file": _upload(CONTACTS)}, format="multipart"
+        )
+        assert response.status_code == 403
+
+
+@pytest.mark.django_db
+def test_case_jobs_import(admin_client, org_a, start):
+    text = "name,status,priority\nPrinter down,New,High\nVPN flaky,New,Low\n"
+    response, delay = start(admin_client, "/api/cases/import/jobs/", text)
+    assert response.status_code == 202
+    job = _run(delay)
+    assert (job.status, job.created_count) == ("succeeded", 2)
+    assert set(Case.objects.values_list("name", flat=True)) == {
+        "Printer down",
+        "VPN flaky",
+    }
+
+
+@pytest.mark.django_db
+class TestLeadUploadJobs:
+    def test_rows_no_longer_travel_in_the_message(self, admin_client, org_a, start):
+        text = "title,email\nAcme deal,ada@example.com\n,bob@example.com\n"
+        response, delay = start(admin_client, "/api/leads/upload/", text, "leads_file")
+        assert response.status_code == 200
+        assert response.json()["job"]["kind"] == "leads"
+        assert delay.call_args.args == (
+            response.json()["job"]["id"],
+            str(org_a.id),
+        )
+
+        job = _run(delay)
+        # Lead imports skip what they cannot take rather than refuse the file.
+        assert (job.status, job.created_count, job.error_count, job.failed_count) == (
+            "succeeded",
+            1,
+            1,
+            0,
+        )
+        assert job.errors[0]["field"] == "title"
+        assert Lead.objects.get(org=org_a).title == "Acme deal"
+
+    def test_a_missing_title_header_is_refused(self, admin_client):
+        response = admin_client.post(
+            "/api/leads/upload/",
+            {"leads_file": _upload("name,email\nAcme,ada@example.com\n")},
+            format="multipart",
+        )
+        assert response.status_code == 400
+        assert response.json()["errors"] == "Missing headers: title"
+
+
+@pytest.mark.django_db
+class TestPolling:
+    @pytest.fixture
+    def job(self, org_a, admin_profile):
+        return ImportJob.objects.create(
+            org=org_a, kind="contacts", requested_by=admin_profile, processed_rows=3
+        )
+
+    def test_the_requester_sees_progress(self, admin_client, job):
+        response = admin_client.get(f"/api/import-jobs/{job.id}/")
+        assert response.status_code == 200
+        assert response.json()["processed_rows"] == 3
+
+    def test_another_member_does_not(self, user_client, job):
+        assert user_client.get(f"/api/import-jobs/{job.id}/").status_code == 404
+
+    def test_another_org_does_not(self, org_b_client, job):
+        assert org_b_client.get(f"/api/import-jobs/{job.id}/").status_code == 404
@@ -0,0 +1,361 @@
+"""Tests for activity/notification partitioning and retention (common/partitions.py).
+
+The partition DDL only runs on PostgreSQL; on SQLite the tables are plain and
+retention falls back to the per-org DELETE, which is what runs here. What has
+to hold: nothing is removed unless a retention is set, an org's own setting
+beats the default in both directions, one org's retention never touches
+another's rows, and a dry run changes nothing.
+
+``TestOnPostgres`` runs the conversion itself (``--ds=crm.test_settings_postgres``):
+migration common/0043 both ways on tables with rows, RLS through the parent
+and through a partition named directly, and ``manage_partitions`` creating,
+dropping and archiving partitions.
+"""
+
+import importlib
+import logging
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+
+from common import partitions
+from common.models import Activity, Notification
+from conftest import clear_rls_context, restore_rls_context, rls_org, set_rls_context
+
+migration = importlib.import_module(
+    "common.migrations.0043_partition_activity_notification"
+)
+
+
+def _utc(*args):
+    return datetime(*args, tzinfo=dt_timezone.utc)
+
+
+def _activity(org, days_old):
+    activity = Activity.objects.create(
+        action="UPDATE",
+        entity_type="Case",
+        entity_id=org.id,
+        entity_name=f"{days_old}d",
+        org=org,
+    )
+    Activity.objects.filter(pk=activity.pk).update(
+        created_at=timezone.now() - timedelta(days=days_old)
+    )
+    return activity
+
+
+def _names(org):
+    return set(Activity.objects.filter(org=org).values_list("entity_name", flat=True))
+
+
+def _rows(table):
+    """Count ``table`` as the current org context sees it."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        return cursor.fetchone()[0]
+
+
+def _seen(*orgs):
+    """The activity and notification ids each org can read."""
+    seen = {}
+    for org in orgs:
+        with rls_org(org):
+            seen[org.id] = (
+                set(Activity.objects.values_list("pk", flat=True)),
+                set(Notification.objects.values_list("pk", flat=True)),
+            )
+    return seen
+
+
+def _primary_key(table):
+    with connection.cursor() as cursor:
+        ((_name, definition),) = partitions._constraints(cursor, table, "p")
+    return definition
+
+
+def _shape(table):
+    """The constraint and index names a round trip has to bring back."""
+    with connection.cursor() as cursor:
+        return (
+            {name for name, _ in partitions._constraints(cursor, table, "p")},
+            {name for name, _ in partitions._constraints(cursor, table, "f")},
+            {name for name, _ in partitions._indexes(cursor, table)},
+        )
+
+
+def _names_of(table):
+    return [p.name for p in partitions.partitions(table)]
+
+
+class TestMonths:
+    def test_month_start_is_utc(self):
+        moment = datetime(2026, 3, 1, 1, 30, tzinfo=dt_timezone(timedelta(hours=5)))
+        assert partitions.month_start(moment) == _utc(2026, 2, 1)
+
+    def test_add_months_crosses_years(self):
+        assert partitions.add_months(_utc(2026, 11, 1), 3) == _utc(2027, 2, 1)
+        assert partitions.add_months(_utc(2026, 1, 1), -1) == _utc(2025, 12, 1)
+
+    def test_partition_name(self):
+        assert partitions.partition_name("activity", _utc(2026, 7, 1)) == (
+            "activity_202607"
+        )
+
+    def test_bounds_are_read_from_the_catalog_expression(self):
+        monthly = partitions._partition(
+            "activity_202611",
+            "FOR VALUES FROM ('2026-11-01 00:00:00+00') TO ('2026-12-01 00:00:00+00')",
+        )
+        legacy = partitions._partition(
+            "activity_legacy",
+            "FOR VALUES FROM (MINVALUE) TO ('2026-11-01 00:00:00+00')",
+        )
+        default = partitions._partition("activity_default", "DEFAULT")
+        assert (monthly.lower, monthly.upper) == (_utc(2026, 11, 1), _utc(2026, 12, 1))
+        assert (legacy.lower, legacy.upper) == (None, _utc(2026, 11, 1))
+        assert default.is_default
+        # The legacy partition covers its own month; the next one does not.
+        existing = [legacy, default]
+        assert partitions._covered(existing, _utc(2026, 10, 1))
+        assert not partitions._covered(existing, _utc(2026, 11, 1))
+
+
+@pytest.mark.django_db
+class TestRetention:
+    def test_nothing_is_removed_by_default(self, org_a):
+        _activity(org_a, 2000)
+        partitions.maintain()
+        assert _names(org_a) == {"2000d"}
+
+    def test_the_default_applies_to_every_org(self, settings, org_a, org_b):
+        settings.ACTIVITY_RETENTION_DAYS = 30
+        for org in (org_a, org_b):
+            _activity(org, 40)
+            _activity(org, 10)
+        partitions.maintain()
+        assert _names(org_a) == _names(org_b) == {"10d"}
+
+    def test_an_org_setting_beats_the_default(self, settings, org_a, org_b):
+        settings.ACTIVITY_RETENTION_DAYS = 30
+        org_a.activity_retention_days = 365
+        org_a.save()
+        org_b.activity_retention_days = 5
+        org_b.save()
+        for org in (org_a, org_b):
+            _activity(org, 40)
+            _activity(org, 10)
+        partitions.maintain()
+        assert _names(org_a) == {"40d", "10d"}
+        assert _names(org_b) == set()
+
+    def test_the_longest_retention_bounds_the_partition_drop(
+        self, settings, org_a, org_b
+    ):
+        settings.ACTIVITY_RETENTION_DAYS = 30
+        org_a.activity_retention_days = 365
+        org_a.save()
+        assert partitions.retention("activity") == (
+            365,
+            {org_a.id: 365, org_b.id: 30},
+        )
+        org_b.activity_retention_days = None
+        org_b.save()
+        settings.ACTIVITY_RETENTION_DAYS = 0
+        # An org keeping everything keeps every partition.
+        assert partitions.retention("activity")[0] is None
+
+    def test_notifications_have_their_own_retention(
+        self, settings, org_a, user_profile
+    ):
+        settings.NOTIFICATION_RETENTION_DAYS = 7
+        old = Notification.objects.create(
+            org=org_a, recipient=user_profile, verb="case.assigned"
+        )
+        Notification.objects.filter(pk=old.pk).update(
+            created_at=timezone.now() - timedelta(days=8)
+        )
+        Notification.objects.create(
+            org=org_a, recipient=user_profile, verb="case.assigned"
+        )
+        _activity(org_a, 8)
+        partitions.maintain()
+        assert Notification.objects.count() == 1
+        assert not Notification.objects.filter(pk=old.pk).exists()
+        assert _names(org_a) == {"8d"}
+
+
+@pytest.mark.django_db
+class TestCommand:
+    def test_dry_run_changes_nothing(self, settings, org_a, capsys):
+        settings.ACTIVITY_RETENTION_DAYS = 30
+        _activity(org_a, 40)
+        call_command("manage_partitions", "--dry-run")
+        out = capsys.readouterr().out
+        assert "activity:\n  not partitioned\n  Would delete 1 rows" in out
+        assert _names(org_a) == {"40d"}
+
+    def test_applies_retention(self, settings, org_a, capsys):
+        settings.ACTIVITY_RETENTION_DAYS = 30
+        _activity(org_a, 40)
+        call_command("manage_partitions")
+        assert "Did delete 1 rows" in capsys.readouterr().out
+        assert _names(org_a) == set()
+
+
+@pytest.mark.postgres_only
+@pytest.mark.django_db
+class TestOnPostgres:
+    """The DDL, under a role that RLS binds.
+
+    The test database is built by migrations, so the tables arrive already
+    partitioned. Every statement here is transactional, and the test's
+    rollback takes the DDL with it.
+    """
+
+    @pytest.fixture(autouse=True)
+    def _require_postgres(self):
+        if connection.vendor != "postgresql":
+            pytest.skip("partitioning requires PostgreSQL")
+
+    @pytest.fixture
+    def orgs(self, org_a, org_b, user_profile, profile_b):
+        _activity(org_a, 40)
+        _activity(org_a, 0)
+        Notification.objects.create(
+            org=org_a, recipient=user_profile, verb="case.assigned"
+        )
+        with rls_org(org_b):
+            _activity(org_b, 0)
+            Notification.objects.create(
+                org=org_b, recipient=profile_b, verb="case.assigned"
+            )
+        return org_a, org_b
+
+    @pytest.fixture
+    def later(self, settings, monkeypatch):
+        """Run the command 400 days on, when every current partition is past
+        a 30-day retention."""
+        settings.ACTIVITY_RETENTION_DAYS = 30
+        moment = timezone.now() + timedelta(days=400)
+        monkeypatch.setattr(timezone, "now", lambda: moment)
+        return moment
+
+    def test_the_migration_round_trips_rows_keys_and_indexes(self, orgs, settings):
+        shapes = {table: _shape(table) for table in partitions.TABLES}
+        seen = _seen(*orgs)
+        assert all(
+            activities and notifications for activities, notifications in seen.values()
+        )
+
+        migration.unpartition(None, None)
+        for table in partitions.TABLES:
+            assert not partitions.is_partitioned(table)
+            assert _primary_key(table) == "PRIMARY KEY (id)"
+            assert _shape(table) == shapes[table]
+        assert _seen(*orgs) == seen
+
+        migration.partition(None, None)
+        for table, (_pk, _fks, indexes) in shapes.items():
+            assert partitions.is_partitioned(table)
+            assert _primary_key(table) == "PRIMARY KEY (id, created_at)"
+            assert _shape(table) == shapes[table]
+            names = _names_of(table)
+            assert names[0] == f"{table}_legacy"
+            assert names[-1] == f"{table}_default"
+            assert len(names) == settings.PARTITION_MONTHS_AHEAD + 2
+            # The old table kept its indexes, renamed, as the first partition.
+            assert _shape(f"{table}_legacy")[2] == {
+                f"{name[:56]}_legacy" for name in indexes
+            }
+        assert _seen(*orgs) == seen
+
+    def test_rls_isolates_orgs_through_the_parent_and_each_partition(self, orgs):
+        org_a, org_b = orgs
+        migration.unpartition(None, None)
+        migration.partition(None, None)
+        next_month = partitions.add_months(partitions.month_start(timezone.now()), 1)
+        monthly = partitions.partition_name("activity", next_month)
+        for org in orgs:
+            with rls_org(org):
+                Activity.objects.filter(entity_name="0d").update(
+                    created_at=next_month + timedelta(days=1)
+                )
+
+        assert _rows("activity") == 2
+        assert _rows("activity_legacy") == _rows(monthly) == 1
+        assert _rows("notification") == _rows("notification_legacy") == 1
+        with rls_org(org_b):
+            assert _rows("activity") == _rows(monthly) == 1
+            assert _rows("activity_legacy") == 0
+        clear_rls_context()
+        try:
+            for table in ("activity", "activity_legacy", monthly, "notification"):
+                assert _rows(table) == 0
+        finally:
+            set_rls_context(org_a)
+
+    def test_the_command_creates_and_drops_partitions(
+        self, orgs, later, settings, capsys
+    ):
+        before = _names_of("activity")
+        call_command("manage_partitions")
+        restore_rls_context()
+        out = capsys.readouterr().out
+
+        first = partitions.month_start(later)
+        created = [
+            partitions.partition_name("activity", partitions.add_months(first, n))
+            for n in range(settings.PARTITION_MONTHS_AHEAD + 1)
+        ]
+        assert _names_of("activity") == [*created, "activity_default"]
+        for name in created:
+            assert f"Did create {name}" in out
+        for name in before[:-1]:
+            assert f"Did drop {name}" in out
+        # Notifications keep everything by default, so lose nothing.
+        assert "notification_legacy" in _names_of("notification")
+        for org in orgs:
+            with rls_org(org):
+                assert not Activity.objects.exists()
+                assert Notification.objects.exists()
+
+    def test_the_command_archives_instead_of_dropping(self, orgs, later, capsys):
+        org_a, org_b = orgs
+        call_command("manage_partitions", "--archive")
+        restore_rls_context()
+        assert "Did archive activity_legacy" in capsys.readouterr().out
+        assert "activity_legacy" not in _names_of("activity")
+
+        archived = f"{partitions.ARCHIVE_SCHEMA}.activity_legacy"
+        assert _rows(archived) == 2
+        with rls_org(org_b):
+            assert _rows(archived) == 1
+        assert not Activity.objects.exists()
+
+    def test_a_month_with_rows_in_the_default_partition_is_left_alone(
+        self, org_a, settings, caplog
+    ):
+        months = settings.PARTITION_MONTHS_AHEAD
+        first = partitions.month_start(timezone.now())
+        blocked = partitions.add_months(first, months + 2)
+        stray = _activity(org_a, 0)
+        Activity.objects.filter(pk=stray.pk).update(
+            created_at=blocked + timedelta(days=1)
+        )
+        assert _rows("activity_default") == 1
+
+        with caplog.at_level(logging.ERROR, logger="common.partitions"):
+            created = partitions.create_partitions("activity", months + 2)
+
+        following = partitions.add_months(first, months + 1)
+        assert created == [partitions.partition_name("activity", following)]
+        assert partitions.partition_name("activity", blocked) not in _names_of(
+            "activity"
+        )
+        assert "move its rows out of activity_default" in caplog.text
+        assert Activity.objects.filter(pk=stray.pk).exists()
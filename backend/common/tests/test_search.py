@@ -7,9 +7,11 @@ the list). Search is a classic place for both leaks.
 
 import pytest
 from crum import impersonate
+from django.db import connection
 
 from accounts.models import Account
 from cases.models import Case, Solution
+from common import search
 from contacts.models import Contact
 from invoices.models import Invoice
 from leads.models import Lead
@@ -56,6 +58,11 @@ def _seed_all(org, token="Zephyr"):
 
 @pytest.mark.django_db
 class TestGlobalSearch:
+    @pytest.fixture(autouse=True, params=[True, False], ids=["index", "fan-out"])
+    def _path(self, request, settings):
+        """Every rule holds on the search document table and on the fallback."""
+        settings.SEARCH_USE_INDEX = request.param
+
     def test_short_query_returns_empty_even_with_matches(self, admin_client, org_a):
         _seed_all(org_a, token="Zephyr")
         # One character is below the floor, so it matches nothing on purpose...
@@ -137,3 +144,78 @@ class TestGlobalSearch:
             )
         results = user_client.get(f"{URL}?q=SharedKB").json()["results"]
         assert any(r["type"] == "solution" for r in results)
+
+
+@pytest.mark.django_db
+class TestSearchBackend:
+    """Which backend answers, and that the fallback is a real fallback."""
+
+    def test_sqlite_gets_plain_matching(self, settings):
+        if connection.vendor == "postgresql":
+            pytest.skip("the fallback is what SQLite runs")
+        settings.SEARCH_BACKEND = None
+        assert type(search.get_backend()) is search.IContainsBackend
+
+    def test_the_setting_picks_the_backend(self, settings):
+        settings.SEARCH_BACKEND = "common.search.TrigramBackend"
+        assert type(search.get_backend()) is search.TrigramBackend
+
+    def test_the_trigram_backend_matches_the_same_rows_and_ranks_them(self, org_a):
+        """Same WHERE as the fallback; the difference is the order."""
+        fields = search.SEARCH_FIELDS["account"]
+        base = Account.objects.filter(org=org_a)
+        plain = search.IContainsBackend().filter(base, fields, "acme")
+        ranked = search.TrigramBackend().filter(base, fields, "acme")
+
+        assert str(ranked.query.where) == str(plain.query.where)
+        assert "search_rank" in ranked.query.annotations
+        assert ranked.query.order_by == ("-search_rank",)
+
+    def test_every_indexed_column_is_a_searched_one(self):
+        """An index on a column nothing searches is a write cost for nothing."""
+        from django.apps import apps
+
+        searched = set()
+        for model_label, key in [
+            ("leads.Lead", "lead"),
+            ("opportunity.Opportunity", "deal"),
+            ("accounts.Account", "account"),
+            ("contacts.Contact", "contact"),
+            ("cases.Case", "ticket"),
+            ("invoices.Invoice", "invoice"),
+            ("cases.Solution", "solution"),
+        ]:
+            model = apps.get_model(model_label)
+            for path in search.SEARCH_FIELDS[key]:
+                if "__" not in path:
+                    column = model._meta.get_field(path).column
+                    searched.add((model._meta.db_table, column))
+
+        assert set(search.TRIGRAM_INDEXES) == searched
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="pg_trgm ranking is PostgreSQL-only"
+)
+class TestTrigramRanking:
+    def test_the_closest_match_comes_first(self, admin_client, org_a):
+        if type(search.get_backend()) is not search.TrigramBackend:
+            pytest.skip("pg_trgm is not installed in this database")
+        Lead.objects.create(
+            first_name="A",
+            last_name="Person",
+            company_name="Holmsworth Zephyrine Trading",
+            org=org_a,
+        )
+        Lead.objects.create(first_name="Zephyr", last_name="Jones", org=org_a)
+
+        leads = [
+            r
+            for r in admin_client.get(f"{URL}?q=Zephyr").json()["results"]
+            if r["type"] == "lead"
+        ]
+        assert [r["title"] for r in leads] == [
+            "Zephyr Jones",
+            "A Person",
+        ]
@@ -10,6 +10,7 @@ Run with: pytest common/tests/test_today.py -v
 """
 
 import datetime
+from unittest.mock import patch
 
 import pytest
 from django.db import connection
@@ -297,6 +298,59 @@ class TestTodayView:
         resp = admin_client.get(self.url)
         assert f"invoice-{foreign.id}" not in _ids(resp.data["queue"])
 
+    # ── snapshot cache ──────────────────────────────────────────────────
+    def test_repeat_load_is_served_from_the_snapshot(self, admin_client, org_a):
+        first = admin_client.get(self.url)
+        second = admin_client.get(self.url)
+        assert first["X-Dashboard-Cache"] == "miss"
+        assert second["X-Dashboard-Cache"] == "hit"
+        assert second.data == first.data
+
+    def test_a_new_task_reaches_a_cached_queue(self, admin_client, org_a, admin_user):
+        admin_client.get(self.url)
+        task = Task.objects.create(
+            title="Late addition",
+            status="New",
+            priority="Medium",
+            org=org_a,
+            created_by=admin_user,
+            due_date=_today(),
+        )
+        resp = admin_client.get(self.url)
+        assert f"task-{task.id}" in _ids(resp.data["queue"])
+
+    def test_a_case_crossing_its_sla_is_overdue_on_a_cached_load(
+        self, admin_client, org_a, admin_user
+    ):
+        case = Case.objects.create(
+            name="Almost late",
+            status="New",
+            priority="Low",
+            case_type="Question",
+            org=org_a,
+            created_by=admin_user,
+        )
+        # Due a minute from now. update() bumps no version, as the clock does not.
+        now = timezone.now()
+        Case.objects.filter(pk=case.pk).update(
+            created_at=now
+            - datetime.timedelta(hours=case.sla_first_response_hours, minutes=-1)
+        )
+        row = f"case-{case.id}"
+
+        first = admin_client.get(self.url)
+        assert next(i for i in first.data["queue"] if i["id"] == row)["due"] == "Today"
+
+        with patch(
+            "django.utils.timezone.now",
+            return_value=now + datetime.timedelta(minutes=2),
+        ):
+            second = admin_client.get(self.url)
+        assert second["X-Dashboard-Cache"] == "hit"
+        item = next(i for i in second.data["queue"] if i["id"] == row)
+        assert (item["due"], item["tone"]) == ("Overdue", "rust")
+        assert second.data["queue"][0]["id"] == row
+
 
 @pytest.mark.django_db
 class TestTheHeaderCountMatchesThePage:
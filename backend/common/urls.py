@@ -22,6 +22,7 @@ from common.views.document_views import (
     DocumentDownloadView,
     DocumentListView,
 )
+from common.views.import_job_views import ImportJobDetailView
 from common.views.notification_views import (
     NotificationDetailView,
     NotificationListView,
@@ -162,6 +163,10 @@ urlpatterns = [
         CustomFieldDefinitionDetailView.as_view(),
         name="custom_field_detail",
     ),
+    # Background CSV import jobs (polled by the requester or an org admin)
+    path(
+        "import-jobs/<uid:pk>/", ImportJobDetailView.as_view(), name="import_job_detail"
+    ),
     # In-app notifications (per-recipient feed)
     path("notifications/", NotificationListView.as_view(), name="notifications_list"),
     path(
@@ -1,6 +1,6 @@
 from datetime import timedelta
 
-from django.db.models import DecimalField, F, Q, Sum
+from django.db.models import DecimalField, Q, Sum
 from django.db.models.functions import Coalesce
 from django.utils import timezone
 from drf_spectacular.utils import OpenApiParameter, extend_schema, inline_serializer
@@ -11,7 +11,9 @@ from rest_framework.views import APIView
 
 from accounts.models import Account
 from cases.models import Case
-from common import serializer, swagger_params
+from common import dashboard, dashboard_cache, serializer, swagger_params
+from common.dashboard import OPEN_STAGES, OPEN_TASK_STATUSES, in_currency
+from common.dashboard_cache import Section
 from common.models import Activity
 from common.permissions import HasOrgContext, is_org_admin
 from common.utils import STAGES
@@ -23,10 +25,6 @@ from opportunity.workflow import DEFAULT_STAGE_EXPECTED_DAYS, ROTTEN_MULTIPLIER
 from tasks.models import Task
 from tasks.serializer import TaskSerializer
 
-# Sales stages a deal can still be worked (and therefore "age") in: mirrors
-# the open-stage list ApiHomeView uses for its revenue metrics.
-OPEN_STAGES = ["PROSPECTING", "QUALIFICATION", "PROPOSAL", "NEGOTIATION"]
-
 # Case statuses that are still open. The rest (Closed, Rejected, Duplicate) are
 # terminal; listing the open ones explicitly means a new terminal status is a
 # deliberate edit here, not a silent inclusion in the "needs a reply" queue.
@@ -39,6 +37,10 @@ OPEN_CASE_STATUSES = ["New", "Assigned", "Pending"]
 TODAY_QUEUE_LIMIT = 8
 TODAY_SOURCE_LIMIT = 25
 
+# Response header saying how a dashboard load was served: "hit", "miss",
+# "partial" (some sections recomputed) or "bypass" (?fresh=1, or no cache).
+CACHE_HEADER = "X-Dashboard-Cache"
+
 _CURRENCY_SYMBOL = {
     "USD": "$",
     "EUR": "€",
@@ -64,6 +66,11 @@ def _fmt_date(d):
     return f"{d:%b} {d.day}"
 
 
+def _wants_fresh(request):
+    """``?fresh=1`` skips the dashboard snapshot cache for this load."""
+    return request.query_params.get("fresh", "").lower() in ("1", "true")
+
+
 def _owned_or_assigned(queryset, profile):
     """Narrow a queryset to what a non-admin may see, without joining.
 
@@ -138,179 +145,159 @@ class ApiHomeView(APIView):
         # read. The screens below want counts, the pipeline, the urgent numbers,
         # ten hot leads and ten tasks. Whoever needs a list calls its own
         # endpoint, which pages; these four never did.
-        context = {}
-        context["accounts_count"] = accounts.count()
-        context["contacts_count"] = contacts.count()
-        context["leads_count"] = leads.count()
-        context["opportunities_count"] = opportunities.count()
-
-        # NEW: Urgent counts for Focus Bar
-        overdue_tasks = tasks.filter(
-            status__in=["New", "In Progress"], due_date__lt=today
-        ).count()
-
-        tasks_due_today = tasks.filter(
-            status__in=["New", "In Progress"], due_date=today
-        ).count()
+        #
+        # One query per model: see common/dashboard.py for why each number is
+        # a conditional aggregate rather than its own count(). Each model's
+        # numbers are a cached section (common/dashboard_cache.py), so a repeat
+        # load recomputes only what a write has made stale.
+        org_currency = org.default_currency or "USD"
+        month_start = timezone.now().replace(
+            day=1, hour=0, minute=0, second=0, microsecond=0
+        )
 
-        followups_today = leads.filter(next_follow_up=today).count()
+        def lead_section():
+            hot_leads_qs = leads.filter(
+                rating="HOT", status__in=["assigned", "in process"]
+            ).order_by("-created_at")[:10]
+            return {
+                "totals": dashboard.lead_metrics(all_leads, today),
+                "hot": [
+                    {
+                        "id": str(lead.id),
+                        "first_name": lead.first_name,
+                        "last_name": lead.last_name,
+                        "company": lead.company_name,
+                        "rating": lead.rating,
+                        "next_follow_up": (
+                            lead.next_follow_up.isoformat()
+                            if lead.next_follow_up
+                            else None
+                        ),
+                        "last_contacted": (
+                            lead.last_contacted.isoformat()
+                            if lead.last_contacted
+                            else None
+                        ),
+                    }
+                    for lead in hot_leads_qs
+                ],
+            }
 
-        hot_leads = leads.filter(
-            rating="HOT", status__in=["assigned", "in process"]
-        ).count()
+        def task_section():
+            upcoming_tasks = tasks.filter(
+                status__in=OPEN_TASK_STATUSES, due_date__isnull=False
+            ).order_by("due_date")[:10]
+            return {
+                "totals": dashboard.task_metrics(tasks, today),
+                # Plain dicts: `.data` is a ReturnList holding its serializer,
+                # which is not something to pickle into a cache.
+                "upcoming": [
+                    dict(row) for row in TaskSerializer(upcoming_tasks, many=True).data
+                ],
+            }
 
-        context["urgent_counts"] = {
-            "overdue_tasks": overdue_tasks,
-            "tasks_due_today": tasks_due_today,
-            "followups_today": followups_today,
-            "hot_leads": hot_leads,
-        }
+        def goal_section():
+            from opportunity.models import SalesGoal
 
-        # Get org's default currency for filtering
-        org_currency = org.default_currency or "USD"
+            goal_filter = Q(assigned_to=profile) | Q(team__in=profile.user_teams.all())
+            if is_admin:
+                goal_filter |= Q(assigned_to__isnull=True, team__isnull=True)
 
-        # NEW: Pipeline by stage (filtered by org's default currency)
-        # Only sum amounts that match org's currency for accurate totals
-        pipeline_by_stage = {}
-        for stage_code, stage_label in STAGES:
-            stage_opps = opportunities.filter(stage=stage_code)
-            # Filter by currency for value calculation (include null as matching org currency)
-            stage_opps_with_currency = stage_opps.filter(
-                Q(currency=org_currency) | Q(currency__isnull=True) | Q(currency="")
+            active_goals = (
+                SalesGoal.objects.filter(
+                    org=org,
+                    is_active=True,
+                    period_start__lte=today,
+                    period_end__gte=today,
+                )
+                .filter(goal_filter)
+                .distinct()[:3]
             )
-            stage_value = stage_opps_with_currency.aggregate(
-                total=Coalesce(Sum("amount"), 0, output_field=DecimalField())
-            )["total"]
-            pipeline_by_stage[stage_code] = {
-                "count": stage_opps.count(),  # Count all opportunities
-                "value": float(stage_value or 0),  # Value only for matching currency
-                "label": stage_label,
-            }
-        context["pipeline_by_stage"] = pipeline_by_stage
-
-        # NEW: Revenue metrics (filtered by org's default currency)
-        open_stages = ["PROSPECTING", "QUALIFICATION", "PROPOSAL", "NEGOTIATION"]
-        open_opps = opportunities.filter(stage__in=open_stages)
-        # Filter by currency for value calculations
-        open_opps_with_currency = open_opps.filter(
-            Q(currency=org_currency) | Q(currency__isnull=True) | Q(currency="")
+            return [
+                {
+                    "id": str(g.id),
+                    "name": g.name,
+                    "goal_type": g.goal_type,
+                    "target_value": float(g.target_value),
+                    "progress_value": float(g.compute_progress()),
+                    "progress_percent": g.progress_percent,
+                    "status": g.status,
+                }
+                for g in active_goals
+            ]
+
+        sections, cache_outcome = dashboard_cache.load_sections(
+            org,
+            "org" if is_admin else str(profile.id),
+            {
+                "accounts": Section(("account",), accounts.count),
+                "contacts": Section(("contact",), contacts.count),
+                "leads": Section(("lead",), lead_section),
+                "opportunities": Section(
+                    ("opportunity",),
+                    lambda: dashboard.opportunity_metrics(
+                        opportunities, org_currency, month_start
+                    ),
+                ),
+                "tasks": Section(("task",), task_section),
+                # Goals are per caller even for admins: each sees the goals
+                # assigned to them and their teams.
+                "goals": Section(
+                    ("opportunity", "goal"), goal_section, scope=str(profile.id)
+                ),
+            },
+            fresh=_wants_fresh(request),
         )
+        lead_totals = sections["leads"]["totals"]
+        task_totals = sections["tasks"]["totals"]
+        opp_totals = sections["opportunities"]
 
-        pipeline_value = open_opps_with_currency.aggregate(
-            total=Coalesce(Sum("amount"), 0, output_field=DecimalField())
-        )["total"]
+        context = {}
+        context["accounts_count"] = sections["accounts"]
+        context["contacts_count"] = sections["contacts"]
+        context["leads_count"] = lead_totals["active"]
+        context["opportunities_count"] = opp_totals["total"]
 
-        # Weighted pipeline = sum of (amount * probability / 100)
-        weighted_pipeline = open_opps_with_currency.aggregate(
-            total=Coalesce(
-                Sum(F("amount") * F("probability") / 100),
-                0,
-                output_field=DecimalField(),
-            )
-        )["total"]
+        context["urgent_counts"] = {
+            "overdue_tasks": task_totals["overdue"],
+            "tasks_due_today": task_totals["due_today"],
+            "followups_today": lead_totals["followups_today"],
+            "hot_leads": lead_totals["hot"],
+        }
 
-        # Won this month (use timezone-aware datetime for updated_at comparison)
-        now = timezone.now()
-        first_day_of_month = now.replace(
-            day=1, hour=0, minute=0, second=0, microsecond=0
-        )
-        won_opps = opportunities.filter(
-            stage="CLOSED_WON", updated_at__gte=first_day_of_month
-        )
-        won_opps_with_currency = won_opps.filter(
-            Q(currency=org_currency) | Q(currency__isnull=True) | Q(currency="")
-        )
-        won_this_month = won_opps_with_currency.aggregate(
-            total=Coalesce(Sum("amount"), 0, output_field=DecimalField())
-        )["total"]
+        # Values only add up deals in the org's default currency (null counts
+        # as that currency); counts include every deal.
+        context["pipeline_by_stage"] = opp_totals["pipeline_by_stage"]
 
         # Conversion rate over the caller's own leads. It used to query
         # `Lead.objects.filter(org=org)` directly, which skipped the narrowing
         # above and printed an org-wide percentage beside a member's own lead
         # count, on the same row of the same card.
-        total_leads_all = all_leads.count()
-        converted_leads = all_leads.filter(status="converted").count()
+        total_leads_all = lead_totals["total"]
         conversion_rate = (
-            (converted_leads / total_leads_all * 100) if total_leads_all > 0 else 0
+            (lead_totals["converted"] / total_leads_all * 100)
+            if total_leads_all > 0
+            else 0
         )
 
-        # Count opportunities in other currencies (for info)
-        other_currency_count = opportunities.exclude(
-            Q(currency=org_currency) | Q(currency__isnull=True) | Q(currency="")
-        ).count()
-
         context["revenue_metrics"] = {
-            "pipeline_value": float(pipeline_value or 0),
-            # How many deals that pipeline value is made of. Counted from
-            # `open_opps` rather than the currency-filtered set, because a deal
+            "pipeline_value": float(opp_totals["pipeline_value"] or 0),
+            # How many deals that pipeline value is made of. Counted over every
+            # open deal rather than the currency-filtered set, because a deal
             # in another currency is still an open deal. `opportunities_count`
             # above counts every stage, closed ones included, so it is not the
             # number to put under an "Open Deals" label.
-            "open_opportunities_count": open_opps.count(),
-            "weighted_pipeline": float(weighted_pipeline or 0),
-            "won_this_month": float(won_this_month or 0),
+            "open_opportunities_count": opp_totals["open_count"],
+            "weighted_pipeline": float(opp_totals["weighted_pipeline"] or 0),
+            "won_this_month": float(opp_totals["won_this_month"] or 0),
             "conversion_rate": round(conversion_rate, 1),
             "currency": org_currency,
-            "other_currency_count": other_currency_count,
+            "other_currency_count": opp_totals["other_currency_count"],
         }
 
-        # NEW: Hot leads list for dedicated panel
-        hot_leads_qs = leads.filter(
-            rating="HOT", status__in=["assigned", "in process"]
-        ).order_by("-created_at")[:10]
-
-        context["hot_leads"] = [
-            {
-                "id": str(lead.id),
-                "first_name": lead.first_name,
-                "last_name": lead.last_name,
-                "company": lead.company_name,
-                "rating": lead.rating,
-                "next_follow_up": (
-                    lead.next_follow_up.isoformat() if lead.next_follow_up else None
-                ),
-                "last_contacted": (
-                    lead.last_contacted.isoformat() if lead.last_contacted else None
-                ),
-            }
-            for lead in hot_leads_qs
-        ]
-
-        # Include tasks in dashboard response (avoid separate API call)
-        upcoming_tasks = tasks.filter(
-            status__in=["New", "In Progress"], due_date__isnull=False
-        ).order_by("due_date")[:10]
-        context["tasks"] = TaskSerializer(upcoming_tasks, many=True).data
-
-        # Goal summary for current user
-        from opportunity.models import SalesGoal
-
-        goal_filter = Q(assigned_to=profile) | Q(team__in=profile.user_teams.all())
-        if is_admin:
-            goal_filter |= Q(assigned_to__isnull=True, team__isnull=True)
-
-        active_goals = (
-            SalesGoal.objects.filter(
-                org=org,
-                is_active=True,
-                period_start__lte=today,
-                period_end__gte=today,
-            )
-            .filter(goal_filter)
-            .distinct()[:3]
-        )
-        context["goal_summary"] = [
-            {
-                "id": str(g.id),
-                "name": g.name,
-                "goal_type": g.goal_type,
-                "target_value": float(g.target_value),
-                "progress_value": float(g.compute_progress()),
-                "progress_percent": g.progress_percent,
-                "status": g.status,
-            }
-            for g in active_goals
-        ]
+        context["hot_leads"] = sections["leads"]["hot"]
+        context["tasks"] = sections["tasks"]["upcoming"]
+        context["goal_summary"] = sections["goals"]
 
         # Include recent activities (avoid separate API call)
         activities = (
@@ -322,7 +309,11 @@ class ApiHomeView(APIView):
             activities, many=True
         ).data
 
-        return Response(context, status=status.HTTP_200_OK)
+        # Not cached: every tracked write adds an activity, so this would be
+        # stale as often as it was fresh, and it is one indexed LIMIT 10.
+        response = Response(context, status=status.HTTP_200_OK)
+        response[CACHE_HEADER] = cache_outcome
+        return response
 
 
 class ApiTodayView(APIView):
@@ -373,6 +364,40 @@ class ApiTodayView(APIView):
         },
     )
     def get(self, request, format=None):
+        profile = request.profile
+        is_admin = is_org_admin(profile) or request.user.is_superuser
+        # One section: the queue is ranked across all four sources, so a write
+        # to any of them can reorder it. StageAgingConfig edits are rare enough
+        # to ride on DASHBOARD_CACHE_TIMEOUT.
+        sections, cache_outcome = dashboard_cache.load_sections(
+            profile.org,
+            "org" if is_admin else str(profile.id),
+            {
+                "today": Section(
+                    ("case", "invoice", "opportunity", "task"),
+                    lambda: self._build(request, is_admin),
+                )
+            },
+            fresh=_wants_fresh(request),
+        )
+        snapshot = sections["today"]
+        body = {
+            "queue": _rank_today_queue(snapshot["candidates"], timezone.now()),
+            "summary": snapshot["summary"],
+            "later": snapshot["later"],
+        }
+        response = Response(body, status=status.HTTP_200_OK)
+        response[CACHE_HEADER] = cache_outcome
+        return response
+
+    def _build(self, request, is_admin):
+        """The time-independent part of the Today page, for the snapshot.
+
+        The queue comes back as ``candidates``: every row the sources
+        contributed, unranked. A case's SLA deadline and a deal's rotten line
+        are stored instead of the verdicts, which ``_rank_today_queue`` reaches
+        per request; see there.
+        """
         org = request.profile.org
         profile = request.profile
         now = timezone.now()
@@ -381,7 +406,6 @@ class ApiTodayView(APIView):
         today = timezone.localdate()
         yesterday = today - timedelta(days=1)
         week_end = today + timedelta(days=7)
-        is_admin = is_org_admin(profile) or request.user.is_superuser
         org_currency = org.default_currency or "USD"
 
         def mine(qs):
@@ -416,7 +440,7 @@ class ApiTodayView(APIView):
             for c in StageAgingConfig.objects.filter(org=org, stage__in=OPEN_STAGES)
         }
         quiet_q = None
-        rotten_cutoffs = {}
+        rotten_days = {}
         for stage in OPEN_STAGES:
             cfg = aging_configs.get(stage)
             expected = (
@@ -427,7 +451,7 @@ class ApiTodayView(APIView):
             warning = cfg.warning_days if cfg else None
             yellow_days = min(warning, expected) if warning else expected
             yellow_cutoff = now - timedelta(days=yellow_days)
-            rotten_cutoffs[stage] = now - timedelta(days=expected * ROTTEN_MULTIPLIER)
+            rotten_days[stage] = expected * ROTTEN_MULTIPLIER
             clause = Q(stage=stage, stage_changed_at__lte=yellow_cutoff)
             quiet_q = clause if quiet_q is None else (quiet_q | clause)
 
@@ -437,30 +461,25 @@ class ApiTodayView(APIView):
             else opportunities.none()
         )
         quiet_deals = quiet_opps.count()
-        quiet_value = quiet_opps.filter(
-            Q(currency=org_currency) | Q(currency__isnull=True) | Q(currency="")
-        ).aggregate(total=Coalesce(Sum("amount"), 0, output_field=DecimalField()))[
-            "total"
-        ]
+        quiet_value = quiet_opps.filter(in_currency(org_currency)).aggregate(
+            total=Coalesce(Sum("amount"), 0, output_field=DecimalField())
+        )["total"]
 
         # ── build the queue (each source pre-ordered by urgency, capped) ────
         queue = []
         awaiting_cases = cases.filter(first_response_at__isnull=True)
 
-        # 1. Cases awaiting a first response. SLA-breached outrank in-SLA ones;
-        #    High/Urgent priority render with the alarm tone.
+        # 1. Cases awaiting a first response, with their SLA deadline; ranked
+        #    and toned per request.
         for c in awaiting_cases.select_related("account").order_by("created_at")[
             :TODAY_SOURCE_LIMIT
         ]:
-            deadline = c.created_at + timedelta(hours=c.sla_first_response_hours or 4)
-            breached = deadline < now
-            hot = c.priority in ("High", "Urgent")
             queue.append(
                 {
-                    "_rank": 0 if breached else 3,
+                    "_deadline": c.created_at
+                    + timedelta(hours=c.sla_first_response_hours or 4),
+                    "_hot": c.priority in ("High", "Urgent"),
                     "id": f"case-{c.id}",
-                    "tone": "rust" if (hot or breached) else "clay",
-                    "due": "Overdue" if breached else "Today",
                     "title": c.name,
                     "detail": f"{c.priority} · {c.account.name if c.account_id else 'No account'} · awaiting first reply",
                     "action": "Reply",
@@ -485,23 +504,22 @@ class ApiTodayView(APIView):
                 }
             )
 
-        # 3. Quiet deals (aging). Rotten (red) outrank merely slowing (yellow).
+        # 3. Quiet deals (aging), with the moment each goes rotten; ranked and
+        #    toned per request.
         stage_labels = dict(STAGES)
         for opp in quiet_opps.order_by("stage_changed_at")[:TODAY_SOURCE_LIMIT]:
-            rotten = (
-                opp.stage in rotten_cutoffs
-                and opp.stage_changed_at is not None
-                and opp.stage_changed_at <= rotten_cutoffs[opp.stage]
-            )
-            days = (now - opp.stage_changed_at).days if opp.stage_changed_at else 0
+            since = opp.stage_changed_at
             queue.append(
                 {
-                    "_rank": 2 if rotten else 6,
+                    "_since": since,
+                    "_rotten_at": (
+                        since + timedelta(days=rotten_days[opp.stage])
+                        if since is not None and opp.stage in rotten_days
+                        else None
+                    ),
                     "id": f"deal-{opp.id}",
-                    "tone": "rust" if rotten else "clay",
-                    "due": "Stalled" if rotten else "Aging",
                     "title": opp.name,
-                    "detail": f"No movement for {days} days · {_fmt_money(opp.amount, opp.currency)} · {stage_labels.get(opp.stage, opp.stage)}",
+                    "detail": f"{_fmt_money(opp.amount, opp.currency)} · {stage_labels.get(opp.stage, opp.stage)}",
                     "action": "Open the deal",
                     "href": f"/pipeline/{opp.id}",
                 }
@@ -527,12 +545,6 @@ class ApiTodayView(APIView):
                 }
             )
 
-        queue.sort(key=lambda item: item["_rank"])
-        queue = [
-            {k: v for k, v in item.items() if k != "_rank"}
-            for item in queue[:TODAY_QUEUE_LIMIT]
-        ]
-
         # ── the count, and where the rows that did not fit have gone ────────
         # `len(queue)` was a third number that matched nothing on screen: it is
         # taken after the per-source cap and before the queue cap, so the header
@@ -572,7 +584,7 @@ class ApiTodayView(APIView):
 
         summary = {
             "count": total_urgent,
-            "shown": len(queue),
+            "shown": min(len(queue), TODAY_QUEUE_LIMIT),
             "sources": sources,
             "quiet_deals": quiet_deals,
             "quiet_value": float(quiet_value or 0),
@@ -638,10 +650,44 @@ class ApiTodayView(APIView):
         later_rows.sort(key=lambda r: r[0])
         later = [row for _, row in later_rows[:6]]
 
-        return Response(
-            {"queue": queue, "summary": summary, "later": later},
-            status=status.HTTP_200_OK,
-        )
+        return {"candidates": queue, "summary": summary, "later": later}
+
+
+def _rank_today_queue(candidates, now):
+    """The Today queue as of ``now``: the cached candidates ranked and capped.
+
+    Two verdicts change with the clock and no write to bump a snapshot
+    version: a case awaiting its first reply breaches its SLA at its deadline,
+    and a quiet deal goes rotten at 1.5x its stage's expected days. Reached in
+    ``_build``, both stayed as they were for up to ``DASHBOARD_CACHE_TIMEOUT``
+    (a breached case still read "Today"), so they are reached here, on every
+    load, from the moments ``_build`` stored. Which deals are quiet at all is
+    still decided by the query, at the snapshot's age.
+
+    SLA-breached cases outrank in-SLA ones, and High/Urgent priority render
+    with the alarm tone; rotten (red) deals outrank merely slowing (yellow)
+    ones. The sort is stable, so ties keep their source's urgency order.
+    """
+    ranked = []
+    for item in candidates:
+        row = {k: v for k, v in item.items() if not k.startswith("_")}
+        if "_deadline" in item:
+            breached = item["_deadline"] < now
+            rank = 0 if breached else 3
+            row["tone"] = "rust" if (item["_hot"] or breached) else "clay"
+            row["due"] = "Overdue" if breached else "Today"
+        elif "_since" in item:
+            rotten = item["_rotten_at"] is not None and item["_rotten_at"] <= now
+            rank = 2 if rotten else 6
+            days = (now - item["_since"]).days if item["_since"] else 0
+            row["tone"] = "rust" if rotten else "clay"
+            row["due"] = "Stalled" if rotten else "Aging"
+            row["detail"] = f"No movement for {days} days · {row['detail']}"
+        else:
+            rank = item["_rank"]
+        ranked.append((rank, row))
+    ranked.sort(key=lambda entry: entry[0])
+    return [row for _, row in ranked[:TODAY_QUEUE_LIMIT]]
 
 
 class ActivityListView(APIView):
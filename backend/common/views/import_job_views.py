@@ -0,0 +1,35 @@
+"""Progress of background CSV imports (``common/imports.py``).
+
+URL surface (mounted at /api/import-jobs/):
+    GET /<id>/: the job's status, row counters and first row errors
+
+Jobs are started by each importer's own endpoint
+(``POST /api/contacts/import/jobs/``, ``POST /api/cases/import/jobs/``,
+``POST /api/leads/upload/``), which answers with the job; the client polls
+this until ``status`` is ``succeeded`` or ``failed``. A job is visible to
+whoever started it and to the org's admins.
+"""
+
+from django.http import Http404
+from drf_spectacular.utils import extend_schema
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from common.lookups import get_scoped_or_404
+from common.models import ImportJob
+from common.permissions import HasOrgContext, is_org_admin
+from common.serializer import ImportJobSerializer
+
+
+class ImportJobDetailView(APIView):
+    permission_classes = (IsAuthenticated, HasOrgContext)
+
+    @extend_schema(tags=["Imports"], responses={200: ImportJobSerializer})
+    def get(self, request, pk, *args, **kwargs):
+        job = get_scoped_or_404(ImportJob, pk, request.profile.org)
+        if job.requested_by_id != request.profile.id and not is_org_admin(
+            request.profile
+        ):
+            raise Http404("No such Import Job.")
+        return Response(ImportJobSerializer(job).data)
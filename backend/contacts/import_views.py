@@ -1,9 +1,13 @@
 """CSV import endpoints for contacts.
 
 Preview reads the uploaded file and returns row-level validation results
-without touching the DB. Commit re-runs validation and writes inside a single
-transaction. Both endpoints are gated to ADMIN or sales-access users so
+without touching the DB. Commit re-runs validation and writes in bulk, a chunk
+per transaction. Both endpoints are gated to ADMIN or sales-access users so
 non-privileged members cannot mass-create contacts through this surface.
+
+Jobs (`import/jobs/`) take the same file and run it in the background as an
+`ImportJob` (common/imports.py), for files past the 5,000-row preview/commit
+limit.
 """
 
 from drf_spectacular.utils import extend_schema, inline_serializer
@@ -13,7 +17,9 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from common.imports import ImportFileError, start_job
 from common.permissions import HasOrgContext
+from common.serializer import ImportJobSerializer
 from contacts.services.csv_import import commit_rows, parse_and_validate
 
 MAX_UPLOAD_BYTES = 5 * 1024 * 1024  # 5 MB; matches the UI hint
@@ -30,15 +36,8 @@ def _can_import(profile) -> bool:
     return bool(getattr(profile, "has_sales_access", False))
 
 
-def _read_upload(request):
-    """Return (file_bytes, error_response). One of the two will be None.
-
-    The size cap is enforced against the actual bytes read, not against
-    `upload.size`. `upload.size` is derived from a client-supplied
-    Content-Length header for in-memory uploads and can be zero or absent
-    even when the body is large, so trusting it for the limit check creates
-    a bypass.
-    """
+def _get_upload(request):
+    """Return (upload, error_response) for the request's `file`, unread."""
     upload = request.FILES.get("file")
     if not upload:
         return None, Response(
@@ -51,6 +50,21 @@ def _read_upload(request):
             {"error": True, "message": "File must have a .csv extension"},
             status=status.HTTP_400_BAD_REQUEST,
         )
+    return upload, None
+
+
+def _read_upload(request):
+    """Return (file_bytes, error_response). One of the two will be None.
+
+    The size cap is enforced against the actual bytes read, not against
+    `upload.size`. `upload.size` is derived from a client-supplied
+    Content-Length header for in-memory uploads and can be zero or absent
+    even when the body is large, so trusting it for the limit check creates
+    a bypass.
+    """
+    upload, err = _get_upload(request)
+    if err is not None:
+        return None, err
     file_bytes = upload.read()
     if len(file_bytes) > MAX_UPLOAD_BYTES:
         return None, Response(
@@ -130,3 +144,40 @@ class ContactImportCommitView(APIView):
             status.HTTP_400_BAD_REQUEST if result.get("error") else status.HTTP_200_OK
         )
         return Response(result, status=http_status)
+
+
+class ContactImportJobView(APIView):
+    """Start a background import of a CSV of any size up to
+    `common.imports.MAX_UPLOAD_BYTES`; answers `202` with the job to poll at
+    `GET /api/import-jobs/<id>/`. Same file format, validation and
+    all-or-nothing rule as commit, without the 5,000-row limit.
+    """
+
+    permission_classes = (IsAuthenticated, HasOrgContext)
+    parser_classes = (MultiPartParser,)
+
+    @extend_schema(
+        tags=["contacts"],
+        request=inline_serializer(
+            name="ContactImportJobRequest",
+            fields={"file": serializers.FileField()},
+        ),
+        responses={202: ImportJobSerializer},
+    )
+    def post(self, request, *args, **kwargs):
+        if not _can_import(request.profile):
+            return Response(
+                {"error": True, "message": "Permission denied"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        upload, err = _get_upload(request)
+        if err is not None:
+            return err
+        try:
+            job = start_job("contacts", upload, request.profile)
+        except ImportFileError as exc:
+            return Response(
+                {"error": True, "message": str(exc)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(ImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
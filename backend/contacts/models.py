@@ -4,6 +4,7 @@ from django.db.models.functions import Lower
 from django.utils.translation import gettext_lazy as _
 
 from common.base import SAMPLE_DATA_HELP_TEXT, AssignableMixin, BaseModel
+from common.duplicate_detection import NormalizedField
 from common.models import Org, Profile, Tags, Teams
 from common.utils import COUNTRIES
 from common.validators import flexible_phone_validator
@@ -26,6 +27,8 @@ class Contact(AssignableMixin, BaseModel):
         blank=True,
         validators=[flexible_phone_validator],
     )
+    # `phone` as DuplicateDetector compares it, kept current on save.
+    phone_normalized = NormalizedField(max_length=25, source="phone", kind="phone")
 
     # Professional Information
     organization = models.CharField(_("Company"), max_length=255, blank=True, null=True)
@@ -90,6 +93,7 @@ class Contact(AssignableMixin, BaseModel):
         ordering = ("-created_at",)
         indexes = [
             models.Index(fields=["org", "-created_at"]),
+            models.Index(fields=["org", "phone_normalized"]),
         ]
         constraints = [
             # Case-insensitive unique email per organization (when email is not null)
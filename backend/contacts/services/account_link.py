@@ -17,10 +17,11 @@ def link_primary_account(contact):
     membership can be granted from the account side and losing "primary" is not
     a statement that the person left the company.
 
-    This lives here rather than in `contacts.views` (where it started) so the
-    CSV importer can call it without a service module importing a views module.
-    The importer set the FK and skipped this, so every imported contact was
-    invisible on the account it was imported against.
+    This lives here rather than in `contacts.views` (where it started) so
+    service modules can call it without importing a views module. The CSV
+    importer set the FK and skipped this, so every imported contact was
+    invisible on the account it was imported against; it now writes the same
+    membership rows in bulk (`csv_import._commit_chunk`).
     """
     if contact.account_id:
         contact.account.contacts.add(contact)
@@ -1,9 +1,9 @@
 """CSV import for contacts.
 
 Two-phase: `parse_and_validate` reads + validates a CSV without writing to the
-DB beyond read-only lookups; `commit_rows` writes inside a transaction. Both
-phases re-run validation so the commit endpoint is safe even if called
-directly.
+DB beyond read-only lookups; `commit_rows` writes the rows in bulk, a chunk per
+transaction. Both phases re-run validation so the commit endpoint is safe even
+if called directly.
 
 Duplicate policy (per org):
   * email: hard error (DB enforces a per-org case-insensitive unique
@@ -20,6 +20,9 @@ Duplicate policy (per org):
 All reference lookups (account, assignees, teams) are bulk-prefetched once per
 call (one SELECT per reference type), scoped to the caller's org so a
 malicious CSV cannot reach across tenants.
+
+`IMPORTER` runs the same parsing, validation and writes as a background
+`ImportJob` (common/imports.py), streaming the stored file a chunk at a time.
 """
 
 from __future__ import annotations
@@ -28,20 +31,23 @@ import csv
 import io
 import re
 from dataclasses import dataclass, field
-from typing import Any, Iterable
+from typing import Any, Iterable, Iterator
 
 from django.core.exceptions import ValidationError as DjangoValidationError
 from django.core.validators import URLValidator
 from django.db import IntegrityError, transaction
+from django.db.models import prefetch_related_objects
 from django.db.models.functions import Lower
 from django.utils.text import slugify
 
 from accounts.models import Account
-from common.models import Profile, Tags, Teams
+from common import dashboard_cache, search_index
+from common.duplicate_detection import DuplicateDetector
+from common.imports import DECODE_ERROR, Importer, ImportFileError, read_csv
+from common.models import Activity, Profile, Tags, Teams
 from common.utils import COUNTRIES
 from common.validators import normalize_phone
 from contacts.models import Contact
-from contacts.services.account_link import link_primary_account
 
 REQUIRED_HEADERS = ("first_name", "last_name")
 OPTIONAL_HEADERS = (
@@ -66,6 +72,8 @@ OPTIONAL_HEADERS = (
 KNOWN_HEADERS = REQUIRED_HEADERS + OPTIONAL_HEADERS
 
 MAX_ROWS = 5000
+# Rows written per transaction by `commit_rows`.
+COMMIT_CHUNK_SIZE = 1000
 NAME_MAX_LEN = 255
 EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
 PHONE_RE = re.compile(r"^[\d\s\-\(\)\+\.]{7,25}$")
@@ -217,31 +225,16 @@ def parse_and_validate(file_bytes: bytes, org) -> ImportResult:
     """
     text = _decode(file_bytes)
     if text is None:
-        return ImportResult(
-            valid=[],
-            errors=[],
-            header_error="File could not be decoded as UTF-8. Save your CSV as UTF-8 and try again.",
-        )
+        return ImportResult(valid=[], errors=[], header_error=DECODE_ERROR)
     reader = csv.reader(io.StringIO(text))
     rows = list(reader)
     if not rows:
         return ImportResult(valid=[], errors=[], header_error="CSV is empty")
 
     headers = _normalize_headers(rows[0])
-    missing = [h for h in REQUIRED_HEADERS if h not in headers]
-    if missing:
-        return ImportResult(
-            valid=[],
-            errors=[],
-            header_error=f"Missing required header(s): {', '.join(missing)}",
-        )
-    unknown = [h for h in headers if h and h not in KNOWN_HEADERS]
-    if unknown:
-        return ImportResult(
-            valid=[],
-            errors=[],
-            header_error=f"Unknown header(s): {', '.join(unknown)}",
-        )
+    header_error = _check_headers(headers)
+    if header_error:
+        return ImportResult(valid=[], errors=[], header_error=header_error)
 
     data_rows = rows[1:]
     if len(data_rows) > MAX_ROWS:
@@ -252,46 +245,96 @@ def parse_and_validate(file_bytes: bytes, org) -> ImportResult:
         )
 
     # First pass: parse each row into a dict and skip blank rows.
-    parsed: list[tuple[int, dict[str, str]]] = []
-    for idx, raw_row in enumerate(data_rows, start=1):
-        if not any((cell or "").strip() for cell in raw_row):
-            continue
-        record = {
-            h: (raw_row[i].strip() if i < len(raw_row) else "")
-            for i, h in enumerate(headers)
-        }
-        parsed.append((idx, record))
+    parsed = [
+        (idx, record)
+        for idx, raw_row in enumerate(data_rows, start=1)
+        if (record := _record(headers, raw_row)) is not None
+    ]
+    errors, valid = _validate_records(parsed, org, _Seen())
+    return ImportResult(valid=valid, errors=errors)
+
 
+def _check_headers(headers: list[str]) -> str | None:
+    missing = [h for h in REQUIRED_HEADERS if h not in headers]
+    if missing:
+        return f"Missing required header(s): {', '.join(missing)}"
+    unknown = [h for h in headers if h and h not in KNOWN_HEADERS]
+    if unknown:
+        return f"Unknown header(s): {', '.join(unknown)}"
+    return None
+
+
+def _record(headers: list[str], raw_row: list[str]) -> dict[str, str] | None:
+    """The row as a dict keyed by header, or None for a blank row."""
+    if not any((cell or "").strip() for cell in raw_row):
+        return None
+    return {
+        h: (raw_row[i].strip() if i < len(raw_row) else "")
+        for i, h in enumerate(headers)
+    }
+
+
+def _stream_records(fileobj) -> Iterator[tuple[int, dict[str, str]]]:
+    """`parse_and_validate`'s parsing, one row at a time, for `ImportJob`s."""
+    rows = read_csv(fileobj)
+    headers = _normalize_headers(next(rows, None) or [])
+    if not headers:
+        raise ImportFileError("CSV is empty")
+    header_error = _check_headers(headers)
+    if header_error:
+        raise ImportFileError(header_error)
+    for idx, raw_row in enumerate(rows, start=1):
+        record = _record(headers, raw_row)
+        if record is not None:
+            yield idx, record
+
+
+@dataclass
+class _Seen:
+    """What earlier rows of the file used, for the within-file duplicate checks.
+
+    Keys map to the row number that used them first.
+    """
+
+    emails: dict[str, int] = field(default_factory=dict)  # email.lower()
+    phones: dict[str, int] = field(default_factory=dict)  # normalized phone
+    # Only rows that had NO email and NO phone, the same disambiguation rule
+    # used vs the DB. A row with an email/phone is exempt because the
+    # email/phone uniqueness checks already prevent silent duplicates.
+    full_names: dict[str, int] = field(default_factory=dict)  # "first|last"
+
+
+def _validate_records(
+    parsed: list[tuple[int, dict[str, str]]], org, seen: _Seen
+) -> tuple[list[RowError], list[ValidatedRow]]:
+    """Validate a run of parsed rows: the whole file, or an import job's chunk.
+
+    References and duplicates are looked up once for the run. `seen` carries
+    the within-file duplicate checks from one run to the next.
+    """
     ref_maps = _build_ref_maps(parsed, org)
 
     valid: list[ValidatedRow] = []
     errors: list[RowError] = []
-    seen_emails: dict[str, int] = {}  # email.lower() -> row number
-    seen_phones: dict[str, int] = {}  # normalized phone -> row number
-    # Tracks rows that had NO email and NO phone, the same disambiguation
-    # rule used vs the DB. A row with an email/phone is exempt because the
-    # email/phone uniqueness checks already prevent silent duplicates.
-    seen_full_names: dict[str, int] = {}  # "first|last".lower() -> row number
-
     for idx, record in parsed:
         row_errors, validated = _validate_and_build(
-            idx, record, ref_maps, seen_emails, seen_phones, seen_full_names
+            idx, record, ref_maps, seen.emails, seen.phones, seen.full_names
         )
         if row_errors:
             errors.extend(row_errors)
             continue
         valid.append(validated)
         if validated.email:
-            seen_emails[validated.email.lower()] = idx
+            seen.emails[validated.email.lower()] = idx
         if validated.phone:
             normalized = normalize_phone(validated.phone)
             if normalized:
-                seen_phones[normalized] = idx
+                seen.phones[normalized] = idx
         if not validated.email and not validated.phone:
             key = f"{validated.first_name.lower()}|{validated.last_name.lower()}"
-            seen_full_names[key] = idx
+            seen.full_names[key] = idx
 
-    return ImportResult(valid=valid, errors=errors)
+    return errors, valid
 
 
 def _build_ref_maps(parsed: list[tuple[int, dict[str, str]]], org) -> _RefMaps:
@@ -306,9 +349,7 @@ def _build_ref_maps(parsed: list[tuple[int, dict[str, str]]], org) -> _RefMaps:
     account_names: set[str] = set()
     assigned_emails: set[str] = set()
     team_names: set[str] = set()
-    candidate_emails: set[str] = set()
-    candidate_phones: set[str] = set()
-    candidate_full_names: set[str] = set()
+    candidates: list[dict[str, str]] = []
 
     for _idx, record in parsed:
         account_name = record.get("account_name", "")
@@ -319,17 +360,13 @@ def _build_ref_maps(parsed: list[tuple[int, dict[str, str]]], org) -> _RefMaps:
         for team in _split_multi(record.get("team_names", "")):
             team_names.add(team.lower())
         email = record.get("email", "")
-        if email:
-            candidate_emails.add(email.lower())
         phone = record.get("phone", "")
-        if phone:
-            normalized = normalize_phone(phone)
-            if normalized:
-                candidate_phones.add(normalized)
-        first = record.get("first_name", "")
-        last = record.get("last_name", "")
-        if first and last and not email and not phone:
-            candidate_full_names.add(f"{first.lower()}|{last.lower()}")
+        candidate = {"email": email, "phone": phone}
+        if not email and not phone:
+            # The name is only a duplicate key for a row with nothing else.
+            candidate["first_name"] = record.get("first_name", "")
+            candidate["last_name"] = record.get("last_name", "")
+        candidates.append(candidate)
 
     accounts: dict[str, str] = {}
     if account_names:
@@ -361,53 +398,21 @@ def _build_ref_maps(parsed: list[tuple[int, dict[str, str]]], org) -> _RefMaps:
         ):
             teams.setdefault(name_lower, str(pk))
 
-    existing_emails: set[str] = set()
-    if candidate_emails:
-        existing_emails = set(
-            Contact.objects.filter(org=org)
-            .annotate(email_lower=Lower("email"))
-            .filter(email_lower__in=candidate_emails)
-            .values_list("email_lower", flat=True)
-        )
-
-    existing_phones: set[str] = set()
-    if candidate_phones:
-        # Phone has no DB constraint and no normalized column; we have to scan
-        # all contacts that have a phone in this org and normalize in Python.
-        # Bounded by org size, not file size, fine for any reasonable tenant.
-        for raw_phone in (
-            Contact.objects.filter(org=org)
-            .exclude(phone__isnull=True)
-            .exclude(phone="")
-            .values_list("phone", flat=True)
-        ):
-            normalized = normalize_phone(raw_phone)
-            if normalized and normalized in candidate_phones:
-                existing_phones.add(normalized)
-
-    existing_full_names: set[str] = set()
-    if candidate_full_names:
-        # Only run this query if any row has a full name but no email and no
-        # phone. That's the only case where full-name dedup applies.
-        for first, last in (
-            Contact.objects.filter(org=org)
-            .annotate(
-                first_lower=Lower("first_name"),
-                last_lower=Lower("last_name"),
-            )
-            .values_list("first_lower", "last_lower")
-        ):
-            key = f"{first}|{last}"
-            if key in candidate_full_names:
-                existing_full_names.add(key)
+    # DuplicateDetector's batch mode, with one query per kind of key, each on
+    # the indexed column: `Lower(email)` with the org (the unique
+    # constraint), `phone_normalized`, and last names for the full-name
+    # check. Inactive contacts count, as they do for the email constraint.
+    stored = DuplicateDetector.find_stored_keys(
+        org, "contact", candidates, include_inactive=True
+    )
 
     return _RefMaps(
         accounts=accounts,
         profiles=profiles,
         teams=teams,
-        existing_emails=existing_emails,
-        existing_phones=existing_phones,
-        existing_full_names=existing_full_names,
+        existing_emails=stored.get("email", set()),
+        existing_phones=stored.get("phone", set()),
+        existing_full_names=stored.get("name", set()),
     )
 
 
@@ -633,14 +638,18 @@ def _validate_and_build(
     )
 
 
-def commit_rows(file_bytes: bytes, org, profile) -> dict[str, Any]:
-    """Re-parse the uploaded CSV and create contacts in a single transaction.
+def commit_rows(file_bytes: bytes, org, profile, on_progress=None) -> dict[str, Any]:
+    """Re-parse the uploaded CSV and create its contacts.
 
     Returning structured counts lets the UI render a per-row outcome strip.
-    Any unexpected error rolls back the whole batch. IntegrityError races
-    (e.g. a contact with the same email created between preview and commit
-    by another request) are caught and reported as a 400-equivalent payload
-    so the user sees an actionable message instead of a generic 500.
+    Nothing is written unless every row validates. The rows are then written
+    in chunks of ``COMMIT_CHUNK_SIZE``, each in its own transaction, so a
+    large file never holds one transaction open for the length of the import;
+    ``on_progress(done, total)`` is called after each chunk. IntegrityError
+    races (e.g. a contact with the same email created between preview and
+    commit by another request) roll back the chunk they hit and are reported
+    as a 400-equivalent payload so the user sees an actionable message instead
+    of a generic 500.
     """
     result = parse_and_validate(file_bytes, org)
     if result.header_error:
@@ -658,66 +667,64 @@ def commit_rows(file_bytes: bytes, org, profile) -> dict[str, Any]:
             "created": 0,
         }
 
+    return _commit_validated(result.valid, org, profile, on_progress=on_progress)
+
+
+def _commit_validated(
+    rows: list[ValidatedRow],
+    org,
+    profile,
+    chunk_size: int = COMMIT_CHUNK_SIZE,
+    on_progress=None,
+) -> dict[str, Any]:
+    """Write validated rows with a fixed number of statements per chunk.
+
+    Per chunk: one INSERT for the contacts and one per many-to-many through
+    table (account membership, assignees, teams, tags), then one search-index
+    upsert. Tags are resolved once for the whole file. ``bulk_create`` sends
+    no signals, so what the per-row saves used to do on the side is done here
+    for the import as a whole: one aggregated IMPORTED activity instead of a
+    CREATE per contact, and one dashboard bump.
+    """
+    created_ids: list[str] = []
+    total = len(rows)
+    tag_ids = _resolve_tags({name for vr in rows for name in vr.tag_names}, org)
+
     try:
-        return _commit_validated(result.valid, org, profile)
+        for start in range(0, total, chunk_size):
+            with transaction.atomic():
+                created_ids.extend(
+                    _commit_chunk(
+                        rows[start : start + chunk_size], org, profile, tag_ids
+                    )
+                )
+            if on_progress is not None:
+                on_progress(len(created_ids), total)
     except IntegrityError as exc:
-        # The atomic block rolled back; surface a friendly message and ask
-        # the user to re-preview so the conflict shows up as a row error.
+        # The failing chunk rolled back; earlier chunks are in. Ask the user to
+        # re-preview so the conflict shows up as a row error, and say how far
+        # the import got so the rest can be imported on its own.
+        message = (
+            "A contact was created concurrently that conflicts with this "
+            "import (likely a duplicate email). Re-run preview and try again."
+        )
+        if created_ids:
+            message += (
+                f" The first {len(created_ids)} rows were imported; remove them "
+                "from the file before retrying."
+            )
+        if created_ids:
+            _record_import(len(created_ids), created_ids[0], org, profile)
         return {
             "error": True,
-            "message": (
-                "A contact was created concurrently that conflicts with this "
-                "import (likely a duplicate email). Re-run preview and try again."
-            ),
+            "message": message,
             "detail": str(exc),
-            "created": 0,
+            "created": len(created_ids),
+            "ids": created_ids,
         }
 
-
-@transaction.atomic
-def _commit_validated(rows: list[ValidatedRow], org, profile) -> dict[str, Any]:
-    created_ids: list[str] = []
-    tag_cache: dict[str, Tags] = {}
-
-    for vr in rows:
-        contact = Contact.objects.create(
-            first_name=vr.first_name,
-            last_name=vr.last_name,
-            email=vr.email,
-            phone=vr.phone,
-            organization=vr.organization,
-            title=vr.title,
-            department=vr.department,
-            do_not_call=vr.do_not_call,
-            linkedin_url=vr.linkedin_url,
-            address_line=vr.address_line,
-            city=vr.city,
-            state=vr.state,
-            postcode=vr.postcode,
-            country=vr.country,
-            description=vr.description,
-            account_id=vr.account_id,
-            org=org,
-            created_by=profile.user,
-        )
-        # A Contact joins an Account two ways: the `account` FK ("primary
-        # account this contact belongs to") and membership of `Account.contacts`.
-        # Only the M2M drives the account page's people list, so setting the FK
-        # alone put the person nowhere visible. The three interactive create
-        # paths all call this; the importer never did, so every imported contact
-        # was invisible on the account it was imported against.
-        link_primary_account(contact)
-        if vr.assigned_ids:
-            contact.assigned_to.set(vr.assigned_ids)
-        if vr.team_ids:
-            contact.teams.set(vr.team_ids)
-        if vr.tag_names:
-            tag_objs = [
-                _get_or_create_tag(name, org, tag_cache) for name in vr.tag_names
-            ]
-            contact.tags.set(tag_objs)
-        created_ids.append(str(contact.id))
-
+    if created_ids:
+        _record_import(len(created_ids), created_ids[0], org, profile)
     return {
         "error": False,
         "created": len(created_ids),
@@ -725,16 +732,134 @@ def _commit_validated(rows: list[ValidatedRow], org, profile) -> dict[str, Any]:
     }
 
 
-def _get_or_create_tag(name: str, org, cache: dict[str, Tags]) -> Tags:
-    # slug+org is the unique key on Tags; using it for get_or_create collapses
-    # the SELECT-then-INSERT race when concurrent imports reference the same tag.
-    slug = slugify(name) or name.lower()
-    if slug in cache:
-        return cache[slug]
-    tag, _ = Tags.objects.get_or_create(
-        slug=slug,
+def _commit_chunk(chunk: list[ValidatedRow], org, profile, tag_ids) -> list[str]:
+    contacts = Contact.objects.bulk_create(
+        [
+            Contact(
+                first_name=vr.first_name,
+                last_name=vr.last_name,
+                email=vr.email,
+                phone=vr.phone,
+                organization=vr.organization,
+                title=vr.title,
+                department=vr.department,
+                do_not_call=vr.do_not_call,
+                linkedin_url=vr.linkedin_url,
+                address_line=vr.address_line,
+                city=vr.city,
+                state=vr.state,
+                postcode=vr.postcode,
+                country=vr.country,
+                description=vr.description,
+                account_id=vr.account_id,
+                org=org,
+                created_by=profile.user,
+            )
+            for vr in chunk
+        ]
+    )
+    pairs = list(zip(chunk, contacts))
+    # A Contact joins an Account two ways: the `account` FK ("primary account
+    # this contact belongs to") and membership of `Account.contacts`. Only the
+    # M2M drives the account page's people list, so setting the FK alone put
+    # the person nowhere visible; `link_primary_account` is what the
+    # interactive create paths call, written here as rows of its through table.
+    _add_links(
+        Account.contacts,
+        ((vr.account_id, c.pk) for vr, c in pairs if vr.account_id),
+    )
+    _add_links(
+        Contact.assigned_to, ((c.pk, pid) for vr, c in pairs for pid in vr.assigned_ids)
+    )
+    _add_links(Contact.teams, ((c.pk, tid) for vr, c in pairs for tid in vr.team_ids))
+    _add_links(
+        Contact.tags,
+        (
+            (c.pk, tag_id)
+            for vr, c in pairs
+            for tag_id in {tag_ids[_tag_slug(name)] for name in vr.tag_names}
+        ),
+    )
+    prefetch_related_objects(contacts, "assigned_to")
+    search_index.index_objects(
+        search_index.SOURCES_BY_LABEL["contacts.Contact"], contacts
+    )
+    return [str(c.pk) for c in contacts]
+
+
+def _add_links(descriptor, pairs) -> None:
+    """Insert many-to-many rows straight into ``descriptor``'s through table.
+
+    ``pairs`` are ``(source_id, target_id)`` in the order of the model that
+    declares the field: ``(contact_id, ...)`` for the contact's own fields,
+    ``(account_id, contact_id)`` for ``Account.contacts``.
+    """
+    field = descriptor.field
+    through = descriptor.through
+    source = f"{field.m2m_field_name()}_id"
+    target = f"{field.m2m_reverse_field_name()}_id"
+    links = [through(**{source: a, target: b}) for a, b in pairs]
+    if links:
+        through.objects.bulk_create(links, ignore_conflicts=True)
+
+
+def _tag_slug(name: str) -> str:
+    # slug+org is the unique key on Tags.
+    return slugify(name) or name.lower()
+
+
+def _resolve_tags(names: set[str], org) -> dict[str, Any]:
+    """Tag id for every tag the file names, keyed by slug, creating the missing.
+
+    One SELECT, one INSERT for the new tags and, when there were any, one
+    SELECT to pick up their ids. ``ignore_conflicts`` lets a concurrent import
+    that created the same tag first win instead of failing this one.
+    """
+    wanted: dict[str, str] = {}
+    for name in sorted(names):
+        wanted.setdefault(_tag_slug(name), name)
+    if not wanted:
+        return {}
+    tags = Tags.objects.filter(org=org, slug__in=list(wanted))
+    found = dict(tags.values_list("slug", "id"))
+    missing = [
+        Tags(name=name, slug=slug, org=org)
+        for slug, name in wanted.items()
+        if slug not in found
+    ]
+    if missing:
+        Tags.objects.bulk_create(missing, ignore_conflicts=True)
+        found = dict(tags.values_list("slug", "id"))
+    return found
+
+
+def _record_import(count: int, first_id: str, org, profile) -> None:
+    """Stand in for the per-row side effects `bulk_create` does not send."""
+    plural = "s" if count != 1 else ""
+    Activity.objects.create(
+        user=profile,
+        action="IMPORTED",
+        entity_type="Contact",
+        entity_id=first_id,
+        entity_name=f"{count} contact{plural}",
+        description=f"Imported {count} contact{plural} from CSV",
+        metadata={"source": "csv", "created": count},
         org=org,
-        defaults={"name": name},
     )
-    cache[slug] = tag
-    return tag
+    dashboard_cache.bump(org.id, "contact")
+
+
+def _commit_job_chunk(rows: list[ValidatedRow], org, profile) -> list[str]:
+    names = {name for vr in rows for name in vr.tag_names}
+    return _commit_chunk(rows, org, profile, _resolve_tags(names, org))
+
+
+# The `ImportJob` path (common/imports.py): same parsing, validation and
+# writes as preview/commit, a chunk at a time.
+IMPORTER = Importer(
+    read=_stream_records,
+    validate=_validate_records,
+    commit=_commit_job_chunk,
+    finish=_record_import,
+    new_state=_Seen,
+)
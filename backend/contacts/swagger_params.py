@@ -7,12 +7,15 @@ The ``org`` header parameter that used to lead every list here is gone; see
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter
 
+from common.swagger_params import list_page_params
+
 organization_params = []
 
 contact_list_get_params = [
     OpenApiParameter("name", OpenApiTypes.STR, OpenApiParameter.QUERY),
     OpenApiParameter("city", OpenApiTypes.STR, OpenApiParameter.QUERY),
     OpenApiParameter("assigned_to", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    *list_page_params,
 ]
 
 contact_create_post_params = [
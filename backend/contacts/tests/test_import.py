@@ -12,10 +12,14 @@ import io
 
 import pytest
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
 
 from accounts.models import Account
-from common.models import Tags, Teams
+from common.models import Activity, SearchDocument, Tags, Teams
 from contacts.models import Contact
+from contacts.services import csv_import
+from contacts.services.csv_import import ValidatedRow
 
 
 def _csv(headers: list[str], rows: list[list[str]]) -> SimpleUploadedFile:
@@ -132,6 +136,22 @@ class TestImportPreview:
         body = response.json()
         assert body["summary"]["invalid"] == 1
 
+    def test_email_duplicate_of_an_inactive_contact(
+        self, admin_client, existing_contact, admin_profile
+    ):
+        # The per-org email constraint counts inactive contacts too.
+        existing_contact.is_active = False
+        existing_contact.save()
+        csv_file = _csv(
+            ["first_name", "last_name", "email"],
+            [["Different", "Person", "pat@acme.test"]],
+        )
+        response = admin_client.post(
+            "/api/contacts/import/preview/", {"file": csv_file}, format="multipart"
+        )
+        fields = {(e["row"], e["field"]) for e in response.json()["errors"]}
+        assert (1, "email") in fields
+
     def test_email_duplicate_within_file(self, admin_client, admin_profile):
         csv_file = _csv(
             ["first_name", "last_name", "email"],
@@ -455,7 +475,7 @@ class TestImportCommit:
         self, admin_client, org_a, admin_user, admin_profile, monkeypatch
     ):
         # Simulate the case where another request inserts a colliding contact
-        # AFTER parse_and_validate has read the DB but BEFORE the create runs.
+        # AFTER parse_and_validate has read the DB but BEFORE the insert runs.
         # The DB then raises IntegrityError on the unique_contact_email_per_org
         # constraint. This must surface as a 400 with a friendly message, not
         # a 500 from Django's exception middleware.
@@ -463,10 +483,10 @@ class TestImportCommit:
 
         from contacts.services import csv_import
 
-        def racing_create(**kwargs):
+        def racing_create(objs, **kwargs):
             raise IntegrityError("duplicate key value violates unique constraint")
 
-        monkeypatch.setattr(csv_import.Contact.objects, "create", racing_create)
+        monkeypatch.setattr(csv_import.Contact.objects, "bulk_create", racing_create)
 
         csv_file = _csv(
             ["first_name", "last_name", "email"],
@@ -480,3 +500,130 @@ class TestImportCommit:
         assert body["error"] is True
         assert body["created"] == 0
         assert "concurrently" in body["message"].lower()
+
+
+def _rows(n, account=None, team=None, assignee=None, tags=("vip",)):
+    return [
+        ValidatedRow(
+            row=i + 2,
+            first_name=f"First{i}",
+            last_name=f"Last{i}",
+            email=f"person{i}@bulk.test",
+            phone=f"+1 202 {i // 10000:03d} {i % 10000:04d}",
+            account_id=str(account.id) if account else None,
+            team_ids=[str(team.id)] if team else [],
+            assigned_ids=[str(assignee.id)] if assignee else [],
+            tag_names=list(tags),
+        )
+        for i in range(n)
+    ]
+
+
+@pytest.mark.django_db
+class TestBulkCommit:
+    """The commit path writes a chunk in a fixed number of statements."""
+
+    def test_query_count_does_not_grow_with_rows(
+        self, org_a, account_a, team_a, admin_profile
+    ):
+        refs = {"account": account_a, "team": team_a, "assignee": admin_profile}
+        rows = _rows(56, **refs)
+        # The first import creates the tag; after that both look it up.
+        csv_import._commit_validated(rows[:1], org_a, admin_profile)
+        counts = []
+        for chunk in (rows[1:6], rows[6:]):
+            with CaptureQueriesContext(connection) as ctx:
+                result = csv_import._commit_validated(chunk, org_a, admin_profile)
+            assert result["created"] == len(chunk)
+            counts.append(len(ctx.captured_queries))
+        assert counts[0] == counts[1]
+
+    def test_links_every_relation(self, org_a, account_a, team_a, admin_profile):
+        result = csv_import._commit_validated(
+            _rows(3, account_a, team_a, admin_profile, tags=("vip", "VIP", "new")),
+            org_a,
+            admin_profile,
+        )
+        contacts = Contact.objects.filter(id__in=result["ids"])
+        assert contacts.count() == 3
+        for contact in contacts:
+            assert contact.phone_normalized
+            assert contact in account_a.contacts.all()
+            assert list(contact.assigned_to.all()) == [admin_profile]
+            assert list(contact.teams.all()) == [team_a]
+            # "vip" and "VIP" share a slug, so are one tag.
+            assert contact.tags.count() == 2
+        assert Tags.objects.filter(org=org_a).count() == 2
+
+    def test_reuses_existing_tags(self, org_a, admin_profile):
+        vip = Tags.objects.create(name="vip", org=org_a)
+        csv_import._commit_validated(_rows(2), org_a, admin_profile)
+        assert Tags.objects.filter(org=org_a).count() == 1
+        assert vip.contact_tags.count() == 2
+
+    def test_records_one_activity(self, org_a, admin_profile):
+        result = csv_import._commit_validated(_rows(25), org_a, admin_profile)
+        activity = Activity.objects.get(org=org_a)
+        assert activity.action == "IMPORTED"
+        assert activity.user == admin_profile
+        assert activity.metadata["created"] == 25
+        assert str(activity.entity_id) == result["ids"][0]
+
+    def test_indexes_contacts_for_search(self, org_a, admin_profile):
+        result = csv_import._commit_validated(
+            _rows(3, assignee=admin_profile), org_a, admin_profile
+        )
+        docs = SearchDocument.objects.filter(entity_id__in=result["ids"])
+        assert docs.count() == 3
+
+    def test_reports_progress_per_chunk(self, org_a, admin_profile):
+        seen = []
+        csv_import._commit_validated(
+            _rows(7),
+            org_a,
+            admin_profile,
+            chunk_size=3,
+            on_progress=lambda done, total: seen.append((done, total)),
+        )
+        assert seen == [(3, 7), (6, 7), (7, 7)]
+
+    def test_conflict_keeps_committed_chunks(self, org_a, admin_profile, monkeypatch):
+        real = Contact.objects.bulk_create
+        calls = []
+
+        def second_chunk_conflicts(objs, **kwargs):
+            calls.append(len(objs))
+            if len(calls) == 2:
+                raise IntegrityError("duplicate key value violates unique constraint")
+            return real(objs, **kwargs)
+
+        monkeypatch.setattr(Contact.objects, "bulk_create", second_chunk_conflicts)
+        result = csv_import._commit_validated(
+            _rows(5), org_a, admin_profile, chunk_size=2
+        )
+        assert result["error"] is True
+        assert result["created"] == 2
+        assert sorted(
+            str(pk) for pk in Contact.objects.values_list("id", flat=True)
+        ) == (sorted(result["ids"]))
+        assert "first 2 rows" in result["message"]
+        assert Activity.objects.get(org=org_a).metadata["created"] == 2
+
+    @pytest.mark.slow
+    def test_benchmark_commit(self, org_a, account_a, team_a, admin_profile):
+        """10k rows through the commit path, against one chunk of them: the
+        queries grow with the chunks, not with the rows in them."""
+        chunk = csv_import.COMMIT_CHUNK_SIZE
+        rows = _rows(
+            11 * chunk + 1, account_a, team_a, admin_profile, tags=("vip", "new")
+        )
+        # The first import creates the tags; after that both look them up.
+        csv_import._commit_validated(rows[:1], org_a, admin_profile)
+        with CaptureQueriesContext(connection) as one:
+            csv_import._commit_validated(rows[1 : chunk + 1], org_a, admin_profile)
+        with CaptureQueriesContext(connection) as ten:
+            result = csv_import._commit_validated(
+                rows[chunk + 1 :], org_a, admin_profile
+            )
+        assert result["created"] == 10 * chunk
+        assert len(ten.captured_queries) <= 10 * len(one.captured_queries)
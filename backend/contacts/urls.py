@@ -17,6 +17,11 @@ urlpatterns = [
         import_views.ContactImportCommitView.as_view(),
         name="contacts_import_commit",
     ),
+    path(
+        "import/jobs/",
+        import_views.ContactImportJobView.as_view(),
+        name="contacts_import_job",
+    ),
     path("<uid:pk>/", views.ContactDetailView.as_view()),
     path("comment/<uid:pk>/", views.ContactCommentView.as_view()),
     path("attachment/<uid:pk>/", views.ContactAttachmentView.as_view()),
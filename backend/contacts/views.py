@@ -10,11 +10,11 @@ from drf_spectacular.utils import (
     inline_serializer,
 )
 from rest_framework import serializers, status
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from common.custom_fields import apply_list_params as apply_custom_field_params
 from common.custom_fields import validate_payload as validate_custom_fields_payload
 from common.models import (
     Attachments,
@@ -24,6 +24,7 @@ from common.models import (
     Tags,
     Teams,
 )
+from common.pagination import ListPagination
 from common.permissions import HasOrgContext, is_org_admin
 from common.serializer import (
     AttachmentsSerializer,
@@ -45,7 +46,7 @@ from contacts.tasks import send_email_to_assigned_user
 from tasks.serializer import TaskSerializer
 
 
-class ContactsListView(APIView, LimitOffsetPagination):
+class ContactsListView(APIView, ListPagination):
     permission_classes = (IsAuthenticated, HasOrgContext)
     model = Contact
 
@@ -55,8 +56,9 @@ class ContactsListView(APIView, LimitOffsetPagination):
             self.model.objects.filter(org=self.request.profile.org)
             # `-id` is a random UUID, so "the list" was in no order at all --
             # a page that says "most recent first" was shuffling people. The
-            # model's own Meta.ordering is `-created_at`; this now agrees.
-            .order_by("-created_at")
+            # model's own Meta.ordering is `-created_at`; this now agrees, with
+            # `-id` breaking ties so cursor pages have a total order to follow.
+            .order_by("-created_at", "-id")
             .select_related("account")
             .prefetch_related("account_contacts", "assigned_to__user", "teams", "tags")
         )
@@ -105,14 +107,10 @@ class ContactsListView(APIView, LimitOffsetPagination):
             created_at_lte = date_param(params, "created_at__lte")
             if created_at_lte:
                 queryset = queryset.filter(created_at__lte=created_at_lte)
-            # Custom-field filters: ?cf_<key>=<value> -> custom_fields contains pair.
-            for raw_key, raw_value in params.items():
-                if raw_key.startswith("cf_") and raw_value:
-                    cf_key = raw_key[3:]
-                    if cf_key:
-                        queryset = queryset.filter(
-                            custom_fields__contains={cf_key: raw_value}
-                        )
+            # Custom-field filters and sorts: ?cf_<key>=, ?ordering=cf_<key>.
+            queryset = apply_custom_field_params(
+                queryset, "Contact", params, self.request.profile.org
+            )
 
         context = {}
         # Both halves counted before the split, so a list showing one of them
@@ -129,21 +127,15 @@ class ContactsListView(APIView, LimitOffsetPagination):
             queryset.distinct(), self.request, view=self
         )
         contacts = ContactSerializer(results_contact, many=True).data
-        if results_contact:
-            offset = queryset.filter(id__gte=results_contact[-1].id).count()
-            if offset == queryset.count():
-                offset = None
-        else:
-            offset = 0
-        context["per_page"] = 10
-        page_number = int(self.offset / 10) + 1
-        context["page_number"] = page_number
+        context["per_page"] = self.limit
+        context["page_number"] = self.page_number()
         # Standard DRF pagination format for frontend compatibility
         context["count"] = self.count
         context["results"] = contacts
         # Legacy format for backwards compatibility
         context["contacts_count"] = self.count
-        context["offset"] = offset
+        context["offset"] = self.next_offset
+        context["next_cursor"] = self.next_cursor
         context["contact_obj_list"] = contacts
         context["countries"] = COUNTRIES
         users = Profile.objects.filter(
@@ -161,12 +153,13 @@ class ContactsListView(APIView, LimitOffsetPagination):
             200: inline_serializer(
                 name="ContactListResponse",
                 fields={
-                    "count": serializers.IntegerField(),
+                    "count": serializers.IntegerField(allow_null=True),
                     "results": ContactSerializer(many=True),
                     "per_page": serializers.IntegerField(),
-                    "page_number": serializers.IntegerField(),
-                    "contacts_count": serializers.IntegerField(),
+                    "page_number": serializers.IntegerField(allow_null=True),
+                    "contacts_count": serializers.IntegerField(allow_null=True),
                     "offset": serializers.IntegerField(allow_null=True),
+                    "next_cursor": serializers.CharField(allow_null=True),
                     "contact_obj_list": ContactSerializer(many=True),
                 },
             )
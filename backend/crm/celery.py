@@ -64,14 +64,35 @@ app.conf.beat_schedule = {
         "task": "common.tasks.purge_read_notifications",
         "schedule": crontab(hour=3, minute=0),
     },
+    # Create next months' activity/notification partitions and apply
+    # history retention - daily at 3:15 AM
+    "maintain-partitions": {
+        "task": "common.tasks.maintain_partitions",
+        "schedule": crontab(hour=3, minute=15),
+    },
     # Stop forgotten time-tracking timers older than 12 hours - every 30 minutes
     "auto-stop-stale-timers": {
         "task": "cases.tasks.auto_stop_stale_timers",
         "schedule": crontab(minute="*/30"),
     },
+    # Rebuild recent and stale days of the case service rollup - daily at 2:15 AM
+    "reconcile-case-daily-metrics": {
+        "task": "cases.tasks.reconcile_case_daily_metrics",
+        "schedule": crontab(hour=2, minute=15),
+    },
     # Drop rotated/expired refresh token records - daily at 3:30 AM
     "flush-expired-refresh-tokens": {
         "task": "common.tasks.flush_expired_refresh_tokens",
         "schedule": crontab(hour=3, minute=30),
     },
+    # Evict cached invoice/estimate PDFs past their age or size limit - daily at 4:30 AM
+    "prune-pdf-cache": {
+        "task": "invoices.tasks.prune_pdf_cache",
+        "schedule": crontab(hour=4, minute=30),
+    },
+    # Rebuild global search documents for writes no signal saw - Sundays at 4 AM
+    "reindex-search-documents": {
+        "task": "common.tasks.reindex_search_documents",
+        "schedule": crontab(hour=4, minute=0, day_of_week=0),
+    },
 }
@@ -93,6 +93,8 @@ MIDDLEWARE = [
     "crum.CurrentRequestUserMiddleware",
     "common.middleware.get_company.GetProfileAndOrg",
     "common.middleware.rls_context.RequireOrgContext",  # RLS: Enforce org context + set PostgreSQL session variable
+    # Inside RequireOrgContext: the flush must run with the org context set.
+    "common.middleware.activity_buffer.ActivityBufferMiddleware",
 ]
 
 ROOT_URLCONF = "crm.urls"
@@ -253,6 +255,69 @@ CELERY_RESULT_BACKEND = os.environ.get(
     "CELERY_RESULT_BACKEND", "redis://localhost:6379/0"
 )
 
+# `default` is left as Django's per-process memory cache, which is what it was
+# before this block existed. `dashboard` holds the home screen snapshots (see
+# common/dashboard_cache.py) and has to be shared, or every web worker would
+# keep its own copy and miss every other worker's invalidations. It defaults to
+# the Redis Celery already needs, on database 1 so a FLUSHDB of either leaves
+# the other alone.
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "dashboard": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ.get("DASHBOARD_CACHE_URL", "redis://localhost:6379/1"),
+        "KEY_PREFIX": "dashboard",
+    },
+}
+
+# Upper bound, in seconds, on how long a dashboard section is served without
+# being recomputed. Writes invalidate sooner; this covers the ones no signal
+# sees, such as QuerySet.update().
+DASHBOARD_CACHE_TIMEOUT = int(os.environ.get("DASHBOARD_CACHE_TIMEOUT", 300))
+
+# Global search reads the search document table (common/search_index.py).
+# False asks each record table instead, for the window between deploying the
+# table and the first `manage.py rebuild_search_index`.
+SEARCH_USE_INDEX = os.environ.get("SEARCH_USE_INDEX", "True").lower() == "true"
+
+# The service overview reads finished days from the daily case rollup
+# (cases/metrics_rollup.py). False computes every day from cases, as before.
+CASE_METRICS_ROLLUP = os.environ.get("CASE_METRICS_ROLLUP", "True").lower() == "true"
+
+# A request's activity rows are written in one INSERT when it ends
+# (common/activity_buffer.py). True hands that INSERT to a Celery worker
+# instead, so the rows appear in the feed once the worker has run it.
+ACTIVITY_WRITE_OFFLOAD = (
+    os.environ.get("ACTIVITY_WRITE_OFFLOAD", "False").lower() == "true"
+)
+
+# History kept in the monthly-partitioned `activity` and `notification` tables
+# (common/partitions.py), in days; 0 keeps it forever. An org can override
+# either on its own row. `manage.py manage_partitions`, run nightly by beat,
+# drops the partitions older than every org keeps and creates the next
+# PARTITION_MONTHS_AHEAD months.
+ACTIVITY_RETENTION_DAYS = int(os.environ.get("ACTIVITY_RETENTION_DAYS", "0"))
+NOTIFICATION_RETENTION_DAYS = int(os.environ.get("NOTIFICATION_RETENTION_DAYS", "0"))
+PARTITION_MONTHS_AHEAD = int(os.environ.get("PARTITION_MONTHS_AHEAD", "3"))
+
+# Rendered invoice and estimate PDFs are kept in media storage under
+# `pdf_cache/` and served again while the document is unchanged
+# (invoices/pdf_cache.py). `manage.py prune_pdf_cache`, run nightly by beat,
+# drops the ones unused for PDF_CACHE_MAX_AGE_DAYS, then the least recently
+# used past PDF_CACHE_MAX_BYTES; 0 turns either limit off.
+PDF_CACHE_ENABLED = os.environ.get("PDF_CACHE_ENABLED", "True").lower() == "true"
+PDF_CACHE_MAX_AGE_DAYS = int(os.environ.get("PDF_CACHE_MAX_AGE_DAYS", "30"))
+PDF_CACHE_MAX_BYTES = int(os.environ.get("PDF_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# True renders PDFs in Celery rather than in the request: a download whose PDF
+# isn't cached yet answers 202 and queues `invoices.tasks.render_document_pdf`
+# on PDF_RENDER_QUEUE, and an invoice or estimate changing status queues its
+# render ahead of the download. Needs a worker consuming that queue, and
+# PDF_CACHE_ENABLED, which carries the worker's render to the download; with
+# the cache off, PDFs render in the request as if this were False.
+PDF_RENDER_ASYNC = os.environ.get("PDF_RENDER_ASYNC", "False").lower() == "true"
+PDF_RENDER_QUEUE = os.environ.get("PDF_RENDER_QUEUE", "celery")
+
 
 LOGGING = {
     "version": 1,
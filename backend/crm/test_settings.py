@@ -18,6 +18,17 @@ DATABASES = {
 CELERY_BROKER_URL = "memory://"
 CELERY_RESULT_BACKEND = "cache+memory://"
 
+# The dashboard snapshot cache is Redis in production; in-process here. Keys
+# are per org and every test makes a new org, so tests cannot see each other's
+# snapshots.
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "dashboard": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "dashboard",
+    },
+}
+
 # The default PBKDF2 hasher costs ~190ms per hash. Fixtures create users on
 # nearly every test, so that dominates the run. MD5 is fine here: it is never
 # used outside crm.test_settings, and no test asserts on the hash algorithm.
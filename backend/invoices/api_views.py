@@ -6,8 +6,22 @@ from decimal import Decimal
 
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.db import transaction
-from django.db.models import Count, Q, Sum
+from django.db.models import (
+    Case,
+    CharField,
+    Count,
+    F,
+    Max,
+    Min,
+    Q,
+    Sum,
+    Value,
+    When,
+    Window,
+)
+from django.db.models.functions import RowNumber
 from django.http import HttpResponse
 from django.utils import timezone
 from drf_spectacular.utils import extend_schema
@@ -17,6 +31,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from common.custom_fields import apply_list_params as apply_custom_field_params
 from common.custom_fields import validate_payload as validate_custom_fields_payload
 from common.models import Attachments, Comment, CustomFieldDefinition
 from common.permissions import HasOrgContext, is_org_admin
@@ -27,6 +42,7 @@ from common.serializer import (
 )
 from common.utils import create_attachment
 from common.validators import uuid_param
+from invoices import pdf_cache
 from invoices.models import (
     UNPAID_STATUSES,
     Estimate,
@@ -69,7 +85,12 @@ from invoices.serializer import (
     RecurringInvoiceListSerializer,
     RecurringInvoiceSerializer,
 )
-from invoices.tasks import create_invoice_history, send_email, send_invoice_to_client
+from invoices.tasks import (
+    create_invoice_history,
+    queue_pdf_render,
+    send_email,
+    send_invoice_to_client,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -152,14 +173,10 @@ class InvoiceListView(APIView, LimitOffsetPagination):
         if params.get("due_date_lte"):
             queryset = queryset.filter(due_date__lte=params.get("due_date_lte"))
 
-        # Filter by custom_fields (cf_<key>=value)
-        for raw_key, raw_value in params.items():
-            if raw_key.startswith("cf_") and raw_value:
-                cf_key = raw_key[3:]
-                if cf_key:
-                    queryset = queryset.filter(
-                        custom_fields__contains={cf_key: raw_value}
-                    )
+        # Custom-field filters and sorts: ?cf_<key>=, ?ordering=cf_<key>.
+        queryset = apply_custom_field_params(
+            queryset, "Invoice", params, self.request.profile.org
+        )
 
         # Sorting
         sort = params.get("sort", "-created_at")
@@ -600,6 +617,29 @@ class InvoiceCancelView(APIView):
         )
 
 
+def pdf_rendering_response(request, kind, document):
+    """202 for a PDF not rendered yet: queue the render, ask the client to come back.
+
+    Only with ``PDF_RENDER_ASYNC``. The poll URL is the download URL itself:
+    once a worker has rendered the PDF, the same request answers with it. A
+    document is queued at most once a minute per web process, so a client
+    polling on ``Retry-After`` doesn't queue a render per poll.
+    """
+    if cache.add(f"pdf-render:{kind}:{document.pk}", True, timeout=60):
+        queue_pdf_render(kind, document)
+    response = Response(
+        {
+            "error": False,
+            "status": "rendering",
+            "message": "The PDF is being generated",
+            "poll_url": request.get_full_path(),
+        },
+        status=status.HTTP_202_ACCEPTED,
+    )
+    response["Retry-After"] = "2"
+    return response
+
+
 class InvoicePDFView(APIView):
     """Generate and download invoice PDF"""
 
@@ -612,7 +652,11 @@ class InvoicePDFView(APIView):
             return error
 
         try:
-            pdf_content = generate_invoice_pdf(invoice)
+            pdf_content = generate_invoice_pdf(
+                invoice, cached_only=pdf_cache.renders_async()
+            )
+            if pdf_content is None:
+                return pdf_rendering_response(request, "invoice", invoice)
             filename = generate_invoice_filename(invoice)
 
             response = HttpResponse(pdf_content, content_type="application/pdf")
@@ -1047,14 +1091,10 @@ class EstimateListView(APIView, LimitOffsetPagination):
                 | Q(client_name__icontains=search)
             )
 
-        # Filter by custom_fields (cf_<key>=value)
-        for raw_key, raw_value in params.items():
-            if raw_key.startswith("cf_") and raw_value:
-                cf_key = raw_key[3:]
-                if cf_key:
-                    queryset = queryset.filter(
-                        custom_fields__contains={cf_key: raw_value}
-                    )
+        # Custom-field filters and sorts: ?cf_<key>=, ?ordering=cf_<key>.
+        queryset = apply_custom_field_params(
+            queryset, "Estimate", params, request.profile.org
+        )
 
         results = self.paginate_queryset(
             queryset.order_by("-created_at"), request, view=self
@@ -1345,7 +1385,11 @@ class EstimatePDFView(APIView):
             return error
 
         try:
-            pdf_content = generate_estimate_pdf(estimate)
+            pdf_content = generate_estimate_pdf(
+                estimate, cached_only=pdf_cache.renders_async()
+            )
+            if pdf_content is None:
+                return pdf_rendering_response(request, "estimate", estimate)
             filename = generate_estimate_filename(estimate)
 
             response = HttpResponse(pdf_content, content_type="application/pdf")
@@ -1398,14 +1442,10 @@ class RecurringInvoiceListView(APIView, LimitOffsetPagination):
             is_active = params.get("is_active").lower() == "true"
             queryset = queryset.filter(is_active=is_active)
 
-        # Filter by custom_fields (cf_<key>=value)
-        for raw_key, raw_value in params.items():
-            if raw_key.startswith("cf_") and raw_value:
-                cf_key = raw_key[3:]
-                if cf_key:
-                    queryset = queryset.filter(
-                        custom_fields__contains={cf_key: raw_value}
-                    )
+        # Custom-field filters and sorts: ?cf_<key>=, ?ordering=cf_<key>.
+        queryset = apply_custom_field_params(
+            queryset, "RecurringInvoice", params, request.profile.org
+        )
 
         results = self.paginate_queryset(queryset, request, view=self)
         return Response(
@@ -2164,8 +2204,35 @@ class RevenueReportView(APIView):
         )
 
 
+# AR aging buckets, in the order the report lists them.
+AGING_BUCKETS = ("current", "1_30_days", "31_60_days", "61_90_days", "over_90_days")
+
+
+def _aging_bucket(today):
+    """The AR aging bucket of an invoice, as a SQL ``CASE`` on its due date.
+
+    Not yet due (or no due date at all) is ``current``; past due, the bucket
+    is by whole days overdue, so 30 days is still ``1_30_days``.
+    """
+    return Case(
+        When(Q(due_date__isnull=True) | Q(due_date__gte=today), then=Value("current")),
+        When(due_date__gte=today - timedelta(days=30), then=Value("1_30_days")),
+        When(due_date__gte=today - timedelta(days=60), then=Value("31_60_days")),
+        When(due_date__gte=today - timedelta(days=90), then=Value("61_90_days")),
+        default=Value("over_90_days"),
+        output_field=CharField(),
+    )
+
+
 class AgingReportView(APIView):
-    """Accounts receivable aging report"""
+    """Accounts receivable aging report.
+
+    Three queries, however many invoices are open: the count and sum of each
+    bucket per currency, the ten newest invoices of each bucket (a
+    ``ROW_NUMBER()`` over the bucket), and the overdue money per account. No
+    invoice is loaded as a model instance. The top-level figures add the
+    currencies together as they always have; ``by_currency`` splits them.
+    """
 
     permission_classes = (IsAuthenticated, HasOrgContext)
 
@@ -2178,122 +2245,126 @@ class AgingReportView(APIView):
         org = request.profile.org
         today = timezone.localdate()
 
-        # Get unpaid invoices. select_related the account so the by-account
-        # roll-up below does not fire a query per invoice.
         unpaid_invoices = Invoice.objects.filter(
             org=org,
             status__in=UNPAID_STATUSES,
             amount_due__gt=0,
-        ).select_related("account")
-
-        # Categorize by age
-        current = []  # Not yet due
-        days_1_30 = []
-        days_31_60 = []
-        days_61_90 = []
-        over_90 = []
-        # Overdue money rolled up by who owes it -- the "who owes it" table needs
-        # a per-account view the capped per-bucket invoice lists cannot give.
-        by_account = {}
-
-        for invoice in unpaid_invoices:
-            if not invoice.due_date:
-                current.append(invoice)
-                continue
-
-            days_overdue = (today - invoice.due_date).days
-
-            if days_overdue <= 0:
-                current.append(invoice)
-                continue
-
-            if days_overdue <= 30:
-                days_1_30.append(invoice)
-            elif days_overdue <= 60:
-                days_31_60.append(invoice)
-            elif days_overdue <= 90:
-                days_61_90.append(invoice)
-            else:
-                over_90.append(invoice)
-
-            # Only genuinely-overdue invoices (past their due date) roll up here.
-            key = str(invoice.account_id) if invoice.account_id else None
-            entry = by_account.get(key)
-            if entry is None:
-                entry = {
-                    "id": key,
-                    "name": (
-                        invoice.account.name
-                        if invoice.account_id
-                        else (invoice.client_name or "No account")
-                    ),
-                    "count": 0,
-                    "oldest_days": 0,
-                    "amount": Decimal("0"),
+        ).annotate(bucket=_aging_bucket(today))
+
+        def empty():
+            return {"count": 0, "amount": Decimal("0")}
+
+        # Count and amount per (bucket, currency).
+        totals = {bucket: empty() for bucket in AGING_BUCKETS}
+        currencies = {}
+        for row in (
+            unpaid_invoices.order_by()
+            .values("bucket", "currency")
+            .annotate(count=Count("id"), amount=Sum("amount_due"))
+        ):
+            per_currency = currencies.setdefault(
+                row["currency"], {bucket: empty() for bucket in AGING_BUCKETS}
+            )
+            for entry in (totals[row["bucket"]], per_currency[row["bucket"]]):
+                entry["count"] += row["count"]
+                entry["amount"] += row["amount"].quantize(Decimal("0.01"))
+
+        # The ten newest invoices of each bucket.
+        listed = {bucket: [] for bucket in AGING_BUCKETS}
+        for row in (
+            unpaid_invoices.annotate(
+                position=Window(
+                    RowNumber(),
+                    partition_by=[F("bucket")],
+                    order_by=[F("created_at").desc(), F("id").desc()],
+                )
+            )
+            .filter(position__lte=10)
+            .order_by("position")
+            .values(
+                "id",
+                "invoice_number",
+                "client_name",
+                "due_date",
+                "amount_due",
+                "bucket",
+            )
+        ):
+            due_date = row["due_date"]
+            listed[row["bucket"]].append(
+                {
+                    "id": str(row["id"]),
+                    "invoice_number": row["invoice_number"],
+                    "client_name": row["client_name"],
+                    "due_date": str(due_date) if due_date else None,
+                    "amount_due": str(row["amount_due"]),
+                    "days_overdue": (today - due_date).days if due_date else 0,
                 }
-                by_account[key] = entry
-            entry["count"] += 1
-            entry["amount"] += invoice.amount_due or Decimal("0")
-            entry["oldest_days"] = max(entry["oldest_days"], days_overdue)
-
-        def summarize(invoices):
-            total = sum((inv.amount_due or Decimal("0")) for inv in invoices)
-            return {
-                "count": len(invoices),
-                "amount": str(total),
-                "invoices": [
-                    {
-                        "id": str(inv.id),
-                        "invoice_number": inv.invoice_number,
-                        "client_name": inv.client_name,
-                        "due_date": str(inv.due_date) if inv.due_date else None,
-                        "amount_due": str(inv.amount_due),
-                        "days_overdue": (
-                            (today - inv.due_date).days if inv.due_date else 0
-                        ),
-                    }
-                    for inv in invoices[:10]  # Limit to 10 per category
-                ],
-            }
-
-        overdue_invoices = days_1_30 + days_31_60 + days_61_90 + over_90
-        overdue_amount = sum(
-            (inv.amount_due or Decimal("0")) for inv in overdue_invoices
-        )
+            )
 
+        # Overdue money rolled up by who owes it -- the "who owes it" table needs
+        # a per-account view the capped per-bucket invoice lists cannot give.
+        # Only genuinely-overdue invoices (past their due date) roll up here.
         by_account_rows = [
             {
-                "id": row["id"],
-                "name": row["name"],
+                "id": str(row["account_id"]) if row["account_id"] else None,
+                "name": (
+                    row["account_name"]
+                    if row["account_id"]
+                    else (row["client_name"] or "No account")
+                ),
                 "count": row["count"],
-                "oldest_days": row["oldest_days"],
-                "amount": str(row["amount"]),
+                "oldest_days": (today - row["oldest_due"]).days,
+                "amount": str(row["amount"].quantize(Decimal("0.01"))),
             }
-            for row in sorted(
-                by_account.values(), key=lambda r: r["amount"], reverse=True
-            )
+            for row in unpaid_invoices.filter(due_date__lt=today)
+            .order_by()
+            .values("account_id")
+            .annotate(
+                account_name=Max("account__name"),
+                client_name=Min("client_name"),
+                count=Count("id"),
+                amount=Sum("amount_due"),
+                oldest_due=Min("due_date"),
+            )
+            .order_by("-amount", "oldest_due")
         ]
 
-        return Response(
-            {
-                "current": summarize(current),
-                "1_30_days": summarize(days_1_30),
-                "31_60_days": summarize(days_31_60),
-                "61_90_days": summarize(days_61_90),
-                "over_90_days": summarize(over_90),
+        def figures(buckets):
+            overdue = [buckets[bucket] for bucket in AGING_BUCKETS[1:]]
+            every = [buckets[bucket] for bucket in AGING_BUCKETS]
+            return {
                 "overdue": {
-                    "count": len(overdue_invoices),
-                    "amount": str(overdue_amount),
+                    "count": sum(entry["count"] for entry in overdue),
+                    "amount": str(sum(entry["amount"] for entry in overdue)),
                 },
-                "by_account": by_account_rows,
                 "total": {
-                    "count": unpaid_invoices.count(),
-                    "amount": str(
-                        sum((inv.amount_due or Decimal("0")) for inv in unpaid_invoices)
-                    ),
+                    "count": sum(entry["count"] for entry in every),
+                    "amount": str(sum(entry["amount"] for entry in every)),
                 },
             }
-        )
+
+        def summarize(entry, invoices=None):
+            summary = {"count": entry["count"], "amount": str(entry["amount"])}
+            if invoices is not None:
+                summary["invoices"] = invoices
+            return summary
+
+        report = {
+            bucket: summarize(totals[bucket], listed[bucket])
+            for bucket in AGING_BUCKETS
+        }
+        report.update(figures(totals))
+        report["by_account"] = by_account_rows
+        report["by_currency"] = [
+            {
+                "currency": currency,
+                **{bucket: summarize(buckets[bucket]) for bucket in AGING_BUCKETS},
+                **figures(buckets),
+            }
+            for currency, buckets in sorted(currencies.items())
+        ]
+        return Response(report)
 
 
 # =============================================================================
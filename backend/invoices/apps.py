@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class InvoicesConfig(AppConfig):
     name = "invoices"
+
+    def ready(self):
+        import invoices.signals  # noqa: F401  # pylint: disable=unused-import
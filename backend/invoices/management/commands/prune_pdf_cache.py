@@ -0,0 +1,57 @@
+"""
+Evict cached invoice and estimate PDFs (invoices/pdf_cache.py).
+
+Removes the files not used for ``PDF_CACHE_MAX_AGE_DAYS``, then the least
+recently used until the cache is under ``PDF_CACHE_MAX_BYTES``. Runs nightly
+through the ``prune-pdf-cache`` beat entry.
+
+Usage:
+    python manage.py prune_pdf_cache
+    python manage.py prune_pdf_cache --max-age-days 7 --max-bytes 104857600
+    python manage.py prune_pdf_cache --all
+
+A removed PDF is rendered again on its next download, so nothing here loses
+data.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from invoices import pdf_cache
+
+
+class Command(BaseCommand):
+    help = "Evict cached invoice and estimate PDFs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-age-days",
+            type=int,
+            help="Remove PDFs unused for this many days (default PDF_CACHE_MAX_AGE_DAYS)",
+        )
+        parser.add_argument(
+            "--max-bytes",
+            type=int,
+            help="Then trim the cache to this size (default PDF_CACHE_MAX_BYTES)",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Remove every cached PDF",
+        )
+
+    def handle(self, *args, **options):
+        for flag in ("max_age_days", "max_bytes"):
+            if options[flag] is not None and options[flag] < 0:
+                raise CommandError(f"--{flag.replace('_', '-')} cannot be negative")
+
+        if options["all"]:
+            removed = pdf_cache.clear()
+            self.stdout.write(self.style.SUCCESS(f"Removed {removed} cached PDFs"))
+            return
+
+        removed, kept = pdf_cache.prune(
+            max_age_days=options["max_age_days"], max_bytes=options["max_bytes"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Removed {removed} cached PDFs, {kept} bytes kept")
+        )
@@ -5,14 +5,19 @@ This module provides functions to generate professional PDF documents
 for invoices and estimates with customizable templates.
 """
 
+import functools
 import io
 import os
+import threading
+from collections import OrderedDict
 from decimal import Decimal
 from urllib.parse import unquote, urlparse
 
 from django.conf import settings
 from django.template.loader import render_to_string
 
+from invoices import pdf_cache
+
 try:
     from weasyprint import CSS, HTML, default_url_fetcher
     from weasyprint.text.fonts import FontConfiguration
@@ -140,8 +145,9 @@ def safe_pdf_url_fetcher(url):
     raise ValueError(f"Blocked disallowed URL scheme in PDF template: {url!r}")
 
 
+@functools.cache
 def get_default_css():
-    """Get the default CSS for PDF generation."""
+    """Get the default CSS for PDF generation, read once per process."""
     css_path = os.path.join(
         os.path.dirname(__file__), "templates", "invoices", "pdf", "invoice.css"
     )
@@ -443,18 +449,89 @@ def format_currency(amount, currency="USD"):
     return f"{symbol}{amount:,.2f}"
 
 
-def generate_invoice_pdf(invoice, include_payments=True):
+# Render state each thread keeps warm between renders of the app's own
+# templates: one FontConfiguration and the stylesheets parsed against it, by
+# their text. Most documents share a handful of stylesheets (the default CSS in
+# each org's template colours), so a render after the first skips the CSS
+# parse and the font setup. Per thread rather than per process because a
+# FontConfiguration is not safe to use from two renders at once.
+#
+# Only app-authored input may use it. An org's custom template_html or
+# template_css can declare fonts: an @font-face in a <style> block, or in a
+# stylesheet pulled in by an @import of a data: URI (which the fetcher allows),
+# spelt with CSS escapes if need be, so no scan of the text can rule it out.
+# WeasyPrint registers those fonts on the config the render uses, where they
+# would stay for every later document in the thread, another org's included,
+# and pile up for as long as the process lives. A render with any custom part
+# gets a FontConfiguration of its own and its CSS parsed fresh.
+_STYLESHEET_CACHE_SIZE = 32
+_render_state = threading.local()
+
+
+def _parse_css(css_content, font_config):
+    return CSS(
+        string=css_content,
+        base_url=settings.BASE_DIR,
+        url_fetcher=safe_pdf_url_fetcher,
+        font_config=font_config,
+    )
+
+
+def _stylesheet(css_content, app_authored):
+    """``(font_config, CSS)`` for rendering with ``css_content``."""
+    if not app_authored:
+        font_config = FontConfiguration()
+        return font_config, _parse_css(css_content, font_config)
+
+    state = _render_state
+    if not hasattr(state, "font_config"):
+        state.font_config = FontConfiguration()
+        state.stylesheets = OrderedDict()
+    css = state.stylesheets.get(css_content)
+    if css is not None:
+        state.stylesheets.move_to_end(css_content)
+        return state.font_config, css
+    css = state.stylesheets[css_content] = _parse_css(css_content, state.font_config)
+    if len(state.stylesheets) > _STYLESHEET_CACHE_SIZE:
+        state.stylesheets.popitem(last=False)
+    return state.font_config, css
+
+
+def write_pdf(html_content, css_content, app_authored=False):
+    """Render HTML and CSS to PDF bytes with WeasyPrint.
+
+    ``app_authored`` says that neither came from an org's custom template, so
+    the render may share this thread's warm font and stylesheet state.
+    """
+    check_weasyprint()
+
+    font_config, css = _stylesheet(css_content, app_authored)
+    html = HTML(
+        string=html_content,
+        base_url=settings.BASE_DIR,
+        url_fetcher=safe_pdf_url_fetcher,
+    )
+
+    pdf_buffer = io.BytesIO()
+    html.write_pdf(pdf_buffer, stylesheets=[css], font_config=font_config)
+    pdf_buffer.seek(0)
+
+    return pdf_buffer.getvalue()
+
+
+def generate_invoice_pdf(invoice, include_payments=True, cached_only=False):
     """
     Generate a PDF for an invoice.
 
     Args:
         invoice: Invoice model instance
         include_payments: Whether to include payment history
+        cached_only: Return None rather than render if this version of the
+            invoice has no cached PDF (invoices/pdf_cache.py)
 
     Returns:
         bytes: PDF file content
     """
-    check_weasyprint()
 
     # Get the template - use invoice's template, or fall back to org's default template
     template = invoice.template
@@ -533,39 +610,33 @@ def generate_invoice_pdf(invoice, include_payments=True):
         css_content = css_content.replace("#3B82F6", template.primary_color)
         if template.secondary_color:
             css_content = css_content.replace("#1E40AF", template.secondary_color)
-
-    # Generate PDF
-    font_config = FontConfiguration()
-    html = HTML(
-        string=html_content,
-        base_url=settings.BASE_DIR,
-        url_fetcher=safe_pdf_url_fetcher,
-    )
-    css = CSS(
-        string=css_content,
-        base_url=settings.BASE_DIR,
-        url_fetcher=safe_pdf_url_fetcher,
-        font_config=font_config,
+    # The colours are validated hex, so only the custom HTML and CSS are the org's
+    app_authored = not (template and (template.template_html or template.template_css))
+
+    # Render, unless this exact HTML and CSS already has been
+    if cached_only:
+        return pdf_cache.fetch("invoice", invoice.pk, html_content, css_content)
+    return pdf_cache.fetch_or_render(
+        "invoice",
+        invoice.pk,
+        html_content,
+        css_content,
+        lambda: write_pdf(html_content, css_content, app_authored=app_authored),
     )
 
-    pdf_buffer = io.BytesIO()
-    html.write_pdf(pdf_buffer, stylesheets=[css], font_config=font_config)
-    pdf_buffer.seek(0)
 
-    return pdf_buffer.getvalue()
-
-
-def generate_estimate_pdf(estimate):
+def generate_estimate_pdf(estimate, cached_only=False):
     """
     Generate a PDF for an estimate.
 
     Args:
         estimate: Estimate model instance
+        cached_only: Return None rather than render if this version of the
+            estimate has no cached PDF (invoices/pdf_cache.py)
 
     Returns:
         bytes: PDF file content
     """
-    check_weasyprint()
 
     # Get the org's default template for styling
     from invoices.models import InvoiceTemplate
@@ -613,25 +684,17 @@ def generate_estimate_pdf(estimate):
         if template.secondary_color:
             css_content = css_content.replace("#1E40AF", template.secondary_color)
 
-    # Generate PDF
-    font_config = FontConfiguration()
-    html = HTML(
-        string=html_content,
-        base_url=settings.BASE_DIR,
-        url_fetcher=safe_pdf_url_fetcher,
+    # Render, unless this exact HTML and CSS already has been
+    if cached_only:
+        return pdf_cache.fetch("estimate", estimate.pk, html_content, css_content)
+    return pdf_cache.fetch_or_render(
+        "estimate",
+        estimate.pk,
+        html_content,
+        css_content,
+        # The default template and CSS; only the colours are the org's
+        lambda: write_pdf(html_content, css_content, app_authored=True),
     )
-    css = CSS(
-        string=css_content,
-        base_url=settings.BASE_DIR,
-        url_fetcher=safe_pdf_url_fetcher,
-        font_config=font_config,
-    )
-
-    pdf_buffer = io.BytesIO()
-    html.write_pdf(pdf_buffer, stylesheets=[css], font_config=font_config)
-    pdf_buffer.seek(0)
-
-    return pdf_buffer.getvalue()
 
 
 def render_invoice_template(template_html, context):
@@ -0,0 +1,205 @@
+"""
+Rendered invoice and estimate PDFs, kept in media storage.
+
+A WeasyPrint render (font configuration, CSS parse, layout) is nearly all the
+cost of a PDF download, and a customer refreshing the portal link asks for the
+same document again and again. ``generate_invoice_pdf`` and
+``generate_estimate_pdf`` still build the document's HTML and CSS on every
+call, which is a few queries and a template render. The PDF is then looked up
+by the SHA-256 of exactly that HTML and CSS, plus ``RENDER_REVISION``, and
+rendered only when it is not found.
+
+Keying on what goes into the render, rather than on the rows it came from,
+means no write has to remember to invalidate anything. An edited line item, a
+payment, a template colour, the org's name, the status badge: each changes the
+HTML and so the key. (A logo replaced in place under the same URL does not;
+uploads get a new name.) What a change leaves behind is the previous version's
+file, so:
+
+* storing a document's new version deletes its older ones;
+* deleting an invoice or estimate deletes all of its (``invoices/signals.py``);
+* ``manage.py prune_pdf_cache``, run nightly by beat, drops the files not used
+  for ``PDF_CACHE_MAX_AGE_DAYS``, then the least recently used past
+  ``PDF_CACHE_MAX_BYTES``.
+
+"Used" is the file's modified time. A hit refreshes it where that is cheap
+(the local file system); on an object store it stays the time of the render,
+so a document read every day but never changed is rendered again once per
+``PDF_CACHE_MAX_AGE_DAYS``.
+
+Files are ``pdf_cache/<kind>/<document id>/<key>.pdf`` in the default
+storage. Nothing links to them: the views read them back and answer through
+the same permission checks as before. A storage error is logged and the PDF
+rendered as if there were no cache; a download never fails because of it.
+"""
+
+import hashlib
+import logging
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = "pdf_cache"
+
+# Bump to orphan every cached PDF when the render itself changes in a way the
+# HTML and CSS do not show: a WeasyPrint upgrade, a new fetcher or font setup.
+# (Not the installed WeasyPrint version itself: a web process that only looks
+# PDFs up need not have WeasyPrint installed, and must compute the same key as
+# the worker that rendered them.)
+RENDER_REVISION = "1"
+
+
+def cache_key(kind, html_content, css_content):
+    """The SHA-256 naming a render of this HTML and CSS."""
+    digest = hashlib.sha256()
+    for part in (RENDER_REVISION, kind, html_content):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    digest.update(css_content.encode())
+    return digest.hexdigest()
+
+
+def _document_dir(kind, document_id):
+    return f"{CACHE_DIR}/{kind}/{document_id}"
+
+
+def _name(kind, document_id, html_content, css_content):
+    key = cache_key(kind, html_content, css_content)
+    return f"{_document_dir(kind, document_id)}/{key}.pdf"
+
+
+def _listdir(storage, path):
+    """``(directories, files)`` under ``path``; nothing if it does not exist.
+
+    Not ``exists()`` first: on an object store a "directory" is a key prefix,
+    which ``exists()`` does not see.
+    """
+    try:
+        return storage.listdir(path)
+    except FileNotFoundError:
+        return [], []
+
+
+def _touch(storage, name):
+    if isinstance(storage, FileSystemStorage):
+        os.utime(storage.path(name))
+
+
+def renders_async():
+    """Whether a download waits for a worker's render rather than rendering.
+
+    ``PDF_RENDER_ASYNC`` alone is not enough: the worker hands its render to
+    the download through this cache, and with the cache off the download
+    would answer 202 forever.
+    """
+    return settings.PDF_RENDER_ASYNC and settings.PDF_CACHE_ENABLED
+
+
+def fetch(kind, document_id, html_content, css_content):
+    """The cached PDF of this HTML and CSS, or None."""
+    if not settings.PDF_CACHE_ENABLED:
+        return None
+
+    storage = default_storage
+    name = _name(kind, document_id, html_content, css_content)
+    try:
+        if storage.exists(name):
+            with storage.open(name, "rb") as cached:
+                pdf = cached.read()
+            _touch(storage, name)
+            return pdf
+    except Exception:
+        logger.warning("Reading cached PDF %s failed", name, exc_info=True)
+    return None
+
+
+def fetch_or_render(kind, document_id, html_content, css_content, render):
+    """The PDF of this HTML and CSS: from storage if rendered before, else ``render()``.
+
+    ``render`` is called with no arguments and returns the PDF's bytes, which
+    are then stored under the document's directory in place of any older
+    version.
+    """
+    if not settings.PDF_CACHE_ENABLED:
+        return render()
+
+    pdf = fetch(kind, document_id, html_content, css_content)
+    if pdf is not None:
+        return pdf
+
+    storage = default_storage
+    directory = _document_dir(kind, document_id)
+    name = _name(kind, document_id, html_content, css_content)
+    pdf = render()
+    try:
+        for filename in _listdir(storage, directory)[1]:
+            storage.delete(f"{directory}/{filename}")
+        storage.save(name, ContentFile(pdf))
+    except Exception:
+        logger.warning("Caching PDF %s failed", name, exc_info=True)
+    return pdf
+
+
+def invalidate(kind, document_id):
+    """Delete every cached version of one document."""
+    storage = default_storage
+    directory = _document_dir(kind, document_id)
+    try:
+        for filename in _listdir(storage, directory)[1]:
+            storage.delete(f"{directory}/{filename}")
+    except Exception:
+        logger.warning("Dropping cached PDFs in %s failed", directory, exc_info=True)
+
+
+def _cached_files(storage):
+    """``(name, size, modified)`` for every cached PDF."""
+    for kind in _listdir(storage, CACHE_DIR)[0]:
+        for document_id in _listdir(storage, f"{CACHE_DIR}/{kind}")[0]:
+            directory = _document_dir(kind, document_id)
+            for filename in _listdir(storage, directory)[1]:
+                name = f"{directory}/{filename}"
+                yield name, storage.size(name), storage.get_modified_time(name)
+
+
+def prune(max_age_days=None, max_bytes=None, now=None):
+    """Evict cached PDFs; returns ``(files removed, bytes kept)``.
+
+    First every file unused for ``max_age_days``, then, oldest use first, as
+    many more as it takes to bring the total under ``max_bytes``. Either limit
+    at 0 is off. Both default to their settings.
+    """
+    if max_age_days is None:
+        max_age_days = settings.PDF_CACHE_MAX_AGE_DAYS
+    if max_bytes is None:
+        max_bytes = settings.PDF_CACHE_MAX_BYTES
+    now = now or timezone.now()
+    storage = default_storage
+
+    files = sorted(_cached_files(storage), key=lambda entry: entry[2])
+    total = sum(size for _, size, _ in files)
+    cutoff = now - timedelta(days=max_age_days) if max_age_days else None
+    removed = 0
+    for name, size, modified in files:
+        expired = cutoff is not None and modified < cutoff
+        over = bool(max_bytes) and total > max_bytes
+        if not (expired or over):
+            break
+        storage.delete(name)
+        total -= size
+        removed += 1
+    return removed, total
+
+
+def clear():
+    """Delete every cached PDF; returns how many."""
+    storage = default_storage
+    names = [name for name, _, _ in _cached_files(storage)]
+    for name in names:
+        storage.delete(name)
+    return len(names)
@@ -16,6 +16,8 @@ from rest_framework.views import APIView
 
 from common.portal_tokens import resolve_portal_org
 from common.tasks import set_rls_context
+from invoices import pdf_cache
+from invoices.api_views import pdf_rendering_response
 from invoices.models import Estimate, Invoice, InvoiceTemplate
 from invoices.pdf import (
     generate_estimate_filename,
@@ -186,7 +188,11 @@ class PublicInvoicePDFView(APIView):
             )
 
         try:
-            pdf_content = generate_invoice_pdf(invoice, include_payments=True)
+            pdf_content = generate_invoice_pdf(
+                invoice, include_payments=True, cached_only=pdf_cache.renders_async()
+            )
+            if pdf_content is None:
+                return pdf_rendering_response(request, "invoice", invoice)
             filename = generate_invoice_filename(invoice)
 
             response = HttpResponse(pdf_content, content_type="application/pdf")
@@ -324,7 +330,11 @@ class PublicEstimatePDFView(APIView):
             )
 
         try:
-            pdf_content = generate_estimate_pdf(estimate)
+            pdf_content = generate_estimate_pdf(
+                estimate, cached_only=pdf_cache.renders_async()
+            )
+            if pdf_content is None:
+                return pdf_rendering_response(request, "estimate", estimate)
             filename = generate_estimate_filename(estimate)
 
             response = HttpResponse(pdf_content, content_type="application/pdf")
@@ -0,0 +1,46 @@
+"""
+Keep the cached invoice and estimate PDFs (invoices/pdf_cache.py) in step.
+
+Edits need no invalidation: the cache is keyed by the rendered document, so an
+edited one is simply a miss, and its new version replaces the old file when it
+is rendered. What happens here:
+
+* Deleting an invoice or estimate drops its cached PDFs.
+* With ``PDF_RENDER_ASYNC`` and the cache on, a status change (sent, paid,
+  accepted...) queues the new version's render once the transaction commits.
+  That is the moment a client is about to open the PDF, so the download finds
+  it cached rather than waiting on the queue.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from invoices import pdf_cache
+from invoices.models import Estimate, Invoice
+from invoices.tasks import queue_pdf_render
+
+PDF_KINDS = {Invoice: "invoice", Estimate: "estimate"}
+
+
+@receiver(post_init, sender=Invoice)
+@receiver(post_init, sender=Estimate)
+def remember_pdf_status(sender, instance, **kwargs):
+    # `__dict__`, not `getattr`: reading a deferred field would fetch it.
+    instance._pdf_status = instance.__dict__.get("status")
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_save, sender=Estimate)
+def prerender_pdf_on_status_change(sender, instance, created, **kwargs):
+    changed = not created and instance.status != instance._pdf_status
+    instance._pdf_status = instance.status
+    if changed and pdf_cache.renders_async():
+        kind = PDF_KINDS[sender]
+        transaction.on_commit(lambda: queue_pdf_render(kind, instance))
+
+
+@receiver(post_delete, sender=Invoice)
+@receiver(post_delete, sender=Estimate)
+def drop_cached_pdfs(sender, instance, **kwargs):
+    pdf_cache.invalidate(PDF_KINDS[sender], instance.pk)
@@ -7,6 +7,7 @@ Tasks include:
 - Overdue invoice checking
 - Payment reminders
 - Estimate expiry checking
+- Background PDF rendering and cached PDF eviction
 """
 
 import logging
@@ -21,7 +22,7 @@ from django.utils import timezone
 from common.links import frontend_url
 from common.models import Profile
 from common.org_time import activate_org_timezone
-from common.tasks import set_rls_context
+from common.tasks import clear_rls_context, set_rls_context
 
 logger = logging.getLogger(__name__)
 
@@ -635,3 +636,59 @@ def send_estimate_to_client(
         logger.info("Sent estimate %s to %s", estimate_id, estimate.client_email)
     except Exception as e:
         logger.error("Failed to send estimate email: %s", e)
+
+
+@shared_task
+def render_document_pdf(kind, document_id, org_id):
+    """Render an invoice's or estimate's PDF into the cache (invoices/pdf_cache.py).
+
+    Queued by ``queue_pdf_render``. A version already cached is a storage read
+    and nothing more, so a duplicate in the queue costs little.
+    """
+    from invoices.models import Estimate, Invoice
+    from invoices.pdf import generate_estimate_pdf, generate_invoice_pdf
+
+    set_rls_context(org_id)
+    try:
+        if kind == "invoice":
+            invoice = Invoice.objects.filter(id=document_id).first()
+            if invoice:
+                generate_invoice_pdf(invoice)
+        elif kind == "estimate":
+            estimate = Estimate.objects.filter(id=document_id).first()
+            if estimate:
+                generate_estimate_pdf(estimate)
+        else:
+            logger.warning("Unknown PDF document kind %r", kind)
+    finally:
+        clear_rls_context()
+
+
+def queue_pdf_render(kind, document):
+    """Queue ``render_document_pdf`` for one document on ``PDF_RENDER_QUEUE``.
+
+    Run a worker on that queue (``celery -A crm worker -Q pdf``) to keep the
+    renders off the workers sending mail and running the beat jobs.
+    """
+    try:
+        render_document_pdf.apply_async(
+            (kind, str(document.pk), str(document.org_id)),
+            queue=settings.PDF_RENDER_QUEUE,
+        )
+    except Exception:  # pragma: no cover. The download renders it instead
+        logger.exception("Failed to queue the PDF render of %s %s", kind, document.pk)
+
+
+@shared_task
+def prune_pdf_cache():
+    """Evict cached invoice and estimate PDFs.
+
+    The nightly run of ``manage.py prune_pdf_cache``; see
+    ``invoices/pdf_cache.py``.
+    """
+    from invoices import pdf_cache
+
+    removed, kept = pdf_cache.prune()
+    if removed:
+        logger.info("Removed %s cached PDFs, %s bytes kept", removed, kept)
+    return {"removed": removed, "kept_bytes": kept}
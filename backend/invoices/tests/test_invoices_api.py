@@ -3234,6 +3234,90 @@ class TestAgingReport:
         data = response.json()
         assert data["current"]["count"] >= 1
 
+    def _owed(self, org, account, days_overdue, amount, currency="USD"):
+        """An unpaid invoice `days_overdue` past due, owing `amount`."""
+        inv = Invoice.objects.create(
+            invoice_title=f"{days_overdue}d {currency}",
+            account=account,
+            currency=currency,
+            org=org,
+        )
+        Invoice.objects.filter(pk=inv.pk).update(
+            status="Sent",
+            due_date=timezone.localdate() - datetime.timedelta(days=days_overdue),
+            amount_due=Decimal(amount),
+        )
+        return inv
+
+    def test_bucket_edges_are_whole_days_overdue(
+        self, admin_client, account_for_invoice, org_a
+    ):
+        for days in (0, 1, 30, 31, 60, 61, 90, 91):
+            self._owed(org_a, account_for_invoice, days, "10.00")
+        data = admin_client.get("/api/invoices/reports/aging/").json()
+        assert [
+            data[bucket]["count"]
+            for bucket in (
+                "current",
+                "1_30_days",
+                "31_60_days",
+                "61_90_days",
+                "over_90_days",
+            )
+        ] == [1, 2, 2, 2, 1]
+        assert data["overdue"] == {"count": 7, "amount": "70.00"}
+        assert data["total"] == {"count": 8, "amount": "80.00"}
+        assert data["by_account"] == [
+            {
+                "id": str(account_for_invoice.id),
+                "name": account_for_invoice.name,
+                "count": 7,
+                "oldest_days": 91,
+                "amount": "70.00",
+            }
+        ]
+
+    def test_lists_ten_per_bucket_but_counts_them_all(
+        self, admin_client, account_for_invoice, org_a
+    ):
+        for _ in range(12):
+            self._owed(org_a, account_for_invoice, 45, "5.00")
+        self._owed(org_a, account_for_invoice, 5, "1.00")
+        data = admin_client.get("/api/invoices/reports/aging/").json()
+        bucket = data["31_60_days"]
+        assert (bucket["count"], bucket["amount"]) == (12, "60.00")
+        assert len(bucket["invoices"]) == 10
+        assert bucket["invoices"][0]["days_overdue"] == 45
+        assert len(data["1_30_days"]["invoices"]) == 1
+
+    def test_splits_by_currency(self, admin_client, account_for_invoice, org_a):
+        self._owed(org_a, account_for_invoice, 10, "100.00")
+        self._owed(org_a, account_for_invoice, -3, "40.00", currency="EUR")
+        data = admin_client.get("/api/invoices/reports/aging/").json()
+        by_currency = {row["currency"]: row for row in data["by_currency"]}
+        assert by_currency["EUR"]["current"] == {"count": 1, "amount": "40.00"}
+        assert by_currency["EUR"]["overdue"] == {"count": 0, "amount": "0"}
+        assert by_currency["USD"]["1_30_days"] == {"count": 1, "amount": "100.00"}
+        assert by_currency["USD"]["total"] == {"count": 1, "amount": "100.00"}
+        assert data["total"] == {"count": 2, "amount": "140.00"}
+
+    def test_query_count_does_not_grow_with_invoices(
+        self, admin_client, account_for_invoice, org_a
+    ):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        def _queries():
+            with CaptureQueriesContext(connection) as ctx:
+                admin_client.get("/api/invoices/reports/aging/")
+            return len(ctx.captured_queries)
+
+        self._owed(org_a, account_for_invoice, 15, "1.00")
+        baseline = _queries()
+        for days in (0, 20, 50, 80, 120):
+            self._owed(org_a, account_for_invoice, days, "1.00")
+        assert _queries() == baseline
+
 
 @pytest.mark.django_db
 class TestReportsAreAdminOnly:
@@ -0,0 +1,279 @@
+"""Tests for the rendered-PDF cache (invoices/pdf_cache.py).
+
+What has to hold: the same HTML and CSS renders once; a different version
+renders again and replaces the old file; deleting the document drops its
+files; pruning removes the unused and then the oldest past the size limit;
+and neither a disabled cache nor a broken storage stops a download.
+"""
+
+import os
+import threading
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.utils import timezone
+
+from accounts.models import Account
+from invoices import pdf, pdf_cache
+from invoices.models import Invoice, InvoiceTemplate
+
+
+@pytest.fixture(autouse=True)
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.PDF_CACHE_ENABLED = True
+
+
+class Renderer:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return f"%PDF-{self.calls}".encode()
+
+
+def _files(kind, document_id):
+    return pdf_cache._listdir(default_storage, f"pdf_cache/{kind}/{document_id}")[1]
+
+
+def _age(kind, document_id, days):
+    directory = f"pdf_cache/{kind}/{document_id}"
+    then = time.time() - days * 86400
+    for filename in _files(kind, document_id):
+        os.utime(default_storage.path(f"{directory}/{filename}"), (then, then))
+
+
+class TestFetchOrRender:
+    def test_the_same_document_renders_once(self):
+        render = Renderer()
+        first = pdf_cache.fetch_or_render("invoice", "a", "<p>1</p>", "", render)
+        again = pdf_cache.fetch_or_render("invoice", "a", "<p>1</p>", "", render)
+        assert first == again == b"%PDF-1"
+        assert render.calls == 1
+
+    def test_a_new_version_replaces_the_old_file(self):
+        render = Renderer()
+        pdf_cache.fetch_or_render("invoice", "a", "<p>1</p>", "", render)
+        pdf_cache.fetch_or_render("invoice", "a", "<p>2</p>", "", render)
+        assert render.calls == 2
+        assert _files("invoice", "a") == [
+            pdf_cache.cache_key("invoice", "<p>2</p>", "") + ".pdf"
+        ]
+
+    def test_disabled_renders_every_time(self, settings):
+        settings.PDF_CACHE_ENABLED = False
+        render = Renderer()
+        pdf_cache.fetch_or_render("invoice", "a", "<p>1</p>", "", render)
+        pdf_cache.fetch_or_render("invoice", "a", "<p>1</p>", "", render)
+        assert render.calls == 2
+        assert _files("invoice", "a") == []
+
+    def test_a_storage_failure_still_returns_the_pdf(self):
+        with patch.object(default_storage, "save", side_effect=OSError("disk full")):
+            pdf = pdf_cache.fetch_or_render("invoice", "a", "x", "", Renderer())
+        assert pdf == b"%PDF-1"
+
+
+class TestPrune:
+    def test_drops_the_unused_then_the_oldest_past_the_size_limit(self):
+        for document_id, days in (("old", 40), ("mid", 20), ("new", 1)):
+            pdf_cache.fetch_or_render(
+                "estimate", document_id, document_id, "", lambda: b"x" * 100
+            )
+            _age("estimate", document_id, days)
+
+        assert pdf_cache.prune(max_age_days=30, max_bytes=0) == (1, 200)
+        assert pdf_cache.prune(max_age_days=0, max_bytes=150) == (1, 100)
+        assert _files("estimate", "new")
+
+    def test_the_command_can_clear_everything(self, capsys):
+        pdf_cache.fetch_or_render("invoice", "a", "x", "", Renderer())
+        call_command("prune_pdf_cache", "--all")
+        assert "Removed 1 cached PDFs" in capsys.readouterr().out
+        assert _files("invoice", "a") == []
+
+
+@pytest.mark.django_db
+class TestGenerateInvoicePdf:
+    @pytest.fixture
+    def invoice(self, org_a):
+        account = Account.objects.create(name="Cached Co", org=org_a)
+        return Invoice.objects.create(
+            invoice_title="Cached", account=account, currency="USD", org=org_a
+        )
+
+    def test_an_unchanged_invoice_is_not_rendered_again(self, invoice):
+        with (
+            patch.object(pdf, "WEASYPRINT_AVAILABLE", True),
+            patch.object(pdf, "write_pdf", return_value=b"%PDF-") as write_pdf,
+        ):
+            pdf.generate_invoice_pdf(invoice)
+            pdf.generate_invoice_pdf(invoice)
+            assert write_pdf.call_count == 1
+
+            invoice.due_date = timezone.localdate() + timedelta(days=3)
+            invoice.save()
+            pdf.generate_invoice_pdf(invoice)
+            assert write_pdf.call_count == 2
+
+    def test_deleting_the_invoice_drops_its_pdfs(self, invoice):
+        with (
+            patch.object(pdf, "WEASYPRINT_AVAILABLE", True),
+            patch.object(pdf, "write_pdf", return_value=b"%PDF-"),
+        ):
+            pdf.generate_invoice_pdf(invoice)
+        invoice_id = invoice.pk
+        assert _files("invoice", invoice_id)
+        invoice.delete()
+        assert _files("invoice", invoice_id) == []
+
+
+@pytest.mark.django_db
+class TestAsyncRendering:
+    """With PDF_RENDER_ASYNC the request never runs WeasyPrint."""
+
+    @pytest.fixture
+    def invoice(self, org_a):
+        account = Account.objects.create(name="Async Co", org=org_a)
+        return Invoice.objects.create(
+            invoice_title="Async", account=account, currency="USD", org=org_a
+        )
+
+    def test_a_miss_answers_202_until_the_worker_has_rendered_it(
+        self, settings, admin_client, invoice, org_a
+    ):
+        from invoices.tasks import render_document_pdf
+
+        settings.PDF_RENDER_ASYNC = True
+        url = f"/api/invoices/{invoice.id}/pdf/"
+        with (
+            patch("invoices.api_views.queue_pdf_render") as queued,
+            patch.object(pdf, "write_pdf") as write_pdf,
+        ):
+            response = admin_client.get(url)
+            assert response.status_code == 202
+            assert response.json()["poll_url"] == url
+            assert queued.call_args.args == ("invoice", invoice)
+            assert not write_pdf.called
+
+        with (
+            patch.object(pdf, "WEASYPRINT_AVAILABLE", True),
+            patch.object(pdf, "write_pdf", return_value=b"%PDF-async"),
+        ):
+            render_document_pdf("invoice", str(invoice.id), str(org_a.id))
+
+        response = admin_client.get(url)
+        assert response.status_code == 200
+        assert response.content == b"%PDF-async"
+
+    def test_without_the_cache_the_download_renders_in_the_request(
+        self, settings, admin_client, invoice, django_capture_on_commit_callbacks
+    ):
+        # Nothing would carry a worker's render back to the download.
+        settings.PDF_RENDER_ASYNC = True
+        settings.PDF_CACHE_ENABLED = False
+        with (
+            patch("invoices.api_views.queue_pdf_render") as queued,
+            patch("invoices.signals.queue_pdf_render") as prerendered,
+            patch.object(pdf, "WEASYPRINT_AVAILABLE", True),
+            patch.object(pdf, "write_pdf", return_value=b"%PDF-sync"),
+        ):
+            response = admin_client.get(f"/api/invoices/{invoice.id}/pdf/")
+            with django_capture_on_commit_callbacks(execute=True):
+                invoice.status = "Sent"
+                invoice.save()
+        assert response.status_code == 200
+        assert response.content == b"%PDF-sync"
+        assert not queued.called
+        assert not prerendered.called
+
+    def test_a_status_change_queues_the_render_on_commit(
+        self, settings, invoice, django_capture_on_commit_callbacks
+    ):
+        settings.PDF_RENDER_ASYNC = True
+        with patch("invoices.signals.queue_pdf_render") as queued:
+            with django_capture_on_commit_callbacks(execute=True):
+                invoice.invoice_title = "Renamed"
+                invoice.save()
+            assert not queued.called
+
+            with django_capture_on_commit_callbacks(execute=True):
+                invoice.status = "Sent"
+                invoice.save()
+            queued.assert_called_once_with("invoice", invoice)
+
+
+class TestWarmRenderState:
+    @pytest.fixture
+    def parsed(self):
+        parsed = []
+
+        class FakeCSS:
+            def __init__(self, **kwargs):
+                parsed.append((kwargs["string"], kwargs["font_config"]))
+
+        with (
+            patch.object(pdf, "CSS", FakeCSS, create=True),
+            patch.object(pdf, "FontConfiguration", object, create=True),
+            patch.object(pdf, "_render_state", threading.local()),
+        ):
+            yield parsed
+
+    def test_app_stylesheets_are_parsed_once_per_thread(self, parsed):
+        config, css = pdf._stylesheet("p { color: red }", app_authored=True)
+        assert pdf._stylesheet("p { color: red }", app_authored=True) == (config, css)
+        assert len(parsed) == 1
+
+        other = []
+        worker = threading.Thread(
+            target=lambda: other.append(pdf._stylesheet("p {}", app_authored=True))
+        )
+        worker.start()
+        worker.join()
+        assert other[0][0] is not config
+
+    def test_a_custom_template_never_touches_the_shared_config(self, parsed):
+        shared, _css = pdf._stylesheet("p {}", app_authored=True)
+        # Fonts can hide from any scan of the text, so nothing is scanned.
+        custom = "@import url(data:text/css;base64,QGZvbnQtZmFjZSB7fQ==);"
+        first, _ = pdf._stylesheet(custom, app_authored=False)
+        second, _ = pdf._stylesheet(custom, app_authored=False)
+        assert len({id(shared), id(first), id(second)}) == 3
+        assert [css for css, _config in parsed] == ["p {}", custom, custom]
+
+
+@pytest.mark.django_db
+class TestWhoseTemplate:
+    @pytest.fixture
+    def account(self, org_a):
+        return Account.objects.create(name="Fonts Co", org=org_a)
+
+    def _app_authored(self, invoice):
+        with (
+            patch.object(pdf, "WEASYPRINT_AVAILABLE", True),
+            patch.object(pdf, "write_pdf", return_value=b"%PDF-") as write_pdf,
+        ):
+            pdf.generate_invoice_pdf(invoice)
+        return write_pdf.call_args.kwargs["app_authored"]
+
+    def test_the_default_template_in_org_colours_is_the_apps(self, org_a, account):
+        template = InvoiceTemplate.objects.create(
+            name="Brand", org=org_a, primary_color="#112233"
+        )
+        invoice = Invoice.objects.create(
+            invoice_title="A", account=account, org=org_a, template=template
+        )
+        assert self._app_authored(invoice) is True
+
+    def test_custom_html_or_css_is_the_orgs(self, org_a, account):
+        for custom in ({"template_html": "<style>x</style>"}, {"template_css": "x"}):
+            template = InvoiceTemplate.objects.create(name="C", org=org_a, **custom)
+            invoice = Invoice.objects.create(
+                invoice_title="B", account=account, org=org_a, template=template
+            )
+            assert self._app_authored(invoice) is False
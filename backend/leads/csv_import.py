@@ -0,0 +1,307 @@
+"""CSV import for leads.
+
+Rows are dicts keyed by the lowercased header (`title`, `first name`, `email`,
+`account_name`, ...). Only the `title` header is required, and the file is
+read as Latin-1, as the upload form that used to parse it read it. Rows are
+skipped, not refused, when they cannot be imported, which is how the lead
+upload has always behaved, unlike the contacts and cases importers'
+all-or-nothing commit. A row is skipped when it has:
+
+* no title, or a title the org or an earlier row of the file already has;
+* no valid email, or an email the org or an earlier row already has (lead
+  email is unique per org, case-insensitively);
+* a phone number longer than the column holds.
+
+The checks used to run per row as the leads were saved one at a time: an
+`exists()` for the title, an account lookup and an INSERT with its activity
+row for every line of the file. They are now set-based. `_validate_records`
+asks for a chunk's titles with one query and its emails through
+`DuplicateDetector.find_stored_keys` (one query per 500), and `_commit_leads`
+resolves its account names with one more and writes the chunk with one
+`bulk_create`. What the per-row saves did besides the INSERT is done once per
+import: `_record_import` writes a single IMPORTED activity, and the chunk is
+added to the search index in a batch.
+
+`IMPORTER` runs an upload as an `ImportJob` (common/imports.py), where the
+created, skipped and failed rows end up on the job. `import_leads` runs the
+same steps over rows already in memory and returns the same counts as a
+`LeadImportResult`.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+from django.db import DataError, IntegrityError, transaction
+from django.db.models import prefetch_related_objects
+from django.db.models.functions import Lower
+
+from accounts.models import Account
+from common import dashboard_cache, search_index
+from common.duplicate_detection import DuplicateDetector
+from common.imports import (
+    CHUNK_SIZE,
+    Committed,
+    Importer,
+    ImportFileError,
+    chunked,
+    read_csv,
+)
+from common.models import Activity
+from leads.models import Lead
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_HEADERS = ("title",)
+email_regex = r"^[_a-zA-Z0-9-]+(\.[_a-zA-Z0-9-]+)*@[a-zA-Z0-9-]+(\.[a-zA-Z0-9-]+)*(\.[a-zA-Z]{2,4})$"
+
+TITLE_MAX_LENGTH = 64
+PHONE_MAX_LENGTH = Lead._meta.get_field("phone").max_length
+
+
+@dataclass
+class RowError:
+    row: int  # 1-based, matching CSV line numbers (header is row 0)
+    field: str
+    message: str
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"row": self.row, "field": self.field, "message": self.message}
+
+
+@dataclass
+class _Seen:
+    """First row of the file to use each title and (lowercased) email."""
+
+    titles: dict[str, int] = field(default_factory=dict)
+    emails: dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class LeadImportResult:
+    """What an import did with each row of the file."""
+
+    created: list[str] = field(default_factory=list)
+    skipped: list[RowError] = field(default_factory=list)
+    failed: list[RowError] = field(default_factory=list)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "created": len(self.created),
+            "skipped": len(self.skipped),
+            "failed": len(self.failed),
+            # Messages name the row they conflict with; the field is the reason.
+            "reasons": dict(Counter(e.field for e in self.skipped + self.failed)),
+        }
+
+
+def _title(record) -> str:
+    return (record.get("title") or "")[:TITLE_MAX_LENGTH]
+
+
+def _email(record) -> str:
+    return (record.get("email") or "").strip()
+
+
+def _validate_records(records, org, seen: _Seen):
+    """Split a chunk into the rows to skip and the ``(row, record)`` to create.
+
+    ``seen`` carries the file's titles and emails from chunk to chunk, so a
+    repeat is caught however far apart the two rows are.
+    """
+    titles = {_title(record) for _idx, record in records} - {""}
+    # Titles compare exactly, as the per-row check did. Emails go through
+    # DuplicateDetector's batch mode, which compares them as the unique
+    # constraint on (Lower(email), org) does and is served by it; inactive
+    # leads count, as they do for the constraint.
+    taken_titles = set(
+        Lead.objects.filter(org=org, title__in=titles).values_list("title", flat=True)
+    )
+    taken_emails = DuplicateDetector.find_stored_keys(
+        org,
+        "lead",
+        [{"email": _email(record)} for _idx, record in records],
+        include_inactive=True,
+    ).get("email", set())
+
+    errors: list[RowError] = []
+    valid: list[tuple[int, dict]] = []
+    for idx, record in records:
+        title, email = _title(record), _email(record)
+        if not title:
+            errors.append(RowError(idx, "title", "Title is required"))
+        elif title in seen.titles:
+            errors.append(
+                RowError(
+                    idx,
+                    "title",
+                    f"Duplicate title also used by row {seen.titles[title]} "
+                    "in this file",
+                )
+            )
+        elif title in taken_titles:
+            errors.append(RowError(idx, "title", "A lead with this title exists"))
+        elif not email or re.match(email_regex, email) is None:
+            errors.append(RowError(idx, "email", "A valid email is required"))
+        elif email.lower() in seen.emails:
+            errors.append(
+                RowError(
+                    idx,
+                    "email",
+                    f"Duplicate email also used by row {seen.emails[email.lower()]} "
+                    "in this file",
+                )
+            )
+        elif email.lower() in taken_emails:
+            errors.append(RowError(idx, "email", "A lead with this email exists"))
+        elif len(record.get("phone") or "") > PHONE_MAX_LENGTH:
+            errors.append(
+                RowError(
+                    idx, "phone", f"Phone is longer than {PHONE_MAX_LENGTH} characters"
+                )
+            )
+        else:
+            valid.append((idx, record))
+            seen.titles[title] = idx
+            seen.emails[email.lower()] = idx
+    return errors, valid
+
+
+def _build_lead(record, org, profile, accounts) -> Lead:
+    # `Lead` has no account link; the account name the file gives lands in
+    # `company_name`, spelled as the org's account is when one matches.
+    account_name = (record.get("account_name") or "").strip()[:255]
+    return Lead(
+        title=_title(record),
+        first_name=(record.get("first name") or "")[:255],
+        last_name=(record.get("last name") or "")[:255],
+        website=(record.get("website") or "")[:255],
+        email=_email(record),
+        phone=record.get("phone") or "",
+        address_line=(record.get("address") or "")[:255],
+        city=(record.get("city") or "")[:255],
+        state=(record.get("state") or "")[:255],
+        postcode=(record.get("postcode") or "")[:64],
+        country=(record.get("country") or "")[:3],
+        description=record.get("description") or "",
+        status=record.get("status") or "",
+        company_name=accounts.get(account_name.lower(), account_name) or None,
+        org=org,
+        # `bulk_create` skips `BaseModel.save`, which would have credited the
+        # request user; a worker has none, so the importer is named here.
+        created_by=profile.user,
+        updated_by=profile.user,
+    )
+
+
+def _commit_leads(rows: list[tuple[int, dict]], org, profile) -> Committed:
+    """Create a chunk of validated rows with one INSERT.
+
+    Runs inside a transaction. A lead that another import or a user created
+    since validation makes the whole INSERT fail, as does a value the database
+    will not take; the chunk is then written a row at a time so only the rows
+    at fault are refused.
+    """
+    names = {
+        (record.get("account_name") or "").strip()[:255].lower()
+        for _idx, record in rows
+    } - {""}
+    accounts = dict(
+        Account.objects.filter(org=org)
+        .annotate(name_lower=Lower("name"))
+        .filter(name_lower__in=names)
+        .values_list("name_lower", "name")
+    )
+    leads = [_build_lead(record, org, profile, accounts) for _idx, record in rows]
+    failed: list[RowError] = []
+    try:
+        with transaction.atomic():
+            Lead.objects.bulk_create(leads)
+        created = leads
+    except (IntegrityError, DataError):
+        created = []
+        for (idx, _record), lead in zip(rows, leads):
+            try:
+                with transaction.atomic():
+                    Lead.objects.bulk_create([lead])
+            except IntegrityError:
+                failed.append(
+                    RowError(
+                        idx,
+                        "email",
+                        "A lead with this email was created during the import",
+                    )
+                )
+            except DataError as exc:
+                failed.append(RowError(idx, "", f"The database refused the row: {exc}"))
+            else:
+                created.append(lead)
+    # New leads have no assignees; the prefetch says so in one query rather
+    # than one per lead when the index reads the audience.
+    prefetch_related_objects(created, "assigned_to")
+    search_index.index_objects(search_index.SOURCES_BY_LABEL["leads.Lead"], created)
+    return Committed([str(lead.pk) for lead in created], failed)
+
+
+def _record_import(count: int, first_id: str, org, profile) -> None:
+    """Stand in for the per-row side effects `bulk_create` does not send."""
+    plural = "s" if count != 1 else ""
+    Activity.objects.create(
+        user=profile,
+        action="IMPORTED",
+        entity_type="Lead",
+        entity_id=first_id,
+        entity_name=f"{count} lead{plural}",
+        description=f"Imported {count} lead{plural} from CSV",
+        metadata={"source": "csv", "created": count},
+        org=org,
+    )
+    dashboard_cache.bump(org.id, "lead")
+
+
+def import_leads(
+    rows: list[dict], org, profile, chunk_size: int = CHUNK_SIZE
+) -> LeadImportResult:
+    """Import rows already parsed from a lead upload, a chunk at a time."""
+    result = LeadImportResult()
+    seen = _Seen()
+    for chunk in chunked(enumerate(rows, start=1), chunk_size):
+        errors, valid = _validate_records(chunk, org, seen)
+        result.skipped.extend(errors)
+        with transaction.atomic():
+            committed = _commit_leads(valid, org, profile)
+        result.created.extend(committed.ids)
+        result.failed.extend(committed.failed)
+    if result.created:
+        _record_import(len(result.created), result.created[0], org, profile)
+    return result
+
+
+def _stream_records(fileobj) -> Iterator[tuple[int, dict[str, str]]]:
+    """The rows of a lead upload; blank rows and unnamed columns are dropped."""
+    rows = read_csv(fileobj, encoding="iso-8859-1")
+    headers = [(h or "").lower() for h in next(rows, None) or []]
+    missing = [h for h in REQUIRED_HEADERS if h not in headers]
+    if missing:
+        raise ImportFileError(f"Missing headers: {', '.join(missing)}")
+    for idx, raw_row in enumerate(rows, start=1):
+        if not "".join(raw_row):
+            continue
+        yield (
+            idx,
+            {h: cell for h, cell in zip(headers, raw_row) if h},
+        )
+
+
+IMPORTER = Importer(
+    read=_stream_records,
+    validate=_validate_records,
+    commit=_commit_leads,
+    finish=_record_import,
+    new_state=_Seen,
+    all_or_nothing=False,
+)
@@ -0,0 +1,39 @@
+# Normalized duplicate-detection keys for Lead (common/duplicate_detection.py).
+#
+# Adds the column(s), indexes them with the org, and fills them for existing
+# rows. New and saved rows are filled by NormalizedField.pre_save. The backfill
+# streams the table and writes in batches, so it is the same job as
+# `manage.py backfill_normalized_fields`, which can also be run again later.
+# Reversing drops the columns, so there is nothing for the backfill to undo.
+
+from django.db import migrations, models
+
+import common.duplicate_detection
+from common.duplicate_detection import backfill_normalized_fields
+
+
+def backfill(apps, schema_editor):
+    backfill_normalized_fields(apps.get_model("leads", "Lead"))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("leads", "0016_alter_leadpipeline_is_default"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="lead",
+            name="phone_normalized",
+            field=common.duplicate_detection.NormalizedField(
+                blank=True, default="", kind="phone", max_length=25, source="phone"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="lead",
+            index=models.Index(
+                fields=["org", "phone_normalized"], name="lead_org_id_5ffb04_idx"
+            ),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -6,6 +6,7 @@ from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from common.base import SAMPLE_DATA_HELP_TEXT, AssignableMixin, BaseModel
+from common.duplicate_detection import NormalizedField
 from common.models import Org, Profile, Tags, Teams
 from common.utils import (
     COUNTRIES,
@@ -55,6 +56,8 @@ class Lead(AssignableMixin, BaseModel):
         blank=True,
         validators=[flexible_phone_validator],
     )
+    # `phone` as DuplicateDetector compares it, kept current on save.
+    phone_normalized = NormalizedField(max_length=25, source="phone", kind="phone")
     job_title = models.CharField(
         _("Job Title"),
         max_length=255,
@@ -155,6 +158,7 @@ class Lead(AssignableMixin, BaseModel):
             models.Index(fields=["status"]),
             models.Index(fields=["source"]),
             models.Index(fields=["org", "-created_at"]),
+            models.Index(fields=["org", "phone_normalized"]),
             models.Index(fields=["stage", "kanban_order"]),
             models.Index(fields=["status", "kanban_order"]),
         ]
@@ -7,6 +7,8 @@ The ``org`` header parameter that used to lead every list here is gone; see
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter
 
+from common.swagger_params import list_page_params
+
 organization_params = []
 
 lead_list_get_params = [
@@ -20,4 +22,5 @@ lead_list_get_params = [
         enum=["assigned", "in process", "converted", "recycled", "closed"],
     ),
     OpenApiParameter("tags", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    *list_page_params,
 ]
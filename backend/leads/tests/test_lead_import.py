@@ -0,0 +1,141 @@
+"""Tests for the set-based lead import (leads/csv_import.py).
+
+The checks that used to run per row, a title ``exists()`` and an account
+lookup before each save, are now one query per chunk each. What has to hold:
+the query count does not grow with the file, every skipped row is reported
+with its reason (including repeats far apart in the file), a lead that
+appears between validation and the INSERT fails only its own row, and the
+per-row activity is replaced by one IMPORTED entry.
+"""
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import Account
+from common.models import Activity, SearchDocument
+from leads import csv_import
+from leads.models import Lead
+
+
+def _rows(n, start=0, **extra):
+    return [
+        {"title": f"Deal {i}", "email": f"lead{i}@example.com", **extra}
+        for i in range(start, start + n)
+    ]
+
+
+@pytest.mark.django_db
+class TestImportLeads:
+    def test_creates_the_rows_and_reports_the_counts(self, org_a, admin_profile):
+        result = csv_import.import_leads(_rows(3), org_a, admin_profile)
+        assert result.to_dict() == {
+            "created": 3,
+            "skipped": 0,
+            "failed": 0,
+            "reasons": {},
+        }
+        leads = Lead.objects.filter(org=org_a)
+        assert {lead.created_by_id for lead in leads} == {admin_profile.user_id}
+        assert sorted(map(str, leads.values_list("pk", flat=True))) == sorted(
+            result.created
+        )
+
+    def test_query_count_does_not_grow_with_the_rows(self, org_a, admin_profile):
+        with CaptureQueriesContext(connection) as small:
+            csv_import.import_leads(_rows(5), org_a, admin_profile)
+        with CaptureQueriesContext(connection) as large:
+            csv_import.import_leads(_rows(50, start=100), org_a, admin_profile)
+        assert len(large.captured_queries) == len(small.captured_queries)
+
+    def test_skipped_rows_say_why(self, org_a, admin_profile):
+        Lead.objects.create(org=org_a, title="Stored", email="stored@example.com")
+        rows = [
+            {"title": "Stored", "email": "new@example.com"},
+            {"title": "", "email": "blank@example.com"},
+            {"title": "No email"},
+            {"title": "Bad email", "email": "not-an-email"},
+            {"title": "Stored email", "email": "STORED@example.com"},
+            {"title": "Kept", "email": "kept@example.com"},
+            {"title": "Kept", "email": "other@example.com"},
+            {"title": "Same email", "email": "Kept@example.com"},
+            {"title": "Long phone", "email": "p@example.com", "phone": "1" * 30},
+        ]
+        # Two rows a chunk: the repeats sit in later chunks than their first use.
+        result = csv_import.import_leads(rows, org_a, admin_profile, chunk_size=2)
+        assert [(e.row, e.field) for e in result.skipped] == [
+            (1, "title"),
+            (2, "title"),
+            (3, "email"),
+            (4, "email"),
+            (5, "email"),
+            (7, "title"),
+            (8, "email"),
+            (9, "phone"),
+        ]
+        assert result.skipped[5].message == (
+            "Duplicate title also used by row 6 in this file"
+        )
+        assert result.to_dict()["reasons"] == {"title": 3, "email": 4, "phone": 1}
+        assert set(Lead.objects.values_list("title", flat=True)) == {"Stored", "Kept"}
+
+    def test_titles_of_another_org_do_not_count(self, org_a, org_b, admin_profile):
+        Lead.objects.create(org=org_b, title="Deal 0", email="lead0@example.com")
+        result = csv_import.import_leads(_rows(1), org_a, admin_profile)
+        assert len(result.created) == 1
+
+    def test_an_inactive_leads_email_still_counts(self, org_a, admin_profile):
+        # The (Lower(email), org) constraint does not care whether the stored
+        # lead is active, so the check must not either.
+        Lead.objects.create(
+            org=org_a, title="Archived", email="lead0@example.com", is_active=False
+        )
+        result = csv_import.import_leads(_rows(1), org_a, admin_profile)
+        assert [(e.row, e.field) for e in result.skipped] == [(1, "email")]
+
+    def test_account_name_is_resolved_to_the_org_account(self, org_a, admin_profile):
+        Account.objects.create(org=org_a, name="Acme Corp")
+        rows = [
+            {"title": "Known", "email": "a@example.com", "account_name": "acme corp"},
+            {"title": "Unknown", "email": "b@example.com", "account_name": "Globex"},
+        ]
+        csv_import.import_leads(rows, org_a, admin_profile)
+        assert dict(Lead.objects.values_list("title", "company_name")) == {
+            "Known": "Acme Corp",
+            "Unknown": "Globex",
+        }
+
+    def test_one_activity_and_search_documents(self, org_a, admin_profile):
+        result = csv_import.import_leads(_rows(4), org_a, admin_profile)
+        activity = Activity.objects.get(org=org_a)
+        assert (activity.action, activity.entity_type) == ("IMPORTED", "Lead")
+        assert activity.metadata["created"] == 4
+        assert SearchDocument.objects.filter(pk__in=result.created).count() == 4
+
+    def test_a_lead_created_since_validation_fails_only_its_row(
+        self, org_a, admin_profile
+    ):
+        rows = list(enumerate(_rows(3), start=1))
+        errors, valid = csv_import._validate_records(rows, org_a, csv_import._Seen())
+        assert not errors
+        Lead.objects.create(org=org_a, title="Elsewhere", email="LEAD1@example.com")
+        committed = csv_import._commit_leads(valid, org_a, admin_profile)
+        assert len(committed.ids) == 2
+        assert [(e.row, e.field) for e in committed.failed] == [(2, "email")]
+        assert Lead.objects.filter(org=org_a).count() == 3
+
+    @pytest.mark.slow
+    def test_benchmark_import(self, org_a, admin_profile):
+        """10k rows through the import, against one chunk of them: the queries
+        grow with the chunks, not with the rows in them."""
+        chunk = csv_import.CHUNK_SIZE
+        Account.objects.create(org=org_a, name="Acme")
+        with CaptureQueriesContext(connection) as one:
+            csv_import.import_leads(
+                _rows(chunk, account_name="Acme"), org_a, admin_profile
+            )
+        rows = _rows(10 * chunk, start=chunk, account_name="Acme")
+        with CaptureQueriesContext(connection) as ten:
+            result = csv_import.import_leads(rows, org_a, admin_profile)
+        assert len(result.created) == len(rows)
+        assert len(ten.captured_queries) <= 10 * len(one.captured_queries)
@@ -92,6 +92,16 @@ class TestImportActuallyImports:
         lead = Lead.objects.get(title="Acme deal")
         assert lead.created_by_id == admin_profile.user_id
 
+    def test_rows_repeating_an_email_are_skipped_up_front(self, org_a, admin_profile):
+        Lead.objects.create(title="Stored", email="ada@example.com", org=org_a)
+        rows = [
+            {"title": "Same as stored", "email": "ADA@example.com"},
+            {"title": "First", "email": "bob@example.com"},
+            {"title": "Repeat of first", "email": "bob@example.com"},
+        ]
+        create_lead_from_file(rows, [], admin_profile.id, "localhost", org_a.id)
+        assert set(Lead.objects.values_list("title", flat=True)) == {"Stored", "First"}
+
 
 @pytest.mark.django_db
 class TestImportTaskHandlesRealFiles:
@@ -4,20 +4,20 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from common.imports import ImportFileError, start_job
 from common.lookups import get_scoped_or_404
 from common.models import APISettings, Attachments, Comment
 from common.permissions import HasOrgContext, is_org_admin
-from common.serializer import LeadCommentSerializer
+from common.serializer import ImportJobSerializer, LeadCommentSerializer
 from contacts.models import Contact
 from leads import swagger_params
-from leads.forms import LeadListForm
 from leads.models import Lead
 from leads.serializer import (
     CreateLeadFromSiteSwaggerSerializer,
     LeadCommentEditSwaggerSerializer,
     LeadUploadSwaggerSerializer,
 )
-from leads.tasks import create_lead_from_file, send_lead_assigned_emails
+from leads.tasks import send_lead_assigned_emails
 
 # Matches the contacts and cases importers, and the UI hint beside the control.
 MAX_UPLOAD_BYTES = 5 * 1024 * 1024
@@ -53,6 +53,7 @@ class LeadUploadView(APIView):
                 fields={
                     "error": serializers.BooleanField(),
                     "message": serializers.CharField(),
+                    "job": ImportJobSerializer(),
                 },
             )
         },
@@ -63,34 +64,32 @@ class LeadUploadView(APIView):
                 {"error": True, "errors": "Admin access required"},
                 status=status.HTTP_403_FORBIDDEN,
             )
-        # The cap is measured against the bytes actually read, not against
-        # `upload.size`, which for an in-memory upload derives from a
-        # client-supplied Content-Length and can understate the body.
         upload = request.FILES.get("leads_file")
-        if upload is not None:
-            file_bytes = upload.read()
-            upload.seek(0)
-            if len(file_bytes) > MAX_UPLOAD_BYTES:
-                return Response(
-                    {"error": True, "errors": "File exceeds the 5 MB upload limit"},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-        lead_form = LeadListForm(request.POST, request.FILES)
-        if lead_form.is_valid():
-            create_lead_from_file.delay(
-                lead_form.validated_rows,
-                lead_form.invalid_rows,
-                request.profile.id,
-                request.get_host(),
-                request.profile.org.id,
+        if upload is None:
+            return Response(
+                {"error": True, "errors": {"leads_file": ["This field is required."]}},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        # The rows travel as a stored file, not as the task's arguments; the
+        # client polls the job for the outcome. The cap is checked against the
+        # bytes storage received, not against `upload.size`, which for an
+        # in-memory upload derives from a client-supplied Content-Length.
+        try:
+            job = start_job(
+                "leads", upload, request.profile, max_bytes=MAX_UPLOAD_BYTES
             )
+        except ImportFileError as exc:
             return Response(
-                {"error": False, "message": "Leads created Successfully"},
-                status=status.HTTP_200_OK,
+                {"error": True, "errors": str(exc)},
+                status=status.HTTP_400_BAD_REQUEST,
             )
         return Response(
-            {"error": True, "errors": lead_form.errors},
-            status=status.HTTP_400_BAD_REQUEST,
+            {
+                "error": False,
+                "message": "Lead import started",
+                "job": ImportJobSerializer(job).data,
+            },
+            status=status.HTTP_200_OK,
         )
 
 
@@ -9,11 +9,11 @@ from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from drf_spectacular.utils import extend_schema, inline_serializer
 from rest_framework import serializers, status
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from common.custom_fields import apply_list_params as apply_custom_field_params
 from common.custom_fields import validate_payload as validate_custom_fields_payload
 from common.models import (
     Attachments,
@@ -23,6 +23,7 @@ from common.models import (
     Tags,
     Teams,
 )
+from common.pagination import ListPagination
 from common.permissions import HasOrgContext, is_org_admin
 from common.serializer import (
     AttachmentsSerializer,
@@ -59,7 +60,7 @@ from leads.tasks import send_email_to_assigned_user
 from leads.workflow import IRREVERSIBLE_STATUSES
 
 
-class LeadListView(APIView, LimitOffsetPagination):
+class LeadListView(APIView, ListPagination):
     model = Lead
     permission_classes = (IsAuthenticated, HasOrgContext)
 
@@ -98,6 +99,8 @@ class LeadListView(APIView, LimitOffsetPagination):
 
     def get_context_data(self, **kwargs):
         params = self.request.query_params
+        # Newest first, `-id` breaking ties. `-id` alone, a random UUID, was
+        # no order at all; this is also the order cursor pages follow.
         queryset = (
             self.model.objects.filter(org=self.request.profile.org)
             .exclude(status="converted")
@@ -106,7 +109,7 @@ class LeadListView(APIView, LimitOffsetPagination):
                 "tags",
                 "assigned_to",
             )
-        ).order_by("-id")
+        ).order_by("-created_at", "-id")
         if (
             not is_org_admin(self.request.profile)
             and not self.request.user.is_superuser
@@ -174,33 +177,23 @@ class LeadListView(APIView, LimitOffsetPagination):
             next_follow_up = date_param(params, "next_follow_up")
             if next_follow_up:
                 queryset = queryset.filter(next_follow_up=next_follow_up)
-            # Custom-field filters: ?cf_<key>=<value> -> custom_fields contains pair.
-            for raw_key, raw_value in params.items():
-                if raw_key.startswith("cf_") and raw_value:
-                    cf_key = raw_key[3:]
-                    if cf_key:
-                        queryset = queryset.filter(
-                            custom_fields__contains={cf_key: raw_value}
-                        )
+            # Custom-field filters and sorts: ?cf_<key>=, ?ordering=cf_<key>.
+            queryset = apply_custom_field_params(
+                queryset, "Lead", params, self.request.profile.org
+            )
         context = {}
         queryset_open = queryset.exclude(status="closed")
         results_leads_open = self.paginate_queryset(
             queryset_open.distinct(), self.request, view=self
         )
         open_leads = LeadSerializer(results_leads_open, many=True).data
-        if results_leads_open:
-            offset = queryset_open.filter(id__gte=results_leads_open[-1].id).count()
-            if offset == queryset_open.count():
-                offset = None
-        else:
-            offset = 0
-        context["per_page"] = 10
-        page_number = int(self.offset / 10) + 1
-        context["page_number"] = page_number
+        context["per_page"] = self.limit
+        context["page_number"] = self.page_number()
         context["open_leads"] = {
             "leads_count": self.count,
             "open_leads": open_leads,
-            "offset": offset,
+            "offset": self.next_offset,
+            "next_cursor": self.next_cursor,
         }
         context["totals"] = self.get_totals(queryset_open)
 
@@ -209,17 +202,11 @@ class LeadListView(APIView, LimitOffsetPagination):
             queryset_close.distinct(), self.request, view=self
         )
         close_leads = LeadSerializer(results_leads_close, many=True).data
-        if results_leads_close:
-            offset = queryset_close.filter(id__gte=results_leads_close[-1].id).count()
-            if offset == queryset_close.count():
-                offset = None
-        else:
-            offset = 0
-
         context["close_leads"] = {
             "leads_count": self.count,
             "close_leads": close_leads,
-            "offset": offset,
+            "offset": self.next_offset,
+            "next_cursor": self.next_cursor,
         }
         # Narrowed for a non-admin the same way the lead queryset above is.
         # This catalogue feeds the lead form's contact picker, and org scope
@@ -260,7 +247,7 @@ class LeadListView(APIView, LimitOffsetPagination):
                 name="LeadListResponse",
                 fields={
                     "per_page": serializers.IntegerField(),
-                    "page_number": serializers.IntegerField(),
+                    "page_number": serializers.IntegerField(allow_null=True),
                     "open_leads": serializers.DictField(),
                     "close_leads": serializers.DictField(),
                     "contacts": serializers.ListField(),
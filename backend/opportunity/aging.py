@@ -0,0 +1,74 @@
+"""
+When an open deal counts as rotten, in SQL.
+
+A deal is rotten once it has sat in its stage for ``expected_days *
+ROTTEN_MULTIPLIER`` whole days, ``expected_days`` coming from the org's
+``StageAgingConfig`` for that stage and from ``DEFAULT_STAGE_EXPECTED_DAYS``
+where it has none. ``Opportunity.get_aging_status()`` answers that for one
+loaded deal; ``rotten_filter`` answers it for a queryset, so the pipeline's
+``?rotten=true``, the ``stalled_count`` in its totals and the daily
+``check_stale_opportunities`` sweep all read the one definition.
+
+The threshold varies per stage and per org, so it cannot be one comparison.
+It is an OR over the open stages of ``stage = s AND stage_changed_at <=
+cutoff(s)``, the cutoffs worked out here from the org's configs in one query.
+Each arm is a range on the ``(org, stage, stage_changed_at)`` index, which is
+what lets the sweep ask for the rotten deals instead of reading every open
+one.
+"""
+
+import math
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+from opportunity.models import StageAgingConfig
+from opportunity.workflow import (
+    CLOSED_STAGES,
+    DEFAULT_STAGE_EXPECTED_DAYS,
+    ROTTEN_MULTIPLIER,
+)
+
+
+def stage_expected_days(org):
+    """``{stage: expected_days}`` for the org's open stages.
+
+    The org's ``StageAgingConfig`` rows over the defaults. Closed stages never
+    age, whatever a config row says about them.
+    """
+    expected = dict(DEFAULT_STAGE_EXPECTED_DAYS)
+    expected.update(
+        StageAgingConfig.objects.filter(org=org).values_list("stage", "expected_days")
+    )
+    for stage in CLOSED_STAGES:
+        expected.pop(stage, None)
+    return expected
+
+
+def rotten_days(expected_days):
+    """Whole days in stage at which a deal expected to take ``expected_days`` is rotten.
+
+    ``get_aging_status()`` compares whole days against ``expected_days *
+    ROTTEN_MULTIPLIER``, so a fractional product rounds up: a stage expected to
+    take 7 days goes red on day 11, not day 10.
+    """
+    return math.ceil(expected_days * ROTTEN_MULTIPLIER)
+
+
+def rotten_filter(org, now=None, expected=None):
+    """`Q` matching the org's open deals that have sat in one stage past the red line.
+
+    ``expected`` is ``stage_expected_days(org)`` for a caller that already
+    has it. A deal with no ``stage_changed_at`` is never rotten, and neither
+    is a closed one: neither can satisfy any arm.
+    """
+    now = now or timezone.now()
+    if expected is None:
+        expected = stage_expected_days(org)
+    # An empty OR would match everything; start from a clause matching nothing.
+    query = Q(pk__in=[])
+    for stage, days in expected.items():
+        cutoff = now - timedelta(days=rotten_days(days))
+        query |= Q(stage=stage, stage_changed_at__lte=cutoff)
+    return query
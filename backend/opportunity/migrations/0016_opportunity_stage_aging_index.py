@@ -0,0 +1,24 @@
+# Generated by Django 6.0.9 on 2026-10-18 10:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0010_account_rollup_columns"),
+        ("common", "0044_custom_fields_gin_indexes"),
+        ("contacts", "0014_normalized_duplicate_keys"),
+        ("opportunity", "0015_drop_orphan_deal_pipeline_tables"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="opportunity",
+            index=models.Index(
+                fields=["org", "stage", "stage_changed_at"],
+                name="opp_org_stage_aging_idx",
+            ),
+        ),
+    ]
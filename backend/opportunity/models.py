@@ -2,7 +2,7 @@ from decimal import Decimal
 
 from django.core.exceptions import ValidationError
 from django.db import models
-from django.db.models import Q, Sum
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
 from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.utils.timesince import timesince
@@ -141,6 +141,11 @@ class Opportunity(AssignableMixin, BaseModel):
             models.Index(fields=["stage"]),
             models.Index(fields=["org", "-created_at"]),
             models.Index(fields=["stage", "kanban_order"], name="opp_stage_kanban_idx"),
+            # `opportunity.aging.rotten_filter`: one range per open stage.
+            models.Index(
+                fields=["org", "stage", "stage_changed_at"],
+                name="opp_org_stage_aging_idx",
+            ),
         ]
         constraints = [
             # Probability must be 0-100
@@ -480,35 +485,15 @@ class SalesGoal(BaseModel):
         return f"{self.name} ({self.get_goal_type_display()})"
 
     def compute_progress(self):
-        """Compute current progress toward this goal from CLOSED_WON opportunities.
+        """Progress toward this goal from CLOSED_WON opportunities.
 
-        Results are cached on the instance to avoid redundant DB queries when
-        progress_percent and status are accessed in the same request.
+        Cached on the instance, so progress_percent and status read it once.
+        A page of goals should call `goal_progress` on all of them first; this
+        is the same evaluation for one.
         """
-        if hasattr(self, "_cached_progress"):
-            return self._cached_progress
-
-        opps = Opportunity.objects.filter(
-            org=self.org,
-            stage="CLOSED_WON",
-            closed_on__gte=self.period_start,
-            closed_on__lte=self.period_end,
-        )
-        if self.assigned_to:
-            opps = opps.filter(assigned_to=self.assigned_to)
-        elif self.team:
-            team_members = Profile.objects.filter(user_teams=self.team, is_active=True)
-            opps = opps.filter(assigned_to__in=team_members)
-
-        if self.goal_type == "REVENUE":
-            result = opps.aggregate(total=Coalesce(Sum("amount"), Decimal("0")))[
-                "total"
-            ]
-        else:
-            result = Decimal(str(opps.count()))
-
-        self._cached_progress = result
-        return result
+        if not hasattr(self, "_cached_progress"):
+            goal_progress([self])
+        return self._cached_progress
 
     @property
     def progress_percent(self):
@@ -542,3 +527,84 @@ class SalesGoal(BaseModel):
         if percent >= expected_pace * 0.8:
             return "at_risk"
         return "behind"
+
+
+def _goal_scope(goal):
+    if goal.assigned_to_id:
+        return "person"
+    if goal.team_id:
+        return "team"
+    return "org"
+
+
+def _won_deals(scope):
+    """The won deals a goal of ``scope`` counts, as a subquery on the goal.
+
+    Those closed inside the goal's own period: for a person's goal, assigned
+    to them; for a team's, assigned to one of its active members; for the
+    org's, all of them. Grouped on ``org``, which every row shares, so an
+    aggregate over it is one row per goal. The team match is an IN over the
+    deals its members hold, not a join on the assignees: a deal assigned to
+    two members of the same team is one deal won, not two.
+    """
+    deals = Opportunity.objects.filter(
+        org=OuterRef("org"),
+        stage="CLOSED_WON",
+        closed_on__gte=OuterRef("period_start"),
+        closed_on__lte=OuterRef("period_end"),
+    )
+    if scope == "person":
+        deals = deals.filter(assigned_to=OuterRef("assigned_to"))
+    elif scope == "team":
+        deals = deals.filter(
+            pk__in=Opportunity.objects.filter(
+                assigned_to__user_teams=OuterRef(OuterRef("team")),
+                assigned_to__is_active=True,
+            ).values("pk")
+        )
+    return deals.order_by().values("org")
+
+
+def goal_progress(goals):
+    """Progress of each goal, as ``{goal id: Decimal}``.
+
+    Revenue goals sum the won deals' ``amount``; deal goals count them. Also
+    fills each goal's `compute_progress` cache, so the serializer, the
+    leaderboard and the milestone task read what this computed instead of
+    asking again per goal: one query per kind of goal present (person, team,
+    org), at most three for any number of goals, where it used to be one or
+    two per goal.
+    """
+    goals = list(goals)
+
+    totals = {}
+    for scope in ("person", "team", "org"):
+        ids = [goal.pk for goal in goals if _goal_scope(goal) == scope]
+        if not ids:
+            continue
+        won = _won_deals(scope)
+        rows = (
+            SalesGoal.objects.filter(pk__in=ids)
+            .annotate(
+                won_amount=Coalesce(
+                    Subquery(won.annotate(total=Sum("amount")).values("total")),
+                    Decimal("0"),
+                    output_field=models.DecimalField(max_digits=12, decimal_places=2),
+                ),
+                won_count=Coalesce(
+                    Subquery(won.annotate(total=Count("pk")).values("total")), 0
+                ),
+            )
+            .values_list("pk", "won_amount", "won_count")
+        )
+        totals.update((pk, (amount, count)) for pk, amount, count in rows)
+
+    progress = {}
+    for goal in goals:
+        amount, count = totals.get(goal.pk, (0, 0))
+        if goal.goal_type == "REVENUE":
+            value = Decimal(str(amount)).quantize(Decimal("0.01"))
+        else:
+            value = Decimal(count)
+        goal._cached_progress = progress[goal.pk] = value
+    return progress
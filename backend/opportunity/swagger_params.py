@@ -7,6 +7,8 @@ The ``org`` header parameter that used to lead every list here is gone; see
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter
 
+from common.swagger_params import list_page_params
+
 organization_params = []
 
 
@@ -16,6 +18,7 @@ opportunity_list_get_params = [
     OpenApiParameter("stage", OpenApiTypes.STR, OpenApiParameter.QUERY),
     OpenApiParameter("lead_source", OpenApiTypes.STR, OpenApiParameter.QUERY),
     OpenApiParameter("tags", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    *list_page_params,
 ]
 
 opportunity_detail_get_params = [
@@ -5,13 +5,15 @@ from celery import shared_task
 from django.conf import settings
 from django.core.mail import EmailMessage
 from django.db import connection
+from django.db.models import Prefetch, prefetch_related_objects
 from django.template.loader import render_to_string
 from django.utils import timezone
 
 from common.links import frontend_url
 from common.models import Org, Profile
 from common.org_time import activate_org_timezone
-from opportunity.models import Opportunity, SalesGoal, StageAgingConfig
+from opportunity.aging import rotten_filter, stage_expected_days
+from opportunity.models import Opportunity, SalesGoal, goal_progress
 
 logger = logging.getLogger(__name__)
 
@@ -52,85 +54,129 @@ def send_email_to_assigned_user(recipients, opportunity_id, org_id):
 
 @shared_task
 def check_stale_opportunities():
-    """Daily task: find rotten deals across all orgs and send email alerts."""
-    from opportunity.workflow import (
-        CLOSED_STAGES,
-        DEFAULT_STAGE_EXPECTED_DAYS,
-        ROTTEN_MULTIPLIER,
-    )
+    """Daily task: find rotten deals across all orgs and queue their alerts.
 
+    One query per org asks for the rotten deals (``opportunity.aging``, the
+    predicate the pipeline's ``?rotten=true`` uses) rather than reading every
+    open deal and measuring it here. The sweep sends nothing itself: each
+    recipient's digest is its own ``send_stale_deals_digest`` task.
+    """
     now = timezone.now()
     orgs = Org.objects.filter(is_active=True)
 
-    for org in orgs:
-        try:
-            _set_rls_context_safe(str(org.id))
+    try:
+        for org in orgs:
+            try:
+                _set_rls_context_safe(str(org.id))
 
-            aging_configs = {
-                c.stage: c for c in StageAgingConfig.objects.filter(org=org)
-            }
+                expected = stage_expected_days(org)
+                rotten = (
+                    Opportunity.objects.filter(org=org, is_active=True)
+                    .filter(rotten_filter(org, now, expected))
+                    .only("id", "name", "stage", "stage_changed_at")
+                    .order_by("stage_changed_at")
+                )
+                stale_opps = [
+                    (opp, (now - opp.stage_changed_at).days, expected[opp.stage])
+                    for opp in rotten
+                ]
 
-            open_opps = (
-                Opportunity.objects.filter(org=org, is_active=True)
-                .exclude(stage__in=CLOSED_STAGES)
-                .select_related("org")
-            )
+                if stale_opps:
+                    send_stale_deals_alert(org, stale_opps)
+            except Exception:
+                logger.exception("Error processing stale deals for org %s", org.id)
+    finally:
+        # The sweep walks every org; the last one's RLS context must not stay
+        # on the worker's connection.
+        from common.tasks import clear_rls_context
 
-            stale_opps = []
-            for opp in open_opps:
-                if not opp.stage_changed_at:
-                    continue
-                config = aging_configs.get(opp.stage)
-                expected = (
-                    config.expected_days
-                    if config
-                    else DEFAULT_STAGE_EXPECTED_DAYS.get(opp.stage)
-                )
-                if expected is None:
-                    continue
-                days = (now - opp.stage_changed_at).days
-                if days >= expected * ROTTEN_MULTIPLIER:
-                    stale_opps.append((opp, days, expected))
-
-            if stale_opps:
-                send_stale_deals_alert(org, stale_opps)
-        except Exception:
-            logger.exception("Error processing stale deals for org %s", org.id)
+        clear_rls_context()
 
 
 def send_stale_deals_alert(org, stale_opps):
-    """Send per-user email alerts for rotten deals."""
-    # Pre-fetch org admins for unassigned deals
-    org_admins = list(Profile.objects.filter(org=org, role="ADMIN", is_active=True))
+    """Queue one stale-deal digest per recipient.
+
+    ``stale_opps`` is ``[(opp, days_in_stage, expected_days), ...]``. A deal
+    goes to its active assignees, or to the org's admins if it has none. The
+    assignees of every deal come back in one prefetch, and each recipient's
+    email is its own task, so a slow mail server holds up one recipient
+    rather than the sweep.
+    """
+    prefetch_related_objects(
+        [opp for opp, _, _ in stale_opps],
+        Prefetch(
+            "assigned_to",
+            queryset=Profile.objects.filter(is_active=True),
+            to_attr="active_assignees",
+        ),
+    )
+    org_admins = None
 
-    # Group by assigned users
+    # Group by recipient
     user_deals = defaultdict(list)
     for opp, days, expected in stale_opps:
-        assigned = list(opp.assigned_to.filter(is_active=True))
-        if assigned:
-            for profile in assigned:
-                user_deals[profile].append((opp, days, expected))
-        else:
+        recipients = opp.active_assignees
+        if not recipients:
             # No one assigned - alert org admins
-            for admin in org_admins:
-                user_deals[admin].append((opp, days, expected))
+            if org_admins is None:
+                org_admins = list(
+                    Profile.objects.filter(org=org, role="ADMIN", is_active=True)
+                )
+            recipients = org_admins
+        for profile in recipients:
+            user_deals[profile.id].append([str(opp.id), days, expected])
+
+    for profile_id, deals in user_deals.items():
+        try:
+            send_stale_deals_digest.delay(str(profile_id), deals, str(org.id))
+        except Exception:
+            logger.exception(
+                "Failed to enqueue stale deals alert for profile=%s", profile_id
+            )
+
+
+@shared_task
+def send_stale_deals_digest(profile_id, deals, org_id):
+    """Email one recipient the stale deals a sweep found for them.
+
+    ``deals`` is ``[[deal_id, days_in_stage, expected_days], ...]`` as the
+    sweep measured them. A deal deleted since is left out.
+    """
+    _set_rls_context_safe(org_id)
+    try:
+        profile = (
+            Profile.objects.select_related("user")
+            .filter(id=profile_id, is_active=True)
+            .first()
+        )
+        if profile is None:
+            return
+        opps = {
+            str(opp.id): opp
+            for opp in Opportunity.objects.filter(
+                id__in=[deal_id for deal_id, _, _ in deals], is_active=True
+            ).only("id", "name", "stage")
+        }
+        rows = [
+            {
+                "name": opps[deal_id].name,
+                "stage": opps[deal_id].get_stage_display(),
+                "days_in_stage": days,
+                "expected_days": expected,
+            }
+            for deal_id, days, expected in deals
+            if deal_id in opps
+        ]
+        if not rows:
+            return
 
-    for profile, deals in user_deals.items():
         context = {
             "user": profile.user,
-            "deals": [
-                {
-                    "name": opp.name,
-                    "stage": opp.get_stage_display(),
-                    "days_in_stage": days,
-                    "expected_days": expected,
-                }
-                for opp, days, expected in deals
-            ],
+            "deals": rows,
             "url": frontend_url("/pipeline?rotten=true"),
-            "deal_count": len(deals),
+            "deal_count": len(rows),
         }
-        subject = f"[BottleCRM] {len(deals)} stale deal{'s' if len(deals) > 1 else ''} need attention"
+        subject = f"[BottleCRM] {len(rows)} stale deal{'s' if len(rows) > 1 else ''} need attention"
         html_content = render_to_string(
             "opportunity/stale_deals_alert.html", context=context
         )
@@ -147,6 +193,10 @@ def send_stale_deals_alert(org, stale_opps):
             logger.exception(
                 "Failed to send stale deals alert to %s", profile.user.email
             )
+    finally:
+        from common.tasks import clear_rls_context
+
+        clear_rls_context()
 
 
 @shared_task
@@ -163,15 +213,18 @@ def check_goal_milestones():
                 activate_org_timezone(org)
                 today = timezone.localdate()
 
-                goals = SalesGoal.objects.filter(
-                    org=org,
-                    is_active=True,
-                    period_start__lte=today,
-                    period_end__gte=today,
+                goals = list(
+                    SalesGoal.objects.filter(
+                        org=org,
+                        is_active=True,
+                        period_start__lte=today,
+                        period_end__gte=today,
+                    )
                 )
+                progress_by_goal = goal_progress(goals)
 
                 for goal in goals:
-                    progress_value = goal.compute_progress()
+                    progress_value = progress_by_goal[goal.pk]
                     if goal.target_value and goal.target_value != 0:
                         percent = min(
                             int(progress_value / goal.target_value * 100), 100
@@ -356,7 +356,7 @@ class TestDealListTotals:
 @pytest.mark.django_db
 class TestStalledCount:
     """`stalled_count` and a red aging pill have to mean the same thing. Both
-    come from `stalled_filter()`."""
+    come from `rotten_filter()` (opportunity/aging.py)."""
 
     def _aged(self, org, name, stage, days):
         from datetime import timedelta
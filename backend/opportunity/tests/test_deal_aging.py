@@ -291,3 +291,77 @@ class TestStaleDealsTask:
 
         # Alert should not be called since no deals are stale
         mock_alert.assert_not_called()
+
+    def _aged(self, org, user, name, stage, days):
+        return Opportunity.objects.create(
+            name=name,
+            stage=stage,
+            org=org,
+            created_by=user,
+            stage_changed_at=timezone.now() - timedelta(days=days),
+        )
+
+    def test_a_fractional_threshold_rounds_up_like_the_pill(
+        self, admin_client, org_a, admin_user
+    ):
+        # 7 * 1.5 = 10.5: red on day 11, not day 10, in SQL as on the row.
+        StageAgingConfig.objects.create(org=org_a, stage="PROPOSAL", expected_days=7)
+        day_10 = self._aged(org_a, admin_user, "Day 10", "PROPOSAL", days=10)
+        day_11 = self._aged(org_a, admin_user, "Day 11", "PROPOSAL", days=11)
+        assert (day_10.get_aging_status(), day_11.get_aging_status()) == (
+            "yellow",
+            "red",
+        )
+
+        response = admin_client.get("/api/opportunities/?rotten=true")
+        assert [o["name"] for o in response.data["opportunities"]] == ["Day 11"]
+
+        from opportunity.tasks import check_stale_opportunities
+
+        with patch("opportunity.tasks.send_stale_deals_alert") as mock_alert:
+            check_stale_opportunities()
+        assert [(o.name, d, e) for o, d, e in mock_alert.call_args[0][1]] == [
+            ("Day 11", 11, 7)
+        ]
+
+    def test_one_digest_is_queued_per_recipient(
+        self, org_a, admin_user, admin_profile, user_profile
+    ):
+        shared = self._aged(org_a, admin_user, "Shared", "PROSPECTING", days=30)
+        shared.assigned_to.add(admin_profile, user_profile)
+        self._aged(org_a, admin_user, "Nobody's", "NEGOTIATION", days=30)
+
+        from opportunity.tasks import check_stale_opportunities
+
+        with patch("opportunity.tasks.send_stale_deals_digest.delay") as queued:
+            check_stale_opportunities()
+
+        digests = {
+            profile_id: sorted(deal_id for deal_id, _, _ in deals)
+            for profile_id, deals, org_id in (c.args for c in queued.call_args_list)
+        }
+        nobodys = Opportunity.objects.get(name="Nobody's")
+        # The unassigned deal goes to the org's admins.
+        assert digests == {
+            str(admin_profile.id): sorted([str(shared.id), str(nobodys.id)]),
+            str(user_profile.id): [str(shared.id)],
+        }
+
+    def test_a_deal_deleted_before_the_digest_is_left_out(
+        self, org_a, admin_user, admin_profile, mailoutbox
+    ):
+        kept = self._aged(org_a, admin_user, "Kept", "PROSPECTING", days=30)
+        deleted = self._aged(org_a, admin_user, "Deleted", "PROSPECTING", days=30)
+        deleted.is_active = False
+        deleted.save()
+
+        from opportunity.tasks import send_stale_deals_digest
+
+        send_stale_deals_digest(
+            str(admin_profile.id),
+            [[str(kept.id), 30, 14], [str(deleted.id), 30, 14]],
+            str(org_a.id),
+        )
+        (message,) = mailoutbox
+        assert "Kept" in message.body
+        assert "Deleted" not in message.body
@@ -687,3 +687,76 @@ class TestGoalMilestoneTask:
         # Already had 50% notified, should not re-send
         assert goal.milestone_50_notified is True
         assert mock_send.call_count == 0
+
+
+class TestBatchedGoalProgress:
+    """goal_progress() answers a page of goals in one query per scope."""
+
+    def test_matches_each_goals_own_progress(
+        self,
+        goal_revenue,
+        goal_deals,
+        team_goal,
+        team_a,
+        org_a,
+        admin_user,
+        admin_profile,
+        user_profile,
+    ):
+        from opportunity.models import goal_progress
+
+        team_a.users.add(admin_profile)
+        for amount, profile in ((1000, admin_profile), (250, user_profile)):
+            opp = _create_won_opportunity(org_a, admin_user, amount)
+            opp.assigned_to.add(profile)
+
+        goals = [goal_revenue, goal_deals, team_goal]
+        progress = goal_progress(goals)
+        assert progress == {
+            goal_revenue.pk: Decimal("1000"),
+            goal_deals.pk: Decimal("1"),
+            team_goal.pk: Decimal("1000"),
+        }
+        # Each goal keeps its value, so serializing it costs no query.
+        assert all(goal._cached_progress == progress[goal.pk] for goal in goals)
+
+    def test_a_team_deal_with_two_members_counts_once(
+        self, team_goal, team_a, org_a, admin_user, admin_profile, user_profile
+    ):
+        team_a.users.add(admin_profile, user_profile)
+        opp = _create_won_opportunity(org_a, admin_user, 700)
+        opp.assigned_to.add(admin_profile, user_profile)
+
+        assert team_goal.compute_progress() == Decimal("700")
+
+    def test_leaderboard_queries_do_not_grow_with_goals(
+        self, admin_client, org_a, admin_profile
+    ):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        def _queries():
+            with CaptureQueriesContext(connection) as ctx:
+                response = admin_client.get("/api/opportunities/goals/leaderboard/")
+            assert response.status_code == 200
+            return len(ctx.captured_queries)
+
+        start, end = TestLeaderboardAPI()._current_month()
+
+        def _add_goal(name):
+            SalesGoal.objects.create(
+                name=name,
+                goal_type="REVENUE",
+                target_value=Decimal("100"),
+                period_type="MONTHLY",
+                period_start=start,
+                period_end=end,
+                assigned_to=admin_profile,
+                org=org_a,
+            )
+
+        _add_goal("First")
+        baseline = _queries()
+        for i in range(5):
+            _add_goal(f"Goal {i}")
+        assert _queries() == baseline
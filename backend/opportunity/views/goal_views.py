@@ -8,7 +8,7 @@ from rest_framework.views import APIView
 
 from common.permissions import HasOrgContext, is_org_admin
 from common.validators import uuid_param
-from opportunity.models import SalesGoal
+from opportunity.models import SalesGoal, goal_progress
 from opportunity.serializer import SalesGoalCreateSerializer, SalesGoalSerializer
 
 
@@ -68,6 +68,9 @@ class SalesGoalListView(APIView, LimitOffsetPagination):
     def get(self, request, *args, **kwargs):
         queryset = self.get_queryset(request)
         results = self.paginate_queryset(queryset, request, view=self)
+        # The page's progress in a few grouped queries; the serializer then
+        # reads each goal's cached value rather than querying per row.
+        goal_progress(results)
         serializer = SalesGoalSerializer(results, many=True)
 
         total_count = self.count
@@ -215,10 +218,11 @@ class SalesGoalLeaderboardView(APIView):
         if not _sees_every_goal(request):
             goals = goals.filter(_visible_to(request.profile)).distinct()
 
+        goals = list(goals)
+        progress_by_goal = goal_progress(goals)
         leaderboard = []
         for goal in goals:
-            # compute_progress() results are cached on the instance
-            progress = goal.compute_progress()
+            progress = progress_by_goal[goal.pk]
             if goal.target_value and goal.target_value != 0:
                 percent = min(
                     int(float(progress) / float(goal.target_value) * 100), 100
@@ -1,20 +1,18 @@
 import json
-from datetime import timedelta
 from decimal import Decimal
 
 from django.contrib.contenttypes.models import ContentType
 from django.db.models import DecimalField, F, Q, Sum
 from django.db.models.functions import Coalesce
-from django.utils import timezone
 from drf_spectacular.utils import extend_schema, inline_serializer
 from rest_framework import serializers, status
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from accounts.models import Account
 from accounts.serializer import AccountSerializer, TagsSerializer
+from common.custom_fields import apply_list_params as apply_custom_field_params
 from common.custom_fields import validate_payload as validate_custom_fields_payload
 from common.models import (
     Attachments,
@@ -24,6 +22,7 @@ from common.models import (
     Tags,
     Teams,
 )
+from common.pagination import ListPagination
 from common.permissions import HasOrgContext, is_org_admin
 from common.serializer import (
     AttachmentsSerializer,
@@ -42,6 +41,7 @@ from common.validators import (
 from contacts.models import Contact
 from contacts.serializer import ContactSerializer
 from opportunity import access, swagger_params
+from opportunity.aging import rotten_filter
 from opportunity.models import Opportunity, StageAgingConfig
 from opportunity.serializer import (
     OpportunityCreateSerializer,
@@ -50,40 +50,10 @@ from opportunity.serializer import (
     OpportunitySerializer,
 )
 from opportunity.tasks import send_email_to_assigned_user
-from opportunity.workflow import (
-    CLOSED_STAGES,
-    DEFAULT_STAGE_EXPECTED_DAYS,
-    ROTTEN_MULTIPLIER,
-)
+from opportunity.workflow import CLOSED_STAGES
 
 
-def stalled_filter(org):
-    """`Q` matching open deals that have sat in one stage past the red line.
-
-    This is the *same* definition `Opportunity.get_aging_status()` uses to
-    return "red": per-stage `expected_days` from the org's `StageAgingConfig`
-    (falling back to `DEFAULT_STAGE_EXPECTED_DAYS`), multiplied by
-    `ROTTEN_MULTIPLIER`.
-
-    It lives here, once, because two callers need it, the `?rotten=true`
-    filter and the `stalled` figure in the list totals, and a header that
-    counts stalled deals differently from the pills on the rows underneath it
-    is worse than no header. Note this cannot be an ORM annotation shared with
-    the serializer: the threshold varies per stage and per org, so it has to be
-    assembled as an OR over the stages.
-    """
-    aging_configs = {c.stage: c for c in StageAgingConfig.objects.filter(org=org)}
-    now = timezone.now()
-    query = Q()
-    for stage, default_days in DEFAULT_STAGE_EXPECTED_DAYS.items():
-        config = aging_configs.get(stage)
-        expected = config.expected_days if config else default_days
-        threshold = now - timedelta(days=int(expected * ROTTEN_MULTIPLIER))
-        query |= Q(stage=stage, stage_changed_at__lte=threshold)
-    return query
-
-
-class OpportunityListView(APIView, LimitOffsetPagination):
+class OpportunityListView(APIView, ListPagination):
     permission_classes = (IsAuthenticated, HasOrgContext)
     model = Opportunity
 
@@ -118,18 +88,20 @@ class OpportunityListView(APIView, LimitOffsetPagination):
             "amount_sum": aggregates["amount_sum"],
             "weighted_sum": aggregates["weighted_sum"],
             # Closed deals are never stalled; `get_aging_status()` returns
-            # green for them, so the count excludes them regardless of whether
-            # the caller asked for open deals only.
-            "stalled_count": totals_queryset.exclude(stage__in=CLOSED_STAGES)
-            .filter(stage_changed_at__isnull=False)
-            .filter(stalled_filter(self.request.profile.org))
-            .count(),
+            # green for them, and `rotten_filter` has no arm for a closed
+            # stage, so the count excludes them regardless of whether the
+            # caller asked for open deals only.
+            "stalled_count": totals_queryset.filter(
+                rotten_filter(self.request.profile.org)
+            ).count(),
         }
 
     def get_context_data(self, **kwargs):
         params = self.request.query_params
+        # Newest first, `-id` breaking ties. `-id` alone, a random UUID, was
+        # no order at all; this is also the order cursor pages follow.
         queryset = self.model.objects.filter(org=self.request.profile.org).order_by(
-            "-id"
+            "-created_at", "-id"
         )
         accounts = Account.objects.filter(org=self.request.profile.org)
         contacts = Contact.objects.filter(org=self.request.profile.org)
@@ -188,14 +160,10 @@ class OpportunityListView(APIView, LimitOffsetPagination):
             amount_lte = decimal_param(params, "amount__lte")
             if amount_lte:
                 queryset = queryset.filter(amount__lte=amount_lte)
-            # Custom-field filters: ?cf_<key>=<value> -> custom_fields contains pair.
-            for raw_key, raw_value in params.items():
-                if raw_key.startswith("cf_") and raw_value:
-                    cf_key = raw_key[3:]
-                    if cf_key:
-                        queryset = queryset.filter(
-                            custom_fields__contains={cf_key: raw_value}
-                        )
+            # Custom-field filters and sorts: ?cf_<key>=, ?ordering=cf_<key>.
+            queryset = apply_custom_field_params(
+                queryset, "Opportunity", params, self.request.profile.org
+            )
 
             # `?open=true`: everything that is not Closed Won or Closed Lost.
             # The existing `stage` filter is a `contains` match, so it cannot
@@ -206,11 +174,9 @@ class OpportunityListView(APIView, LimitOffsetPagination):
                 queryset = queryset.exclude(stage__in=CLOSED_STAGES)
 
             if params.get("rotten") == "true":
-                # Filter for rotten deals at DB level using stage-specific thresholds
-                queryset = queryset.exclude(stage__in=CLOSED_STAGES).filter(
-                    stage_changed_at__isnull=False
-                )
-                queryset = queryset.filter(stalled_filter(self.request.profile.org))
+                # The same predicate as `stalled_count` and the daily
+                # stale-deal sweep: see opportunity/aging.py.
+                queryset = queryset.filter(rotten_filter(self.request.profile.org))
 
         context = {}
         context["totals"] = self.get_totals(queryset)
@@ -223,19 +189,13 @@ class OpportunityListView(APIView, LimitOffsetPagination):
         opportunities = OpportunitySerializer(
             results_opportunities, many=True, context={"aging_configs": aging_configs}
         ).data
-        if results_opportunities:
-            offset = queryset.filter(id__gte=results_opportunities[-1].id).count()
-            if offset == queryset.count():
-                offset = None
-        else:
-            offset = 0
-        context["per_page"] = 10
-        page_number = int(self.offset / 10) + 1
-        context["page_number"] = page_number
+        context["per_page"] = self.limit
+        context["page_number"] = self.page_number()
         context.update(
             {
                 "opportunities_count": self.count,
-                "offset": offset,
+                "offset": self.next_offset,
+                "next_cursor": self.next_cursor,
             }
         )
         context["opportunities"] = opportunities
@@ -258,7 +218,7 @@ class OpportunityListView(APIView, LimitOffsetPagination):
             200: inline_serializer(
                 name="OpportunityListResponse",
                 fields={
-                    "opportunities_count": serializers.IntegerField(),
+                    "opportunities_count": serializers.IntegerField(allow_null=True),
                     "totals": inline_serializer(
                         name="OpportunityListTotals",
                         fields={
@@ -273,8 +233,9 @@ class OpportunityListView(APIView, LimitOffsetPagination):
                         },
                     ),
                     "offset": serializers.IntegerField(allow_null=True),
+                    "next_cursor": serializers.CharField(allow_null=True),
                     "per_page": serializers.IntegerField(),
-                    "page_number": serializers.IntegerField(),
+                    "page_number": serializers.IntegerField(allow_null=True),
                     "opportunities": OpportunitySerializer(many=True),
                     "accounts_list": AccountSerializer(many=True),
                     "contacts_list": ContactSerializer(many=True),
@@ -7,10 +7,13 @@ The ``org`` header parameter that used to lead every list here is gone; see
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter
 
+from common.swagger_params import list_page_params
+
 organization_params = []
 
 task_list_get_params = [
     OpenApiParameter("title", OpenApiTypes.STR, OpenApiParameter.QUERY),
     OpenApiParameter("status", OpenApiTypes.STR, OpenApiParameter.QUERY),
     OpenApiParameter("priority", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    *list_page_params,
 ]
@@ -612,7 +612,7 @@ class TestTheListPayload:
         for i in range(12):
             _task(org_a, admin_user, title=f"Task {i}")
         admin_client.get("/api/tasks/?limit=12&slim=true")
-        with django_assert_num_queries(12):
+        with django_assert_num_queries(10):
             admin_client.get("/api/tasks/?limit=12&slim=true")
 
     def test_twelve_rows_cost_the_same_as_two(
@@ -627,12 +627,12 @@ class TestTheListPayload:
         for i in range(2):
             _task(org_a, admin_user, title=f"Small {i}")
         admin_client.get("/api/tasks/?slim=true")
-        with django_assert_num_queries(12):
+        with django_assert_num_queries(10):
             admin_client.get("/api/tasks/?slim=true")
 
         for i in range(20):
             _task(org_a, admin_user, title=f"Big {i}")
-        with django_assert_num_queries(12):
+        with django_assert_num_queries(10):
             admin_client.get("/api/tasks/?limit=25&slim=true")
 
 
@@ -8,13 +8,13 @@ from django.http import Http404
 from django.utils import timezone
 from drf_spectacular.utils import extend_schema, inline_serializer
 from rest_framework import serializers, status
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from accounts.models import Account
 from accounts.serializer import AccountSerializer
+from common.custom_fields import apply_list_params as apply_custom_field_params
 from common.custom_fields import validate_payload as validate_custom_fields_payload
 from common.models import (
     Attachments,
@@ -24,6 +24,7 @@ from common.models import (
     Tags,
     Teams,
 )
+from common.pagination import ListPagination
 from common.permissions import HasOrgContext
 from common.serializer import (
     AttachmentsSerializer,
@@ -74,7 +75,7 @@ def _model_errors(exc):
     )
 
 
-class TaskListView(APIView, LimitOffsetPagination):
+class TaskListView(APIView, ListPagination):
     model = Task
     permission_classes = (IsAuthenticated, HasOrgContext)
 
@@ -84,11 +85,13 @@ class TaskListView(APIView, LimitOffsetPagination):
         # to be spelled out here and spelled differently there, which is how a
         # member came to have tasks in their list that answered 403, or, once
         # the creator clause is live, tasks they created and could not open.
+        # Newest first, `-id` breaking ties: `-id` alone, a random UUID, was no
+        # order at all; this is also the order cursor pages follow.
         queryset = (
             visible_tasks_qs(self.request.profile)
             .select_related("account", "opportunity", "case", "lead")
             .prefetch_related("assigned_to__user", "tags")
-            .order_by("-id")
+            .order_by("-created_at", "-id")
         )
 
         if params:
@@ -129,13 +132,10 @@ class TaskListView(APIView, LimitOffsetPagination):
                 related_id = uuid_param(params, related)
                 if related_id:
                     queryset = queryset.filter(**{f"{related}_id": related_id})
-            for raw_key, raw_value in params.items():
-                if raw_key.startswith("cf_") and raw_value:
-                    cf_key = raw_key[3:]
-                    if cf_key:
-                        queryset = queryset.filter(
-                            custom_fields__contains={cf_key: raw_value}
-                        )
+            # Custom-field filters and sorts: ?cf_<key>=, ?ordering=cf_<key>.
+            queryset = apply_custom_field_params(
+                queryset, "Task", params, self.request.profile.org
+            )
         context = {}
         queryset = queryset.distinct()
 
@@ -181,16 +181,11 @@ class TaskListView(APIView, LimitOffsetPagination):
         # rows and renders FKs as {id, name}. Detail view still uses
         # TaskSerializer for the full nested payload.
         tasks = TaskListSerializer(results_tasks, many=True).data
-        if results_tasks:
-            offset = queryset.filter(id__gte=results_tasks[-1].id).count()
-            if offset == queryset.count():
-                offset = None
-        else:
-            offset = 0
         context.update(
             {
                 "tasks_count": self.count,
-                "offset": offset,
+                "offset": self.next_offset,
+                "next_cursor": self.next_cursor,
                 "tasks": tasks,
             }
         )
@@ -226,8 +221,9 @@ class TaskListView(APIView, LimitOffsetPagination):
             200: inline_serializer(
                 name="TaskListResponse",
                 fields={
-                    "tasks_count": serializers.IntegerField(),
+                    "tasks_count": serializers.IntegerField(allow_null=True),
                     "offset": serializers.IntegerField(allow_null=True),
+                    "next_cursor": serializers.CharField(allow_null=True),
                     "tasks": TaskListSerializer(many=True),
                     "totals": serializers.DictField(),
                     "status": serializers.ListField(),